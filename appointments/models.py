@@ -19,6 +19,8 @@ class Appointment(ScheduledTimedEvent):
         verbose_name = "Appointment"
         verbose_name_plural = "Appointments"
 
+    denormalized_sources = ScheduledTimedEvent.denormalized_sources + ("patient",)
+
     def __str__(self):
         return f"Appointment with Dr. {self.professional.email} for {self.patient.email} on {self.scheduled_to}"
 
@@ -26,3 +28,6 @@ class Appointment(ScheduledTimedEvent):
         """Ensure event_type is always 'appointment'."""
         self.event_type = "appointment"
         super().save(*args, **kwargs)
+
+    def get_event_patient_id(self):
+        return self.patient_id
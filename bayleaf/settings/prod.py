@@ -66,6 +66,7 @@ INSTALLED_APPS = [
     "medications",
     "careplans",
     "documents",
+    "webhooks",
 ]
 
 MIDDLEWARE = [
@@ -238,6 +239,71 @@ EMAIL_HOST_PASSWORD = env("EMAIL_HOST_PASSWORD", "")
 EMAIL_USE_TLS = env("EMAIL_USE_TLS", "1") == "1"
 DEFAULT_FROM_EMAIL = env("DEFAULT_FROM_EMAIL", "no-reply@bayleaf.local")
 
+# ------------------------------------------------------------
+# Lab critical value alerts (dispatch_critical_alerts)
+# ------------------------------------------------------------
+LAB_CRITICAL_ALERT_CHANNELS = list_from_env(
+    "LAB_CRITICAL_ALERT_CHANNELS", "lab.critical_alerts.channels.EmailChannel"
+)
+
+# ------------------------------------------------------------
+# Lab autoverification (autoverify_exam_requests)
+# ------------------------------------------------------------
+LAB_AUTOVERIFICATION_RULES = list_from_env(
+    "LAB_AUTOVERIFICATION_RULES", "complete_panel,all_fields_normal,delta_check"
+)
+LAB_AUTOVERIFICATION_DELTA_PERCENT = float(env("LAB_AUTOVERIFICATION_DELTA_PERCENT", "50"))
+LAB_AUTOVERIFICATION_DELTA_DAYS = int(env("LAB_AUTOVERIFICATION_DELTA_DAYS", "365"))
+
+# ------------------------------------------------------------
+# Lab quality control (Westgard rules)
+# ------------------------------------------------------------
+LAB_QC_REJECTION_RULES = list_from_env("LAB_QC_REJECTION_RULES", "1_3s,2_2s,R_4s,4_1s,10_x")
+LAB_QC_MIN_RESULTS = int(env("LAB_QC_MIN_RESULTS", "20"))
+
+# ------------------------------------------------------------
+# Lab accession numbers
+# ------------------------------------------------------------
+LAB_ACCESSION_REQUEST_PREFIX = env("LAB_ACCESSION_REQUEST_PREFIX", "R")
+LAB_ACCESSION_SAMPLE_PREFIX = env("LAB_ACCESSION_SAMPLE_PREFIX", "S")
+LAB_ACCESSION_BLOCK_SIZE = int(env("LAB_ACCESSION_BLOCK_SIZE", "20"))
+LAB_ACCESSION_KEEP_DAYS = int(env("LAB_ACCESSION_KEEP_DAYS", "7"))
+
+# ------------------------------------------------------------
+# Lab metrics (Prometheus scrape at /api/lab/metrics/)
+# ------------------------------------------------------------
+# Without a token, only admin users can read the metrics.
+LAB_METRICS_TOKEN = env("LAB_METRICS_TOKEN", "")
+LAB_METRICS_FLUSH_SECONDS = float(env("LAB_METRICS_FLUSH_SECONDS", "10"))
+
+# ------------------------------------------------------------
+# Recurring events (rolling materialization window)
+# ------------------------------------------------------------
+EVENTS_MATERIALIZATION_DAYS = int(env("EVENTS_MATERIALIZATION_DAYS", "14"))
+
+# ------------------------------------------------------------
+# Event archive (terminal events older than this move to cold storage)
+# ------------------------------------------------------------
+EVENTS_ARCHIVE_AFTER_DAYS = int(env("EVENTS_ARCHIVE_AFTER_DAYS", "365"))
+
+# ------------------------------------------------------------
+# Webhooks (outbox delivery to integrations)
+# ------------------------------------------------------------
+WEBHOOKS_TIMEOUT_SECONDS = float(env("WEBHOOKS_TIMEOUT_SECONDS", "10"))
+WEBHOOKS_RETENTION_DAYS = int(env("WEBHOOKS_RETENTION_DAYS", "7"))
+
+# ------------------------------------------------------------
+# Event reminders (minutes before an event starts, by event_type)
+# ------------------------------------------------------------
+EVENTS_REMINDER_LEADS = {
+    "takemedicationevent": [int(minutes) for minutes in list_from_env("EVENTS_REMINDER_MEDICATION_LEADS", "15")],
+    "appointment": [int(minutes) for minutes in list_from_env("EVENTS_REMINDER_APPOINTMENT_LEADS", "1440,60")],
+}
+EVENTS_REMINDER_LOOKAHEAD_SECONDS = int(env("EVENTS_REMINDER_LOOKAHEAD_SECONDS", "300"))
+EVENTS_REMINDER_CHANNELS = list_from_env(
+    "EVENTS_REMINDER_CHANNELS", "events.reminders.channels.EmailChannel"
+)
+
 # ------------------------------------------------------------
 # Logging
 # ------------------------------------------------------------
@@ -47,6 +47,8 @@ urlpatterns = [
     path("api/timeline/", include("timeline.urls")),
     path('api/careplans/', include('careplans.urls')),
     path("api/documents/", include("documents.urls")),
+    path("api/events/", include("events.urls")),
+    path("api/webhooks/", include("webhooks.urls")),
 ]
 
 if settings.DEBUG:
@@ -6,7 +6,7 @@ from .models import (
     CarePlanTemplate, GoalTemplate, ActionTemplate,
     CarePlan, CarePlanGoal, CarePlanAction,
     MedicationActionDetail, AppointmentActionDetail,
-    CarePlanActivityEvent, CarePlanReview
+    CarePlanActivityEvent, CarePlanReview, CarePlanEnrollment
 )
 
 # ============================================================
@@ -159,3 +159,21 @@ class CarePlanReviewAdmin(admin.ModelAdmin):
     list_filter = ["outcome", "reviewed_by"]
     search_fields = ["summary"]
     readonly_fields = ["review_date"]
+
+
+# ============================================================
+# ENROLLMENTS ADMIN
+# ============================================================
+
+@admin.register(CarePlanEnrollment)
+class CarePlanEnrollmentAdmin(admin.ModelAdmin):
+    list_display = [
+        "id", "template", "owner", "status",
+        "total", "enrolled", "skipped", "events_created",
+        "created_at", "finished_at",
+    ]
+    list_filter = ["status", "template"]
+    readonly_fields = [
+        "total", "enrolled", "skipped", "events_created",
+        "error", "started_at", "finished_at",
+    ]
@@ -0,0 +1,92 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from careplans.models import CarePlanEnrollment, CarePlanTemplate
+from careplans.services.enrollment import claim_enrollment, run_enrollment
+from professionals.models import Professional
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply care plan templates to many patients: run queued enrollments, "
+        "or enroll directly with --template and --patients/--filter."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--template", type=int, help="Template id to enroll patients in directly.")
+        parser.add_argument("--patients", default="", help="Comma-separated patient UUIDs.")
+        parser.add_argument("--filter", default="", help='Patient filter as JSON, e.g. {"reason_code": "E11"}.')
+        parser.add_argument(
+            "--medications",
+            default="",
+            help='{"<action template id>": {"medication", "dosage_unit", "dosage_amount", "frequency_hours", "total_unit_amount"}} as JSON.',
+        )
+        parser.add_argument("--owner", help="Email of the professional owning the plans.")
+        parser.add_argument("--start-date", help="Plan start date (YYYY-MM-DD); defaults to today.")
+        parser.add_argument("--chunk-size", type=int, default=500, help="Patients written per transaction.")
+        parser.add_argument("--workers", type=int, default=4, help="Chunks written in parallel.")
+        parser.add_argument("--interval", type=float, default=10, help="Seconds to sleep when no enrollment is queued.")
+        parser.add_argument("--once", action="store_true", help="Run queued enrollments once and exit.")
+
+    def handle(self, *args, **options):
+        chunk_size, workers = max(options["chunk_size"], 1), max(options["workers"], 1)
+
+        if options["template"] is not None:
+            enrollment = run_enrollment(
+                self._direct_enrollment(options), chunk_size=chunk_size, workers=workers, progress=self._progress
+            )
+            self._report(enrollment)
+            if enrollment.error:
+                raise CommandError(enrollment.error)
+            self.stdout.write(self.style.SUCCESS("Enrollment finished."))
+            return
+
+        while True:
+            enrollment = claim_enrollment()
+            if enrollment is not None:
+                self._report(run_enrollment(enrollment, chunk_size=chunk_size, workers=workers, progress=self._progress))
+                continue
+            if options["once"]:
+                break
+            time.sleep(max(options["interval"], 0))
+
+        self.stdout.write(self.style.SUCCESS("Queued enrollments finished."))
+
+    def _direct_enrollment(self, options) -> CarePlanEnrollment:
+        template = CarePlanTemplate.objects.filter(pk=options["template"]).first()
+        if template is None:
+            raise CommandError(f"Template {options['template']} not found.")
+        owner = None
+        if options["owner"]:
+            owner = Professional.objects.filter(email=options["owner"]).first()
+            if owner is None:
+                raise CommandError(f"Professional {options['owner']} not found.")
+        try:
+            patient_filter = json.loads(options["filter"]) if options["filter"] else {}
+            medications = json.loads(options["medications"]) if options["medications"] else {}
+        except json.JSONDecodeError as exc:
+            raise CommandError(f"Invalid JSON: {exc}") from exc
+        start_date = parse_date(options["start_date"]) if options["start_date"] else None
+        if options["start_date"] and start_date is None:
+            raise CommandError("--start-date must be YYYY-MM-DD.")
+        return CarePlanEnrollment.objects.create(
+            template=template,
+            owner=owner,
+            start_date=start_date,
+            patient_ids=[pid.strip() for pid in options["patients"].split(",") if pid.strip()],
+            patient_filter=patient_filter,
+            medications=medications,
+        )
+
+    def _progress(self, enrollment):
+        done = enrollment.enrolled + enrollment.skipped
+        self.stdout.write(f"Enrollment #{enrollment.pk}: {done}/{enrollment.total} patients ({enrollment.events_created} events).")
+
+    def _report(self, enrollment):
+        self.stdout.write(
+            f"Enrollment #{enrollment.pk} {enrollment.status}: enrolled {enrollment.enrolled}, "
+            f"skipped {enrollment.skipped} of {enrollment.total}, {enrollment.events_created} events."
+        )
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('careplans', '0003_careplanaction_schedule_json_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='careplanaction',
+            name='materialized_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='careplanaction',
+            name='occurrence_minutes',
+            field=models.PositiveIntegerField(default=60),
+        ),
+        migrations.AddField(
+            model_name='careplanaction',
+            name='recurrence_ends_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='careplanaction',
+            name='recurrence_rule',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:26
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('careplans', '0004_recurrence_rule'),
+        ('professionals', '0002_professional_organizations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CarePlanEnrollment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('start_date', models.DateField(blank=True, null=True)),
+                ('plan_status', models.CharField(choices=[('PLANNED', 'Planned'), ('ACTIVE', 'Active'), ('ON_HOLD', 'On hold'), ('COMPLETED', 'Completed'), ('CANCELLED', 'Cancelled')], default='PLANNED', max_length=20)),
+                ('reason_codes', models.JSONField(blank=True, default=list)),
+                ('patient_ids', models.JSONField(blank=True, default=list)),
+                ('patient_filter', models.JSONField(blank=True, default=dict)),
+                ('medication_items', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('QUEUED', 'Queued'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='QUEUED', max_length=20)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('enrolled', models.PositiveIntegerField(default=0)),
+                ('skipped', models.PositiveIntegerField(default=0)),
+                ('events_created', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('owner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='careplan_enrollments', to='professionals.professional')),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enrollments', to='careplans.careplantemplate')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='careplans_c_status_977ffe_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:02
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("careplans", "0005_careplan_enrollment"),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name="careplanenrollment",
+            old_name="medication_items",
+            new_name="medications",
+        ),
+    ]
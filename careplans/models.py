@@ -1,7 +1,9 @@
 # careplans/models.py
 from __future__ import annotations
 
-from django.db import models
+from datetime import timedelta
+
+from django.db import models, transaction
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
@@ -11,7 +13,7 @@ from patients.models import Patient
 from professionals.models import Professional, Specialization
 from core.models import Service, TimeStampedModel
 from medications.models import MedicationItem  # or your concrete medication model
-from events.models import ScheduledDueWindowEvent, ScheduledTimedEvent  # base scheduled event in your project
+from events.models import RecurringSchedule, ScheduledDueWindowEvent, ScheduledTimedEvent  # base scheduled event in your project
 
 
 # =========================
@@ -111,6 +113,17 @@ class CarePlan(TimeStampedModel):
     def __str__(self) -> str:
         return f"CarePlan #{self.pk} for {self.patient_id} ({self.status})"
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        resync = not self._state.adding and (update_fields is None or "patient" in update_fields)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if resync:
+                # The plan's events copy its patient into event_patient (see BaseEvent).
+                CarePlanActivityEvent.objects.filter(action__careplan=self).exclude(
+                    event_patient_id=self.patient_id
+                ).update(event_patient_id=self.patient_id)
+
 
 class CarePlanGoalStatus(models.TextChoices):
     PLANNED = "PLANNED", _("Planned")
@@ -152,7 +165,11 @@ class ActionStatus(models.TextChoices):
     CANCELLED = "CANCELLED", _("Cancelled")
 
 
-class CarePlanAction(TimeStampedModel):
+class CarePlanAction(TimeStampedModel, RecurringSchedule):
+    # Recurring schedules are stored as recurrence_rule (see careplans.services.event_generator)
+    occurrence_start_field = "due_from"
+    occurrence_end_field = "due_until"
+
     careplan = models.ForeignKey(CarePlan, on_delete=models.CASCADE, related_name="actions")
     template = models.ForeignKey(
         ActionTemplate, null=True, blank=True, on_delete=models.SET_NULL, related_name="instances"
@@ -191,6 +208,27 @@ class CarePlanAction(TimeStampedModel):
         if self.status == ActionStatus.COMPLETED and not self.completed_at:
             self.completed_at = self.completed_at or timezone.now()
 
+    @classmethod
+    def recurring_sources(cls):
+        # Finished actions and plans stop growing events.
+        return (
+            super().recurring_sources()
+            .exclude(status__in=[ActionStatus.COMPLETED, ActionStatus.CANCELLED])
+            .exclude(careplan__status__in=[CarePlanStatus.COMPLETED, CarePlanStatus.CANCELLED])
+        )
+
+    def occurrence_events(self):
+        return self.scheduled_events.all()
+
+    def build_occurrence_event(self, at, *, created_by=None) -> CarePlanActivityEvent:
+        return CarePlanActivityEvent(
+            action=self,
+            due_from=at,
+            due_until=at + timedelta(minutes=self.occurrence_minutes),
+            description=self.title,
+            created_by=created_by or self.careplan.owner,
+        )
+
 
 class MedicationActionDetail(models.Model):
     """Detail for MEDICATION actions — holds actual FK to a MedicationItem and dose info."""
@@ -246,6 +284,11 @@ class CarePlanActivityEvent(ScheduledDueWindowEvent):
         CarePlanAction, on_delete=models.CASCADE, related_name="scheduled_events"
     )
 
+    denormalized_sources = ScheduledDueWindowEvent.denormalized_sources + ("action",)
+
+    def get_event_patient_id(self):
+        return self.action.careplan.patient_id if self.action_id else None
+
     def __str__(self) -> str:
         # ScheduledTimedEvent likely has start/end; adjust as per your base model
         return f"Event for action {self.action_id} ({getattr(self, 'start', None)})"
@@ -277,3 +320,54 @@ class CarePlanReview(models.Model):
 
     def __str__(self) -> str:
         return f"Review {self.pk} on CarePlan {self.careplan_id} ({self.outcome})"
+
+
+# =========================
+# Population enrollment
+# =========================
+class EnrollmentStatus(models.TextChoices):
+    QUEUED = "QUEUED", _("Queued")
+    RUNNING = "RUNNING", _("Running")
+    COMPLETED = "COMPLETED", _("Completed")
+    FAILED = "FAILED", _("Failed")
+
+
+class CarePlanEnrollment(TimeStampedModel):
+    """
+    A request to apply one template to many patients (see careplans.services.enrollment).
+
+    Patients come from `patient_ids`, `patient_filter`, or both (intersection).
+    MEDICATION action templates need a medication spec per template action in
+    `medications` ({"<action template id>": {"medication", "dosage_unit",
+    "dosage_amount", "frequency_hours", "total_unit_amount", "instructions"}});
+    each patient gets their own MedicationItem. The counters are updated as
+    each chunk commits, so they report progress.
+    """
+    template = models.ForeignKey(CarePlanTemplate, on_delete=models.CASCADE, related_name="enrollments")
+    owner = models.ForeignKey(
+        Professional, null=True, blank=True, on_delete=models.SET_NULL, related_name="careplan_enrollments"
+    )
+    start_date = models.DateField(null=True, blank=True)
+    plan_status = models.CharField(max_length=20, choices=CarePlanStatus.choices, default=CarePlanStatus.PLANNED)
+    reason_codes = models.JSONField(default=list, blank=True)
+
+    patient_ids = models.JSONField(default=list, blank=True)
+    patient_filter = models.JSONField(default=dict, blank=True)
+    medications = models.JSONField(default=dict, blank=True)
+
+    status = models.CharField(max_length=20, choices=EnrollmentStatus.choices, default=EnrollmentStatus.QUEUED)
+    total = models.PositiveIntegerField(default=0)
+    enrolled = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    events_created = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"Enrollment #{self.pk} in {self.template_id} ({self.status}: {self.enrolled}/{self.total})"
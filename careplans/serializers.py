@@ -5,13 +5,15 @@ from django.db import transaction
 from rest_framework import serializers
 
 from professionals.models import Professional
+from careplans.services.enrollment import filter_patients, load_blueprint
 from careplans.services.event_generator import generate_events_for_action
+from events.serializers import BulkStatusSerializer
 
 from .models import (
     CarePlanTemplate, GoalTemplate, ActionTemplate,
     CarePlan, CarePlanGoal, CarePlanAction, CarePlanReview,
     MedicationActionDetail, AppointmentActionDetail, ActionCategory,
-    CarePlanActivityEvent,
+    CarePlanActivityEvent, CarePlanEnrollment,
 )
 
 
@@ -87,12 +89,13 @@ class CarePlanActionSerializer(serializers.ModelSerializer):
             "status", "cancel_reason", "completed_at",
             "custom_instructions_richtext",
             "schedule_json",
+            "recurrence_rule", "materialized_until",
             "assigned_to",
             "extras",
             "medication_detail", "appointment_detail",
             "created_at", "updated_at",
         ]
-        read_only_fields = ["created_at", "updated_at"]
+        read_only_fields = ["recurrence_rule", "materialized_until", "created_at", "updated_at"]
 
     # ---------- validation ----------
     def _require_detail_for_category(self, category, med, appt):
@@ -423,3 +426,47 @@ class CarePlanActivityEventSerializer(serializers.ModelSerializer):
                 setattr(instance, field, validated_data[field])
         instance.save()
         return instance
+
+
+class CarePlanActivityEventBulkStatusSerializer(BulkStatusSerializer):
+    action = serializers.IntegerField(required=False)
+    careplan = serializers.IntegerField(required=False)
+
+    scope_filters = {"action": "action_id", "careplan": "action__careplan_id"}
+
+
+# ============================
+# POPULATION ENROLLMENT
+# ============================
+class CarePlanEnrollmentSerializer(serializers.ModelSerializer):
+    """
+    Queues a template for many patients; the counters report progress while the
+    enroll_careplans worker runs it. The template comes from the URL (context["template"]).
+    """
+    patient_ids = serializers.ListField(child=serializers.UUIDField(), required=False)
+
+    class Meta:
+        model = CarePlanEnrollment
+        fields = [
+            "id", "template", "owner",
+            "start_date", "plan_status", "reason_codes",
+            "patient_ids", "patient_filter", "medications",
+            "status", "total", "enrolled", "skipped", "events_created", "error",
+            "created_at", "started_at", "finished_at",
+        ]
+        read_only_fields = [
+            "id", "template",
+            "status", "total", "enrolled", "skipped", "events_created", "error",
+            "created_at", "started_at", "finished_at",
+        ]
+
+    def validate(self, attrs):
+        if not attrs.get("patient_ids") and not attrs.get("patient_filter"):
+            raise serializers.ValidationError("Give patient_ids, a patient_filter, or both.")
+        try:
+            filter_patients(attrs.get("patient_filter") or {})
+            load_blueprint(self.context["template"], attrs.get("medications"))
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc)) from exc
+        attrs["patient_ids"] = [str(pid) for pid in attrs.get("patient_ids", [])]
+        return attrs
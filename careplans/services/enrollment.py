@@ -0,0 +1,378 @@
+# careplans/services/enrollment.py
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from careplans.models import (
+    ActionCategory,
+    ActionTemplate,
+    AppointmentActionDetail,
+    CarePlan,
+    CarePlanAction,
+    CarePlanEnrollment,
+    CarePlanGoal,
+    CarePlanStatus,
+    CarePlanTemplate,
+    EnrollmentStatus,
+    GoalTemplate,
+    MedicationActionDetail,
+)
+from careplans.services.event_generator import _build_one_off_events, _build_recurrence
+from core.models import DosageUnit
+from events.bulk import bulk_create_events
+from events.recurrence import materialization_horizon, occurrences, rule_ends_at
+from medications.models import Medication, MedicationItem
+from patients.models import Patient
+
+# A patient holding one of these plans from the template is not enrolled again.
+OPEN_PLAN_STATUSES = (CarePlanStatus.PLANNED, CarePlanStatus.ACTIVE, CarePlanStatus.ON_HOLD)
+
+# patient_filter keys: Patient lookups, and CarePlan lookups (patients holding a matching plan).
+PATIENT_FILTERS = {
+    "sex": "sex",
+    "born_after": "birth_date__gte",
+    "born_before": "birth_date__lt",
+    "is_active": "is_active",
+}
+CAREPLAN_FILTERS = {
+    "reason_code": "reason_codes__contains",
+    "template": "template_id",
+}
+
+
+@dataclass
+class MedicationSpec:
+    """
+    What to prescribe for one MEDICATION action template. Each enrolled patient
+    gets their own MedicationItem built from it.
+    """
+    medication: Medication
+    dosage_unit: DosageUnit
+    dosage_amount: Decimal
+    frequency_hours: int
+    total_unit_amount: int
+    instructions: str = ""
+
+    def build_item(self, patient_id) -> MedicationItem:
+        # No recurrence rule: the care plan action carries the schedule and its events.
+        return MedicationItem(
+            patient_id=patient_id,
+            medication=self.medication,
+            dosage_unit=self.dosage_unit,
+            dosage_amount=self.dosage_amount,
+            frequency_hours=self.frequency_hours,
+            total_unit_amount=self.total_unit_amount,
+            instructions=self.instructions,
+        )
+
+
+@dataclass
+class TemplateBlueprint:
+    """
+    A template read once and shared by every chunk: goal and action templates,
+    and the medication spec for each MEDICATION action template.
+    """
+    template: CarePlanTemplate
+    goals: list[GoalTemplate]
+    actions: list[ActionTemplate]
+    medications: dict[int, MedicationSpec] = field(default_factory=dict)
+
+
+def filter_patients(patient_filter: dict):
+    """
+    Patients matching every key of patient_filter (PATIENT_FILTERS and CAREPLAN_FILTERS).
+    """
+    unknown = sorted(set(patient_filter) - set(PATIENT_FILTERS) - set(CAREPLAN_FILTERS))
+    if unknown:
+        raise ValueError(f"Unknown patient filter: {', '.join(unknown)}.")
+    patients = Patient.objects.all()
+    for key, value in patient_filter.items():
+        if key in PATIENT_FILTERS:
+            patients = patients.filter(**{PATIENT_FILTERS[key]: value})
+            continue
+        if key == "reason_code":
+            value = [value]
+        plans = CarePlan.objects.filter(**{CAREPLAN_FILTERS[key]: value})
+        patients = patients.filter(pid__in=plans.values("patient_id"))
+    return patients
+
+
+def enrollment_patients(enrollment: CarePlanEnrollment):
+    if not enrollment.patient_ids and not enrollment.patient_filter:
+        raise ValueError("Give patient_ids, a patient_filter, or both.")
+    patients = filter_patients(enrollment.patient_filter or {})
+    if enrollment.patient_ids:
+        patients = patients.filter(pid__in=enrollment.patient_ids)
+    return patients
+
+
+def load_blueprint(template: CarePlanTemplate, medications: dict | None = None) -> TemplateBlueprint:
+    """
+    Reads the template's goals and actions and resolves `medications`
+    ({action template id: medication spec}, see MedicationSpec); raises
+    ValueError when a MEDICATION action template has no valid spec.
+    """
+    actions = list(template.activity_templates.order_by("order_index", "id"))
+    goals = list(template.goal_templates.order_by("id"))
+    try:
+        raw = {int(key): value for key, value in (medications or {}).items()}
+    except (TypeError, ValueError):
+        raise ValueError("medications maps action template ids to medication specs.") from None
+
+    medication_actions = [action.id for action in actions if action.category == ActionCategory.MEDICATION]
+    missing = [action_id for action_id in medication_actions if action_id not in raw]
+    if missing:
+        raise ValueError(f"MEDICATION action templates need a medication: {', '.join(map(str, missing))}.")
+    specs = {action_id: _parse_spec(action_id, raw[action_id]) for action_id in medication_actions}
+
+    found = Medication.objects.in_bulk({spec["medication"] for spec in specs.values()})
+    units = DosageUnit.objects.in_bulk({spec["dosage_unit"] for spec in specs.values()})
+    absent = sorted({spec["medication"] for spec in specs.values()} - set(found))
+    if absent:
+        raise ValueError(f"Medications not found: {', '.join(map(str, absent))}.")
+    absent = sorted({spec["dosage_unit"] for spec in specs.values()} - set(units))
+    if absent:
+        raise ValueError(f"Dosage units not found: {', '.join(map(str, absent))}.")
+    return TemplateBlueprint(
+        template=template,
+        goals=goals,
+        actions=actions,
+        medications={
+            action_id: MedicationSpec(
+                medication=found[spec["medication"]],
+                dosage_unit=units[spec["dosage_unit"]],
+                dosage_amount=spec["dosage_amount"],
+                frequency_hours=spec["frequency_hours"],
+                total_unit_amount=spec["total_unit_amount"],
+                instructions=spec["instructions"],
+            )
+            for action_id, spec in specs.items()
+        },
+    )
+
+
+def _parse_spec(action_id: int, spec) -> dict:
+    if not isinstance(spec, dict):
+        raise ValueError(f"Medication for action template {action_id} must be an object.")
+    try:
+        parsed = {
+            "medication": int(spec["medication"]),
+            "dosage_unit": int(spec["dosage_unit"]),
+            "dosage_amount": Decimal(str(spec["dosage_amount"])),
+            "frequency_hours": int(spec["frequency_hours"]),
+            "total_unit_amount": int(spec["total_unit_amount"]),
+            "instructions": str(spec.get("instructions", "")),
+        }
+    except KeyError as exc:
+        raise ValueError(f"Medication for action template {action_id} is missing {exc.args[0]}.") from None
+    except (TypeError, ValueError, InvalidOperation):
+        raise ValueError(f"Medication for action template {action_id} has an invalid value.") from None
+    if parsed["dosage_amount"] <= 0 or parsed["frequency_hours"] <= 0 or parsed["total_unit_amount"] <= 0:
+        raise ValueError(f"Medication for action template {action_id} needs positive amounts.")
+    return parsed
+
+
+@transaction.atomic
+def enroll_chunk(enrollment: CarePlanEnrollment, blueprint: TemplateBlueprint, patient_ids: list, *, until: datetime) -> tuple[int, int, int]:
+    """
+    Creates the plan tree for patient_ids in one transaction: one bulk insert
+    each for plans, goals, actions, the patients' medication items and the
+    details, then the events.
+
+    Actions are expanded in memory the way generate_events_for_action does for a
+    new action: recurring schedules store their rule and materialize up to
+    `until`, one-off schedules get their single event. Identical rules are
+    expanded once. Patients already holding an open plan from the template are
+    skipped. Returns (enrolled, skipped, events created).
+    """
+    template = blueprint.template
+    enrolled = set(
+        CarePlan.objects.filter(template=template, patient_id__in=patient_ids, status__in=OPEN_PLAN_STATUSES)
+        .values_list("patient_id", flat=True)
+    )
+    start_date = enrollment.start_date or timezone.localdate()
+    plans = [
+        CarePlan(
+            patient_id=patient_id,
+            template=template,
+            status=enrollment.plan_status,
+            start_date=start_date,
+            owner=enrollment.owner,
+            reason_codes=list(enrollment.reason_codes),
+        )
+        for patient_id in patient_ids
+        if patient_id not in enrolled
+    ]
+    if not plans:
+        return 0, len(patient_ids), 0
+    CarePlan.objects.bulk_create(plans)
+
+    CarePlanGoal.objects.bulk_create(
+        [
+            CarePlanGoal(
+                careplan=plan,
+                template=goal,
+                title=goal.title,
+                target_metric_code=goal.target_metric_code,
+                target_value_json=goal.target_value,
+                due_date=start_date + timedelta(days=goal.timeframe_days) if goal.timeframe_days else None,
+            )
+            for plan in plans
+            for goal in blueprint.goals
+        ]
+    )
+
+    expanded, actions, medication_items, medication_details, appointment_details = {}, [], [], [], []
+    for plan in plans:
+        for action_template in blueprint.actions:
+            action = CarePlanAction(
+                careplan=plan,
+                template=action_template,
+                category=action_template.category,
+                title=action_template.title,
+                schedule_json=dict(action_template.schedule_json or {}),
+            )
+            # Details first: the schedule builders read them from the action.
+            if action_template.category == ActionCategory.MEDICATION:
+                spec = blueprint.medications[action_template.id]
+                item = spec.build_item(plan.patient_id)
+                medication_items.append(item)
+                medication_details.append(
+                    MedicationActionDetail(
+                        action=action,
+                        medication_item=item,
+                        dose=f"{spec.dosage_amount} {spec.dosage_unit.code}",
+                    )
+                )
+            elif action_template.category == ActionCategory.APPOINTMENT:
+                appointment_details.append(AppointmentActionDetail(action=action))
+            actions.append((action, _expand_recurrence(action, until, expanded)))
+    CarePlanAction.objects.bulk_create([action for action, _ in actions])
+    MedicationItem.objects.bulk_create(medication_items)
+    MedicationActionDetail.objects.bulk_create(medication_details)
+    AppointmentActionDetail.objects.bulk_create(appointment_details)
+
+    events = []
+    for action, times in actions:
+        if times is None:
+            events.extend(_build_one_off_events(action))
+        else:
+            events.extend(action.build_occurrence_event(at) for at in times)
+    bulk_create_events(events)
+    return len(plans), len(patient_ids) - len(plans), len(events)
+
+
+def _expand_recurrence(action: CarePlanAction, until: datetime, expanded: dict) -> list[datetime] | None:
+    """
+    Sets the action's rule fields in memory and returns its occurrences up to
+    `until`, or None for one-off schedules. `expanded` caches work per rule.
+    """
+    recurrence = _build_recurrence(action)
+    if recurrence is None:
+        return None
+    rule, occurrence_minutes = recurrence
+    if rule not in expanded:
+        expanded[rule] = (rule_ends_at(rule), occurrences(rule, until=until))
+    action.recurrence_rule, action.occurrence_minutes = rule, occurrence_minutes
+    action.recurrence_ends_at, times = expanded[rule]
+    action.materialized_until = until
+    return times
+
+
+@transaction.atomic
+def claim_enrollment() -> CarePlanEnrollment | None:
+    """
+    Marks the oldest queued enrollment running and returns it; None when there is none.
+    """
+    enrollment = (
+        CarePlanEnrollment.objects.select_for_update(skip_locked=True)
+        .filter(status=EnrollmentStatus.QUEUED)
+        .order_by("created_at", "id")
+        .first()
+    )
+    if enrollment is not None:
+        enrollment.status = EnrollmentStatus.RUNNING
+        enrollment.started_at = timezone.now()
+        enrollment.save(update_fields=["status", "started_at", "updated_at"])
+    return enrollment
+
+
+def run_enrollment(enrollment: CarePlanEnrollment, *, chunk_size: int = 500, workers: int = 4, progress=None) -> CarePlanEnrollment:
+    """
+    Enrolls the enrollment's patients in chunks of chunk_size, running the
+    chunks on a pool of `workers` threads (inline when 1).
+
+    Each chunk commits on its own and adds to the enrollment's counters, and
+    `progress(enrollment)` is called after each one. A failed chunk is recorded
+    in `error` and the rest carry on; the enrollment ends FAILED if any chunk
+    failed. Running it again enrolls only the patients still missing.
+    """
+    try:
+        if enrollment.owner is None:
+            raise ValueError("An owner is required to enroll patients.")
+        blueprint = load_blueprint(enrollment.template, enrollment.medications)
+        patient_ids = list(enrollment_patients(enrollment).order_by("pid").values_list("pid", flat=True))
+    except ValueError as exc:
+        return _finish(enrollment, [str(exc)])
+
+    enrollment.status = EnrollmentStatus.RUNNING
+    enrollment.started_at = enrollment.started_at or timezone.now()
+    enrollment.total = len(patient_ids)
+    enrollment.enrolled = enrollment.skipped = enrollment.events_created = 0
+    enrollment.error = ""
+    enrollment.save(update_fields=["status", "started_at", "total", "enrolled", "skipped", "events_created", "error", "updated_at"])
+
+    until = materialization_horizon()
+    chunks = [patient_ids[start:start + chunk_size] for start in range(0, len(patient_ids), chunk_size)]
+    threaded = workers > 1 and len(chunks) > 1
+
+    def work(chunk):
+        try:
+            return enroll_chunk(enrollment, blueprint, chunk, until=until)
+        finally:
+            if threaded:
+                # Each pool thread opened its own connection.
+                connections.close_all()
+
+    def record(result):
+        enrolled, skipped, events_created = result
+        CarePlanEnrollment.objects.filter(pk=enrollment.pk).update(
+            enrolled=F("enrolled") + enrolled,
+            skipped=F("skipped") + skipped,
+            events_created=F("events_created") + events_created,
+            updated_at=timezone.now(),
+        )
+        enrollment.refresh_from_db(fields=["enrolled", "skipped", "events_created", "updated_at"])
+        if progress is not None:
+            progress(enrollment)
+
+    errors = []
+    if threaded:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(work, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                try:
+                    record(future.result())
+                except Exception as exc:
+                    # A failed chunk rolled back on its own; the others stand.
+                    errors.append(f"{type(exc).__name__}: {exc}")
+    else:
+        for chunk in chunks:
+            try:
+                record(work(chunk))
+            except Exception as exc:
+                errors.append(f"{type(exc).__name__}: {exc}")
+    return _finish(enrollment, errors)
+
+
+def _finish(enrollment: CarePlanEnrollment, errors: list[str]) -> CarePlanEnrollment:
+    enrollment.status = EnrollmentStatus.FAILED if errors else EnrollmentStatus.COMPLETED
+    enrollment.error = "; ".join(errors)[:2000]
+    enrollment.finished_at = timezone.now()
+    enrollment.save(update_fields=["status", "error", "finished_at", "updated_at"])
+    return enrollment
@@ -1,8 +1,8 @@
 # careplans/services/event_generator.py
 from datetime import datetime, timedelta
 from django.utils import timezone
-from dateutil.rrule import rrule, DAILY, WEEKLY
 
+from events.recurrence import format_rule, format_utc, regenerate, sync_events
 from careplans.models import (
     CarePlanAction,
     CarePlanActivityEvent,
@@ -14,6 +14,12 @@ def generate_events_for_action(action: CarePlanAction):
     """
     Expand a CarePlanAction into concrete CarePlanActivityEvent rows.
 
+    Existing events are diffed against the new schedule: completed ones are never
+    touched and only added, removed or shifted occurrences are written (see
+    events.recurrence.sync_events). Recurring schedules are stored as
+    action.recurrence_rule and only the rolling window is materialized; the
+    extender job adds the rest as time passes.
+
     Scheduling priority:
         1) action.schedule_json  (ALWAYS used)
         2) category-specific detail overrides
@@ -27,36 +33,82 @@ def generate_events_for_action(action: CarePlanAction):
         - {"times_per_day": 3, "at_times": ["08:00","14:00","20:00"], "duration_days": 10}
         - Appointment-style: {"preferred_window_start": "...", "preferred_window_end": "..."}
     """
-
+    recurrence = _build_recurrence(action)
+    if recurrence is not None:
+        rule, occurrence_minutes = recurrence
+        return regenerate(action, rule, occurrence_minutes=occurrence_minutes)
+
+    if action.recurrence_rule:
+        action.clear_recurrence()
+    events = _build_one_off_events(action)
+    if events and (action.schedule_json or {}).get("on_start") is True:
+        existing = action.occurrence_events().order_by("due_from").first()
+        if existing is not None:
+            # sync_events matches by start: keep the one-time task's original window
+            # so regenerating does not add a second one next to it.
+            events[0].due_from, events[0].due_until = existing.due_from, existing.due_until
+    return sync_events(action, events)
+
+
+def _build_one_off_events(action: CarePlanAction) -> list[CarePlanActivityEvent]:
+    """
+    Unsaved events for schedules that happen once (on start, appointment window).
+    """
     schedule = action.schedule_json or {}
-    plan = action.careplan
 
     # Professional *is* the user (multi-table inheritance)
-    owner_user = plan.owner if plan.owner else None
-
-    start_date = plan.start_date or timezone.now().date()
-    start_dt = timezone.make_aware(
-        datetime.combine(start_date, datetime.min.time())
-    )
+    owner_user = action.careplan.owner if action.careplan.owner else None
     now = timezone.now()
 
     # -------------------------------------------------------------------------
-    # 0. Remove existing events (safe & predictable)
+    # 1. ONE-TIME on_start
     # -------------------------------------------------------------------------
-    CarePlanActivityEvent.objects.filter(action=action).delete()
+    if schedule.get("on_start") is True:
+        return [
+            CarePlanActivityEvent(
+                action=action,
+                due_from=now,
+                due_until=now + timedelta(hours=12),
+                description=action.title,
+                created_by=owner_user,
+            )
+        ]
 
     # -------------------------------------------------------------------------
-    # 1. ONE-TIME on_start
+    # 6. APPOINTMENT (from appointment_detail)
     # -------------------------------------------------------------------------
+    if action.category == ActionCategory.APPOINTMENT:
+        appt = getattr(action, "appointment_detail", None)
+        if appt and appt.preferred_window_start:
+            due_until = appt.preferred_window_end or (appt.preferred_window_start + timedelta(hours=1))
+            return [
+                CarePlanActivityEvent(
+                    action=action,
+                    due_from=appt.preferred_window_start,
+                    due_until=due_until,
+                    description=action.title,
+                    created_by=owner_user,
+                )
+            ]
+
+    # -------------------------------------------------------------------------
+    # 7. SAFE NO-OP fallback
+    # -------------------------------------------------------------------------
+    return []
+
+
+def _build_recurrence(action: CarePlanAction) -> tuple[str, int] | None:
+    """
+    (recurrence rule, event length in minutes) for recurring schedules, else None.
+    """
+    schedule = action.schedule_json or {}
     if schedule.get("on_start") is True:
-        CarePlanActivityEvent.objects.create(
-            action=action,
-            due_from=now,
-            due_until=now + timedelta(hours=12),
-            description=action.title,
-            created_by=owner_user,
-        )
-        return
+        return None
+
+    start_date = action.careplan.start_date or timezone.now().date()
+    start_dt = timezone.make_aware(
+        datetime.combine(start_date, datetime.min.time())
+    )
 
     # Extract main schedule fields
     frequency = schedule.get("frequency", "").upper()
@@ -76,66 +128,29 @@ def generate_events_for_action(action: CarePlanAction):
 
     # Pure helper to parse HH:MM
     def parse_time(t):
-        hour, minute = map(int, t.split(":"))
-        return datetime.strptime(t, "%H:%M").replace(hour=hour, minute=minute).time()
+        return datetime.strptime(t, "%H:%M").time()
 
     # -------------------------------------------------------------------------
     # 2. DAILY
     # -------------------------------------------------------------------------
     if frequency == "DAILY":
-        time_obj = parse_time(at_time)
-
-        for i in range(duration_days):
-            date = start_date + timedelta(days=i)
-            due_dt = timezone.make_aware(
-                datetime.combine(date, time_obj)
-            )
-
-            CarePlanActivityEvent.objects.create(
-                action=action,
-                due_from=due_dt,
-                due_until=due_dt + timedelta(hours=4),
-                description=action.title,
-                created_by=owner_user,
-            )
-        return
+        due_dt = timezone.make_aware(datetime.combine(start_date, parse_time(at_time)))
+        return format_rule(due_dt, [f"FREQ=DAILY;COUNT={duration_days}"], wall_clock=True), 4 * 60
 
     # -------------------------------------------------------------------------
     # 3. WEEKLY
     # -------------------------------------------------------------------------
     if frequency == "WEEKLY":
         weekdays = schedule.get("weekdays", [])  # e.g. ["MON","WED"]
-        if not weekdays:
-            return
-
-        weekday_map = {
-            "MON": 0, "TUE": 1, "WED": 2,
-            "THU": 3, "FRI": 4, "SAT": 5, "SUN": 6
-        }
+        byday = [d[:2] for d in weekdays if d in ("MON", "TUE", "WED", "THU", "FRI", "SAT", "SUN")]
+        if not byday:
+            return None
 
         time_obj = parse_time(at_time)
         end_date = start_date + timedelta(days=duration_days)
-
-        rr = rrule(
-            WEEKLY,
-            dtstart=start_dt,
-            until=datetime.combine(end_date, datetime.min.time()),
-            byweekday=[weekday_map[d] for d in weekdays if d in weekday_map],
-        )
-
-        for occur in rr:
-            due_dt = timezone.make_aware(
-                datetime.combine(occur.date(), time_obj)
-            )
-
-            CarePlanActivityEvent.objects.create(
-                action=action,
-                due_from=due_dt,
-                due_until=due_dt + timedelta(hours=4),
-                description=action.title,
-                created_by=owner_user,
-            )
-        return
+        until = timezone.make_aware(datetime.combine(end_date, time_obj))
+        rule = f"FREQ=WEEKLY;BYDAY={','.join(byday)};UNTIL={format_utc(until)}"
+        return format_rule(timezone.make_aware(datetime.combine(start_date, time_obj)), [rule], wall_clock=True), 4 * 60
 
     # -------------------------------------------------------------------------
     # 4. INTERVAL: every X hours
@@ -143,18 +158,8 @@ def generate_events_for_action(action: CarePlanAction):
     interval_hours = schedule.get("interval_hours")
     if interval_hours:
         end_dt = start_dt + timedelta(days=duration_days)
-        cursor = start_dt
-
-        while cursor <= end_dt:
-            CarePlanActivityEvent.objects.create(
-                action=action,
-                due_from=cursor,
-                due_until=cursor + timedelta(hours=2),
-                description=action.title,
-                created_by=owner_user,
-            )
-            cursor += timedelta(hours=interval_hours)
-        return
+        rule = f"FREQ=MINUTELY;INTERVAL={max(round(float(interval_hours) * 60), 1)};UNTIL={format_utc(end_dt)}"
+        return format_rule(start_dt, [rule]), 2 * 60
 
     # -------------------------------------------------------------------------
     # 5. MULTIPLE TIMES PER DAY
@@ -163,39 +168,10 @@ def generate_events_for_action(action: CarePlanAction):
     at_times = schedule.get("at_times")   # e.g. ["08:00","14:00","20:00"]
 
     if times_per_day and at_times:
-        for d in range(duration_days):
-            current_date = start_date + timedelta(days=d)
-            for t in at_times:
-                time_obj = parse_time(t)
-                due_dt = timezone.make_aware(
-                    datetime.combine(current_date, time_obj)
-                )
-                CarePlanActivityEvent.objects.create(
-                    action=action,
-                    due_from=due_dt,
-                    due_until=due_dt + timedelta(hours=2),
-                    description=action.title,
-                    created_by=owner_user,
-                )
-        return
+        rules = []
+        for t in at_times:
+            time_obj = parse_time(t)
+            rules.append(f"FREQ=DAILY;COUNT={duration_days};BYHOUR={time_obj.hour};BYMINUTE={time_obj.minute}")
+        return format_rule(start_dt, rules, wall_clock=True), 2 * 60
 
-    # -------------------------------------------------------------------------
-    # 6. APPOINTMENT (from appointment_detail)
-    # -------------------------------------------------------------------------
-    if action.category == ActionCategory.APPOINTMENT:
-        appt = getattr(action, "appointment_detail", None)
-        if appt and appt.preferred_window_start:
-            CarePlanActivityEvent.objects.create(
-                action=action,
-                due_from=appt.preferred_window_start,
-                due_until=appt.preferred_window_end
-                    or (appt.preferred_window_start + timedelta(hours=1)),
-                description=action.title,
-                created_by=owner_user,
-            )
-        return
-
-    # -------------------------------------------------------------------------
-    # 7. SAFE NO-OP fallback
-    # -------------------------------------------------------------------------
-    return
+    return None
@@ -0,0 +1,142 @@
+import pytest
+from django.urls import reverse
+
+from careplans.models import (
+    ActionTemplate,
+    CarePlan,
+    CarePlanAction,
+    CarePlanActivityEvent,
+    CarePlanEnrollment,
+    CarePlanTemplate,
+    EnrollmentStatus,
+    GoalTemplate,
+    MedicationActionDetail,
+)
+from careplans.services import enrollment as enrollment_service
+from careplans.services.enrollment import load_blueprint, run_enrollment
+from core.models import DosageUnit
+from medications.models import Medication, MedicationItem
+from patients.models import Patient
+
+
+@pytest.fixture
+def template(db):
+    template = CarePlanTemplate.objects.create(name="Cholesterol", version="1.0.0")
+    GoalTemplate.objects.create(template=template, title="Reduce LDL", timeframe_days=56)
+    ActionTemplate.objects.create(
+        template=template,
+        title="Take your statin",
+        category="MEDICATION",
+        schedule_json={"frequency": "DAILY", "at_time": "08:00", "duration_days": 30},
+    )
+    ActionTemplate.objects.create(template=template, title="Read the guide", category="EDUCATION", schedule_json={"on_start": True})
+    return template
+
+
+@pytest.fixture
+def medications(db, template):
+    medication = Medication.objects.create(name="Atorvastatin")
+    unit = DosageUnit.objects.create(code="mg", name="Milligram")
+    action = template.activity_templates.get(category="MEDICATION")
+    return {
+        str(action.id): {
+            "medication": medication.id,
+            "dosage_unit": unit.id,
+            "dosage_amount": "20",
+            "frequency_hours": 24,
+            "total_unit_amount": 30,
+        }
+    }
+
+
+@pytest.fixture
+def cohort(db):
+    return [
+        Patient.objects.create(email=f"cohort{index}@example.com", first_name="Pat", last_name=str(index), sex="F")
+        for index in range(5)
+    ]
+
+
+def _enrollment(template, professional, medications, **kwargs):
+    return CarePlanEnrollment.objects.create(
+        template=template, owner=professional, patient_filter={"sex": "F"}, medications=medications, **kwargs
+    )
+
+
+@pytest.mark.django_db
+def test_enrollment_writes_one_plan_tree_per_patient(template, medications, cohort, professional):
+    progress = []
+    enrollment = run_enrollment(
+        _enrollment(template, professional, medications),
+        chunk_size=2,
+        workers=1,
+        progress=lambda current: progress.append(current.enrolled),
+    )
+
+    assert enrollment.status == EnrollmentStatus.COMPLETED
+    assert (enrollment.total, enrollment.enrolled, enrollment.skipped) == (5, 5, 0)
+    assert progress == [2, 4, 5]
+    assert CarePlan.objects.filter(template=template).count() == 5
+    assert CarePlanAction.objects.count() == 10
+    assert enrollment.events_created == CarePlanActivityEvent.objects.count() > 10
+
+    # Every patient gets their own medication item.
+    items = MedicationItem.objects.all()
+    assert sorted(item.patient_id for item in items) == sorted(patient.pid for patient in cohort)
+    for detail in MedicationActionDetail.objects.select_related("action__careplan", "medication_item"):
+        assert detail.medication_item.patient_id == detail.action.careplan.patient_id
+        assert detail.dose == "20 mg"
+    assert not any(item.recurrence_rule for item in items)
+
+
+@pytest.mark.django_db
+def test_enrollment_skips_patients_already_enrolled(template, medications, cohort, professional):
+    run_enrollment(_enrollment(template, professional, medications, patient_ids=[str(cohort[0].pid)]), workers=1)
+
+    enrollment = run_enrollment(_enrollment(template, professional, medications), chunk_size=2, workers=1)
+
+    assert (enrollment.total, enrollment.enrolled, enrollment.skipped) == (5, 4, 1)
+    assert CarePlan.objects.filter(patient=cohort[0]).count() == 1
+    assert MedicationItem.objects.count() == 5
+
+
+@pytest.mark.django_db
+def test_failed_chunk_rolls_back_alone(template, medications, cohort, professional, monkeypatch):
+    calls = []
+    original = enrollment_service.bulk_create_events
+
+    def flaky(events, **kwargs):
+        calls.append(len(events))
+        if len(calls) == 2:
+            raise RuntimeError("disk full")
+        return original(events, **kwargs)
+
+    monkeypatch.setattr(enrollment_service, "bulk_create_events", flaky)
+
+    enrollment = run_enrollment(_enrollment(template, professional, medications), chunk_size=2, workers=1)
+
+    assert enrollment.status == EnrollmentStatus.FAILED
+    assert "RuntimeError: disk full" in enrollment.error
+    assert (enrollment.enrolled, enrollment.skipped) == (3, 0)
+    # The second chunk left nothing behind.
+    assert CarePlan.objects.count() == MedicationItem.objects.count() == 3
+    assert CarePlanAction.objects.count() == 6
+
+
+@pytest.mark.django_db
+def test_enroll_endpoint_requires_medication_spec(api_client, template, medications, cohort, professional):
+    api_client.force_authenticate(user=professional)
+    url = reverse("careplan-template-enroll", args=[template.id])
+
+    response = api_client.post(url, {"patient_filter": {"sex": "F"}}, format="json")
+    assert response.status_code == 400
+
+    with pytest.raises(ValueError, match="missing dosage_unit"):
+        spec = dict(next(iter(medications.values())))
+        spec.pop("dosage_unit")
+        load_blueprint(template, {next(iter(medications)): spec})
+
+    response = api_client.post(url, {"patient_filter": {"sex": "F"}, "medications": medications}, format="json")
+    assert response.status_code == 202
+    assert response.data["status"] == EnrollmentStatus.QUEUED
+    assert response.data["owner"] == professional.pk
@@ -3,7 +3,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
 from .views import (
-    CarePlanTemplateViewSet, GoalTemplateViewSet, ActionTemplateViewSet,
+    CarePlanTemplateViewSet, GoalTemplateViewSet, ActionTemplateViewSet, CarePlanEnrollmentViewSet,
     CarePlanViewSet, CarePlanGoalViewSet, CarePlanActionViewSet,
     CarePlanReviewViewSet, CarePlanActivityEventViewSet,
     MyCarePlansView,
@@ -19,6 +19,7 @@ router.register(r"goals", CarePlanGoalViewSet, basename="careplan-goal")
 router.register(r"actions", CarePlanActionViewSet, basename="careplan-action")
 router.register(r"reviews", CarePlanReviewViewSet, basename="careplan-review")
 router.register(r"events", CarePlanActivityEventViewSet, basename="careplan-activity-event")
+router.register(r"enrollments", CarePlanEnrollmentViewSet, basename="careplan-enrollment")
 
 urlpatterns = [
     path("careplans/my/", MyCarePlansView.as_view(), name="my-careplans"),
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
@@ -9,15 +10,18 @@ from drf_yasg.utils import swagger_auto_schema
 from professionals.models import Professional
 from .models import (
     CarePlanTemplate, GoalTemplate, ActionTemplate,
-    CarePlan, CarePlanGoal, CarePlanAction, CarePlanReview, CarePlanActivityEvent,
+    CarePlan, CarePlanGoal, CarePlanAction, CarePlanReview, CarePlanActivityEvent, CarePlanEnrollment,
 )
 from .serializers import (
     CarePlanTemplateSerializer, GoalTemplateSerializer, ActionTemplateSerializer,
     CarePlanSerializer, CarePlanDetailSerializer, CarePlanUpsertSerializer,
     CarePlanGoalSerializer, CarePlanActionSerializer, CarePlanActionReadSerializer,
-    CarePlanReviewSerializer, CarePlanActivityEventSerializer,
+    CarePlanReviewSerializer, CarePlanActivityEventSerializer, CarePlanActivityEventBulkStatusSerializer,
+    CarePlanEnrollmentSerializer,
 )
 
+from events.bulk import bulk_update_status
+from events.recurrence import schedule_between, schedule_window
 from users.permissions import IsBayleafAPIToken
 from professionals.permissions import IsProfessional
 from patients.permissions import IsPatient
@@ -35,6 +39,27 @@ class CarePlanTemplateViewSet(viewsets.ModelViewSet):
         pro = Professional.objects.filter(user_ptr_id=self.request.user.id).first()
         serializer.save(created_by=pro)
 
+    @swagger_auto_schema(request_body=CarePlanEnrollmentSerializer, responses={202: CarePlanEnrollmentSerializer})
+    @action(detail=True, methods=["post"])
+    def enroll(self, request, pk=None):
+        """
+        Queues this template for every selected patient; follow progress at /enrollments/{id}/.
+        """
+        template = self.get_object()
+        serializer = CarePlanEnrollmentSerializer(data=request.data, context={"request": request, "template": template})
+        serializer.is_valid(raise_exception=True)
+        owner = serializer.validated_data.get("owner") or Professional.objects.filter(user_ptr_id=request.user.id).first()
+        if owner is None:
+            return Response({"detail": "An owner is required to enroll patients."}, status=status.HTTP_400_BAD_REQUEST)
+        serializer.save(template=template, owner=owner)
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+
+class CarePlanEnrollmentViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = CarePlanEnrollment.objects.select_related("template", "owner").order_by("-created_at")
+    serializer_class = CarePlanEnrollmentSerializer
+    permission_classes = [IsProfessional | IsBayleafAPIToken]
+
 
 class GoalTemplateViewSet(viewsets.ModelViewSet):
     queryset = GoalTemplate.objects.select_related("template")
@@ -166,6 +191,17 @@ class CarePlanActionViewSet(viewsets.ModelViewSet):
     def _deny_patient_modification(self):
         return Response({"detail": "Patients cannot modify actions."}, status=status.HTTP_403_FORBIDDEN)
 
+    @action(detail=True, methods=["get"])
+    def schedule(self, request, pk=None):
+        """
+        Occurrences between ?from= and ?to=, including virtual ones past the materialized window.
+        """
+        try:
+            start, end = schedule_window(request.query_params)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(schedule_between(self.get_object(), start, end))
+
     def create(self, request, *args, **kwargs):
         if IsPatient().has_permission(request, self):
             return self._deny_patient_modification()
@@ -258,6 +294,21 @@ class CarePlanActivityEventViewSet(viewsets.ModelViewSet):
             return qs.filter(action__careplan__patient__user_ptr_id=user.id)
         return qs.none()
 
+    @swagger_auto_schema(request_body=CarePlanActivityEventBulkStatusSerializer)
+    @action(detail=False, methods=["post"], url_path="bulk-status")
+    def bulk_status(self, request):
+        """
+        Moves every selected event to `status` at once (all-or-nothing transition check).
+        """
+        serializer = CarePlanActivityEventBulkStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        events = serializer.filter(self.get_queryset(), start_field="due_from")
+        try:
+            changed = bulk_update_status(events, serializer.validated_data["status"], changed_by=request.user)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"updated": sum(changed.values()), "by_status": changed})
+
 
 # ============================================================
 # "My Plans" (expanded) for Patients; OBO handled automatically
@@ -0,0 +1,101 @@
+# events/archive.py
+from datetime import datetime, timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from events.models import ArchivedEvent, BaseEvent, EventStatusHistory
+
+TERMINAL_STATUSES = (BaseEvent.Status.COMPLETED, BaseEvent.Status.CANCELED, BaseEvent.Status.MISSED)
+HISTORY_FIELDS = ("previous_status", "new_status", "changed_by_id", "changed_at")
+READ_FIELDS = ("id", "event_type", "status", "description", "starts_at", "ends_at")
+
+
+def archive_cutoff(now: datetime | None = None) -> datetime:
+    return (now or timezone.now()) - timedelta(days=getattr(settings, "EVENTS_ARCHIVE_AFTER_DAYS", 365))
+
+
+def event_models() -> dict[str, type[BaseEvent]]:
+    """
+    Concrete event models by the event_type BaseEvent.save gives them.
+    """
+    return {
+        model.__name__.lower(): model
+        for model in apps.get_models()
+        if issubclass(model, BaseEvent)
+    }
+
+
+def _snapshot(event: BaseEvent) -> dict:
+    return {field.attname: field.value_from_object(event) for field in event._meta.concrete_fields}
+
+
+@transaction.atomic
+def archive_batch(*, before: datetime, batch_size: int = 500) -> int:
+    """
+    Moves up to batch_size terminal events that ended before `before` (or were
+    created before it, when they have no window) into ArchivedEvent, with their
+    subtype row and status history. Returns how many moved.
+
+    Events another event was rescheduled from stay put so that link survives, and
+    rows locked elsewhere are left for the next batch.
+    """
+    models = event_models()
+    rows = list(
+        BaseEvent.objects.select_for_update(skip_locked=True)
+        .filter(status__in=TERMINAL_STATUSES, event_type__in=list(models))
+        .filter(Q(ends_at__lt=before) | Q(ends_at__isnull=True, created_at__lt=before))
+        .filter(~Exists(BaseEvent.objects.filter(rescheduled_to=OuterRef("pk"))))
+        .order_by()
+        .values_list("pk", "event_type")[:batch_size]
+    )
+    if not rows:
+        return 0
+
+    ids_by_type = {}
+    for pk, event_type in rows:
+        ids_by_type.setdefault(event_type, []).append(pk)
+    history = {}
+    for entry in (
+        EventStatusHistory.objects.filter(event_id__in=[pk for pk, _ in rows])
+        .order_by("changed_at", "id")
+        .values("event_id", *HISTORY_FIELDS)
+    ):
+        history.setdefault(entry.pop("event_id"), []).append(entry)
+
+    archived = []
+    for event_type, ids in ids_by_type.items():
+        for event in models[event_type].objects.filter(pk__in=ids).order_by():
+            archived.append(
+                ArchivedEvent(
+                    id=event.pk,
+                    event_type=event.event_type,
+                    status=event.status,
+                    description=event.description,
+                    event_patient_id=event.event_patient_id,
+                    starts_at=event.starts_at,
+                    ends_at=event.ends_at,
+                    created_at=event.created_at,
+                    data=_snapshot(event),
+                    history=history.get(event.pk, []),
+                )
+            )
+    ArchivedEvent.objects.bulk_create(archived)
+    # Cascades to the subtype rows and EventStatusHistory.
+    BaseEvent.objects.filter(pk__in=[pk for pk, _ in rows]).delete()
+    return len(rows)
+
+
+def patient_events(patient, start: datetime, end: datetime) -> list[dict]:
+    """
+    The patient's events starting within [start, end], read through from the hot
+    table and the archive, ordered by start.
+    """
+    window = {"event_patient": patient, "starts_at__gte": start, "starts_at__lte": end}
+    items = [{**row, "archived": False} for row in BaseEvent.objects.filter(**window).order_by().values(*READ_FIELDS)]
+    items.extend({**row, "archived": True} for row in ArchivedEvent.objects.filter(**window).order_by().values(*READ_FIELDS))
+    items.sort(key=lambda item: item["starts_at"])
+    return items
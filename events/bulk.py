@@ -0,0 +1,114 @@
+# events/bulk.py
+from django.db import connections, router, transaction
+
+from events.models import BaseEvent, EventStatusHistory
+from webhooks.outbox import enqueue, event_status_message
+
+
+def bulk_create_events(events, *, batch_size=None):
+    """
+    Inserts BaseEvent children with one INSERT per table instead of two per event.
+
+    QuerySet.bulk_create refuses multi-table inherited models, so this writes the
+    parent rows first and then the child rows, reusing the UUID primary key each
+    event already got from BaseEvent.id's default. event_type and the denormalized
+    patient/window columns are filled in the way BaseEvent.save does it. Like
+    bulk_create, save() and model signals are skipped.
+
+    All events must be instances of the same model.
+    """
+    events = list(events)
+    if not events:
+        return events
+    model = type(events[0])
+    if not issubclass(model, BaseEvent) or model._meta.abstract:
+        raise ValueError("bulk_create_events expects concrete BaseEvent children.")
+    if any(type(event) is not model for event in events):
+        raise ValueError("bulk_create_events expects events of a single model.")
+
+    for event in events:
+        if not event.event_type:
+            event.event_type = model.__name__.lower()
+        event.sync_denormalized()
+
+    # Topmost concrete parent first, so each child row finds its parent.
+    tables = [*reversed(model._meta.get_parent_list()), model]
+    root_pk = tables[0]._meta.pk.attname
+    using = router.db_for_write(model)
+    connection = connections[using]
+    with transaction.atomic(using=using, savepoint=False):
+        for table_model in tables:
+            for link in table_model._meta.parents.values():
+                # Child tables share the parent's primary key.
+                for event in events:
+                    setattr(event, link.attname, getattr(event, root_pk))
+            fields = table_model._meta.local_concrete_fields
+            size = min(batch_size or len(events), connection.ops.bulk_batch_size(fields, events) or len(events))
+            for start in range(0, len(events), size):
+                table_model._base_manager._insert(events[start:start + size], fields=fields, using=using)
+
+    for event in events:
+        event._state.adding = False
+        event._state.db = using
+    return events
+
+
+@transaction.atomic
+def bulk_update_status(queryset, new_status: str, *, changed_by=None) -> dict:
+    """
+    Moves every event of `queryset` (BaseEvent or a child) to new_status.
+
+    Rows are locked and grouped by current status; if any group may not move to
+    new_status (BaseEvent.VALID_TRANSITIONS) a ValueError is raised and nothing
+    changes. Otherwise it runs one UPDATE per source status and one bulk_create
+    of EventStatusHistory. Events already in new_status are left alone, as in
+    update_status. Returns the number of events changed per previous status.
+    """
+    if new_status not in BaseEvent.Status.values:
+        raise ValueError(f"Unknown status: {new_status}")
+    rows = list(
+        BaseEvent.objects.select_for_update()
+        .filter(pk__in=queryset.values("pk"))
+        .exclude(status=new_status)
+        .order_by("pk")
+        .values_list("pk", "status", "event_type", "event_patient_id")
+    )
+    by_status = {}
+    for pk, status, *event in rows:
+        by_status.setdefault(status, []).append((pk, *event))
+
+    invalid = sorted(status for status in by_status if new_status not in BaseEvent.VALID_TRANSITIONS.get(status, []))
+    if invalid:
+        raise ValueError(
+            "Invalid status transition: "
+            + ", ".join(f"{status} → {new_status} ({len(by_status[status])} events)" for status in invalid)
+        )
+
+    return apply_status(by_status, new_status, changed_by=changed_by)
+
+
+def apply_status(by_status: dict, new_status: str, *, changed_by=None) -> dict:
+    """
+    Writes new_status to locked events grouped as {previous_status: [(pk, event_type, patient_id), ...]}.
+
+    One UPDATE per previous status, then one bulk_create each of EventStatusHistory
+    and webhook outbox rows. The caller holds the row locks and has checked the
+    transitions.
+    """
+    history, patients = [], {}
+    for previous, events in by_status.items():
+        BaseEvent.objects.filter(pk__in=[pk for pk, _, _ in events], status=previous).update(status=new_status)
+        for pk, event_type, patient_id in events:
+            patients[pk] = patient_id
+            history.append(
+                EventStatusHistory(
+                    event_id=pk,
+                    event_type=event_type,
+                    previous_status=previous,
+                    new_status=new_status,
+                    changed_by=changed_by,
+                )
+            )
+    EventStatusHistory.objects.bulk_create(history)
+    enqueue(*(event_status_message(entry, patient_id=patients[entry.event_id]) for entry in history))
+    return {status: len(events) for status, events in by_status.items()}
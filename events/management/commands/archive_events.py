@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from events.archive import archive_batch, archive_cutoff
+
+
+class Command(BaseCommand):
+    help = "Move completed, canceled and missed events older than EVENTS_ARCHIVE_AFTER_DAYS into the archive."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Events archived per transaction.")
+        parser.add_argument("--interval", type=float, default=86400, help="Seconds between passes.")
+        parser.add_argument("--once", action="store_true", help="Run one pass and exit.")
+
+    def handle(self, *args, **options):
+        batch_size = max(options["batch_size"], 1)
+        while True:
+            # One cutoff per pass, so a long pass does not chase rows ageing in behind it.
+            before = archive_cutoff()
+            total = 0
+            while True:
+                moved = archive_batch(before=before, batch_size=batch_size)
+                total += moved
+                if moved < batch_size:
+                    break
+            if total:
+                self.stdout.write(f"Archived {total} event(s) that ended before {before:%Y-%m-%d}.")
+            if options["once"]:
+                break
+            time.sleep(max(options["interval"], 1))
+
+        self.stdout.write(self.style.SUCCESS("Events archived."))
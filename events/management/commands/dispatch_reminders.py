@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from events.reminders import ReminderDispatcher, schedule_reminders
+
+
+class Command(BaseCommand):
+    help = "Schedule reminders for upcoming events and send the ones that are due."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200, help="Reminders claimed per batch.")
+        parser.add_argument("--interval", type=float, default=30, help="Seconds to sleep when no reminder is due.")
+        parser.add_argument("--max-attempts", type=int, default=3, help="Attempts before a reminder is marked failed.")
+        parser.add_argument("--once", action="store_true", help="Schedule and send due reminders once and exit.")
+
+    def handle(self, *args, **options):
+        try:
+            dispatcher = ReminderDispatcher(
+                batch_size=max(options["batch_size"], 1),
+                max_attempts=max(options["max_attempts"], 1),
+            )
+        except (ImportError, ValueError) as exc:
+            raise CommandError(f"Invalid reminder channel configuration: {exc}") from exc
+
+        while True:
+            scanned = schedule_reminders(batch_size=dispatcher.batch_size * 5)
+            stats = dispatcher.dispatch_batch()
+            if scanned or stats.processed:
+                self.stdout.write(
+                    f"Scanned {scanned} events; sent {stats.sent}, skipped {stats.skipped}, "
+                    f"deferred {stats.deferred}, retrying {stats.retried}, failed {stats.failed}."
+                )
+            if stats.processed == dispatcher.batch_size:
+                continue
+            if options["once"]:
+                break
+            time.sleep(max(options["interval"], 0))
+
+        self.stdout.write(self.style.SUCCESS("Reminder dispatch finished."))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from events.recurrence import extend_horizon, materialization_horizon
+
+
+class Command(BaseCommand):
+    help = "Materialize recurring events up to the rolling horizon (EVENTS_MATERIALIZATION_DAYS ahead)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200, help="Schedules extended per batch and model.")
+        parser.add_argument("--interval", type=float, default=3600, help="Seconds between passes.")
+        parser.add_argument("--once", action="store_true", help="Run one pass and exit.")
+
+    def handle(self, *args, **options):
+        batch_size = max(options["batch_size"], 1)
+        while True:
+            # One horizon per pass, so extended schedules drop out of the next batch.
+            until = materialization_horizon()
+            total = 0
+            while True:
+                extended = extend_horizon(batch_size=batch_size, until=until)
+                total += extended
+                if not extended:
+                    break
+            if total:
+                self.stdout.write(f"Extended {total} schedule(s) to {until:%Y-%m-%d %H:%M}.")
+            if options["once"]:
+                break
+            time.sleep(max(options["interval"], 1))
+
+        self.stdout.write(self.style.SUCCESS("Event horizon extended."))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from events.overdue import sweep_overdue
+
+
+class Command(BaseCommand):
+    help = "Mark REQUESTED/CONFIRMED events whose completion window has passed as MISSED."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Events updated per transaction.")
+        parser.add_argument("--interval", type=float, default=300, help="Seconds between passes.")
+        parser.add_argument("--once", action="store_true", help="Run one pass and exit.")
+
+    def handle(self, *args, **options):
+        batch_size = max(options["batch_size"], 1)
+        while True:
+            swept = sweep_overdue(batch_size=batch_size)
+            for event_type, count in swept.items():
+                self.stdout.write(f"Marked {count} {event_type} event(s) missed.")
+            if options["once"]:
+                break
+            time.sleep(max(options["interval"], 1))
+
+        self.stdout.write(self.style.SUCCESS("Overdue events swept."))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='baseevent',
+            name='status',
+            field=models.CharField(choices=[('REQUESTED', 'Requested'), ('CONFIRMED', 'Confirmed'), ('INITIATED', 'Initiated'), ('COMPLETED', 'Completed'), ('CANCELED', 'Canceled'), ('RESCHEDULED', 'Rescheduled'), ('MISSED', 'Missed')], db_index=True, default='REQUESTED', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='eventstatushistory',
+            name='new_status',
+            field=models.CharField(choices=[('REQUESTED', 'Requested'), ('CONFIRMED', 'Confirmed'), ('INITIATED', 'Initiated'), ('COMPLETED', 'Completed'), ('CANCELED', 'Canceled'), ('RESCHEDULED', 'Rescheduled'), ('MISSED', 'Missed')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='eventstatushistory',
+            name='previous_status',
+            field=models.CharField(choices=[('REQUESTED', 'Requested'), ('CONFIRMED', 'Confirmed'), ('INITIATED', 'Initiated'), ('COMPLETED', 'Completed'), ('CANCELED', 'Canceled'), ('RESCHEDULED', 'Rescheduled'), ('MISSED', 'Missed')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:12
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# (app, model, patient lookup, start field, end field or None for scheduled_to + duration_minutes)
+EVENT_SOURCES = [
+    ("medications", "TakeMedicationEvent", "medication_item__patient_id", "scheduled_to_complete_from", "scheduled_to_complete_until"),
+    ("careplans", "CarePlanActivityEvent", "action__careplan__patient_id", "due_from", "due_until"),
+    ("appointments", "Appointment", "patient_id", "scheduled_to", None),
+]
+
+
+def backfill_event_patient_window(apps, schema_editor):
+    BaseEvent = apps.get_model("events", "BaseEvent")
+    for app_label, model_name, patient, start, end in EVENT_SOURCES:
+        model = apps.get_model(app_label, model_name)
+        columns = ("pk", patient, start, end or "duration_minutes")
+        batch = []
+        for pk, patient_id, starts_at, end_value in model.objects.order_by().values_list(*columns).iterator(chunk_size=2000):
+            ends_at = end_value if end else starts_at + timedelta(minutes=end_value)
+            batch.append(BaseEvent(pk=pk, event_patient_id=patient_id, starts_at=starts_at, ends_at=ends_at))
+            if len(batch) >= 2000:
+                BaseEvent.objects.bulk_update(batch, ["event_patient", "starts_at", "ends_at"])
+                batch = []
+        BaseEvent.objects.bulk_update(batch, ["event_patient", "starts_at", "ends_at"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0003_event_missed_status'),
+        ('patients', '0003_patient_sex'),
+        ('medications', '0003_recurrence_rule'),
+        ('careplans', '0004_recurrence_rule'),
+        ('appointments', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='baseevent',
+            name='ends_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='baseevent',
+            name='event_patient',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='events', to='patients.patient'),
+        ),
+        migrations.AddField(
+            model_name='baseevent',
+            name='starts_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='baseevent',
+            index=models.Index(fields=['event_patient', 'starts_at'], name='events_base_event_p_fb4664_idx'),
+        ),
+        migrations.RunPython(backfill_event_patient_window, migrations.RunPython.noop),
+    ]
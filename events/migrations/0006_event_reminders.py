@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:22
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0005_archived_event'),
+        ('patients', '0003_patient_sex'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lead_minutes', models.PositiveIntegerField()),
+                ('remind_at', models.DateTimeField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('skipped', 'Skipped'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField()),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('sent_via', models.CharField(blank=True, default='', max_length=50)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ReminderCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(max_length=50)),
+                ('lead_minutes', models.PositiveIntegerField()),
+                ('scanned_until', models.DateTimeField()),
+                ('last_event_id', models.UUIDField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='baseevent',
+            index=models.Index(condition=models.Q(('status__in', ['REQUESTED', 'CONFIRMED'])), fields=['event_type', 'starts_at', 'id'], name='event_open_starts_idx'),
+        ),
+        migrations.AddField(
+            model_name='eventreminder',
+            name='event',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='events.baseevent'),
+        ),
+        migrations.AddConstraint(
+            model_name='remindercursor',
+            constraint=models.UniqueConstraint(fields=('event_type', 'lead_minutes'), name='uniq_reminder_cursor'),
+        ),
+        migrations.AddIndex(
+            model_name='eventreminder',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['next_attempt_at'], name='event_reminder_pending_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='eventreminder',
+            constraint=models.UniqueConstraint(fields=('event', 'lead_minutes'), name='uniq_event_reminder'),
+        ),
+    ]
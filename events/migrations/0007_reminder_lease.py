@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0006_event_reminders'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventreminder',
+            name='leased_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='eventreminder',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('skipped', 'Skipped'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='eventreminder',
+            index=models.Index(condition=models.Q(('status', 'sending')), fields=['leased_until'], name='event_reminder_sending_idx'),
+        ),
+    ]
@@ -1,9 +1,12 @@
 # events/models.py
 import uuid
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
 from django.utils import timezone
 from django.conf import settings
 
+from webhooks.outbox import enqueue, event_status_message
+
 
 class BaseEvent(models.Model):
     """
@@ -19,15 +22,17 @@ class BaseEvent(models.Model):
         COMPLETED = "COMPLETED", "Completed"
         CANCELED = "CANCELED", "Canceled"
         RESCHEDULED = "RESCHEDULED", "Rescheduled"
+        MISSED = "MISSED", "Missed"
 
     # Allowed transitions (enforced in update_status)
     VALID_TRANSITIONS = {
-        Status.REQUESTED: [Status.CONFIRMED, Status.CANCELED],
-        Status.CONFIRMED: [Status.INITIATED, Status.CANCELED, Status.RESCHEDULED],
+        Status.REQUESTED: [Status.CONFIRMED, Status.CANCELED, Status.MISSED],
+        Status.CONFIRMED: [Status.INITIATED, Status.CANCELED, Status.RESCHEDULED, Status.MISSED],
         Status.INITIATED: [Status.COMPLETED, Status.CANCELED],
         Status.COMPLETED: [],
         Status.CANCELED: [],
         Status.RESCHEDULED: [Status.CONFIRMED],  # must confirm the rescheduled instance
+        Status.MISSED: [],  # set by the overdue sweeper once the window has passed
     }
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -62,11 +67,34 @@ class BaseEvent(models.Model):
         related_name="rescheduled_from",
     )
 
+    # Denormalized from the subtype so one indexed query reads a patient's events of every type.
+    # Kept in sync by save() (see sync_denormalized); not named `patient` as Appointment has its own.
+    event_patient = models.ForeignKey(
+        "patients.Patient",
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="events",
+        db_index=False,  # covered by the (event_patient, starts_at) index
+    )
+    starts_at = models.DateTimeField(null=True, blank=True)
+    ends_at = models.DateTimeField(null=True, blank=True)
+
+    # Subtype fields that feed event_patient/starts_at/ends_at.
+    denormalized_sources = ()
+
     class Meta:
         ordering = ["-created_at"]
         indexes = [
             models.Index(fields=["event_type", "status"]),
             models.Index(fields=["created_by", "created_at"]),
+            models.Index(fields=["event_patient", "starts_at"]),
+            # Keyset scans of upcoming open events by type (reminder scheduling).
+            models.Index(
+                fields=["event_type", "starts_at", "id"],
+                condition=models.Q(status__in=["REQUESTED", "CONFIRMED"]),
+                name="event_open_starts_idx",
+            ),
         ]
 
     def __str__(self):
@@ -78,8 +106,31 @@ class BaseEvent(models.Model):
         # Auto-fill event_type with the concrete child class name if not set
         if not self.event_type:
             self.event_type = self.__class__.__name__.lower()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None:
+            self.sync_denormalized()
+        elif set(update_fields) & set(self.denormalized_sources):
+            self.sync_denormalized()
+            kwargs["update_fields"] = {*update_fields, "event_patient", "starts_at", "ends_at"}
         super().save(*args, **kwargs)
 
+    def get_event_patient_id(self):
+        return None
+
+    def get_event_window(self) -> tuple:
+        return None, None
+
+    def sync_event_window(self) -> None:
+        self.starts_at, self.ends_at = self.get_event_window()
+
+    def sync_denormalized(self) -> None:
+        """
+        Copies the patient and time window from the subtype fields onto BaseEvent.
+        Paths that skip save() (bulk_create_events, bulk_update) call this themselves.
+        """
+        self.event_patient_id = self.get_event_patient_id()
+        self.sync_event_window()
+
     def validate_status_transition(self, new_status: str) -> None:
         current = self.status
         allowed = self.VALID_TRANSITIONS.get(current, [])
@@ -92,18 +143,21 @@ class BaseEvent(models.Model):
 
         self.validate_status_transition(new_status)
 
-        # Persist change first so history captures the new truth even if signal/other logic runs
-        previous = self.status
-        self.status = new_status
-        self.save(update_fields=["status"])
-
-        EventStatusHistory.objects.create(
-            event=self,
-            event_type=self.event_type,
-            previous_status=previous,
-            new_status=new_status,
-            changed_by=changed_by,
-        )
+        with transaction.atomic():
+            # Persist change first so history captures the new truth even if signal/other logic runs
+            previous = self.status
+            self.status = new_status
+            self.save(update_fields=["status"])
+
+            history = EventStatusHistory.objects.create(
+                event=self,
+                event_type=self.event_type,
+                previous_status=previous,
+                new_status=new_status,
+                changed_by=changed_by,
+            )
+            # Webhook outbox row, committed together with the change.
+            enqueue(event_status_message(history, patient_id=self.event_patient_id))
 
     def mark_rescheduled(self, new_event: "BaseEvent", changed_by=None) -> None:
         """
@@ -142,6 +196,110 @@ class EventStatusHistory(models.Model):
         return f"{self.event_type or 'event'}: {self.previous_status} → {self.new_status} @ {self.changed_at:%Y-%m-%d %H:%M}"
 
 
+class ArchivedEvent(models.Model):
+    """
+    Cold copy of a terminal event moved out of the hot tables by
+    `manage.py archive_events` (see events/archive.py).
+
+    Keeps the original id, so audit lookups by event id still resolve, plus the
+    columns historical reads filter on. `data` holds every base and subtype
+    column by attname and `history` the event's status changes, oldest first.
+    """
+    id = models.UUIDField(primary_key=True, editable=False)
+    event_type = models.CharField(max_length=50, blank=True)
+    status = models.CharField(max_length=20, choices=BaseEvent.Status.choices)
+    description = models.TextField(blank=True)
+    event_patient = models.ForeignKey(
+        "patients.Patient",
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="archived_events",
+        db_index=False,  # covered by the (event_patient, starts_at) index
+    )
+    starts_at = models.DateTimeField(null=True, blank=True)
+    ends_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    history = models.JSONField(encoder=DjangoJSONEncoder, default=list)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["event_patient", "starts_at"])]
+
+    def __str__(self):
+        return f"{self.event_type or 'event'} [{self.status}] archived @ {self.archived_at:%Y-%m-%d %H:%M}"
+
+
+class EventReminder(models.Model):
+    """
+    One reminder for an event, `lead_minutes` before it starts (see events/reminders).
+
+    Unique per (event, lead_minutes), so an event is never reminded twice for the
+    same lead; the dispatch_reminders worker claims due rows with SKIP LOCKED and
+    commits them as `sending` (with a lease) before it sends.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        SENDING = "sending", "Sending"
+        SENT = "sent", "Sent"
+        SKIPPED = "skipped", "Skipped"  # event closed or gone past before sending
+        FAILED = "failed", "Failed"
+
+    event = models.ForeignKey(BaseEvent, on_delete=models.CASCADE, related_name="reminders")
+    lead_minutes = models.PositiveIntegerField()
+    remind_at = models.DateTimeField()
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField()
+    leased_until = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, default="")
+    sent_at = models.DateTimeField(blank=True, null=True)
+    sent_via = models.CharField(max_length=50, blank=True, default="")
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["event", "lead_minutes"], name="uniq_event_reminder"),
+        ]
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at"],
+                condition=models.Q(status="pending"),
+                name="event_reminder_pending_idx",
+            ),
+            models.Index(
+                fields=["leased_until"],
+                condition=models.Q(status="sending"),
+                name="event_reminder_sending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Reminder {self.id} for {self.event_id} ({self.status})"
+
+
+class ReminderCursor(models.Model):
+    """
+    How far reminders have been scheduled for one (event_type, lead): events are
+    scanned in (starts_at, id) order, resuming after (scanned_until, last_event_id).
+    """
+    event_type = models.CharField(max_length=50)
+    lead_minutes = models.PositiveIntegerField()
+    scanned_until = models.DateTimeField()
+    last_event_id = models.UUIDField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["event_type", "lead_minutes"], name="uniq_reminder_cursor"),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} -{self.lead_minutes}m @ {self.scanned_until:%Y-%m-%d %H:%M}"
+
+
 # ---------- Abstract specializations (keep abstract!) ----------
 
 class ScheduledCheckpointEvent(BaseEvent):
@@ -152,10 +310,18 @@ class ScheduledCheckpointEvent(BaseEvent):
     scheduled_to_complete_from = models.DateTimeField(db_index=True)
     scheduled_to_complete_until = models.DateTimeField(db_index=True)
 
+    # Past this field the overdue sweeper marks open events MISSED (events/overdue.py)
+    window_end_field = "scheduled_to_complete_until"
+
     class Meta:
         abstract = True
         ordering = ["scheduled_to_complete_from"]
 
+    denormalized_sources = ("scheduled_to_complete_from", "scheduled_to_complete_until")
+
+    def get_event_window(self) -> tuple:
+        return self.scheduled_to_complete_from, self.scheduled_to_complete_until
+
     def is_within_timeframe(self) -> bool:
         now = timezone.now()
         return self.scheduled_to_complete_from <= now <= self.scheduled_to_complete_until
@@ -178,6 +344,13 @@ class ScheduledTimedEvent(BaseEvent):
         abstract = True
         ordering = ["scheduled_to"]
 
+    denormalized_sources = ("scheduled_to", "duration_minutes")
+
+    def get_event_window(self) -> tuple:
+        if self.scheduled_to is None or self.duration_minutes is None:
+            return self.scheduled_to, None
+        return self.scheduled_to, self.get_end_time()
+
     def get_end_time(self):
         return self.scheduled_to + timezone.timedelta(minutes=self.duration_minutes)
 
@@ -193,10 +366,17 @@ class ScheduledDueWindowEvent(BaseEvent):
     due_from = models.DateTimeField(db_index=True, default=None)
     due_until = models.DateTimeField(db_index=True, default=None)
 
+    window_end_field = "due_until"
+
     class Meta:
         abstract = True
         ordering = ["due_from"]
 
+    denormalized_sources = ("due_from", "due_until")
+
+    def get_event_window(self) -> tuple:
+        return self.due_from, self.due_until
+
     def is_within_window(self) -> bool:
         now = timezone.now()
         return self.due_from <= now <= self.due_until
@@ -205,3 +385,56 @@ class ScheduledDueWindowEvent(BaseEvent):
         if not self.is_within_window():
             raise ValueError("Cannot complete outside due window.")
         self.update_status(BaseEvent.Status.COMPLETED, changed_by=changed_by)
+
+
+class RecurringSchedule(models.Model):
+    """
+    Mixin for models whose events follow a recurrence rule (RFC 5545 DTSTART + RRULE text).
+
+    Only occurrences up to `materialized_until` exist as event rows; the extender job
+    (`manage.py extend_event_horizon`) keeps that a rolling window ahead of now, and
+    later occurrences are computed on read. See events/recurrence.py.
+
+    Concrete models implement build_occurrence_event() and occurrence_events() and
+    name the start/end fields of their event model.
+    """
+    recurrence_rule = models.TextField(blank=True, default="")
+    occurrence_minutes = models.PositiveIntegerField(default=60)
+    # Last occurrence of a finite rule; null while the rule is open-ended.
+    recurrence_ends_at = models.DateTimeField(null=True, blank=True)
+    materialized_until = models.DateTimeField(null=True, blank=True)
+
+    occurrence_start_field = ""
+    occurrence_end_field = ""
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def recurring_sources(cls):
+        """
+        Rows the extender keeps materializing; override to leave out finished ones.
+        """
+        return cls.objects.exclude(recurrence_rule="")
+
+    def set_recurrence(self, rule: str, *, occurrence_minutes: int) -> None:
+        """
+        Replaces the rule; call materialize() afterwards to create the first window.
+        """
+        from events.recurrence import rule_ends_at
+
+        self.recurrence_rule = rule
+        self.occurrence_minutes = occurrence_minutes
+        self.recurrence_ends_at = rule_ends_at(rule) if rule else None
+        self.materialized_until = None
+        self.save(update_fields=["recurrence_rule", "occurrence_minutes", "recurrence_ends_at", "materialized_until"])
+
+    def clear_recurrence(self) -> None:
+        self.recurrence_rule, self.recurrence_ends_at, self.materialized_until = "", None, None
+        self.save(update_fields=["recurrence_rule", "recurrence_ends_at", "materialized_until"])
+
+    def build_occurrence_event(self, at, *, created_by=None) -> BaseEvent:
+        raise NotImplementedError
+
+    def occurrence_events(self):
+        raise NotImplementedError
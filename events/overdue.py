@@ -0,0 +1,65 @@
+# events/overdue.py
+from datetime import datetime
+
+from django.apps import apps
+from django.db import transaction
+from django.utils import timezone
+
+from events.bulk import apply_status
+from events.models import BaseEvent
+
+OPEN_STATUSES = (BaseEvent.Status.REQUESTED, BaseEvent.Status.CONFIRMED)
+
+
+def windowed_models() -> list[type[BaseEvent]]:
+    """
+    Concrete events with a completion window (see window_end_field on their abstract base).
+    """
+    return [
+        model
+        for model in apps.get_models()
+        if issubclass(model, BaseEvent) and getattr(model, "window_end_field", "")
+    ]
+
+
+@transaction.atomic
+def mark_missed(model: type[BaseEvent], *, now: datetime, batch_size: int = 500) -> int:
+    """
+    Moves up to batch_size REQUESTED/CONFIRMED events of `model` whose window ended
+    before `now` to MISSED, with their status history. Returns how many moved.
+
+    The open-status filter goes through the (event_type, status) index on BaseEvent,
+    so the scan covers open events rather than the whole history. Rows another
+    transaction holds (e.g. a patient completing the dose) are skipped until the
+    next batch.
+    """
+    rows = list(
+        model.objects.select_for_update(skip_locked=True)
+        .filter(event_type=model.__name__.lower(), status__in=OPEN_STATUSES)
+        .filter(**{f"{model.window_end_field}__lt": now})
+        .order_by()
+        .values_list("pk", "status", "event_type", "event_patient_id")[:batch_size]
+    )
+    by_status = {}
+    for pk, status, *event in rows:
+        by_status.setdefault(status, []).append((pk, *event))
+    apply_status(by_status, BaseEvent.Status.MISSED)
+    return len(rows)
+
+
+def sweep_overdue(*, batch_size: int = 500, now: datetime | None = None) -> dict:
+    """
+    Marks every overdue open event MISSED, batch by batch. Returns counts per event_type.
+    """
+    now = now or timezone.now()
+    swept = {}
+    for model in windowed_models():
+        total = 0
+        while True:
+            moved = mark_missed(model, now=now, batch_size=batch_size)
+            total += moved
+            if moved < batch_size:
+                break
+        if total:
+            swept[model.__name__.lower()] = total
+    return swept
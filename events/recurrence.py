@@ -0,0 +1,257 @@
+# events/recurrence.py
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from dateutil.rrule import rrulestr
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from events.bulk import bulk_create_events
+from events.models import BaseEvent, RecurringSchedule
+
+# Outcomes regeneration never rewrites or deletes.
+KEPT_STATUSES = (BaseEvent.Status.COMPLETED, BaseEvent.Status.MISSED)
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+END_OF_TIME = datetime(9999, 12, 31, tzinfo=dt_timezone.utc)
+MAX_READ_WINDOW = timedelta(days=400)
+
+
+def format_rule(dtstart: datetime, rules: list[str], *, wall_clock: bool = False) -> str:
+    """
+    RFC 5545 text for `rules` starting at dtstart.
+
+    With wall_clock=True the start carries the current time zone, so daily and
+    weekly rules keep their local time across DST changes; otherwise it is UTC and
+    intervals stay exact (e.g. a dose every 8 hours).
+    """
+    if wall_clock:
+        zone = timezone.get_current_timezone()
+        start = f"DTSTART;TZID={zone.key}:{timezone.localtime(dtstart, zone):%Y%m%dT%H%M%S}"
+    else:
+        start = f"DTSTART:{format_utc(dtstart)}"
+    return "\n".join([start] + [f"RRULE:{rule}" for rule in rules])
+
+
+def format_utc(value: datetime) -> str:
+    return f"{value.astimezone(dt_timezone.utc):%Y%m%dT%H%M%SZ}"
+
+
+def parse_rule(rule: str):
+    return rrulestr(rule, forceset=True)
+
+
+def rule_ends_at(rule: str) -> datetime | None:
+    """
+    Last occurrence of the rule, or None when any RRULE has neither COUNT nor UNTIL.
+    """
+    lines = [line for line in rule.splitlines() if line.startswith("RRULE:")]
+    if not lines or any("COUNT=" not in line and "UNTIL=" not in line for line in lines):
+        return None
+    return parse_rule(rule).before(END_OF_TIME, inc=True)
+
+
+def occurrences(rule: str, *, after: datetime | None = None, until: datetime) -> list[datetime]:
+    """
+    Occurrences later than `after` (from the first one when None) up to and including `until`.
+    """
+    times = parse_rule(rule).between(after or EPOCH, until, inc=True)
+    return [at for at in times if after is None or at > after]
+
+
+def materialization_horizon(now: datetime | None = None) -> datetime:
+    return (now or timezone.now()) + timedelta(days=getattr(settings, "EVENTS_MATERIALIZATION_DAYS", 14))
+
+
+@transaction.atomic
+def materialize(source: RecurringSchedule, *, until: datetime | None = None, created_by=None) -> int:
+    """
+    Creates the source's events between its materialized_until and `until`, once.
+
+    Returns the number of events created.
+    """
+    until = until or materialization_horizon()
+    model = type(source)
+    # The row lock serializes the extender with a rule being replaced or extended elsewhere.
+    rule, materialized_until = (
+        model.objects.select_for_update().filter(pk=source.pk).values_list("recurrence_rule", "materialized_until").get()
+    )
+    if not rule or (materialized_until and materialized_until >= until):
+        return 0
+    times = occurrences(rule, after=materialized_until, until=until)
+    bulk_create_events([source.build_occurrence_event(at, created_by=created_by) for at in times])
+    model.objects.filter(pk=source.pk).update(materialized_until=until)
+    source.materialized_until = until
+    return len(times)
+
+
+@transaction.atomic
+def regenerate(source: RecurringSchedule, rule: str, *, occurrence_minutes: int, created_by=None) -> dict:
+    """
+    Replaces the source's rule and brings its stored events in line with it up to
+    the horizon, touching only what changed (see sync_events). An empty rule
+    leaves no open events.
+    """
+    model = type(source)
+    model.objects.select_for_update().filter(pk=source.pk).exists()
+    source.set_recurrence(rule, occurrence_minutes=occurrence_minutes)
+    until = materialization_horizon()
+    desired = [source.build_occurrence_event(at, created_by=created_by) for at in occurrences(rule, until=until)] if rule else []
+    changes = sync_events(source, desired)
+    if rule:
+        model.objects.filter(pk=source.pk).update(materialized_until=until)
+        source.materialized_until = until
+    return changes
+
+
+@transaction.atomic
+def sync_events(source: RecurringSchedule, desired: list[BaseEvent]) -> dict:
+    """
+    Makes the source's stored events match `desired` (unsaved events) by start time.
+
+    Completed and missed events are never touched, and no occurrence is created
+    at the start of one. Open events whose start is still wanted keep their row and get
+    their window and description updated if needed. Leftover untouched
+    (REQUESTED) events are moved to the new starts in chronological order. Only
+    what remains is deleted or inserted. Returns the counts.
+    """
+    start_field, end_field = source.occurrence_start_field, source.occurrence_end_field
+    existing = list(source.occurrence_events().order_by(start_field))
+    kept_starts = {getattr(event, start_field) for event in existing if event.status in KEPT_STATUSES}
+    open_by_start = {}
+    for event in existing:
+        if event.status not in KEPT_STATUSES:
+            open_by_start.setdefault(getattr(event, start_field), []).append(event)
+
+    def differs(event, wanted):
+        return any(getattr(event, name) != getattr(wanted, name) for name in (start_field, end_field, "description"))
+
+    def copy(event, wanted):
+        for name in (start_field, end_field, "description"):
+            setattr(event, name, getattr(wanted, name))
+        event.sync_event_window()
+
+    to_update, added = [], []
+    for wanted in desired:
+        start = getattr(wanted, start_field)
+        if start in kept_starts:
+            continue
+        if open_by_start.get(start):
+            event = open_by_start[start].pop(0)
+            if differs(event, wanted):
+                copy(event, wanted)
+                to_update.append(event)
+        else:
+            added.append(wanted)
+
+    leftovers = sorted((event for events in open_by_start.values() for event in events), key=lambda e: getattr(e, start_field))
+    movable = [event for event in leftovers if event.status == BaseEvent.Status.REQUESTED]
+    moved = list(zip(movable, added))
+    for event, wanted in moved:
+        copy(event, wanted)
+        to_update.append(event)
+    added = added[len(moved):]
+    moved_ids = {event.pk for event, _ in moved}
+    removed = [event for event in leftovers if event.pk not in moved_ids]
+
+    if removed:
+        source.occurrence_events().filter(pk__in=[event.pk for event in removed]).delete()
+    if to_update:
+        type(to_update[0]).objects.bulk_update(to_update, [start_field, end_field, "description", "starts_at", "ends_at"])
+    bulk_create_events(added)
+    return {"created": len(added), "updated": len(to_update), "deleted": len(removed)}
+
+
+def recurring_models() -> list[type[RecurringSchedule]]:
+    return [model for model in apps.get_models() if issubclass(model, RecurringSchedule)]
+
+
+def extend_horizon(*, batch_size: int = 200, until: datetime | None = None) -> int:
+    """
+    Materializes up to the horizon for up to batch_size sources per model that fall short of it.
+
+    Returns the number of sources extended; call again while it equals the batch total.
+    """
+    until = until or materialization_horizon()
+    extended = 0
+    for model in recurring_models():
+        pending = (
+            model.recurring_sources()
+            .filter(Q(materialized_until__isnull=True) | Q(materialized_until__lt=until))
+            # Finite rules drop out once their last occurrence is materialized.
+            .filter(
+                Q(recurrence_ends_at__isnull=True)
+                | Q(materialized_until__isnull=True)
+                | Q(recurrence_ends_at__gt=F("materialized_until"))
+            )
+            .order_by("materialized_until", "pk")[:batch_size]
+        )
+        for source in pending:
+            materialize(source, until=until)
+            extended += 1
+    return extended
+
+
+def schedule_window(query_params, *, default_days: int = 30, require_from: bool = False) -> tuple[datetime, datetime]:
+    """
+    Reads ?from=&to= (ISO 8601) for schedule reads, defaulting to the next `default_days`.
+
+    History reads pass require_from=True, since a window starting now would never
+    reach past events.
+    """
+    now = timezone.now()
+    bounds = []
+    for name, default in (("from", now), ("to", None)):
+        raw = query_params.get(name)
+        if not raw:
+            if name == "from" and require_from:
+                raise ValueError("'from' is required.")
+            bounds.append(default)
+            continue
+        value = parse_datetime(raw)
+        if value is None:
+            raise ValueError(f"'{name}' must be an ISO 8601 datetime.")
+        bounds.append(value if timezone.is_aware(value) else timezone.make_aware(value))
+    start, end = bounds
+    end = end or start + timedelta(days=default_days)
+    if end < start:
+        raise ValueError("'to' must not be before 'from'.")
+    if end - start > MAX_READ_WINDOW:
+        raise ValueError(f"Schedules are read at most {MAX_READ_WINDOW.days} days at a time.")
+    return start, end
+
+
+def schedule_between(source: RecurringSchedule, start: datetime, end: datetime) -> list[dict]:
+    """
+    The source's occurrences starting within [start, end]: stored events, then the
+    virtual ones past materialized_until (no id, status REQUESTED).
+    """
+    start_field, end_field = source.occurrence_start_field, source.occurrence_end_field
+    items = [
+        {
+            "id": str(event.id),
+            "starts_at": getattr(event, start_field),
+            "ends_at": getattr(event, end_field),
+            "status": event.status,
+            "is_virtual": False,
+        }
+        for event in source.occurrence_events()
+        .filter(**{f"{start_field}__gte": start, f"{start_field}__lte": end})
+        .order_by(start_field)
+    ]
+    if source.recurrence_rule:
+        duration = timedelta(minutes=source.occurrence_minutes)
+        items.extend(
+            {
+                "id": None,
+                "starts_at": at,
+                "ends_at": at + duration,
+                "status": BaseEvent.Status.REQUESTED,
+                "is_virtual": True,
+            }
+            for at in occurrences(source.recurrence_rule, after=source.materialized_until, until=end)
+            if at >= start
+        )
+    return items
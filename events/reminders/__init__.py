@@ -0,0 +1,13 @@
+from .channels import EmailChannel, LoggingChannel, ReminderChannel, StubChannel
+from .dispatcher import DispatchStats, ReminderDispatcher
+from .scheduler import schedule_reminders
+
+__all__ = [
+    "DispatchStats",
+    "EmailChannel",
+    "LoggingChannel",
+    "ReminderChannel",
+    "ReminderDispatcher",
+    "StubChannel",
+    "schedule_reminders",
+]
@@ -0,0 +1,64 @@
+import logging
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def reminder_text(reminder) -> str:
+    event = reminder.event
+    what = event.description or event.event_type
+    return f"Reminder: {what} at {timezone.localtime(event.starts_at):%Y-%m-%d %H:%M}."
+
+
+class ReminderChannel:
+    """
+    Delivers one event reminder to the event's patient; raise on failure so the reminder is retried.
+    """
+
+    name = ""
+
+    def send(self, reminder) -> None:
+        raise NotImplementedError
+
+
+class EmailChannel(ReminderChannel):
+    name = "email"
+
+    def send(self, reminder) -> None:
+        email = reminder.event.event_patient.email
+        if not email:
+            raise ValueError("Patient has no email address.")
+        send_mail(
+            subject="Bayleaf reminder",
+            message=reminder_text(reminder),
+            from_email=getattr(settings, "DEFAULT_FROM_EMAIL", None),
+            recipient_list=[email],
+        )
+
+
+class LoggingChannel(ReminderChannel):
+    name = "log"
+
+    def send(self, reminder) -> None:
+        logger.info("Reminder %s for patient %s: %s", reminder.id, reminder.event.event_patient_id, reminder_text(reminder))
+
+
+class StubChannel(ReminderChannel):
+    """
+    In-memory channel for tests and local runs; fails the first `fail_times` sends.
+    """
+
+    name = "stub"
+
+    def __init__(self, fail_times: int = 0):
+        self.fail_times = fail_times
+        self.sent = []
+
+    def send(self, reminder) -> None:
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise ConnectionError("Stub channel failure.")
+        self.sent.append(reminder)
@@ -0,0 +1,140 @@
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from events.models import EventReminder
+from events.overdue import OPEN_STATUSES
+
+DEFAULT_CHANNELS = ["events.reminders.channels.EmailChannel"]
+
+
+@dataclass
+class DispatchStats:
+    sent: int = 0
+    skipped: int = 0
+    deferred: int = 0
+    retried: int = 0
+    failed: int = 0
+
+    @property
+    def processed(self) -> int:
+        return self.sent + self.skipped + self.deferred + self.retried + self.failed
+
+
+def load_channels():
+    return [import_string(path)() for path in getattr(settings, "EVENTS_REMINDER_CHANNELS", DEFAULT_CHANNELS)]
+
+
+class ReminderDispatcher:
+    """
+    Sends due event reminders in batches, at most once each.
+
+    _claim() locks due rows with SELECT ... FOR UPDATE SKIP LOCKED, so several
+    workers can run side by side, and commits them as `sending` with a lease and
+    the attempt counted. Only then are they sent, outside any transaction, and
+    each outcome is recorded on its own. A reminder still `sending` when its
+    lease runs out belonged to a worker that stopped mid-send; it may have gone
+    out, so it is marked failed rather than sent again.
+
+    Reminders whose event is no longer open or has already started are skipped;
+    if the event moved later the reminder waits for the new time. Channels are
+    tried in order until one accepts the reminder; when all fail it is retried
+    with exponential backoff and marked failed after max_attempts.
+    """
+
+    def __init__(
+        self,
+        channels=None,
+        *,
+        batch_size: int = 200,
+        max_attempts: int = 3,
+        retry_base_seconds: int = 30,
+        lease_seconds: int = 300,
+    ):
+        self.channels = channels if channels is not None else load_channels()
+        if not self.channels:
+            raise ValueError("At least one reminder channel is required.")
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.lease_seconds = lease_seconds
+
+    def dispatch_batch(self) -> DispatchStats:
+        stats = DispatchStats()
+        for reminder in self._claim(stats):
+            channel_name, errors = self._deliver(reminder)
+            self._record(reminder, channel_name, errors, stats)
+        return stats
+
+    @transaction.atomic
+    def _claim(self, stats: DispatchStats) -> list[EventReminder]:
+        now = timezone.now()
+        stats.failed += EventReminder.objects.filter(status=EventReminder.Status.SENDING, leased_until__lt=now).update(
+            status=EventReminder.Status.FAILED,
+            leased_until=None,
+            last_error="Worker stopped while sending; not resent to avoid a duplicate.",
+        )
+        reminders = list(
+            EventReminder.objects.select_for_update(skip_locked=True, of=("self",))
+            .select_related("event", "event__event_patient")
+            .filter(status=EventReminder.Status.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[: self.batch_size]
+        )
+
+        claimed = []
+        for reminder in reminders:
+            event = reminder.event
+            if event.status not in OPEN_STATUSES or event.starts_at is None or event.starts_at <= now or event.event_patient is None:
+                reminder.status = EventReminder.Status.SKIPPED
+                stats.skipped += 1
+                continue
+            remind_at = event.starts_at - timedelta(minutes=reminder.lead_minutes)
+            if remind_at > now:
+                # The event was rescheduled later since the reminder was planned.
+                reminder.remind_at = reminder.next_attempt_at = remind_at
+                stats.deferred += 1
+                continue
+            reminder.status = EventReminder.Status.SENDING
+            reminder.attempts += 1
+            reminder.leased_until = now + timedelta(seconds=self.lease_seconds)
+            claimed.append(reminder)
+
+        EventReminder.objects.bulk_update(reminders, ["status", "attempts", "remind_at", "next_attempt_at", "leased_until"])
+        return claimed
+
+    def _record(self, reminder, channel_name: str | None, errors: list[str], stats: DispatchStats) -> None:
+        now = timezone.now()
+        if channel_name is not None:
+            fields = {"status": EventReminder.Status.SENT, "sent_at": now, "sent_via": channel_name, "last_error": ""}
+            stats.sent += 1
+        elif reminder.attempts >= self.max_attempts:
+            fields = {"status": EventReminder.Status.FAILED, "last_error": "; ".join(errors)[:2000]}
+            stats.failed += 1
+        else:
+            fields = {
+                "status": EventReminder.Status.PENDING,
+                "next_attempt_at": now + timedelta(seconds=self.retry_base_seconds * 2 ** (reminder.attempts - 1)),
+                "last_error": "; ".join(errors)[:2000],
+            }
+            stats.retried += 1
+        for name, value in fields.items():
+            setattr(reminder, name, value)
+        reminder.leased_until = None
+        # One UPDATE, committed on its own.
+        EventReminder.objects.filter(pk=reminder.pk).update(leased_until=None, **fields)
+
+    def _deliver(self, reminder) -> tuple[str | None, list[str]]:
+        errors = []
+        for channel in self.channels:
+            try:
+                channel.send(reminder)
+            except Exception as exc:
+                # Any channel failure means "try the next one"; the errors are kept on the reminder.
+                errors.append(f"{channel.name or type(channel).__name__}: {exc}")
+                continue
+            return channel.name or type(channel).__name__, errors
+        return None, errors
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from events.models import BaseEvent, EventReminder, ReminderCursor
+from events.overdue import OPEN_STATUSES
+
+# Minutes before starts_at, by event_type.
+DEFAULT_LEADS = {
+    "takemedicationevent": [15],
+    "appointment": [24 * 60, 60],
+}
+
+
+def reminder_leads() -> dict[str, list[int]]:
+    return getattr(settings, "EVENTS_REMINDER_LEADS", DEFAULT_LEADS)
+
+
+@transaction.atomic
+def schedule_batch(event_type: str, lead_minutes: int, *, until: datetime, batch_size: int = 1000) -> int:
+    """
+    Creates reminders due by `until` for up to batch_size open events of event_type,
+    continuing from the (event_type, lead) cursor. Returns how many events were scanned.
+
+    The scan walks the open-event (event_type, starts_at, id) index from the
+    cursor, so each event is read once per lead however often this runs. A new
+    cursor starts at now, so events already inside their lead time are not
+    reminded. A cursor being advanced by another worker is skipped.
+    """
+    lead = timedelta(minutes=lead_minutes)
+    ReminderCursor.objects.get_or_create(
+        event_type=event_type, lead_minutes=lead_minutes, defaults={"scanned_until": timezone.now() + lead}
+    )
+    cursor = (
+        ReminderCursor.objects.select_for_update(skip_locked=True)
+        .filter(event_type=event_type, lead_minutes=lead_minutes)
+        .first()
+    )
+    if cursor is None:
+        return 0
+
+    after = Q(starts_at__gt=cursor.scanned_until)
+    if cursor.last_event_id:
+        after |= Q(starts_at=cursor.scanned_until, id__gt=cursor.last_event_id)
+    end = until + lead
+    events = list(
+        BaseEvent.objects.filter(after, event_type=event_type, status__in=OPEN_STATUSES, starts_at__lte=end)
+        .order_by("starts_at", "id")
+        .values_list("id", "starts_at")[:batch_size]
+    )
+    EventReminder.objects.bulk_create(
+        [
+            EventReminder(event_id=pk, lead_minutes=lead_minutes, remind_at=starts_at - lead, next_attempt_at=starts_at - lead)
+            for pk, starts_at in events
+        ],
+        ignore_conflicts=True,
+    )
+    if len(events) == batch_size:
+        cursor.scanned_until, cursor.last_event_id = events[-1][1], events[-1][0]
+    elif end > cursor.scanned_until:
+        cursor.scanned_until, cursor.last_event_id = end, None
+    cursor.save(update_fields=["scanned_until", "last_event_id"])
+    return len(events)
+
+
+def schedule_reminders(*, batch_size: int = 1000, lookahead_seconds: float | None = None) -> int:
+    """
+    Schedules every configured lead up to now + lookahead. Returns the events scanned.
+    """
+    if lookahead_seconds is None:
+        lookahead_seconds = getattr(settings, "EVENTS_REMINDER_LOOKAHEAD_SECONDS", 300)
+    until = timezone.now() + timedelta(seconds=lookahead_seconds)
+    scanned = 0
+    for event_type, leads in reminder_leads().items():
+        for lead_minutes in leads:
+            while True:
+                count = schedule_batch(event_type, lead_minutes, until=until, batch_size=batch_size)
+                scanned += count
+                if count < batch_size:
+                    break
+    return scanned
@@ -0,0 +1,53 @@
+from rest_framework import serializers
+
+from events.models import ArchivedEvent, BaseEvent
+
+
+class BulkStatusSerializer(serializers.Serializer):
+    """
+    Body of the bulk status endpoints: the target status and filters selecting
+    the events (explicit ids, a scheduled-time range, and the scope fields a
+    subclass adds). At least one filter is required.
+
+    Only the statuses a patient or professional sets by hand are accepted;
+    RESCHEDULED and MISSED are written by mark_rescheduled and the overdue sweeper.
+    COMPLETED is left out because completing checks each event's window (see
+    complete() on the scheduled event types), which a bulk UPDATE would skip.
+    """
+    allowed_statuses = (BaseEvent.Status.CONFIRMED, BaseEvent.Status.CANCELED)
+
+    status = serializers.ChoiceField(choices=[(value, value.label) for value in allowed_statuses])
+    event_ids = serializers.ListField(child=serializers.UUIDField(), required=False, allow_empty=False, max_length=5000)
+    scheduled_from = serializers.DateTimeField(required=False)
+    scheduled_until = serializers.DateTimeField(required=False)
+
+    # Subclass fields that map straight to queryset filters, e.g. {"action": "action_id"}
+    scope_filters = {}
+
+    def validate(self, attrs):
+        if set(attrs) == {"status"}:
+            raise serializers.ValidationError("Select events with event_ids, a scheduled range or a scope filter.")
+        return attrs
+
+    def filter(self, queryset, *, start_field: str):
+        data = self.validated_data
+        if "event_ids" in data:
+            queryset = queryset.filter(pk__in=data["event_ids"])
+        if "scheduled_from" in data:
+            queryset = queryset.filter(**{f"{start_field}__gte": data["scheduled_from"]})
+        if "scheduled_until" in data:
+            queryset = queryset.filter(**{f"{start_field}__lte": data["scheduled_until"]})
+        for name, lookup in self.scope_filters.items():
+            if name in data:
+                queryset = queryset.filter(**{lookup: data[name]})
+        return queryset
+
+
+class ArchivedEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedEvent
+        fields = [
+            "id", "event_type", "status", "description", "event_patient",
+            "starts_at", "ends_at", "created_at", "archived_at", "data", "history",
+        ]
+        read_only_fields = fields
@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from core.models import DosageUnit
+from events.archive import archive_batch, archive_cutoff
+from events.models import ArchivedEvent, BaseEvent
+from medications.models import Medication, MedicationItem
+
+Status = BaseEvent.Status
+
+
+@pytest.fixture
+def dose(db, patient):
+    item = MedicationItem.objects.create(
+        patient=patient,
+        medication=Medication.objects.create(name="Lisinopril"),
+        dosage_amount=10,
+        dosage_unit=DosageUnit.objects.create(code="mg", name="Milligram"),
+        frequency_hours=24,
+        total_unit_amount=30,
+    )
+
+    def dose(days_ago):
+        event = item.build_occurrence_event(timezone.now() - timedelta(days=days_ago))
+        event.save()
+        return event
+
+    return dose
+
+
+@pytest.mark.django_db
+def test_archive_batch_moves_old_terminal_events_with_their_history(api_client, patient, dose):
+    archived = dose(800)
+    archived.update_status(Status.CANCELED, changed_by=patient)
+    open_old = dose(800)
+    recent = dose(10)
+    recent.update_status(Status.CANCELED, changed_by=patient)
+    target = dose(790)
+    target.update_status(Status.CANCELED, changed_by=patient)
+    # An event rescheduled to `target` keeps pointing at it, so `target` stays live.
+    BaseEvent.objects.filter(pk=open_old.pk).update(rescheduled_to=target)
+
+    assert archive_batch(before=archive_cutoff()) == 1
+    assert archive_batch(before=archive_cutoff()) == 0
+
+    copy = ArchivedEvent.objects.get()
+    assert copy.id == archived.id
+    assert (copy.status, copy.event_patient_id, copy.starts_at) == (Status.CANCELED, patient.pid, archived.starts_at)
+    assert copy.data["medication_item_id"] == archived.medication_item_id
+    assert [(entry["previous_status"], entry["new_status"]) for entry in copy.history] == [(Status.REQUESTED, Status.CANCELED)]
+    assert copy.history[0]["changed_by_id"] == patient.user_ptr_id
+    assert set(BaseEvent.objects.values_list("pk", flat=True)) == {open_old.pk, recent.pk, target.pk}
+
+    api_client.force_authenticate(user=patient)
+    assert api_client.get("/api/events/history/").status_code == 400
+    since = (timezone.now() - timedelta(days=805)).isoformat()
+    response = api_client.get("/api/events/history/", {"from": since})
+    assert response.status_code == 200
+    assert [(row["id"], row["archived"]) for row in response.data] == [
+        (archived.id, True),
+        (open_old.id, False),
+        (target.id, False),
+    ]
@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from core.models import DosageUnit
+from events.models import BaseEvent, EventStatusHistory
+from medications.models import Medication, MedicationItem, TakeMedicationEvent
+
+URL = "/api/medications/my-medications/events/bulk-status/"
+Status = BaseEvent.Status
+
+
+@pytest.fixture
+def doses(db, patient):
+    item = MedicationItem.objects.create(
+        patient=patient,
+        medication=Medication.objects.create(name="Metformin"),
+        dosage_amount=500,
+        dosage_unit=DosageUnit.objects.create(code="mg", name="Milligram"),
+        frequency_hours=12,
+        total_unit_amount=60,
+    )
+
+    def dose(hours, status=Status.REQUESTED):
+        event = item.build_occurrence_event(timezone.now() + timedelta(hours=hours))
+        event.status = status
+        event.save()
+        return event
+
+    return dose
+
+
+@pytest.fixture
+def patient_client(api_client, patient):
+    api_client.force_authenticate(user=patient)
+    return api_client
+
+
+@pytest.mark.django_db
+def test_bulk_status_groups_changes_by_previous_status(patient_client, doses):
+    requested = [doses(1), doses(13)]
+    confirmed = doses(25, Status.CONFIRMED)
+    doses(37, Status.CANCELED)  # Already there: left alone.
+
+    response = patient_client.post(URL, {"status": Status.CANCELED, "scheduled_from": timezone.now()}, format="json")
+
+    assert response.status_code == 200
+    assert response.data == {"updated": 3, "by_status": {Status.REQUESTED: 2, Status.CONFIRMED: 1}}
+    assert set(TakeMedicationEvent.objects.values_list("status", flat=True)) == {Status.CANCELED}
+    history = EventStatusHistory.objects.order_by("previous_status")
+    assert [(entry.previous_status, entry.new_status) for entry in history] == [
+        (Status.CONFIRMED, Status.CANCELED),
+        (Status.REQUESTED, Status.CANCELED),
+        (Status.REQUESTED, Status.CANCELED),
+    ]
+    assert {entry.event_id for entry in history} == {event.id for event in [*requested, confirmed]}
+
+
+@pytest.mark.django_db
+def test_bulk_status_is_all_or_nothing(patient_client, doses):
+    requested, completed = doses(1), doses(13, Status.COMPLETED)
+
+    response = patient_client.post(
+        URL, {"status": Status.CONFIRMED, "event_ids": [str(requested.id), str(completed.id)]}, format="json"
+    )
+
+    assert response.status_code == 400
+    assert "COMPLETED → CONFIRMED (1 events)" in response.data["error"]
+    requested.refresh_from_db()
+    assert requested.status == Status.REQUESTED
+    assert not EventStatusHistory.objects.exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("target", [Status.RESCHEDULED, Status.MISSED, Status.INITIATED, Status.COMPLETED])
+def test_bulk_status_rejects_statuses_it_cannot_check(patient_client, doses, target):
+    event = doses(1, Status.CONFIRMED)
+
+    response = patient_client.post(URL, {"status": target, "event_ids": [str(event.id)]}, format="json")
+
+    assert response.status_code == 400
+    assert "status" in response.data
+    event.refresh_from_db()
+    assert event.status == Status.CONFIRMED
@@ -0,0 +1,47 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from careplans.models import CarePlan, CarePlanAction, CarePlanActivityEvent
+from careplans.services.event_generator import generate_events_for_action
+from core.models import DosageUnit
+from medications.models import Medication, MedicationItem
+from patients.models import Patient
+
+
+@pytest.fixture
+def other_patient(db):
+    return Patient.objects.create(email="other@example.com", first_name="Other", last_name="Patient")
+
+
+@pytest.mark.django_db
+def test_moving_a_plan_to_another_patient_moves_its_events(api_client, patient, other_patient, professional):
+    plan = CarePlan.objects.create(patient=patient, owner=professional, start_date=timezone.localdate())
+    action = CarePlanAction.objects.create(careplan=plan, category="EDUCATION", title="Read", schedule_json={"on_start": True})
+    generate_events_for_action(action)
+    assert set(CarePlanActivityEvent.objects.values_list("event_patient_id", flat=True)) == {patient.pid}
+
+    api_client.force_authenticate(user=professional)
+    response = api_client.patch(f"/api/careplans/careplans/{plan.id}/", {"patient": str(other_patient.pid)}, format="json")
+
+    assert response.status_code == 200
+    assert set(CarePlanActivityEvent.objects.values_list("event_patient_id", flat=True)) == {other_patient.pid}
+
+
+@pytest.mark.django_db
+def test_moving_a_medication_item_moves_its_dose_events(patient, other_patient):
+    item = MedicationItem.objects.create(
+        patient=patient,
+        medication=Medication.objects.create(name="Atorvastatin"),
+        dosage_amount=20,
+        dosage_unit=DosageUnit.objects.create(code="mg", name="Milligram"),
+        frequency_hours=24,
+        total_unit_amount=30,
+    )
+    item.build_occurrence_event(timezone.now() + timedelta(hours=1)).save()
+
+    item.patient = other_patient
+    item.save(update_fields=["patient"])
+
+    assert item.medication_events.get().event_patient_id == other_patient.pid
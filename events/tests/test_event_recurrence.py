@@ -0,0 +1,107 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from appointments.models import Appointment
+from careplans.models import CarePlan, CarePlanAction
+from careplans.services.event_generator import generate_events_for_action
+from core.models import DosageUnit
+from events.bulk import bulk_create_events
+from events.models import BaseEvent
+from events.recurrence import sync_events
+from medications.models import Medication, MedicationItem, TakeMedicationEvent
+
+Status = BaseEvent.Status
+
+
+@pytest.fixture
+def item(db, patient):
+    return MedicationItem.objects.create(
+        patient=patient,
+        medication=Medication.objects.create(name="Amoxicillin"),
+        dosage_amount=500,
+        dosage_unit=DosageUnit.objects.create(code="mg", name="Milligram"),
+        frequency_hours=12,
+        total_unit_amount=14,
+    )
+
+
+@pytest.fixture
+def base():
+    return timezone.now().replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+
+def _stored(item, at, status=Status.REQUESTED):
+    event = item.build_occurrence_event(at)
+    event.status = status
+    event.save()
+    return event
+
+
+@pytest.mark.django_db
+def test_bulk_create_events_fills_parent_and_denormalized_columns(item, patient, base):
+    events = bulk_create_events([item.build_occurrence_event(base + timedelta(hours=12 * n)) for n in range(3)])
+
+    stored = TakeMedicationEvent.objects.order_by("scheduled_to_complete_from")
+    assert [event.pk for event in stored] == [event.pk for event in events]
+    parents = BaseEvent.objects.filter(pk__in=[event.pk for event in events])
+    assert set(parents.values_list("event_type", "event_patient_id")) == {("takemedicationevent", patient.pid)}
+    for event in stored:
+        assert (event.starts_at, event.ends_at) == (event.scheduled_to_complete_from, event.scheduled_to_complete_until)
+
+    with pytest.raises(ValueError, match="single model"):
+        bulk_create_events([item.build_occurrence_event(base), Appointment()])
+
+
+@pytest.mark.django_db
+def test_sync_events_touches_only_what_changed(item, base):
+    completed = _stored(item, base, Status.COMPLETED)
+    kept_open = _stored(item, base + timedelta(hours=12))
+    missed = _stored(item, base + timedelta(hours=24), Status.MISSED)
+    shifted = _stored(item, base + timedelta(hours=36))
+    confirmed = _stored(item, base + timedelta(hours=48), Status.CONFIRMED)
+
+    starts = [base + timedelta(hours=hours) for hours in (0, 12, 24, 40, 60)]
+    desired = [item.build_occurrence_event(at) for at in starts]
+    desired[1].scheduled_to_complete_until = starts[1] + timedelta(minutes=90)
+
+    assert sync_events(item, desired) == {"created": 1, "updated": 2, "deleted": 1}
+
+    # Completed and missed rows are kept as they were, and no duplicate is created at their start.
+    for event in (completed, missed):
+        stored = TakeMedicationEvent.objects.get(pk=event.pk)
+        assert (stored.status, stored.scheduled_to_complete_from) == (event.status, event.scheduled_to_complete_from)
+    # A wanted start keeps its row; the window change is written in place.
+    kept_open.refresh_from_db()
+    assert kept_open.scheduled_to_complete_until == kept_open.ends_at == starts[1] + timedelta(minutes=90)
+    # The leftover requested row moves to the new start instead of being replaced.
+    shifted.refresh_from_db()
+    assert shifted.scheduled_to_complete_from == shifted.starts_at == starts[3]
+    assert shifted.ends_at == starts[3] + timedelta(minutes=item.occurrence_minutes)
+    # A confirmed occurrence that is no longer wanted is deleted, and the new start is inserted.
+    assert not BaseEvent.objects.filter(pk=confirmed.pk).exists()
+    assert list(item.medication_events.order_by("scheduled_to_complete_from").values_list("scheduled_to_complete_from", flat=True)) == starts
+
+    # Syncing the same schedule again writes nothing.
+    again = [item.build_occurrence_event(at) for at in starts]
+    again[1].scheduled_to_complete_until = starts[1] + timedelta(minutes=90)
+    assert sync_events(item, again) == {"created": 0, "updated": 0, "deleted": 0}
+
+
+@pytest.mark.django_db
+def test_regenerating_an_on_start_action_keeps_its_one_time_task(patient, professional):
+    plan = CarePlan.objects.create(patient=patient, owner=professional, start_date=timezone.localdate())
+    action = CarePlanAction.objects.create(careplan=plan, category="EDUCATION", title="Read", schedule_json={"on_start": True})
+    generate_events_for_action(action)
+    task = action.scheduled_events.get()
+
+    assert generate_events_for_action(action) == {"created": 0, "updated": 0, "deleted": 0}
+    task.update_status(Status.CONFIRMED, changed_by=professional)
+    task.update_status(Status.INITIATED, changed_by=professional)
+    task.update_status(Status.COMPLETED, changed_by=professional)
+    action.title = "Read the guide"
+    action.save()
+    generate_events_for_action(action)
+
+    assert list(action.scheduled_events.values_list("pk", "status")) == [(task.pk, Status.COMPLETED)]
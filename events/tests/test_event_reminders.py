@@ -0,0 +1,127 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from appointments.models import Appointment
+from core.models import Service
+from events.models import BaseEvent, EventReminder, ReminderCursor
+from events.reminders import ReminderDispatcher, StubChannel
+from events.reminders.scheduler import schedule_batch
+
+
+@pytest.fixture
+def service(db):
+    return Service.objects.create(name="Cardiology", code="CARD")
+
+
+@pytest.fixture
+def book(patient, professional, service):
+    def book(starts_in_minutes):
+        return Appointment.objects.create(
+            patient=patient,
+            professional=professional,
+            service=service,
+            created_by=professional,
+            scheduled_to=timezone.now() + timedelta(minutes=starts_in_minutes),
+            duration_minutes=30,
+        )
+
+    return book
+
+
+def _reminder(appointment, *, lead_minutes=60, due=True):
+    remind_at = appointment.scheduled_to - timedelta(minutes=lead_minutes)
+    return EventReminder.objects.create(
+        event=appointment,
+        lead_minutes=lead_minutes,
+        remind_at=remind_at,
+        next_attempt_at=timezone.now() if due else remind_at,
+    )
+
+
+@pytest.mark.django_db
+def test_scheduler_resumes_from_its_cursor(book):
+    now = timezone.now()
+    # First run opens the cursor at now + lead.
+    assert schedule_batch("appointment", 60, until=now, batch_size=10) == 0
+    first, second, later = book(62), book(63), book(300)
+
+    until = now + timedelta(minutes=5)
+    assert schedule_batch("appointment", 60, until=until, batch_size=1) == 1
+    cursor = ReminderCursor.objects.get()
+    assert cursor.last_event_id == first.id
+    assert schedule_batch("appointment", 60, until=until, batch_size=1) == 1
+    assert schedule_batch("appointment", 60, until=until, batch_size=1) == 0
+    assert schedule_batch("appointment", 60, until=until, batch_size=1) == 0
+
+    reminders = EventReminder.objects.order_by("remind_at")
+    assert [reminder.event_id for reminder in reminders] == [first.id, second.id]
+    assert reminders[0].remind_at == first.scheduled_to - timedelta(minutes=60)
+    assert not EventReminder.objects.filter(event=later).exists()
+
+
+@pytest.mark.django_db
+def test_closed_events_are_skipped_and_moved_events_deferred(book, professional):
+    canceled, moved = book(30), book(30)
+    canceled_reminder, moved_reminder = _reminder(canceled), _reminder(moved)
+    canceled.update_status(BaseEvent.Status.CANCELED, changed_by=professional)
+    moved.scheduled_to = timezone.now() + timedelta(minutes=180)
+    moved.save()
+    channel = StubChannel()
+
+    stats = ReminderDispatcher([channel]).dispatch_batch()
+
+    assert (stats.skipped, stats.deferred, stats.sent) == (1, 1, 0)
+    assert channel.sent == []
+    canceled_reminder.refresh_from_db()
+    moved_reminder.refresh_from_db()
+    assert canceled_reminder.status == EventReminder.Status.SKIPPED
+    assert moved_reminder.status == EventReminder.Status.PENDING
+    assert moved_reminder.next_attempt_at == moved.scheduled_to - timedelta(minutes=60)
+
+
+@pytest.mark.django_db
+def test_failed_sends_back_off_then_fail(book):
+    reminder = _reminder(book(30))
+    dispatcher = ReminderDispatcher([StubChannel(fail_times=10)], max_attempts=2, retry_base_seconds=60)
+
+    assert dispatcher.dispatch_batch().retried == 1
+    reminder.refresh_from_db()
+    assert reminder.status == EventReminder.Status.PENDING
+    assert reminder.attempts == 1
+    assert reminder.next_attempt_at > timezone.now() + timedelta(seconds=50)
+    assert "Stub channel failure" in reminder.last_error
+    assert dispatcher.dispatch_batch().processed == 0
+
+    EventReminder.objects.update(next_attempt_at=timezone.now())
+    assert dispatcher.dispatch_batch().failed == 1
+    reminder.refresh_from_db()
+    assert (reminder.status, reminder.attempts) == (EventReminder.Status.FAILED, 2)
+
+
+@pytest.mark.django_db
+def test_reminder_is_committed_as_sending_before_it_goes_out(book):
+    reminder = _reminder(book(30))
+    seen = []
+
+    class PeekingChannel(StubChannel):
+        def send(self, claimed):
+            seen.append(EventReminder.objects.get(pk=claimed.pk).status)
+            super().send(claimed)
+
+    channel = PeekingChannel()
+    assert ReminderDispatcher([channel]).dispatch_batch().sent == 1
+    assert seen == [EventReminder.Status.SENDING]
+    reminder.refresh_from_db()
+    assert (reminder.status, reminder.sent_via, reminder.leased_until) == (EventReminder.Status.SENT, "stub", None)
+
+    # A worker that stopped mid-send leaves its claim behind; it is not sent again.
+    stuck = _reminder(book(45))
+    EventReminder.objects.filter(pk=stuck.pk).update(
+        status=EventReminder.Status.SENDING, leased_until=timezone.now() - timedelta(seconds=1)
+    )
+    assert ReminderDispatcher([channel]).dispatch_batch().failed == 1
+    stuck.refresh_from_db()
+    assert stuck.status == EventReminder.Status.FAILED
+    assert len(channel.sent) == 1
@@ -0,0 +1,8 @@
+from django.urls import path
+
+from .views import ArchivedEventDetailView, PatientEventHistoryView
+
+urlpatterns = [
+    path("history/", PatientEventHistoryView.as_view(), name="event-history"),
+    path("archive/<uuid:pk>/", ArchivedEventDetailView.as_view(), name="archived-event-detail"),
+]
@@ -1,3 +1,57 @@
-from django.shortcuts import render
+import uuid
 
-# Create your views here.
+from rest_framework import status
+from rest_framework.generics import RetrieveAPIView
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from events.archive import patient_events
+from events.models import ArchivedEvent
+from events.recurrence import schedule_window
+from events.serializers import ArchivedEventSerializer
+from patients.models import Patient
+from patients.permissions import IsPatient
+from professionals.permissions import IsProfessional
+from users.permissions import IsBayleafAPIToken
+
+
+class PatientEventHistoryView(APIView):
+    """
+    Events of every type starting between ?from= (required) and ?to=, live and archived.
+    Patients read their own; professionals pass ?patient=<uuid>.
+    """
+    permission_classes = [IsProfessional | IsPatient | IsBayleafAPIToken]
+
+    def get(self, request):
+        if IsProfessional().has_permission(request, self):
+            try:
+                pid = uuid.UUID(request.query_params.get("patient", ""))
+            except ValueError:
+                return Response({"error": "'patient' must be a patient UUID."}, status=status.HTTP_400_BAD_REQUEST)
+            patient = Patient.objects.filter(pid=pid).first()
+            if patient is None:
+                return Response({"error": "Patient not found."}, status=status.HTTP_404_NOT_FOUND)
+        elif IsPatient().has_permission(request, self):
+            patient = Patient.objects.get(user_ptr_id=request.user.id)
+        else:
+            return Response({"error": "Only patients and professionals can read event history."}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            start, end = schedule_window(request.query_params, require_from=True)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(patient_events(patient, start, end))
+
+
+class ArchivedEventDetailView(RetrieveAPIView):
+    """
+    Full archived copy of an event (all columns and status history) by its original id.
+    """
+    serializer_class = ArchivedEventSerializer
+    permission_classes = [IsProfessional | IsPatient | IsBayleafAPIToken]
+
+    def get_queryset(self):
+        if IsProfessional().has_permission(self.request, self):
+            return ArchivedEvent.objects.all()
+        if IsPatient().has_permission(self.request, self):
+            return ArchivedEvent.objects.filter(event_patient__user_ptr_id=self.request.user.id)
+        return ArchivedEvent.objects.none()
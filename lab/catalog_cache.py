@@ -0,0 +1,138 @@
+import threading
+import time
+from bisect import bisect_right
+from collections import defaultdict, deque
+
+from django.conf import settings
+
+
+class CatalogCache:
+    """
+    Process-local indexes over read-mostly lab catalog tables.
+
+    Tables are loaded with one query each on first use and reloaded after
+    LAB_CATALOG_CACHE_TTL seconds, or right away once a write path in this
+    process calls invalidate().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._generation = 0
+        self._reference_ranges = {}
+        self._unit_edges = {}
+        self._conversions = {}
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._loaded_at = None
+
+    def reference_range_for(self, exam_field_id: int, *, age_days: int | None, sex: str = ""):
+        """
+        Returns the ReferenceRange of the field covering the patient, or None.
+
+        Sex-specific bands win over bands without sex. Each lookup is a binary
+        search over the band starts.
+        """
+        if age_days is None or age_days < 0:
+            return None
+        bands_by_sex = self._get_reference_ranges().get(exam_field_id)
+        if not bands_by_sex:
+            return None
+        for band_sex in ([sex, ""] if sex else [""]):
+            bands = bands_by_sex.get(band_sex)
+            if not bands:
+                continue
+            starts, ranges = bands
+            idx = bisect_right(starts, age_days) - 1
+            if idx >= 0 and ranges[idx].contains_age(age_days):
+                return ranges[idx]
+        return None
+
+    def convert(self, value: float, *, from_unit_id: int, to_unit_id: int, analyte_id: int | None = None):
+        """
+        Converts value between units through the conversion graph, or returns None.
+
+        Analyte-scoped edges are tried before general ones. The composed factor and
+        offset of each (analyte, from, to) path are memoized until the next reload.
+        """
+        if from_unit_id == to_unit_id:
+            return value
+        self._ensure_loaded()
+        key = (analyte_id, from_unit_id, to_unit_id)
+        conversion = self._conversions.get(key)
+        if conversion is None and key not in self._conversions:
+            conversion = self._conversions[key] = self._find_conversion(analyte_id, from_unit_id, to_unit_id)
+        if conversion is None:
+            return None
+        factor, offset = conversion
+        return value * factor + offset
+
+    def _find_conversion(self, analyte_id, from_unit_id, to_unit_id):
+        edges = self._unit_edges
+        scoped = edges.get(analyte_id, {}) if analyte_id is not None else {}
+        general = edges.get(None, {})
+        # Breadth-first over units, composing value -> value * factor + offset along the path.
+        seen = {from_unit_id: (1.0, 0.0)}
+        queue = deque([from_unit_id])
+        while queue:
+            unit_id = queue.popleft()
+            factor, offset = seen[unit_id]
+            for next_unit_id, edge_factor, edge_offset in scoped.get(unit_id, []) + general.get(unit_id, []):
+                if next_unit_id in seen:
+                    continue
+                seen[next_unit_id] = (factor * edge_factor, offset * edge_factor + edge_offset)
+                if next_unit_id == to_unit_id:
+                    return seen[next_unit_id]
+                queue.append(next_unit_id)
+        return None
+
+    def _get_reference_ranges(self) -> dict:
+        self._ensure_loaded()
+        return self._reference_ranges
+
+    def _ensure_loaded(self) -> None:
+        ttl = getattr(settings, "LAB_CATALOG_CACHE_TTL", 60)
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < ttl:
+            return
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < ttl:
+                return
+            generation = self._generation
+            started = time.monotonic()
+            self._reference_ranges = self._load_reference_ranges()
+            self._unit_edges = self._load_unit_edges()
+            self._conversions = {}
+            # An invalidate() during the load means it may have missed the write.
+            if generation == self._generation:
+                self._loaded_at = started
+
+    def _load_reference_ranges(self) -> dict:
+        from lab.models import ReferenceRange
+
+        grouped = defaultdict(lambda: defaultdict(list))
+        for reference_range in ReferenceRange.objects.order_by("exam_field_id", "sex", "age_min_days"):
+            grouped[reference_range.exam_field_id][reference_range.sex].append(reference_range)
+
+        index = {}
+        for exam_field_id, by_sex in grouped.items():
+            index[exam_field_id] = {
+                sex: ([item.age_min_days for item in ranges], ranges)
+                for sex, ranges in by_sex.items()
+            }
+        return index
+
+    def _load_unit_edges(self) -> dict:
+        from lab.models import UnitConversion
+
+        edges = defaultdict(lambda: defaultdict(list))
+        for from_id, to_id, analyte_id, factor, offset in UnitConversion.objects.order_by("id").values_list(
+            "from_unit_id", "to_unit_id", "analyte_id", "factor", "offset"
+        ):
+            edges[analyte_id][from_id].append((to_id, factor, offset))
+            edges[analyte_id][to_id].append((from_id, 1 / factor, -offset / factor))
+        return {analyte_id: dict(by_unit) for analyte_id, by_unit in edges.items()}
+
+
+catalog_cache = CatalogCache()
@@ -0,0 +1,13 @@
+from .channels import AlertChannel, EmailChannel, LoggingChannel, StubChannel
+from .dispatcher import CriticalAlertDispatcher, DispatchStats
+from .outbox import enqueue_critical_alert
+
+__all__ = [
+    "AlertChannel",
+    "CriticalAlertDispatcher",
+    "DispatchStats",
+    "EmailChannel",
+    "LoggingChannel",
+    "StubChannel",
+    "enqueue_critical_alert",
+]
@@ -0,0 +1,61 @@
+import logging
+
+from django.conf import settings
+from django.core.mail import send_mail
+
+logger = logging.getLogger(__name__)
+
+
+class AlertChannel:
+    """
+    Delivers one critical value alert; raise on failure so the alert is retried.
+    """
+
+    name = ""
+
+    def send(self, alert) -> None:
+        raise NotImplementedError
+
+
+class EmailChannel(AlertChannel):
+    name = "email"
+
+    def send(self, alert) -> None:
+        email = alert.recipient.email
+        if not email:
+            raise ValueError("Recipient has no email address.")
+        payload = alert.payload
+        send_mail(
+            subject=f"Critical result: {payload['exam_field_name']} for {payload['patient_name']}",
+            message=(
+                f"Exam request {payload['exam_request_code'] or payload['exam_request_id']}: "
+                f"{payload['exam_field_name']} = {payload['value']} ({payload['flag']})."
+            ),
+            from_email=getattr(settings, "DEFAULT_FROM_EMAIL", None),
+            recipient_list=[email],
+        )
+
+
+class LoggingChannel(AlertChannel):
+    name = "log"
+
+    def send(self, alert) -> None:
+        logger.warning("Critical value alert %s for %s: %s", alert.dedup_key, alert.recipient_id, alert.payload)
+
+
+class StubChannel(AlertChannel):
+    """
+    In-memory channel for tests and local runs; fails the first `fail_times` sends.
+    """
+
+    name = "stub"
+
+    def __init__(self, fail_times: int = 0):
+        self.fail_times = fail_times
+        self.sent = []
+
+    def send(self, alert) -> None:
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise ConnectionError("Stub channel failure.")
+        self.sent.append(alert)
@@ -0,0 +1,106 @@
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from lab.models import CriticalValueAlert
+
+DEFAULT_CHANNELS = ["lab.critical_alerts.channels.EmailChannel"]
+
+
+@dataclass
+class DispatchStats:
+    delivered: int = 0
+    retried: int = 0
+    failed: int = 0
+    max_latency_ms: int | None = None
+
+    @property
+    def processed(self) -> int:
+        return self.delivered + self.retried + self.failed
+
+
+def load_channels():
+    return [import_string(path)() for path in getattr(settings, "LAB_CRITICAL_ALERT_CHANNELS", DEFAULT_CHANNELS)]
+
+
+class CriticalAlertDispatcher:
+    """
+    Delivers pending critical value alerts in batches.
+
+    Rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so several workers
+    can run side by side. Channels are tried in order until one accepts the
+    alert; when all fail the alert is retried with exponential backoff and
+    marked failed after max_attempts.
+    """
+
+    def __init__(self, channels=None, *, batch_size: int = 50, max_attempts: int = 5, retry_base_seconds: int = 30):
+        self.channels = channels if channels is not None else load_channels()
+        if not self.channels:
+            raise ValueError("At least one alert channel is required.")
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+
+    @transaction.atomic
+    def dispatch_batch(self) -> DispatchStats:
+        now = timezone.now()
+        alerts = list(
+            CriticalValueAlert.objects.select_for_update(skip_locked=True, of=("self",))
+            .select_related("recipient")
+            .filter(status=CriticalValueAlert.Status.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[: self.batch_size]
+        )
+
+        stats = DispatchStats()
+        for alert in alerts:
+            alert.attempts += 1
+            alert.updated_at = now
+            channel_name, errors = self._deliver(alert)
+            if channel_name is not None:
+                alert.status = CriticalValueAlert.Status.DELIVERED
+                alert.delivered_at = timezone.now()
+                alert.delivered_via = channel_name
+                alert.latency_ms = max(int((alert.delivered_at - alert.detected_at).total_seconds() * 1000), 0)
+                alert.last_error = ""
+                stats.delivered += 1
+                stats.max_latency_ms = max(stats.max_latency_ms or 0, alert.latency_ms)
+                continue
+
+            alert.last_error = "; ".join(errors)[:2000]
+            if alert.attempts >= self.max_attempts:
+                alert.status = CriticalValueAlert.Status.FAILED
+                stats.failed += 1
+            else:
+                alert.next_attempt_at = now + timedelta(seconds=self.retry_base_seconds * 2 ** (alert.attempts - 1))
+                stats.retried += 1
+
+        CriticalValueAlert.objects.bulk_update(
+            alerts,
+            [
+                "status",
+                "attempts",
+                "next_attempt_at",
+                "last_error",
+                "delivered_at",
+                "delivered_via",
+                "latency_ms",
+                "updated_at",
+            ],
+        )
+        return stats
+
+    def _deliver(self, alert) -> tuple[str | None, list[str]]:
+        errors = []
+        for channel in self.channels:
+            try:
+                channel.send(alert)
+            except Exception as exc:
+                # Any channel failure means "try the next one"; the errors are kept on the alert.
+                errors.append(f"{channel.name or type(channel).__name__}: {exc}")
+                continue
+            return channel.name or type(channel).__name__, errors
+        return None, errors
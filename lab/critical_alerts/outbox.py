@@ -0,0 +1,44 @@
+from lab.models import CriticalValueAlert, ExamFieldResult
+
+
+def enqueue_critical_alert(result: ExamFieldResult) -> None:
+    """
+    Adds an outbox row for a critical result; call inside the result's transaction.
+
+    The dedup key covers the value and flag, so recomputes and retried writes of
+    the same critical value never alert twice.
+    """
+    if result.classification != ExamFieldResult.Classification.CRITICAL:
+        return
+
+    requested_exam = result.requested_exam
+    exam_request = requested_exam.exam_request
+    exam_field = result.exam_field
+    context = result.classification_context or {}
+    patient = exam_request.patient
+    CriticalValueAlert.objects.bulk_create(
+        [
+            CriticalValueAlert(
+                exam_field_result=result,
+                recipient_id=exam_request.requested_by_id,
+                dedup_key=(
+                    f"{requested_exam.id}:{exam_field.id}:{context.get('flag', '')}:{result.computed_value}"
+                )[:255],
+                payload={
+                    "exam_request_id": exam_request.id,
+                    "exam_request_code": exam_request.code,
+                    "requested_exam_id": requested_exam.id,
+                    "patient_id": str(patient.pk),
+                    "patient_name": f"{patient.first_name} {patient.last_name}".strip(),
+                    "exam_field_code": exam_field.code,
+                    "exam_field_name": exam_field.name,
+                    "value": result.computed_value,
+                    "flag": context.get("flag"),
+                    "critical_low": context.get("critical_low"),
+                    "critical_high": context.get("critical_high"),
+                },
+                detected_at=result.created_at,
+            )
+        ],
+        ignore_conflicts=True,
+    )
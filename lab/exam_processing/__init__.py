@@ -1,5 +1,7 @@
+from .dry_run import FormulaDryRunner
 from .injector import AnalyteResultInjector
 from .processor import ExamProcessor
 from .validator import ExamFormulaValidator
+from .worklist import WorklistQueue
 
-__all__ = ["AnalyteResultInjector", "ExamProcessor", "ExamFormulaValidator"]
+__all__ = ["AnalyteResultInjector", "FormulaDryRunner", "ExamProcessor", "ExamFormulaValidator", "WorklistQueue"]
@@ -0,0 +1,156 @@
+from dataclasses import dataclass, field
+
+from lab.exam_processing.processor import _MISSING, ExamProcessor
+from lab.exam_processing.validator import ExamFormulaValidator
+from lab.models import ExamField
+
+MAX_VECTORS = 10000
+
+
+@dataclass
+class _TestVector:
+    analytes: dict[int, dict]
+    fields: dict[int, dict]
+    computed: dict[int, str | None] = field(default_factory=dict)
+
+
+class FormulaDryRunner(ExamProcessor):
+    """
+    Evaluates exam field formulas against in-memory test vectors.
+
+    The ExamProcessor engine is reused as is; only reference resolution is
+    swapped to read from the vector, so evaluation never touches the database.
+    """
+
+    def build_fields(self, *, exam_version=None, drafts=None) -> list[ExamField]:
+        """
+        Returns the fields of exam_version overlaid with draft fields (matched by id).
+        """
+        fields = {}
+        if exam_version is not None:
+            fields = {exam_field.id: exam_field for exam_field in exam_version.fields.all()}
+
+        errors = []
+        for idx, draft in enumerate(drafts or []):
+            if not isinstance(draft, dict):
+                errors.append(f"Draft {idx}: must be an object.")
+                continue
+            field_id = draft.get("id")
+            if field_id is None:
+                field_id = -(idx + 1)
+            elif not isinstance(field_id, int):
+                errors.append(f"Draft {idx}: id must be an integer.")
+                continue
+            base = fields.get(field_id)
+            formula = draft.get("formula", base.formula if base else None)
+            errors.extend(f"Draft {idx}: {error}" for error in ExamFormulaValidator().validate(formula))
+            fields[field_id] = ExamField(
+                id=field_id,
+                name=draft.get("name") or (base.name if base else f"Draft {idx}"),
+                code=draft.get("code") or (base.code if base else ""),
+                priority=draft.get("priority", base.priority if base else 0),
+                formula=formula,
+            )
+
+        if errors:
+            raise ValueError("; ".join(errors))
+        return list(fields.values())
+
+    def evaluate(self, exam_fields: list[ExamField], vectors: list[dict]) -> list[list[dict]]:
+        if not isinstance(vectors, list) or not vectors:
+            raise ValueError("vectors must be a non-empty list.")
+        if len(vectors) > MAX_VECTORS:
+            raise ValueError(f"At most {MAX_VECTORS} vectors can be evaluated at once.")
+
+        ordered_fields = self._order_exam_fields(list(exam_fields))
+        test_vectors = [self._build_vector(idx, vector) for idx, vector in enumerate(vectors)]
+        return [self._evaluate_vector(ordered_fields, test_vector) for test_vector in test_vectors]
+
+    def _evaluate_vector(self, exam_fields: list[ExamField], test_vector: _TestVector) -> list[dict]:
+        results = []
+        for exam_field in exam_fields:
+            value, rule_index = self._match_field_formula(exam_field, test_vector)
+            if value is _MISSING:
+                results.append(
+                    {"id": exam_field.id, "code": exam_field.code, "value": None, "matched_rule": None, "is_missing": True}
+                )
+                continue
+            computed_str = self._format_computed_value(value)
+            test_vector.computed[exam_field.id] = computed_str
+            results.append(
+                {
+                    "id": exam_field.id,
+                    "code": exam_field.code,
+                    "value": computed_str,
+                    "matched_rule": rule_index,
+                    "is_missing": False,
+                }
+            )
+        return results
+
+    def _build_vector(self, idx: int, vector) -> _TestVector:
+        if not isinstance(vector, dict):
+            raise ValueError(f"Vector {idx}: must be an object.")
+        analytes = {}
+        for key, value in (vector.get("analytes") or {}).items():
+            if isinstance(value, dict):
+                raw_value = value.get("raw_value")
+                numeric_value = value.get("numeric_value", self._coerce_numeric(raw_value))
+                analytes[self._parse_id(idx, key)] = {
+                    "raw_value": raw_value,
+                    "numeric_value": self._coerce_numeric(numeric_value),
+                    "units": value.get("units"),
+                }
+            else:
+                analytes[self._parse_id(idx, key)] = {
+                    "raw_value": None if value is None else str(value),
+                    "numeric_value": self._coerce_numeric(value),
+                    "units": None,
+                }
+        fields = {}
+        for key, value in (vector.get("fields") or {}).items():
+            if isinstance(value, dict):
+                fields[self._parse_id(idx, key)] = {
+                    "computed_value": value.get("computed_value"),
+                    "raw_value": value.get("raw_value"),
+                }
+            else:
+                fields[self._parse_id(idx, key)] = {
+                    "computed_value": self._format_computed_value(value),
+                    "raw_value": None,
+                }
+        return _TestVector(analytes=analytes, fields=fields)
+
+    def _parse_id(self, idx: int, key) -> int:
+        try:
+            return int(key)
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"Vector {idx}: reference ids must be integers, got {key!r}.") from exc
+
+    def _resolve_reference(self, *, requested_exam, ref_type, ref_id, field, requested_exam_id):
+        # requested_exam is the _TestVector being evaluated.
+        test_vector = requested_exam
+        if ref_type == "exam_field_result":
+            if ref_id in test_vector.computed and requested_exam_id is None:
+                result = {"computed_value": test_vector.computed[ref_id], "raw_value": None}
+            else:
+                result = test_vector.fields.get(ref_id)
+            if field == "exists":
+                return result is not None
+            if result is None:
+                return _MISSING
+            if field == "numeric_value":
+                return self._coerce_numeric(result["computed_value"] or result["raw_value"])
+            if field in ("computed_value", "raw_value"):
+                return result[field]
+            return _MISSING
+        if ref_type == "analyte_code_result":
+            result = test_vector.analytes.get(ref_id)
+            if field == "exists":
+                return result is not None
+            if result is None:
+                return _MISSING
+            if field in ("numeric_value", "raw_value", "units"):
+                return result[field]
+            return _MISSING
+        return _MISSING
@@ -1,11 +1,13 @@
-import re
+import hashlib
 
-from django.db import transaction
+from django.db import IntegrityError, transaction
 
+from lab.catalog_cache import catalog_cache
 from lab.exam_processing.processor import ExamProcessor
-from lab.models import AnalyteCode, AnalyteResult, MeasurementUnit, RequestedExam, Sample
-
-_ANALYTE_REF_RE = re.compile(r"analyte_code_result\((\d+)\)\.\w+")
+from lab.exam_processing.quality_control import QCStatistics, qc_lot_from_metadata
+from lab.exam_processing.worklist import WorklistQueue
+from lab.metrics import results_ingested
+from lab.models import AnalyteCode, AnalyteResult, MeasurementUnit, QCResult, Sample, WorklistItem
 
 
 class AnalyteResultInjector:
@@ -23,7 +25,18 @@ class AnalyteResultInjector:
         numeric_value=None,
         units_code: str | None = None,
         metadata: dict | None = None,
-    ) -> AnalyteResult:
+        idempotency_key: str | None = None,
+        instrument_timestamp: str | None = None,
+    ) -> AnalyteResult | QCResult:
+        """
+        Retransmissions are recognised by idempotency key: the one supplied, or one
+        derived from equipment, sample, analyte code and instrument timestamp. A
+        duplicate returns the original result without any processing.
+
+        Control runs are flagged with {"qc": {"lot": ...}} in metadata; they are
+        recorded as QCResult, deduplicated on the same key, and never touch
+        samples or exams.
+        """
         if not equipment_code:
             raise ValueError("equipment_code is required.")
         if not analyte_code:
@@ -39,6 +52,32 @@ class AnalyteResultInjector:
         if analyte_code_obj is None:
             raise ValueError("Analyte code not found for equipment.")
 
+        if not idempotency_key and instrument_timestamp:
+            idempotency_key = self._derive_idempotency_key(
+                analyte_code=analyte_code_obj,
+                sample_id=sample_id,
+                instrument_timestamp=instrument_timestamp,
+            )
+        if idempotency_key:
+            if len(str(idempotency_key)) > 128:
+                raise ValueError("idempotency_key must have at most 128 characters.")
+
+        qc = qc_lot_from_metadata(metadata)
+        if qc is not None:
+            return QCStatistics().record(
+                analyte_code=analyte_code_obj,
+                value=self._coerce_numeric(raw_result if numeric_value is None else numeric_value),
+                lot=qc["lot"],
+                level=str(qc.get("level") or ""),
+                metadata=metadata,
+                idempotency_key=idempotency_key,
+            )
+
+        if idempotency_key:
+            existing = AnalyteResult.objects.filter(idempotency_key=idempotency_key).first()
+            if existing is not None:
+                return existing
+
         sample = None
         if sample_id is not None:
             sample = Sample.objects.filter(id=sample_id).first()
@@ -56,6 +95,7 @@ class AnalyteResultInjector:
             numeric_value=numeric_value,
             units_code=units_code,
             metadata=metadata,
+            idempotency_key=idempotency_key,
         )
 
     def inject_for_sample(
@@ -67,7 +107,14 @@ class AnalyteResultInjector:
         numeric_value=None,
         units_code: str | None = None,
         metadata: dict | None = None,
+        idempotency_key: str | None = None,
     ) -> AnalyteResult:
+        if idempotency_key:
+            existing = AnalyteResult.objects.filter(idempotency_key=idempotency_key).first()
+            if existing is not None:
+                return existing
+
+        QCStatistics.ensure_not_locked_out(analyte_code)
         units = None
         if units_code:
             units = MeasurementUnit.objects.filter(code=units_code).first()
@@ -78,58 +125,75 @@ class AnalyteResultInjector:
             numeric_value = self._coerce_numeric(raw_result)
         else:
             numeric_value = self._coerce_numeric(numeric_value)
+        normalized_value, normalized_units_id = self._normalize(analyte_code.analyte, numeric_value, units)
 
         with transaction.atomic():
-            analyte_result = AnalyteResult.objects.create(
-                analyte=analyte_code.analyte,
-                equipment=analyte_code.equipment,
-                sample=sample,
-                raw_value=str(raw_result),
-                numeric_value=numeric_value,
-                units=units,
-                metadata=metadata,
-            )
+            try:
+                with transaction.atomic():
+                    analyte_result = AnalyteResult.objects.create(
+                        analyte=analyte_code.analyte,
+                        equipment=analyte_code.equipment,
+                        sample=sample,
+                        raw_value=str(raw_result),
+                        numeric_value=numeric_value,
+                        units=units,
+                        normalized_value=normalized_value,
+                        normalized_units_id=normalized_units_id,
+                        metadata=metadata,
+                        idempotency_key=idempotency_key or None,
+                    )
+            except IntegrityError:
+                # A concurrent retransmission committed first; hand back its result.
+                if not idempotency_key:
+                    raise
+                return AnalyteResult.objects.get(idempotency_key=idempotency_key)
+            WorklistQueue().complete(sample=sample, analyte_code=analyte_code)
             ExamProcessor().compute_sample(sample)
+        results_ingested.inc(equipment=analyte_code.equipment.code)
 
         return analyte_result
 
+    def _normalize(self, analyte, numeric_value, units) -> tuple[float | None, int | None]:
+        """
+        Value and unit id stored as normalized: the analyte's canonical unit when set.
+
+        Results sent without units are taken to be in the canonical unit already.
+        """
+        units_id = units.id if units else None
+        if numeric_value is None:
+            return None, units_id
+        canonical_id = analyte.canonical_unit_id
+        if canonical_id is None or units_id is None or units_id == canonical_id:
+            return numeric_value, canonical_id or units_id
+        converted = catalog_cache.convert(
+            numeric_value,
+            from_unit_id=units_id,
+            to_unit_id=canonical_id,
+            analyte_id=analyte.id,
+        )
+        if converted is None:
+            raise ValueError(f"No unit conversion from {units.code} to the canonical unit of {analyte.name}.")
+        return converted, canonical_id
+
     def _find_pending_sample(self, analyte_code: AnalyteCode) -> Sample | None:
-        requested_exams = (
-            RequestedExam.objects.filter(is_completed=False, sample__isnull=False)
-            .select_related("sample", "exam_version")
-            .prefetch_related("exam_version__fields")
+        item = (
+            WorklistItem.objects.filter(analyte_code=analyte_code)
+            .select_related("sample")
+            .order_by("id")
+            .first()
+        )
+        return item.sample if item else None
+
+    def _derive_idempotency_key(self, *, analyte_code: AnalyteCode, sample_id, instrument_timestamp) -> str:
+        source = "|".join(
+            [
+                str(analyte_code.equipment_id),
+                "" if sample_id is None else str(sample_id),
+                str(analyte_code.analyte_id),
+                str(instrument_timestamp),
+            ]
         )
-        for requested_exam in requested_exams:
-            if not self._exam_expects_analyte_code(requested_exam, analyte_code.id):
-                continue
-            if not AnalyteResult.objects.filter(
-                sample=requested_exam.sample,
-                analyte=analyte_code.analyte,
-                equipment=analyte_code.equipment,
-            ).exists():
-                return requested_exam.sample
-        return None
-
-    def _exam_expects_analyte_code(self, requested_exam: RequestedExam, analyte_code_id: int) -> bool:
-        for exam_field in requested_exam.exam_version.fields.all():
-            if analyte_code_id in self._extract_analyte_code_ids(exam_field.formula):
-                return True
-        return False
-
-    def _extract_analyte_code_ids(self, formula) -> set[int]:
-        if not formula or not isinstance(formula, list):
-            return set()
-        analyte_ids: set[int] = set()
-        for rule in formula:
-            if not isinstance(rule, dict):
-                continue
-            for key in ("condition", "result"):
-                expr = rule.get(key)
-                if not isinstance(expr, str):
-                    continue
-                for match in _ANALYTE_REF_RE.finditer(expr):
-                    analyte_ids.add(int(match.group(1)))
-        return analyte_ids
+        return hashlib.sha256(source.encode("utf-8")).hexdigest()
 
     def _coerce_numeric(self, value):
         try:
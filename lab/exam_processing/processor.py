@@ -1,6 +1,13 @@
 import ast
 import re
+from functools import lru_cache
 
+from django.utils import timezone
+
+from lab.catalog_cache import catalog_cache
+from lab.helpers.exam_field_result_helper import ExamFieldResultHelper
+from lab.helpers.status_board import StatusBoard
+from lab.metrics import formula_missing, track_compute
 from lab.models import (
     AnalyteCode,
     AnalyteResult,
@@ -17,6 +24,24 @@ _REFERENCE_RE = re.compile(
 )
 
 
+def _reference_replacer(match: re.Match) -> str:
+    ref_type, ref_id, field, requested_exam_id = match.groups()
+    requested_exam_value = requested_exam_id or "None"
+    return f"_ref('{ref_type}', {int(ref_id)}, '{field}', {requested_exam_value})"
+
+
+@lru_cache(maxsize=4096)
+def _parse_expression(expression: str) -> ast.AST | None:
+    """
+    Parses a formula expression once; the AST is read-only during evaluation.
+    """
+    python_expression = _REFERENCE_RE.sub(_reference_replacer, expression)
+    try:
+        return ast.parse(python_expression, mode="eval").body
+    except SyntaxError:
+        return None
+
+
 class ExamProcessor:
     """
     Orchestrates exam processing for requests and samples.
@@ -26,7 +51,9 @@ class ExamProcessor:
         """
         Compute all requested exams inside an exam request.
         """
-        requested_exams = self._order_exams_(list(exam_request.requested_exams.all()))
+        requested_exams = self._order_exams_(
+            list(exam_request.requested_exams.select_related("exam_request__patient", "exam_version"))
+        )
         for requested_exam in requested_exams:
             self._compute_requested_exam(requested_exam)
 
@@ -34,7 +61,9 @@ class ExamProcessor:
         """
         Compute all requested exams within a sample.
         """
-        requested_exams = self._order_exams_(list(sample.requested_exams.all()))
+        requested_exams = self._order_exams_(
+            list(sample.requested_exams.select_related("exam_request__patient", "exam_version"))
+        )
         for requested_exam in requested_exams:
             self._compute_requested_exam(requested_exam)
 
@@ -57,24 +86,81 @@ class ExamProcessor:
         """
         Compute a single requested exam, creating field results when possible.
         """
+        with track_compute():
+            self._compute_fields(requested_exam)
+
+    def _compute_fields(self, requested_exam: RequestedExam) -> None:
         exam_fields = self._order_exam_fields(list(requested_exam.exam_version.fields.all()))
+        age_days, sex = self._patient_profile(requested_exam)
         for exam_field in exam_fields:
             computed_value = self._evaluate_field_formula(exam_field, requested_exam)
             if computed_value is _MISSING:
+                if exam_field.formula:
+                    formula_missing.inc(exam_field=exam_field.code or exam_field.id)
                 continue
-            if computed_value is None:
-                computed_str = None
-            elif isinstance(computed_value, str):
-                computed_str = computed_value
-            else:
-                computed_str = str(computed_value)
-            ExamFieldResult.objects.update_or_create(
+            computed_str = self._format_computed_value(computed_value)
+            # Identical recomputes are no-ops; changes append a new revision.
+            ExamFieldResultHelper().record(
                 requested_exam=requested_exam,
                 exam_field=exam_field,
-                defaults={"computed_value": computed_str},
+                computed_value=computed_str,
+                **self._classify(exam_field, computed_str, age_days=age_days, sex=sex),
             )
         self._update_exam_completion(requested_exam, exam_fields)
 
+    def _patient_profile(self, requested_exam: RequestedExam) -> tuple[int | None, str]:
+        """
+        Patient age in days at request time and sex, used to pick reference ranges.
+        """
+        exam_request = requested_exam.exam_request
+        patient = exam_request.patient
+        if patient.birth_date is None:
+            return None, patient.sex
+        reference_date = timezone.localdate(exam_request.created_at) if exam_request.created_at else timezone.localdate()
+        return (reference_date - patient.birth_date).days, patient.sex
+
+    def _classify(self, exam_field: ExamField, computed_str: str | None, *, age_days, sex) -> dict:
+        """
+        Classification values for a numeric result against the patient's reference range.
+
+        Returns no values when no range applies, leaving any classification untouched.
+        """
+        reference_range = catalog_cache.reference_range_for(exam_field.id, age_days=age_days, sex=sex)
+        if reference_range is None:
+            return {}
+        value = self._coerce_numeric(computed_str)
+        if value is None:
+            return {}
+
+        flag, classification = "N", ExamFieldResult.Classification.NORMAL
+        if reference_range.critical_low is not None and value < reference_range.critical_low:
+            flag, classification = "LL", ExamFieldResult.Classification.CRITICAL
+        elif reference_range.critical_high is not None and value > reference_range.critical_high:
+            flag, classification = "HH", ExamFieldResult.Classification.CRITICAL
+        elif reference_range.low is not None and value < reference_range.low:
+            flag, classification = "L", ExamFieldResult.Classification.ABNORMAL
+        elif reference_range.high is not None and value > reference_range.high:
+            flag, classification = "H", ExamFieldResult.Classification.ABNORMAL
+
+        return {
+            "classification": classification,
+            "classification_context": {
+                "flag": flag,
+                "reference_range_id": reference_range.id,
+                "low": reference_range.low,
+                "high": reference_range.high,
+                "critical_low": reference_range.critical_low,
+                "critical_high": reference_range.critical_high,
+            },
+        }
+
+    def _format_computed_value(self, computed_value) -> str | None:
+        if computed_value is None:
+            return None
+        if isinstance(computed_value, str):
+            return computed_value
+        return str(computed_value)
+
     def _topo_sort_exam_fields(self, exam_fields_list: list[ExamField]) -> list[ExamField] | None:
         field_map = {field.id: field for field in exam_fields_list}
         dependencies: dict[int, set[int]] = {field.id: set() for field in exam_fields_list}
@@ -112,6 +198,7 @@ class ExamProcessor:
             if not ExamFieldResult.objects.filter(
                 requested_exam=requested_exam,
                 exam_field=exam_field,
+                is_current=True,
             ).exists():
                 pending = True
                 break
@@ -120,6 +207,21 @@ class ExamProcessor:
             return
         requested_exam.is_completed = is_completed
         requested_exam.save(update_fields=["is_completed"])
+        if requested_exam.exam_request.canceled_at is None:
+            StatusBoard().exam_completion_changed(
+                exam_id=requested_exam.exam_version.exam_id,
+                is_completed=is_completed,
+            )
+        if is_completed and not RequestedExam.objects.filter(
+            exam_request_id=requested_exam.exam_request_id,
+            is_completed=False,
+        ).exists():
+            # The whole request is done: queue it for the autoverification worker.
+            ExamRequest.objects.filter(
+                id=requested_exam.exam_request_id,
+                is_validated=False,
+                canceled_at__isnull=True,
+            ).update(autoverification_pending=True)
 
     def _extract_exam_field_dependencies(self, formula) -> set[int]:
         if not formula or not isinstance(formula, list):
@@ -137,11 +239,18 @@ class ExamProcessor:
         return deps
 
     def _evaluate_field_formula(self, exam_field: ExamField, requested_exam: RequestedExam):
+        value, _rule_index = self._match_field_formula(exam_field, requested_exam)
+        return value
+
+    def _match_field_formula(self, exam_field: ExamField, requested_exam: RequestedExam):
+        """
+        Returns the formula value and the index of the rule that produced it.
+        """
         formula = exam_field.formula
         if not formula or not isinstance(formula, list):
-            return _MISSING
+            return _MISSING, None
 
-        for rule in formula:
+        for rule_index, rule in enumerate(formula):
             if not isinstance(rule, dict):
                 continue
             condition_expr = rule.get("condition") or ""
@@ -151,30 +260,23 @@ class ExamProcessor:
             if condition_expr:
                 condition_value = self._evaluate_expression(condition_expr, requested_exam)
                 if condition_value is _MISSING:
-                    return _MISSING
+                    return _MISSING, None
                 if not isinstance(condition_value, bool):
-                    return _MISSING
+                    return _MISSING, None
                 if not condition_value:
                     continue
             result_value = self._evaluate_expression(result_expr, requested_exam)
             if result_value is _MISSING:
-                return _MISSING
-            return result_value
+                return _MISSING, None
+            return result_value, rule_index
 
-        return _MISSING
+        return _MISSING, None
 
     def _evaluate_expression(self, expression: str, requested_exam: RequestedExam):
-        python_expression = _REFERENCE_RE.sub(self._reference_replacer, expression)
-        try:
-            parsed = ast.parse(python_expression, mode="eval")
-        except SyntaxError:
+        parsed = _parse_expression(expression)
+        if parsed is None:
             return _MISSING
-        return self._eval_ast(parsed.body, requested_exam)
-
-    def _reference_replacer(self, match: re.Match) -> str:
-        ref_type, ref_id, field, requested_exam_id = match.groups()
-        requested_exam_value = requested_exam_id or "None"
-        return f"_ref('{ref_type}', {int(ref_id)}, '{field}', {requested_exam_value})"
+        return self._eval_ast(parsed, requested_exam)
 
     def _eval_ast(self, node: ast.AST, requested_exam: RequestedExam):
         if isinstance(node, ast.Constant):
@@ -330,6 +432,7 @@ class ExamProcessor:
         result = ExamFieldResult.objects.filter(
             requested_exam=target_exam,
             exam_field_id=exam_field_id,
+            is_current=True,
         ).first()
 
         if field == "exists":
@@ -356,7 +459,7 @@ class ExamProcessor:
             return _MISSING
         if not requested_exam.sample_id:
             return _MISSING
-        analyte_result = AnalyteResult.objects.filter(
+        analyte_result = AnalyteResult.objects.select_related("units", "normalized_units").filter(
             sample_id=requested_exam.sample_id,
             analyte=analyte_code.analyte,
             equipment=analyte_code.equipment,
@@ -366,12 +469,16 @@ class ExamProcessor:
             return analyte_result is not None
         if analyte_result is None:
             return _MISSING
+        # Rows written outside the injector carry no normalization; like the backfill,
+        # their own value and unit are taken as already normalized.
+        normalized = analyte_result.normalized_value is not None
         if field == "numeric_value":
-            return analyte_result.numeric_value
+            return analyte_result.normalized_value if normalized else analyte_result.numeric_value
         if field == "raw_value":
             return analyte_result.raw_value
         if field == "units":
-            return analyte_result.units.code if analyte_result.units else None
+            units = analyte_result.normalized_units if normalized else analyte_result.units
+            return units.code if units else None
         return _MISSING
 
     def _coerce_numeric(self, value):
@@ -0,0 +1,154 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from lab.models import AnalyteCode, QCAccumulator, QCResult
+
+# Longest run any rule looks at (10_x); the accumulator keeps this many z-scores.
+Z_WINDOW = 10
+DEFAULT_QC_REJECTION_RULES = ["1_3s", "2_2s", "R_4s", "4_1s", "10_x"]
+
+
+class QCLockoutError(ValueError):
+    """
+    Raised for patient results on an analyte code locked out by QC.
+    """
+
+
+def qc_lot_from_metadata(metadata) -> dict | None:
+    """
+    Returns the QC block of injection metadata, e.g. {"qc": {"lot": "L1"}}, or None.
+    """
+    if not isinstance(metadata, dict):
+        return None
+    qc = metadata.get("qc")
+    if not qc:
+        return None
+    if not isinstance(qc, dict) or not str(qc.get("lot") or "").strip():
+        raise ValueError("QC metadata must include a lot.")
+    return qc
+
+
+def westgard_violations(z_scores: list[float]) -> list[str]:
+    """
+    Westgard rules broken by the newest z-score (last item) and the ones before it.
+
+    Looks at no more than Z_WINDOW values, so the cost does not grow with the lot.
+    """
+    if not z_scores:
+        return []
+    violations = []
+    latest = z_scores[-1]
+
+    def run(length, predicate):
+        window = z_scores[-length:]
+        return len(window) == length and all(predicate(z) for z in window)
+
+    if abs(latest) > 2:
+        violations.append("1_2s")
+    if abs(latest) > 3:
+        violations.append("1_3s")
+    if run(2, lambda z: z > 2) or run(2, lambda z: z < -2):
+        violations.append("2_2s")
+    if len(z_scores) >= 2:
+        previous = z_scores[-2]
+        if (latest > 2 and previous < -2) or (latest < -2 and previous > 2):
+            violations.append("R_4s")
+    if run(4, lambda z: z > 1) or run(4, lambda z: z < -1):
+        violations.append("4_1s")
+    if run(10, lambda z: z > 0) or run(10, lambda z: z < 0):
+        violations.append("10_x")
+    return violations
+
+
+class QCStatistics:
+    """
+    Records control results and keeps per-lot statistics and lockouts current.
+
+    A result breaking a rejection rule locks the analyte code out: patient
+    results for it are refused until a control run passes or a professional
+    releases the lockout. Rejected values do not enter the running statistics.
+    """
+
+    def __init__(self, rejection_rules=None):
+        self.rejection_rules = set(
+            rejection_rules
+            if rejection_rules is not None
+            else getattr(settings, "LAB_QC_REJECTION_RULES", DEFAULT_QC_REJECTION_RULES)
+        )
+        self.min_results = getattr(settings, "LAB_QC_MIN_RESULTS", 20)
+
+    @transaction.atomic
+    def record(
+        self,
+        *,
+        analyte_code: AnalyteCode,
+        value,
+        lot: str,
+        level: str = "",
+        metadata=None,
+        idempotency_key: str | None = None,
+    ) -> QCResult:
+        """
+        A retransmitted control result (same idempotency key) returns the stored
+        one and leaves the statistics alone.
+        """
+        if value is None:
+            raise ValueError("QC results must be numeric.")
+        lot = str(lot).strip()
+        QCAccumulator.objects.get_or_create(analyte_code=analyte_code, lot=lot, defaults={"level": level or ""})
+        accumulator = QCAccumulator.objects.select_for_update().get(analyte_code=analyte_code, lot=lot)
+        if idempotency_key:
+            # Checked under the accumulator lock, so concurrent retransmissions queue here.
+            existing = QCResult.objects.filter(idempotency_key=idempotency_key).first()
+            if existing is not None:
+                return existing
+
+        z_score = self._z_score(accumulator, value)
+        violations = []
+        if z_score is not None:
+            accumulator.recent_z_scores = (list(accumulator.recent_z_scores) + [z_score])[-Z_WINDOW:]
+            violations = westgard_violations(accumulator.recent_z_scores)
+        is_rejected = bool(self.rejection_rules.intersection(violations))
+
+        if not is_rejected:
+            # Welford's update of the running mean and sum of squared deviations.
+            accumulator.count += 1
+            delta = value - accumulator.mean
+            accumulator.mean += delta / accumulator.count
+            accumulator.m2 += delta * (value - accumulator.mean)
+        accumulator.last_violations = violations
+        if is_rejected and not accumulator.is_locked_out:
+            accumulator.is_locked_out, accumulator.locked_out_at = True, timezone.now()
+        elif not is_rejected:
+            accumulator.is_locked_out, accumulator.locked_out_at = False, None
+        accumulator.save()
+
+        return QCResult.objects.create(
+            accumulator=accumulator,
+            value=value,
+            z_score=z_score,
+            violations=violations,
+            is_rejected=is_rejected,
+            metadata=metadata,
+            idempotency_key=idempotency_key or None,
+        )
+
+    def _z_score(self, accumulator: QCAccumulator, value: float) -> float | None:
+        if accumulator.target_mean is not None and accumulator.target_sd:
+            mean, sd = accumulator.target_mean, accumulator.target_sd
+        elif accumulator.count >= self.min_results and accumulator.sd:
+            mean, sd = accumulator.mean, accumulator.sd
+        else:
+            return None
+        return round((value - mean) / sd, 4)
+
+    @staticmethod
+    def ensure_not_locked_out(analyte_code: AnalyteCode) -> None:
+        locked_lots = list(
+            QCAccumulator.objects.filter(analyte_code=analyte_code, is_locked_out=True).values_list("lot", flat=True)
+        )
+        if locked_lots:
+            raise QCLockoutError(
+                f"Analyte code {analyte_code.code} is locked out by QC (lot {', '.join(sorted(locked_lots))})."
+            )
@@ -0,0 +1,112 @@
+import re
+from collections import defaultdict
+
+from django.db import transaction
+
+from lab.models import AnalyteCode, AnalyteResult, ExamField, RequestedExam, WorklistItem
+
+ANALYTE_REF_RE = re.compile(r"analyte_code_result\((\d+)\)\.\w+")
+
+
+def extract_analyte_code_ids(formula) -> set[int]:
+    if not formula or not isinstance(formula, list):
+        return set()
+    analyte_ids: set[int] = set()
+    for rule in formula:
+        if not isinstance(rule, dict):
+            continue
+        for key in ("condition", "result"):
+            expr = rule.get(key)
+            if not isinstance(expr, str):
+                continue
+            for match in ANALYTE_REF_RE.finditer(expr):
+                analyte_ids.add(int(match.group(1)))
+    return analyte_ids
+
+
+class WorklistQueue:
+    """
+    Keeps the pending (sample, analyte code) pairs each equipment still has to run.
+
+    Formulas are parsed once per exam version when exams are requested; after that
+    the queue only changes through indexed inserts and deletes.
+    """
+
+    def enqueue(self, requested_exams) -> int:
+        requested_exams = [item for item in requested_exams if item.sample_id is not None]
+        pending = self._pending_items(requested_exams)
+        WorklistItem.objects.bulk_create(pending, ignore_conflicts=True)
+        return len(pending)
+
+    def complete(self, *, sample, analyte_code: AnalyteCode) -> None:
+        WorklistItem.objects.filter(sample=sample, analyte_code=analyte_code).delete()
+
+    def discard_samples(self, sample_ids) -> None:
+        WorklistItem.objects.filter(sample_id__in=list(sample_ids)).delete()
+
+    @transaction.atomic
+    def rebuild(self) -> tuple[int, int]:
+        """
+        Reconciles the queue with open requested exams (e.g. after formulas changed).
+
+        Returns the number of items added and removed.
+        """
+        requested_exams = RequestedExam.objects.filter(
+            is_completed=False,
+            sample__isnull=False,
+            exam_request__canceled_at__isnull=True,
+        ).only("id", "sample_id", "exam_version_id")
+        expected = {(item.sample_id, item.analyte_code_id): item for item in self._pending_items(requested_exams)}
+        current = dict(
+            ((sample_id, analyte_code_id), item_id)
+            for item_id, sample_id, analyte_code_id in WorklistItem.objects.values_list(
+                "id", "sample_id", "analyte_code_id"
+            )
+        )
+
+        stale_ids = [item_id for key, item_id in current.items() if key not in expected]
+        missing = [item for key, item in expected.items() if key not in current]
+        if stale_ids:
+            WorklistItem.objects.filter(id__in=stale_ids).delete()
+        WorklistItem.objects.bulk_create(missing, ignore_conflicts=True)
+        return len(missing), len(stale_ids)
+
+    def _pending_items(self, requested_exams) -> list[WorklistItem]:
+        version_ids = {item.exam_version_id for item in requested_exams}
+        if not version_ids:
+            return []
+
+        codes_by_version = defaultdict(set)
+        for version_id, formula in ExamField.objects.filter(exam_version_id__in=version_ids).values_list(
+            "exam_version_id", "formula"
+        ):
+            codes_by_version[version_id] |= extract_analyte_code_ids(formula)
+
+        code_ids = set().union(*codes_by_version.values())
+        codes = {
+            code_id: (analyte_id, equipment_id, group_id)
+            for code_id, analyte_id, equipment_id, group_id in AnalyteCode.objects.filter(
+                id__in=code_ids
+            ).values_list("id", "analyte_id", "equipment_id", "equipment__group_id")
+        }
+        sample_ids = {item.sample_id for item in requested_exams}
+        measured = set(
+            AnalyteResult.objects.filter(sample_id__in=sample_ids).values_list("sample_id", "analyte_id", "equipment_id")
+        )
+
+        pending = {}
+        for requested_exam in requested_exams:
+            for code_id in sorted(codes_by_version.get(requested_exam.exam_version_id, ())):
+                if code_id not in codes:
+                    continue
+                analyte_id, equipment_id, group_id = codes[code_id]
+                key = (requested_exam.sample_id, code_id)
+                if key in pending or (requested_exam.sample_id, analyte_id, equipment_id) in measured:
+                    continue
+                pending[key] = WorklistItem(
+                    sample_id=requested_exam.sample_id,
+                    analyte_code_id=code_id,
+                    equipment_id=equipment_id,
+                    equipment_group_id=group_id,
+                )
+        return list(pending.values())
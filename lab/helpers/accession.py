@@ -0,0 +1,129 @@
+import re
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, OperationalError, connection, connections
+from django.utils import timezone
+
+PREFIX_RE = re.compile(r"^[A-Z]{1,8}$")
+SEQUENCE_PREFIX = "lab_accession_"
+# lab_accession_<prefix>_<yymmdd>[_<sector>]: only day scopes are ever dropped.
+DAY_SEQUENCE_RE = re.compile(r"^lab_accession_[a-z]{1,8}_(\d{6})(?:_\d+)?$")
+
+
+class AccessionNumberService:
+    """
+    Hands out accession codes from PostgreSQL sequences, one sequence per scope.
+
+    A scope is a prefix, optionally narrowed to a day and a sector, and every part
+    of it is printed in the code (R-261019-00042, S-261019-003-00007), so codes of
+    different scopes never collide and nothing has to be retried. Each process
+    takes LAB_ACCESSION_BLOCK_SIZE numbers per round trip and hands them out from
+    memory; sequences never give a number twice, so an unused block only leaves a
+    gap.
+
+    Sequences are created on a separate autocommit connection, never inside the
+    caller's transaction: a rolled back request must not take the sequence with
+    it while this process still holds numbers from it. Creating a scope also
+    drops day scopes older than LAB_ACCESSION_KEEP_DAYS.
+    """
+
+    def __init__(self, block_size: int | None = None):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._blocks = {}
+        self._sequences = set()
+
+    def next_code(self, prefix: str, *, day=None, sector=None, width: int = 5) -> str:
+        prefix = (prefix or "").upper()
+        if not PREFIX_RE.match(prefix):
+            raise ValueError("Accession prefixes must be 1 to 8 letters.")
+        parts = [prefix]
+        if day is not None:
+            parts.append(day.strftime("%y%m%d"))
+        if sector is not None:
+            parts.append(f"{getattr(sector, 'id', sector):03d}")
+        sequence = SEQUENCE_PREFIX + "_".join(part.lower() for part in parts)
+        return "-".join(parts + [f"{self._next_number(sequence):0{width}d}"])
+
+    def next_exam_request_code(self) -> str:
+        return self.next_code(getattr(settings, "LAB_ACCESSION_REQUEST_PREFIX", "R"), day=timezone.localdate())
+
+    def next_sample_code(self) -> str:
+        return self.next_code(getattr(settings, "LAB_ACCESSION_SAMPLE_PREFIX", "S"), day=timezone.localdate())
+
+    def discard_blocks(self) -> None:
+        with self._lock:
+            self._blocks.clear()
+            self._sequences.clear()
+
+    def _next_number(self, sequence: str) -> int:
+        with self._lock:
+            block = self._blocks.get(sequence)
+            if not block:
+                block = self._blocks[sequence] = deque(self._fetch_block(sequence))
+            return block.popleft()
+
+    def _fetch_block(self, sequence: str) -> list[int]:
+        if sequence not in self._sequences:
+            self._create_sequence(sequence)
+            self._sequences.add(sequence)
+        size = self.block_size or getattr(settings, "LAB_ACCESSION_BLOCK_SIZE", 20)
+        # nextval is not transactional, so the block stays valid if the caller rolls back.
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT nextval(%s) FROM generate_series(1, %s)", [sequence, size])
+            return [row[0] for row in cursor.fetchall()]
+
+    def _create_sequence(self, sequence: str) -> None:
+        side = connections.create_connection(DEFAULT_DB_ALIAS)
+        try:
+            with side.cursor() as cursor:
+                try:
+                    cursor.execute(f'CREATE SEQUENCE IF NOT EXISTS "{sequence}"')
+                except IntegrityError:
+                    # Another worker created the scope's sequence at the same moment.
+                    pass
+                self._drop_stale(cursor, keep=sequence)
+        finally:
+            side.close()
+
+    def _drop_stale(self, cursor, *, keep: str = "") -> list[str]:
+        keep_days = getattr(settings, "LAB_ACCESSION_KEEP_DAYS", 7)
+        oldest = timezone.localdate() - timedelta(days=keep_days)
+        cursor.execute("SELECT relname FROM pg_class WHERE relkind = 'S' AND relname LIKE %s", [SEQUENCE_PREFIX + "%"])
+        stale = []
+        for (name,) in cursor.fetchall():
+            match = DAY_SEQUENCE_RE.match(name)
+            if name != keep and match and datetime.strptime(match.group(1), "%y%m%d").date() < oldest:
+                stale.append(name)
+        # Never wait on a transaction still using an old scope; the next pass retries it.
+        cursor.execute("SET lock_timeout = '200ms'")
+        dropped = []
+        for name in stale:
+            try:
+                cursor.execute(f'DROP SEQUENCE IF EXISTS "{name}"')
+            except OperationalError:
+                continue
+            dropped.append(name)
+        return dropped
+
+    def prune(self) -> list[str]:
+        """
+        Drops day scopes older than LAB_ACCESSION_KEEP_DAYS; returns their sequence names.
+        """
+        side = connections.create_connection(DEFAULT_DB_ALIAS)
+        try:
+            with side.cursor() as cursor:
+                stale = self._drop_stale(cursor)
+        finally:
+            side.close()
+        with self._lock:
+            for name in stale:
+                self._blocks.pop(name, None)
+                self._sequences.discard(name)
+        return stale
+
+
+accession_numbers = AccessionNumberService()
@@ -0,0 +1,195 @@
+import gzip
+import json
+
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import ProtectedError
+from django.utils import timezone
+
+from careplans.models import ActionTemplate, CarePlan, CarePlanEnrollment, CarePlanTemplate, GoalTemplate
+from core.models import Service
+from lab.catalog_cache import catalog_cache
+from lab.models import (
+    AllowedStateTransition,
+    Analyte,
+    AnalyteCode,
+    Equipment,
+    EquipmentGroup,
+    Exam,
+    ExamField,
+    ExamFieldTag,
+    ExamVersion,
+    MeasurementUnit,
+    ReferenceRange,
+    Sample,
+    SampleState,
+    SampleStateTransition,
+    SampleType,
+    Sector,
+    Tag,
+    UnitConversion,
+)
+
+SNAPSHOT_FORMAT = "bayleaf.catalog"
+SNAPSHOT_VERSION = 1
+INSERT_BATCH_SIZE = 1000
+
+# Dependency order: every table only references tables listed before it.
+CATALOG_MODELS = [
+    SampleType,
+    SampleState,
+    AllowedStateTransition,
+    MeasurementUnit,
+    Sector,
+    EquipmentGroup,
+    Equipment,
+    Analyte,
+    AnalyteCode,
+    UnitConversion,
+    Service,
+    Exam,
+    ExamVersion,
+    ExamField,
+    ReferenceRange,
+    Tag,
+    ExamFieldTag,
+    CarePlanTemplate,
+    GoalTemplate,
+    ActionTemplate,
+]
+
+# Columns pointing at environment-specific rows (users) are not carried over.
+_EXCLUDED_COLUMNS = {
+    CarePlanTemplate: {"created_by_id"},
+}
+
+
+def _queryset(model):
+    if model is Service:
+        # Only the Service rows backing exams belong to the catalog.
+        return Service.objects.filter(exam__isnull=False)
+    return model._base_manager.all()
+
+
+def _columns(model) -> list[str]:
+    excluded = _EXCLUDED_COLUMNS.get(model, set())
+    return [
+        field.attname
+        for field in model._meta.local_concrete_fields
+        if field.attname not in excluded
+    ]
+
+
+class CatalogSnapshotHelper:
+    """
+    Dumps and restores the lab catalog and care plan templates as one gzip'd JSON file.
+
+    Rows keep their primary keys and are inserted table by table with raw bulk
+    inserts (no save() or signals), so formulas that embed ids stay valid.
+    """
+
+    def dump(self, fileobj) -> dict[str, int]:
+        tables = []
+        counts = {}
+        for model in CATALOG_MODELS:
+            columns = _columns(model)
+            rows = [list(row) for row in _queryset(model).order_by("pk").values_list(*columns)]
+            tables.append({"model": model._meta.label_lower, "columns": columns, "rows": rows})
+            counts[model._meta.label_lower] = len(rows)
+
+        payload = {
+            "format": SNAPSHOT_FORMAT,
+            "version": SNAPSHOT_VERSION,
+            "created_at": timezone.now(),
+            "tables": tables,
+        }
+        with gzip.GzipFile(fileobj=fileobj, mode="wb") as handle:
+            handle.write(json.dumps(payload, cls=DjangoJSONEncoder, separators=(",", ":")).encode("utf-8"))
+        return counts
+
+    @transaction.atomic
+    def load(self, fileobj, *, replace: bool = False) -> dict[str, int]:
+        tables = self._read_tables(fileobj)
+
+        if replace:
+            self._clear_catalog()
+        else:
+            self._ensure_empty(tables)
+
+        counts = {}
+        for model in CATALOG_MODELS:
+            table = tables.get(model._meta.label_lower)
+            if table is None:
+                continue
+            counts[model._meta.label_lower] = self._insert_rows(model, table["columns"], table["rows"])
+
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), CATALOG_MODELS):
+                cursor.execute(sql)
+        # Raw inserts skip model save(), so drop cached catalog indexes explicitly.
+        transaction.on_commit(catalog_cache.invalidate)
+        return counts
+
+    def _read_tables(self, fileobj) -> dict[str, dict]:
+        try:
+            with gzip.GzipFile(fileobj=fileobj, mode="rb") as handle:
+                payload = json.loads(handle.read().decode("utf-8"))
+        except (OSError, ValueError) as exc:
+            raise ValueError(f"Invalid catalog snapshot: {exc}") from exc
+
+        if not isinstance(payload, dict) or payload.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError("File is not a catalog snapshot.")
+        if payload.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(
+                f"Unsupported snapshot version {payload.get('version')} (expected {SNAPSHOT_VERSION})."
+            )
+
+        known = {model._meta.label_lower: model for model in CATALOG_MODELS}
+        tables = {}
+        for table in payload.get("tables") or []:
+            label = table.get("model")
+            model = known.get(label)
+            if model is None:
+                raise ValueError(f"Unknown table '{label}' in snapshot.")
+            unknown_columns = set(table.get("columns") or []) - set(_columns(model))
+            if unknown_columns:
+                raise ValueError(f"Table '{label}' has unknown columns: {sorted(unknown_columns)}")
+            tables[label] = table
+        return tables
+
+    def _ensure_empty(self, tables: dict[str, dict]) -> None:
+        for model in CATALOG_MODELS:
+            if model is Service:
+                table = tables.get(model._meta.label_lower)
+                pk_index = table["columns"].index("id") if table else None
+                ids = [row[pk_index] for row in table["rows"]] if table else []
+                if Service.objects.filter(id__in=ids).exists():
+                    raise ValueError("Services in the snapshot collide with existing service ids.")
+                continue
+            if model._base_manager.exists():
+                raise ValueError(
+                    f"Catalog table '{model._meta.label_lower}' is not empty; use --replace to overwrite it."
+                )
+
+    def _clear_catalog(self) -> None:
+        # Sample types and states cascade into patient samples; never wipe those.
+        if Sample.objects.exists() or SampleStateTransition.objects.exists():
+            raise ValueError("Samples exist; refusing to replace the catalog of a database in use.")
+        # Deleting templates would detach plans from them and cascade into enrollments.
+        if CarePlan.objects.exists() or CarePlanEnrollment.objects.exists():
+            raise ValueError("Care plans exist; refusing to replace the catalog of a database in use.")
+        try:
+            for model in reversed(CATALOG_MODELS):
+                _queryset(model).delete()
+        except ProtectedError as exc:
+            raise ValueError("Catalog rows are still referenced (requests or results exist).") from exc
+
+    def _insert_rows(self, model, columns: list[str], rows: list[list]) -> int:
+        fields = model._meta.local_concrete_fields
+        manager = model._base_manager
+        for start in range(0, len(rows), INSERT_BATCH_SIZE):
+            objs = [model(**dict(zip(columns, row))) for row in rows[start:start + INSERT_BATCH_SIZE]]
+            # raw=True keeps dumped values for auto_now/auto_now_add columns.
+            manager._insert(objs, fields=fields, raw=True, using=manager.db)
+        return len(rows)
@@ -0,0 +1,68 @@
+from django.db import transaction
+
+from lab.critical_alerts.outbox import enqueue_critical_alert
+from lab.helpers.status_board import StatusBoard
+from lab.models import ExamFieldResult, ExamRequest
+from lab.reports.renderer import enqueue_lab_reports
+from webhooks.outbox import enqueue, exam_field_result_message
+
+# Values a new revision inherits from the current one unless they are overridden.
+REVISION_FIELDS = ("raw_value", "computed_value", "classification", "classification_context")
+
+
+class ExamFieldResultHelper:
+    @transaction.atomic
+    def record(self, *, requested_exam, exam_field, **values) -> tuple[ExamFieldResult, bool]:
+        """
+        Appends a revision for (requested_exam, exam_field) unless nothing changed.
+
+        Values not passed are carried over from the current revision, except that a
+        new computed_value drops the classification unless a new one is passed too.
+
+        Returns the current result and whether a new revision was written.
+        """
+        unknown = set(values) - set(REVISION_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown exam field result values: {sorted(unknown)}")
+
+        current = (
+            ExamFieldResult.objects.select_for_update()
+            .filter(requested_exam=requested_exam, exam_field=exam_field, is_current=True)
+            .first()
+        )
+        if current is not None and all(getattr(current, name) == value for name, value in values.items()):
+            return current, False
+
+        revision_values = {name: getattr(current, name) for name in REVISION_FIELDS} if current else {}
+        if current is not None and values.get("computed_value", current.computed_value) != current.computed_value:
+            # The classification described the old value; a new value is unclassified until told otherwise.
+            revision_values.update(classification=None, classification_context={})
+        revision_values.update(values)
+        if current is not None:
+            ExamFieldResult.objects.filter(id=current.id).update(is_current=False)
+
+        result = ExamFieldResult.objects.create(
+            requested_exam=requested_exam,
+            exam_field=exam_field,
+            revision=current.revision + 1 if current else 1,
+            is_current=True,
+            **revision_values,
+        )
+        enqueue_critical_alert(result)
+        enqueue(exam_field_result_message(result))
+        self._update_status_board(current, result)
+        if ExamRequest.objects.filter(id=requested_exam.exam_request_id, is_validated=True).exists():
+            # An amendment to a validated request makes a new revision of its report.
+            enqueue_lab_reports([requested_exam.exam_request_id])
+        return result, True
+
+    def _update_status_board(self, previous, result) -> None:
+        critical = ExamFieldResult.Classification.CRITICAL
+        was_critical = previous is not None and previous.classification == critical
+        is_critical = result.classification == critical
+        if was_critical == is_critical:
+            return
+        exam_request = result.requested_exam.exam_request
+        if exam_request.is_validated or exam_request.canceled_at:
+            return
+        StatusBoard().critical_result_changed(was_critical=was_critical, is_critical=is_critical)
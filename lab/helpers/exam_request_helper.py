@@ -1,6 +1,9 @@
 from django.db import transaction
 from django.utils import timezone
 
+from lab.exam_processing.worklist import WorklistQueue
+from lab.helpers.accession import accession_numbers
+from lab.helpers.status_board import StatusBoard
 from lab.models import ExamRequest, RequestedExam, Sample
 
 
@@ -14,6 +17,8 @@ class ExamRequestHelper:
         exam_versions,
         **exam_request_kwargs,
     ) -> ExamRequest:
+        if not exam_request_kwargs.get("code"):
+            exam_request_kwargs["code"] = accession_numbers.next_exam_request_code()
         exam_request = ExamRequest.objects.create(
             patient=patient,
             requested_by=requested_by,
@@ -25,19 +30,25 @@ class ExamRequestHelper:
             sample_type = exam_version.exam.material
             if sample_type.id not in sample_map:
                 sample_map[sample_type.id] = Sample.objects.create(
+                    code=accession_numbers.next_sample_code(),
                     patient=patient,
                     sample_type=sample_type,
                     exam_request=exam_request,
                 )
 
+        requested_exams = []
         for exam_version in exam_versions:
             sample = sample_map.get(exam_version.exam.material.id)
-            RequestedExam.objects.create(
-                exam_request=exam_request,
-                exam_version=exam_version,
-                sample=sample,
+            requested_exams.append(
+                RequestedExam.objects.create(
+                    exam_request=exam_request,
+                    exam_version=exam_version,
+                    sample=sample,
+                )
             )
 
+        WorklistQueue().enqueue(requested_exams)
+        StatusBoard().exams_requested(exam_version.exam_id for exam_version in exam_versions)
         return exam_request
 
     @transaction.atomic
@@ -53,9 +64,11 @@ class ExamRequestHelper:
         if canceled_by is None:
             raise ValueError("A professional must cancel the exam request.")
 
+        StatusBoard().exam_request_canceled(exam_request)
         exam_request.canceled_at = timezone.now()
         exam_request.canceled_by = canceled_by
         if reason is not None:
             exam_request.cancel_reason = reason
         exam_request.save(update_fields=["canceled_at", "canceled_by", "cancel_reason"])
+        WorklistQueue().discard_samples(exam_request.samples.values_list("id", flat=True))
         return exam_request
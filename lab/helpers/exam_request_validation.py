@@ -0,0 +1,268 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from lab.helpers.status_board import StatusBoard
+from lab.models import ExamField, ExamFieldResult, ExamRequest, RequestedExam, ValidationDecision
+from lab.reports.renderer import enqueue_lab_reports
+
+DEFAULT_AUTOVERIFICATION_RULES = ["complete_panel", "all_fields_normal", "delta_check"]
+
+
+def _coerce_numeric(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _field_label(exam_field) -> str:
+    # ExamField.code is optional.
+    return exam_field.code or exam_field.name or str(exam_field.id)
+
+
+class ExamRequestValidationHelper:
+    @transaction.atomic
+    def bulk_validate(self, *, exam_request_ids, validated_by) -> tuple[list[int], dict[int, str]]:
+        """
+        Validates every eligible request with one UPDATE and one audit insert.
+
+        Returns the validated ids and the reason each other id was skipped.
+        """
+        if validated_by is None:
+            raise ValueError("A professional must validate the exam requests.")
+        requested_ids = list(dict.fromkeys(exam_request_ids))
+
+        rows = {
+            row["id"]: row
+            for row in ExamRequest.objects.select_for_update()
+            .filter(id__in=requested_ids)
+            .values("id", "is_validated", "canceled_at")
+        }
+        incomplete_ids = set(
+            ExamRequest.objects.filter(id__in=rows, requested_exams__is_completed=False).values_list("id", flat=True)
+        )
+
+        skipped = {}
+        eligible_ids = []
+        for exam_request_id in requested_ids:
+            row = rows.get(exam_request_id)
+            if row is None:
+                skipped[exam_request_id] = "Exam request not found."
+            elif row["canceled_at"] is not None:
+                skipped[exam_request_id] = "Exam request is canceled."
+            elif row["is_validated"]:
+                skipped[exam_request_id] = "Exam request is already validated."
+            elif exam_request_id in incomplete_ids:
+                skipped[exam_request_id] = "Exam request has incomplete exams."
+            else:
+                eligible_ids.append(exam_request_id)
+
+        _apply_validation(eligible_ids, validated_by=validated_by)
+        ValidationDecision.objects.bulk_create(
+            [
+                ValidationDecision(
+                    exam_request_id=exam_request_id,
+                    outcome=ValidationDecision.Outcome.VALIDATED,
+                    source=ValidationDecision.Source.MANUAL,
+                    decided_by=validated_by,
+                )
+                for exam_request_id in eligible_ids
+            ]
+        )
+        return eligible_ids, skipped
+
+
+def _apply_validation(exam_request_ids, *, validated_by=None) -> None:
+    if not exam_request_ids:
+        return
+    StatusBoard().exam_requests_validated(exam_request_ids)
+    ExamRequest.objects.filter(id__in=exam_request_ids).update(
+        is_validated=True,
+        validated_by=validated_by,
+        validated_at=timezone.now(),
+        autoverification_pending=False,
+        updated_at=timezone.now(),
+    )
+    enqueue_lab_reports(exam_request_ids)
+
+
+class AutoverificationEngine:
+    """
+    Decides, batch by batch, which completed exam requests validate themselves.
+
+    Rules are named in LAB_AUTOVERIFICATION_RULES; a request is validated only
+    when every rule passes, otherwise it is held for a professional. Each
+    decision leaves a ValidationDecision with the failed rules.
+    """
+
+    def __init__(self, rules=None, *, batch_size: int = 200):
+        names = rules if rules is not None else getattr(
+            settings, "LAB_AUTOVERIFICATION_RULES", DEFAULT_AUTOVERIFICATION_RULES
+        )
+        unknown = [name for name in names if not hasattr(self, f"_rule_{name}")]
+        if unknown:
+            raise ValueError(f"Unknown autoverification rules: {unknown}")
+        self.rules = list(names)
+        self.batch_size = batch_size
+        self.delta_percent = getattr(settings, "LAB_AUTOVERIFICATION_DELTA_PERCENT", 50)
+        self.delta_days = getattr(settings, "LAB_AUTOVERIFICATION_DELTA_DAYS", 365)
+
+    @transaction.atomic
+    def run_batch(self) -> tuple[int, int]:
+        """
+        Returns the number of requests validated and held.
+        """
+        exam_requests = list(
+            ExamRequest.objects.select_for_update(skip_locked=True)
+            .filter(autoverification_pending=True, is_validated=False, canceled_at__isnull=True)
+            .order_by("id")[: self.batch_size]
+        )
+        if not exam_requests:
+            return 0, 0
+
+        context = self._load_context(exam_requests)
+        validated_ids, decisions = [], []
+        for exam_request in exam_requests:
+            failures = {}
+            for name in self.rules:
+                reason = getattr(self, f"_rule_{name}")(exam_request, context)
+                if reason:
+                    failures[name] = reason
+            outcome = ValidationDecision.Outcome.HELD if failures else ValidationDecision.Outcome.VALIDATED
+            if not failures:
+                validated_ids.append(exam_request.id)
+            decisions.append(
+                ValidationDecision(
+                    exam_request=exam_request,
+                    outcome=outcome,
+                    source=ValidationDecision.Source.AUTO,
+                    failed_rules=sorted(failures),
+                    details=failures,
+                )
+            )
+
+        _apply_validation(validated_ids)
+        held_ids = [decision.exam_request_id for decision in decisions if decision.outcome == ValidationDecision.Outcome.HELD]
+        ExamRequest.objects.filter(id__in=held_ids).update(autoverification_pending=False)
+        ValidationDecision.objects.bulk_create(decisions)
+        return len(validated_ids), len(held_ids)
+
+    def _load_context(self, exam_requests) -> dict:
+        request_ids = [exam_request.id for exam_request in exam_requests]
+        results_by_request = defaultdict(list)
+        for result in ExamFieldResult.objects.filter(
+            requested_exam__exam_request_id__in=request_ids,
+            is_current=True,
+        ).select_related("exam_field", "requested_exam"):
+            results_by_request[result.requested_exam.exam_request_id].append(result)
+
+        context = {"results": results_by_request}
+        context["expected_fields"] = self._expected_fields(request_ids)
+        if "delta_check" in self.rules:
+            context["previous"] = self._previous_values(exam_requests)
+        return context
+
+    def _expected_fields(self, request_ids) -> dict:
+        requested = list(
+            RequestedExam.objects.filter(exam_request_id__in=request_ids).values_list(
+                "id", "exam_request_id", "exam_version_id", "is_completed"
+            )
+        )
+        fields_by_version = defaultdict(list)
+        for field_id, version_id, is_required, formula in ExamField.objects.filter(
+            exam_version_id__in={row[2] for row in requested}
+        ).values_list("id", "exam_version_id", "is_required", "formula"):
+            if is_required or formula:
+                fields_by_version[version_id].append(field_id)
+
+        expected = defaultdict(lambda: {"incomplete": 0, "fields": set()})
+        for requested_exam_id, exam_request_id, version_id, is_completed in requested:
+            entry = expected[exam_request_id]
+            if not is_completed:
+                entry["incomplete"] += 1
+            entry["fields"].update((requested_exam_id, field_id) for field_id in fields_by_version[version_id])
+        return expected
+
+    def _previous_values(self, exam_requests) -> dict:
+        """
+        Latest earlier numeric value per (patient, exam field), before each request.
+        """
+        patient_ids = {exam_request.patient_id for exam_request in exam_requests}
+        oldest = min(exam_request.created_at for exam_request in exam_requests)
+        rows = (
+            ExamFieldResult.objects.filter(
+                is_current=True,
+                requested_exam__exam_request__patient_id__in=patient_ids,
+                requested_exam__exam_request__created_at__gte=oldest - timedelta(days=self.delta_days),
+            )
+            .exclude(requested_exam__exam_request_id__in=[exam_request.id for exam_request in exam_requests])
+            .values_list(
+                "requested_exam__exam_request__patient_id",
+                "exam_field_id",
+                "requested_exam__exam_request__created_at",
+                "computed_value",
+            )
+            .order_by("requested_exam__exam_request__created_at")
+        )
+        history = defaultdict(list)
+        for patient_id, exam_field_id, created_at, computed_value in rows:
+            value = _coerce_numeric(computed_value)
+            if value is not None:
+                history[(patient_id, exam_field_id)].append((created_at, value))
+        return history
+
+    def _rule_complete_panel(self, exam_request, context) -> str | None:
+        expected = context["expected_fields"].get(exam_request.id)
+        if expected is None:
+            return "No requested exams."
+        if expected["incomplete"]:
+            return f"{expected['incomplete']} requested exam(s) are not completed."
+        present = {(result.requested_exam_id, result.exam_field_id) for result in context["results"][exam_request.id]}
+        missing = expected["fields"] - present
+        if missing:
+            return f"{len(missing)} field result(s) are missing."
+        return None
+
+    def _rule_all_fields_normal(self, exam_request, context) -> str | None:
+        """
+        Every numeric result must be classified normal; one without a classification
+        (no reference range applied) is held too, since nothing vouched for it.
+        """
+        flagged, unclassified = [], []
+        for result in context["results"][exam_request.id]:
+            if result.classification:
+                if result.classification != ExamFieldResult.Classification.NORMAL:
+                    flagged.append(_field_label(result.exam_field))
+            elif _coerce_numeric(result.computed_value) is not None:
+                unclassified.append(_field_label(result.exam_field))
+        reasons = []
+        if flagged:
+            reasons.append(f"Not normal: {', '.join(sorted(flagged))}.")
+        if unclassified:
+            reasons.append(f"Not classified: {', '.join(sorted(unclassified))}.")
+        return " ".join(reasons) or None
+
+    def _rule_delta_check(self, exam_request, context) -> str | None:
+        failures = []
+        for result in context["results"][exam_request.id]:
+            value = _coerce_numeric(result.computed_value)
+            if value is None:
+                continue
+            earlier = [
+                previous
+                for created_at, previous in context["previous"].get((exam_request.patient_id, result.exam_field_id), [])
+                if created_at < exam_request.created_at
+                and created_at >= exam_request.created_at - timedelta(days=self.delta_days)
+            ]
+            if not earlier or earlier[-1] == 0:
+                continue
+            change = abs(value - earlier[-1]) / abs(earlier[-1]) * 100
+            if change > self.delta_percent:
+                failures.append(f"{_field_label(result.exam_field)} changed {change:.0f}%")
+        if failures:
+            return f"Delta check failed: {', '.join(sorted(failures))}."
+        return None
@@ -0,0 +1,168 @@
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.utils import timezone
+
+from lab.models import (
+    Exam,
+    ExamFieldResult,
+    RequestedExam,
+    Sample,
+    SampleState,
+    SampleStateTransition,
+    StatusBoardCounter,
+)
+
+Metric = StatusBoardCounter.Metric
+
+
+def _critical_results(exam_request_ids=None):
+    queryset = ExamFieldResult.objects.filter(
+        is_current=True,
+        classification=ExamFieldResult.Classification.CRITICAL,
+    )
+    if exam_request_ids is not None:
+        return queryset.filter(requested_exam__exam_request_id__in=list(exam_request_ids))
+    return queryset.filter(
+        requested_exam__exam_request__is_validated=False,
+        requested_exam__exam_request__canceled_at__isnull=True,
+    )
+
+
+class StatusBoard:
+    """
+    Counters behind the lab status board.
+
+    Each write path reports what it changed and the deltas are upserted in its
+    transaction, so reading the board is one query over a handful of rows.
+    """
+
+    def add(self, deltas) -> None:
+        """
+        Adds {(metric, key): delta} to the counters with one upsert.
+        """
+        rows = sorted((metric, key, delta) for (metric, key), delta in deltas.items() if delta)
+        if not rows:
+            return
+        now = timezone.now()
+        table = StatusBoardCounter._meta.db_table
+        # Fixed row order, so concurrent writers lock counters in the same sequence.
+        values = ", ".join(["(%s, %s, %s, %s)"] * len(rows))
+        params = [item for metric, key, delta in rows for item in (str(metric), key, delta, now)]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (metric, key, value, updated_at) VALUES {values} "
+                f"ON CONFLICT (metric, key) DO UPDATE SET value = {table}.value + EXCLUDED.value, "
+                "updated_at = EXCLUDED.updated_at",
+                params,
+            )
+
+    def sample_moved(self, *, previous_state_id, new_state_id) -> None:
+        deltas = Counter({(Metric.SAMPLE_STATE, new_state_id): 1})
+        if previous_state_id is not None:
+            deltas[(Metric.SAMPLE_STATE, previous_state_id)] -= 1
+        self.add(deltas)
+
+    def exams_requested(self, exam_ids) -> None:
+        self.add(Counter((Metric.PENDING_EXAM, exam_id) for exam_id in exam_ids))
+
+    def exam_completion_changed(self, *, exam_id, is_completed: bool) -> None:
+        self.add({(Metric.PENDING_EXAM, exam_id): -1 if is_completed else 1})
+
+    def critical_result_changed(self, *, was_critical: bool, is_critical: bool) -> None:
+        self.add({(Metric.CRITICAL_AWAITING_VALIDATION, 0): int(is_critical) - int(was_critical)})
+
+    def exam_requests_validated(self, exam_request_ids) -> None:
+        """
+        Call for requests that were open (not validated, not canceled) until now.
+        """
+        self.add({(Metric.CRITICAL_AWAITING_VALIDATION, 0): -_critical_results(exam_request_ids).count()})
+
+    def exam_request_canceled(self, exam_request) -> None:
+        """
+        Call before the cancellation is saved, while the request still counts as open.
+        """
+        deltas = Counter()
+        for row in (
+            RequestedExam.objects.filter(exam_request=exam_request, is_completed=False)
+            .values("exam_version__exam_id")
+            .annotate(total=Count("id"))
+        ):
+            deltas[(Metric.PENDING_EXAM, row["exam_version__exam_id"])] -= row["total"]
+        if not exam_request.is_validated:
+            deltas[(Metric.CRITICAL_AWAITING_VALIDATION, 0)] -= _critical_results([exam_request.id]).count()
+        self.add(deltas)
+
+    def snapshot(self) -> dict:
+        counters = list(StatusBoardCounter.objects.filter(value__gt=0).order_by("metric", "key"))
+        by_metric = {metric: {} for metric in Metric}
+        updated_at = None
+        for counter in counters:
+            by_metric[counter.metric][counter.key] = counter.value
+            updated_at = max(updated_at, counter.updated_at) if updated_at else counter.updated_at
+
+        states = SampleState.objects.in_bulk(list(by_metric[Metric.SAMPLE_STATE]))
+        exams = Exam.objects.in_bulk(list(by_metric[Metric.PENDING_EXAM]))
+        return {
+            "sample_states": [
+                {"id": key, "name": states[key].name, "count": value}
+                for key, value in by_metric[Metric.SAMPLE_STATE].items()
+                if key in states
+            ],
+            "pending_exams": [
+                {"id": key, "code": exams[key].code, "name": exams[key].name, "count": value}
+                for key, value in by_metric[Metric.PENDING_EXAM].items()
+                if key in exams
+            ],
+            "critical_awaiting_validation": by_metric[Metric.CRITICAL_AWAITING_VALIDATION].get(0, 0),
+            "updated_at": updated_at,
+        }
+
+    @transaction.atomic
+    def reconcile(self) -> int:
+        """
+        Rewrites every counter from the source tables and returns how many were off.
+
+        The table lock waits for writers that already touched a counter and holds
+        back new ones until the totals are written, so no delta is lost or doubled.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {StatusBoardCounter._meta.db_table} IN EXCLUSIVE MODE")
+
+        expected = Counter()
+        latest_state = (
+            SampleStateTransition.objects.filter(sample=OuterRef("pk"), is_verified=True)
+            .order_by("-created_at")
+            .values("new_state_id")[:1]
+        )
+        for row in (
+            Sample.objects.annotate(state_id=Subquery(latest_state))
+            .filter(state_id__isnull=False)
+            .values("state_id")
+            .annotate(total=Count("id"))
+        ):
+            expected[(Metric.SAMPLE_STATE, row["state_id"])] = row["total"]
+        for row in (
+            RequestedExam.objects.filter(is_completed=False, exam_request__canceled_at__isnull=True)
+            .values("exam_version__exam_id")
+            .annotate(total=Count("id"))
+        ):
+            expected[(Metric.PENDING_EXAM, row["exam_version__exam_id"])] = row["total"]
+        expected[(Metric.CRITICAL_AWAITING_VALIDATION, 0)] = _critical_results().count()
+
+        current = {(counter.metric, counter.key): counter for counter in StatusBoardCounter.objects.all()}
+        now = timezone.now()
+        drifted = [key for key in set(current) | set(expected) if expected.get(key, 0) != getattr(current.get(key), "value", 0)]
+        to_update, to_create = [], []
+        for metric, key in drifted:
+            value = expected.get((metric, key), 0)
+            counter = current.get((metric, key))
+            if counter is None:
+                to_create.append(StatusBoardCounter(metric=metric, key=key, value=value, updated_at=now))
+            else:
+                counter.value, counter.updated_at = value, now
+                to_update.append(counter)
+        StatusBoardCounter.objects.bulk_update(to_update, ["value", "updated_at"])
+        StatusBoardCounter.objects.bulk_create(to_create)
+        return len(drifted)
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lab.helpers.exam_request_validation import AutoverificationEngine
+
+
+class Command(BaseCommand):
+    help = "Validate completed exam requests that pass every autoverification rule."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200, help="Exam requests claimed per batch.")
+        parser.add_argument("--interval", type=float, default=10, help="Seconds to sleep when nothing is pending.")
+        parser.add_argument("--once", action="store_true", help="Drain pending exam requests once and exit.")
+
+    def handle(self, *args, **options):
+        try:
+            engine = AutoverificationEngine(batch_size=max(options["batch_size"], 1))
+        except ValueError as exc:
+            raise CommandError(f"Invalid autoverification configuration: {exc}") from exc
+
+        while True:
+            validated, held = engine.run_batch()
+            if validated or held:
+                self.stdout.write(f"Validated {validated}, held {held} for review.")
+            if validated + held == engine.batch_size:
+                continue
+            if options["once"]:
+                break
+            time.sleep(max(options["interval"], 0))
+
+        self.stdout.write(self.style.SUCCESS("Autoverification finished."))
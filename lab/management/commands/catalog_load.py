@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lab.helpers.catalog_snapshot import CatalogSnapshotHelper
+
+
+class Command(BaseCommand):
+    help = "Load a catalog snapshot produced by catalog_dump, preserving primary keys."
+
+    def add_arguments(self, parser):
+        parser.add_argument("snapshot_path", type=str, help="Path to the snapshot file.")
+        parser.add_argument(
+            "--replace",
+            action="store_true",
+            help="Delete the existing catalog before loading (refused once samples or care plans exist).",
+        )
+
+    def handle(self, *args, **options):
+        snapshot_path = options["snapshot_path"]
+        started = time.monotonic()
+
+        try:
+            with open(snapshot_path, "rb") as handle:
+                counts = CatalogSnapshotHelper().load(handle, replace=options["replace"])
+        except FileNotFoundError as exc:
+            raise CommandError(f"Snapshot file not found: {snapshot_path}") from exc
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+
+        for label, count in counts.items():
+            self.stdout.write(f"{label}: {count}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Catalog loaded: {sum(counts.values())} rows in {time.monotonic() - started:.1f}s."
+            )
+        )
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lab.critical_alerts.dispatcher import CriticalAlertDispatcher
+
+
+class Command(BaseCommand):
+    help = "Deliver pending critical value alerts to the requesting professionals."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50, help="Alerts claimed per batch.")
+        parser.add_argument("--interval", type=float, default=5, help="Seconds to sleep when no alert is due.")
+        parser.add_argument("--max-attempts", type=int, default=5, help="Attempts before an alert is marked failed.")
+        parser.add_argument("--once", action="store_true", help="Drain due alerts once and exit.")
+
+    def handle(self, *args, **options):
+        try:
+            dispatcher = CriticalAlertDispatcher(
+                batch_size=max(options["batch_size"], 1),
+                max_attempts=max(options["max_attempts"], 1),
+            )
+        except (ImportError, ValueError) as exc:
+            raise CommandError(f"Invalid alert channel configuration: {exc}") from exc
+
+        while True:
+            stats = dispatcher.dispatch_batch()
+            if stats.processed:
+                self.stdout.write(
+                    f"Delivered {stats.delivered}, retrying {stats.retried}, failed {stats.failed} "
+                    f"(max latency {stats.max_latency_ms if stats.max_latency_ms is not None else '-'} ms)."
+                )
+            if stats.processed == dispatcher.batch_size:
+                continue
+            if options["once"]:
+                break
+            time.sleep(max(options["interval"], 0))
+
+        self.stdout.write(self.style.SUCCESS("Critical alert dispatch finished."))
@@ -1,6 +1,9 @@
 import csv
 import json
 import re
+import time
+from collections import defaultdict
+from contextlib import nullcontext
 from pathlib import Path
 
 from django.core.management.base import BaseCommand, CommandError
@@ -23,6 +26,17 @@ from lab.models import (
 _ANALYTE_REF_RE = re.compile(r"analyte_code_result\(([^)]+)\)")
 _CATALOG_CACHE = None
 
+DEFAULT_BATCH_SIZE = 500
+
+_REQUIRED_COLUMNS = {
+    "exam_code",
+    "exam_name",
+    "exam_material",
+    "exam_version",
+    "field_name",
+    "field_type",
+}
+
 
 def _parse_bool(value, default=False):
     if value is None:
@@ -54,77 +68,6 @@ def _parse_json(value):
         raise ValueError(f"Invalid JSON: {exc}") from exc
 
 
-def _resolve_formula_refs(formula):
-    if not formula or not isinstance(formula, list):
-        return formula
-    for rule in formula:
-        if not isinstance(rule, dict):
-            continue
-        for key in ("condition", "result"):
-            expr = rule.get(key)
-            if not isinstance(expr, str):
-                continue
-            rule[key] = _resolve_analyte_refs(expr)
-    return formula
-
-
-def _resolve_analyte_refs(expression: str) -> str:
-    def replace(match: re.Match) -> str:
-        token = match.group(1).strip()
-        if token.isdigit():
-            return f"analyte_code_result({token})"
-        code = token.strip("'\"")
-        analyte_code = AnalyteCode.objects.filter(code=code).first()
-        if analyte_code is None:
-            analyte = Analyte.objects.filter(default_code=code).first()
-            if analyte is not None:
-                analyte_code = AnalyteCode.objects.filter(analyte=analyte).order_by("id").first()
-                if analyte_code is None:
-                    equipment = Equipment.objects.filter(group=analyte.group).order_by("id").first()
-                    if equipment is None:
-                        raise ValueError(f"No equipment found for analyte '{code}'.")
-                    analyte_code, _ = AnalyteCode.objects.get_or_create(
-                        analyte=analyte,
-                        equipment=equipment,
-                        defaults={"code": analyte.default_code, "is_default": True},
-                    )
-            else:
-                analyte = _ensure_analyte_from_catalog(code)
-                if analyte is not None:
-                    equipment = Equipment.objects.filter(group=analyte.group).order_by("id").first()
-                    if equipment is None:
-                        raise ValueError(f"No equipment found for analyte '{code}'.")
-                    analyte_code, _ = AnalyteCode.objects.get_or_create(
-                        analyte=analyte,
-                        equipment=equipment,
-                        defaults={"code": analyte.default_code, "is_default": True},
-                    )
-        if analyte_code is None:
-            raise ValueError(f"Unknown analyte code reference '{code}'.")
-        return f"analyte_code_result({analyte_code.id})"
-
-    return _ANALYTE_REF_RE.sub(replace, expression)
-
-
-def _ensure_analyte_from_catalog(code: str) -> Analyte | None:
-    catalog = _load_catalog()
-    analyte_info = catalog.get(code)
-    if analyte_info is None:
-        return None
-    group_name = analyte_info["group"]
-    name = analyte_info["name"]
-    group, _ = EquipmentGroup.objects.get_or_create(name=group_name)
-    analyte, _ = Analyte.objects.get_or_create(
-        name=name,
-        defaults={"group": group, "default_code": code},
-    )
-    if analyte.default_code != code or analyte.group_id != group.id:
-        analyte.default_code = code
-        analyte.group = group
-        analyte.save(update_fields=["default_code", "group"])
-    return analyte
-
-
 def _load_catalog() -> dict:
     global _CATALOG_CACHE
     if _CATALOG_CACHE is not None:
@@ -152,52 +95,64 @@ def _load_catalog() -> dict:
     return _CATALOG_CACHE
 
 
-class Command(BaseCommand):
-    help = "Import exams, versions, and fields from a CSV file."
-
-    def add_arguments(self, parser):
-        parser.add_argument("csv_path", type=str, help="Path to the CSV file.")
-        parser.add_argument(
-            "--dry-run",
-            action="store_true",
-            help="Parse and validate, but do not write to the database.",
-        )
-
-    def handle(self, *args, **options):
-        csv_path = options["csv_path"]
-        dry_run = options["dry_run"]
-
-        with open(csv_path, newline="", encoding="utf-8") as handle:
-            reader = csv.DictReader(handle)
-            if not reader.fieldnames:
-                raise CommandError("CSV file has no headers.")
-
-            required = {
-                "exam_code",
-                "exam_name",
-                "exam_material",
-                "exam_version",
-                "field_name",
-                "field_type",
-            }
-            missing = required - set(reader.fieldnames)
-            if missing:
-                raise CommandError(f"Missing required columns: {sorted(missing)}")
-
-            with transaction.atomic():
-                for idx, row in enumerate(reader, start=2):
-                    try:
-                        self._import_row(row)
-                    except Exception as exc:
-                        raise CommandError(f"Row {idx}: {exc}") from exc
-
-                if dry_run:
-                    transaction.set_rollback(True)
-                    self.stdout.write(self.style.WARNING("Dry-run complete; no changes saved."))
-                else:
-                    self.stdout.write(self.style.SUCCESS("Import completed."))
-
-    def _import_row(self, row):
+class _CatalogIndex:
+    """
+    In-memory view of the exam catalog used to apply CSV rows without per-row queries.
+
+    Rows only mutate the index; new and changed objects are queued and written by
+    `flush()` with bulk inserts/updates, in dependency order.
+    """
+
+    def __init__(self):
+        self.sample_types = {obj.name: obj for obj in SampleType.objects.all()}
+        self.units = {obj.code: obj for obj in MeasurementUnit.objects.all()}
+        self.exams = {obj.code: obj for obj in Exam.objects.all()}
+        exam_codes = {exam.id: code for code, exam in self.exams.items()}
+
+        self.versions = {}
+        self.versions_by_exam = defaultdict(list)
+        for version in ExamVersion.objects.order_by("id"):
+            exam_code = exam_codes[version.exam_id]
+            self.versions[(exam_code, version.version)] = version
+            self.versions_by_exam[exam_code].append(version)
+
+        version_keys = {version.id: key for key, version in self.versions.items()}
+        self.fields_by_code = {}
+        self.fields_by_name = {}
+        for field in ExamField.objects.order_by("id"):
+            version_key = version_keys[field.exam_version_id]
+            if field.code:
+                self.fields_by_code[(version_key, field.code)] = field
+            self.fields_by_name.setdefault((version_key, field.name), field)
+
+        self.tags = {obj.name: obj for obj in Tag.objects.all()}
+        self.tag_links = set(ExamFieldTag.objects.values_list("exam_field_id", "tag_id"))
+
+        self.groups = {obj.name: obj for obj in EquipmentGroup.objects.all()}
+        self.analytes_by_name = {}
+        self.analytes_by_default_code = defaultdict(list)
+        for analyte in Analyte.objects.order_by("id"):
+            self.analytes_by_name[analyte.name] = analyte
+            self.analytes_by_default_code[analyte.default_code].append(analyte)
+
+        self.equipment_by_group = {}
+        for equipment in Equipment.objects.order_by("id"):
+            self.equipment_by_group.setdefault(equipment.group_id, equipment)
+
+        self.analyte_codes_by_code = {}
+        self.analyte_codes_by_analyte = {}
+        self.analyte_codes_by_pair = {}
+        for analyte_code in AnalyteCode.objects.order_by("id"):
+            self._register_analyte_code(analyte_code)
+
+        self._created = defaultdict(list)
+        self._updated = defaultdict(dict)
+        self._updated_fields = defaultdict(set)
+        self._new_links = []
+
+    # --------- row application ---------
+
+    def apply_row(self, row) -> None:
         exam_code = str(row.get("exam_code", "")).strip()
         exam_name = str(row.get("exam_name", "")).strip()
         exam_description = str(row.get("exam_description", "")).strip() or None
@@ -207,23 +162,23 @@ class Command(BaseCommand):
         if not exam_code or not exam_name or not exam_material:
             raise ValueError("exam_code, exam_name, and exam_material are required.")
 
-        sample_type, _ = SampleType.objects.get_or_create(name=exam_material)
-
-        exam, created = Exam.objects.get_or_create(
-            code=exam_code,
-            defaults={
-                "name": exam_name,
-                "description": exam_description,
-                "material": sample_type,
-                "is_active": exam_is_active,
-            },
-        )
-        if not created:
-            exam.name = exam_name
-            exam.description = exam_description
-            exam.material = sample_type
-            exam.is_active = exam_is_active
-            exam.save(update_fields=["name", "description", "material", "is_active"])
+        sample_type = self.sample_types.get(exam_material)
+        if sample_type is None:
+            sample_type = self._new(SampleType, name=exam_material)
+            self.sample_types[exam_material] = sample_type
+
+        exam_values = {
+            "name": exam_name,
+            "description": exam_description,
+            "material": sample_type,
+            "is_active": exam_is_active,
+        }
+        exam = self.exams.get(exam_code)
+        if exam is None:
+            exam = self._new(Exam, code=exam_code, **exam_values)
+            self.exams[exam_code] = exam
+        else:
+            self._assign(exam, **exam_values)
 
         version_number = _parse_int(row.get("exam_version"))
         version_notes = str(row.get("exam_version_notes", "")).strip() or None
@@ -232,18 +187,25 @@ class Command(BaseCommand):
         if version_number <= 0:
             raise ValueError("exam_version must be a positive integer.")
 
+        version_key = (exam_code, version_number)
+        exam_version = self.versions.get(version_key)
         if version_is_active:
-            ExamVersion.objects.filter(exam=exam, is_active=True).update(is_active=False)
-
-        exam_version, created = ExamVersion.objects.get_or_create(
-            exam=exam,
-            version=version_number,
-            defaults={"notes": version_notes, "is_active": version_is_active},
-        )
-        if not created:
-            exam_version.notes = version_notes
-            exam_version.is_active = version_is_active
-            exam_version.save(update_fields=["notes", "is_active"])
+            for other in self.versions_by_exam[exam_code]:
+                if other is not exam_version:
+                    self._assign(other, is_active=False)
+
+        if exam_version is None:
+            exam_version = self._new(
+                ExamVersion,
+                exam=exam,
+                version=version_number,
+                notes=version_notes,
+                is_active=version_is_active,
+            )
+            self.versions[version_key] = exam_version
+            self.versions_by_exam[exam_code].append(exam_version)
+        else:
+            self._assign(exam_version, notes=version_notes, is_active=version_is_active)
 
         field_name = str(row.get("field_name", "")).strip()
         field_code = str(row.get("field_code", "")).strip() or None
@@ -252,8 +214,7 @@ class Command(BaseCommand):
         field_is_required = _parse_bool(row.get("field_is_required"), default=False)
         measurement_unit_code = str(row.get("field_measurement_unit_code", "")).strip()
         measurement_unit_name = str(row.get("field_measurement_unit_name", "")).strip()
-        field_formula = _parse_json(row.get("field_formula"))
-        field_formula = _resolve_formula_refs(field_formula)
+        field_formula = self.resolve_formula_refs(_parse_json(row.get("field_formula")))
         field_classification_rules = _parse_json(row.get("field_classification_rules"))
 
         if not field_name:
@@ -261,62 +222,41 @@ class Command(BaseCommand):
 
         measurement_unit = None
         if measurement_unit_code:
-            measurement_unit, _ = MeasurementUnit.objects.get_or_create(
-                code=measurement_unit_code,
-                defaults={"name": measurement_unit_name or measurement_unit_code},
-            )
-            if measurement_unit_name:
-                measurement_unit.name = measurement_unit_name
-                measurement_unit.save(update_fields=["name"])
-
+            measurement_unit = self.units.get(measurement_unit_code)
+            if measurement_unit is None:
+                measurement_unit = self._new(
+                    MeasurementUnit,
+                    code=measurement_unit_code,
+                    name=measurement_unit_name or measurement_unit_code,
+                )
+                self.units[measurement_unit_code] = measurement_unit
+            elif measurement_unit_name:
+                self._assign(measurement_unit, name=measurement_unit_name)
+
+        field_values = {
+            "name": field_name,
+            "priority": field_priority,
+            "field_type": field_type,
+            "measurement_unit": measurement_unit,
+            "formula": field_formula,
+            "classification_rules": field_classification_rules,
+            "is_required": field_is_required,
+        }
         if field_code:
-            field, created = ExamField.objects.get_or_create(
-                exam_version=exam_version,
-                code=field_code,
-                defaults={
-                    "name": field_name,
-                    "priority": field_priority,
-                    "field_type": field_type,
-                    "measurement_unit": measurement_unit,
-                    "formula": field_formula,
-                    "classification_rules": field_classification_rules,
-                    "is_required": field_is_required,
-                },
-            )
+            field = self.fields_by_code.get((version_key, field_code))
         else:
-            field, created = ExamField.objects.get_or_create(
-                exam_version=exam_version,
-                name=field_name,
-                defaults={
-                    "code": None,
-                    "priority": field_priority,
-                    "field_type": field_type,
-                    "measurement_unit": measurement_unit,
-                    "formula": field_formula,
-                    "classification_rules": field_classification_rules,
-                    "is_required": field_is_required,
-                },
-            )
+            field = self.fields_by_name.get((version_key, field_name))
 
-        if not created:
-            field.name = field_name
-            field.priority = field_priority
-            field.field_type = field_type
-            field.measurement_unit = measurement_unit
-            field.formula = field_formula
-            field.classification_rules = field_classification_rules
-            field.is_required = field_is_required
-            field.save(
-                update_fields=[
-                    "name",
-                    "priority",
-                    "field_type",
-                    "measurement_unit",
-                    "formula",
-                    "classification_rules",
-                    "is_required",
-                ]
-            )
+        if field is None:
+            field = self._new(ExamField, exam_version=exam_version, code=field_code, **field_values)
+            if field_code:
+                self.fields_by_code[(version_key, field_code)] = field
+        else:
+            previous_name = field.name
+            self._assign(field, **field_values)
+            if previous_name != field_name and self.fields_by_name.get((version_key, previous_name)) is field:
+                del self.fields_by_name[(version_key, previous_name)]
+        self.fields_by_name.setdefault((version_key, field_name), field)
 
         tag_names = str(row.get("field_tags", "")).strip()
         tag_descriptions = _parse_json(row.get("tag_descriptions_json"))
@@ -325,11 +265,243 @@ class Command(BaseCommand):
         if tag_names:
             names = [t.strip() for t in tag_names.split(",") if t.strip()]
             for name in names:
-                tag, _ = Tag.objects.get_or_create(name=name)
+                tag = self.tags.get(name)
+                if tag is None:
+                    tag = self._new(Tag, name=name)
+                    self.tags[name] = tag
                 if isinstance(tag_descriptions, dict) and name in tag_descriptions:
-                    tag.description = tag_descriptions[name]
+                    self._assign(tag, description=tag_descriptions[name])
                 if isinstance(tag_formulas, dict) and name in tag_formulas:
-                    tag.formula = tag_formulas[name]
-                if tag.description is not None or tag.formula is not None:
-                    tag.save(update_fields=["description", "formula"])
-                ExamFieldTag.objects.get_or_create(exam_field=field, tag=tag)
+                    self._assign(tag, formula=tag_formulas[name])
+                self._new_links.append((field, tag))
+
+    # --------- formula references ---------
+
+    def resolve_formula_refs(self, formula):
+        if not formula or not isinstance(formula, list):
+            return formula
+        for rule in formula:
+            if not isinstance(rule, dict):
+                continue
+            for key in ("condition", "result"):
+                expr = rule.get(key)
+                if not isinstance(expr, str):
+                    continue
+                rule[key] = _ANALYTE_REF_RE.sub(self._replace_analyte_ref, expr)
+        return formula
+
+    def _replace_analyte_ref(self, match: re.Match) -> str:
+        token = match.group(1).strip()
+        if token.isdigit():
+            return f"analyte_code_result({token})"
+        code = token.strip("'\"")
+        analyte_code = self.analyte_codes_by_code.get(code)
+        if analyte_code is None:
+            same_code = self.analytes_by_default_code.get(code)
+            analyte = same_code[0] if same_code else None
+            if analyte is not None:
+                analyte_code = self.analyte_codes_by_analyte.get(analyte.id)
+                if analyte_code is None:
+                    analyte_code = self._default_analyte_code(analyte, code)
+            else:
+                analyte = self._ensure_analyte_from_catalog(code)
+                if analyte is not None:
+                    analyte_code = self._default_analyte_code(analyte, code)
+        if analyte_code is None:
+            raise ValueError(f"Unknown analyte code reference '{code}'.")
+        return f"analyte_code_result({analyte_code.id})"
+
+    def _default_analyte_code(self, analyte: Analyte, code: str) -> AnalyteCode:
+        equipment = self.equipment_by_group.get(analyte.group_id)
+        if equipment is None:
+            raise ValueError(f"No equipment found for analyte '{code}'.")
+        analyte_code = self.analyte_codes_by_pair.get((analyte.id, equipment.id))
+        if analyte_code is None:
+            # Needs a primary key right away: the formula is rewritten to reference it.
+            analyte_code = AnalyteCode.objects.create(
+                analyte=analyte,
+                equipment=equipment,
+                code=analyte.default_code,
+                is_default=True,
+            )
+            self._register_analyte_code(analyte_code)
+        return analyte_code
+
+    def _ensure_analyte_from_catalog(self, code: str) -> Analyte | None:
+        analyte_info = _load_catalog().get(code)
+        if analyte_info is None:
+            return None
+        group_name = analyte_info["group"]
+        name = analyte_info["name"]
+        group = self.groups.get(group_name)
+        if group is None:
+            group = EquipmentGroup.objects.create(name=group_name)
+            self.groups[group_name] = group
+        analyte = self.analytes_by_name.get(name)
+        if analyte is None:
+            analyte = Analyte.objects.create(name=name, group=group, default_code=code)
+            self.analytes_by_name[name] = analyte
+            self.analytes_by_default_code[code].append(analyte)
+        elif analyte.default_code != code or analyte.group_id != group.id:
+            if analyte.default_code != code:
+                self.analytes_by_default_code[analyte.default_code].remove(analyte)
+                same_code = self.analytes_by_default_code[code]
+                same_code.append(analyte)
+                same_code.sort(key=lambda obj: obj.id)
+            analyte.default_code = code
+            analyte.group = group
+            analyte.save(update_fields=["default_code", "group"])
+        return analyte
+
+    def _register_analyte_code(self, analyte_code: AnalyteCode) -> None:
+        self.analyte_codes_by_code.setdefault(analyte_code.code, analyte_code)
+        self.analyte_codes_by_analyte.setdefault(analyte_code.analyte_id, analyte_code)
+        self.analyte_codes_by_pair[(analyte_code.analyte_id, analyte_code.equipment_id)] = analyte_code
+
+    # --------- pending writes ---------
+
+    def _new(self, model, **values):
+        obj = model(**values)
+        self._created[model].append(obj)
+        return obj
+
+    def _assign(self, obj, **values) -> None:
+        changed = []
+        for name, value in values.items():
+            field = obj._meta.get_field(name)
+            if field.is_relation:
+                target = None if value is None else value.pk
+                if getattr(obj, field.attname) == target and (value is None or target is not None):
+                    continue
+            elif getattr(obj, name) == value:
+                continue
+            setattr(obj, name, value)
+            changed.append(name)
+        if changed and obj.pk is not None:
+            model = type(obj)
+            self._updated[model][obj.pk] = obj
+            self._updated_fields[model].update(changed)
+
+    def flush(self, batch_size: int) -> None:
+        """
+        Write queued inserts/updates; parents go first so children pick up their ids.
+        """
+        for model in (SampleType, MeasurementUnit):
+            self._bulk_create(model, batch_size)
+        # Exam is a multi-table child of Service, which bulk_create cannot insert.
+        for exam in self._created.pop(Exam, []):
+            exam.save()
+        for model in (ExamVersion, ExamField, Tag):
+            self._bulk_create(model, batch_size)
+        for model in (SampleType, MeasurementUnit, Exam, ExamVersion, ExamField, Tag):
+            self._bulk_update(model, batch_size)
+
+        links = []
+        for field, tag in self._new_links:
+            key = (field.pk, tag.pk)
+            if key in self.tag_links:
+                continue
+            self.tag_links.add(key)
+            links.append(ExamFieldTag(exam_field=field, tag=tag))
+        self._new_links = []
+        if links:
+            ExamFieldTag.objects.bulk_create(links, batch_size=batch_size)
+
+    def _bulk_create(self, model, batch_size: int) -> None:
+        objs = self._created.pop(model, [])
+        if objs:
+            model.objects.bulk_create(objs, batch_size=batch_size)
+
+    def _bulk_update(self, model, batch_size: int) -> None:
+        objs = self._updated.pop(model, {})
+        fields = self._updated_fields.pop(model, set())
+        if objs:
+            model.objects.bulk_update(list(objs.values()), sorted(fields), batch_size=batch_size)
+
+
+class Command(BaseCommand):
+    help = "Import exams, versions, and fields from a CSV file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path", type=str, help="Path to the CSV file.")
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Parse and validate, but do not write to the database.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Rows written per bulk batch and transaction (default {DEFAULT_BATCH_SIZE}).",
+        )
+        parser.add_argument(
+            "--atomic",
+            action="store_true",
+            help="Run the whole import in a single transaction instead of one per batch.",
+        )
+
+    def handle(self, *args, **options):
+        csv_path = options["csv_path"]
+        dry_run = options["dry_run"]
+        batch_size = max(1, int(options["batch_size"]))
+        single_transaction = dry_run or options["atomic"]
+
+        with open(csv_path, newline="", encoding="utf-8") as handle:
+            reader = csv.DictReader(handle)
+            if not reader.fieldnames:
+                raise CommandError("CSV file has no headers.")
+
+            missing = _REQUIRED_COLUMNS - set(reader.fieldnames)
+            if missing:
+                raise CommandError(f"Missing required columns: {sorted(missing)}")
+
+            started = time.monotonic()
+            total = 0
+            with transaction.atomic() if single_transaction else nullcontext():
+                index = _CatalogIndex()
+                for batch in self._batches(reader, batch_size):
+                    with transaction.atomic():
+                        for idx, row in batch:
+                            try:
+                                index.apply_row(row)
+                            except Exception as exc:
+                                raise CommandError(f"Row {idx}: {exc}") from exc
+                        try:
+                            index.flush(batch_size)
+                        except Exception as exc:
+                            raise CommandError(f"Rows {batch[0][0]}-{batch[-1][0]}: {exc}") from exc
+                    total += len(batch)
+                    self.stdout.write(
+                        f"Processed {total} rows ({self._rate(total, started):.0f} rows/s)."
+                    )
+
+                if dry_run:
+                    transaction.set_rollback(True)
+
+        elapsed = time.monotonic() - started
+        if dry_run:
+            self.stdout.write(self.style.WARNING("Dry-run complete; no changes saved."))
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Import completed. {total} rows in {elapsed:.1f}s "
+                    f"({self._rate(total, started):.0f} rows/s)."
+                )
+            )
+
+    @staticmethod
+    def _batches(reader, batch_size: int):
+        batch = []
+        for idx, row in enumerate(reader, start=2):
+            batch.append((idx, row))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @staticmethod
+    def _rate(total: int, started: float) -> float:
+        elapsed = time.monotonic() - started
+        return total / elapsed if elapsed > 0 else float(total)
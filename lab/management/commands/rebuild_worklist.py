@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from lab.exam_processing.worklist import WorklistQueue
+
+
+class Command(BaseCommand):
+    help = "Reconcile equipment worklists with open requested exams (e.g. after exam formulas changed)."
+
+    def handle(self, *args, **options):
+        added, removed = WorklistQueue().rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Worklist rebuilt: {added} items added, {removed} removed."))
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from lab.helpers.status_board import StatusBoard
+
+
+class Command(BaseCommand):
+    help = "Recompute the lab status board counters and correct any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=300, help="Seconds between reconciliations.")
+        parser.add_argument("--once", action="store_true", help="Reconcile once and exit.")
+
+    def handle(self, *args, **options):
+        board = StatusBoard()
+        while True:
+            corrected = board.reconcile()
+            if corrected:
+                self.stdout.write(self.style.WARNING(f"Corrected {corrected} status board counter(s)."))
+            if options["once"]:
+                break
+            time.sleep(max(options["interval"], 1))
+
+        self.stdout.write(self.style.SUCCESS("Status board reconciled."))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from lab.reports.renderer import LabReportRenderer
+
+
+class Command(BaseCommand):
+    help = "Render queued lab reports to PDF and store them as documents."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=20, help="Reports claimed per batch.")
+        parser.add_argument("--interval", type=float, default=5, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument("--max-attempts", type=int, default=3, help="Attempts before a report is marked failed.")
+        parser.add_argument("--once", action="store_true", help="Drain the queue once and exit.")
+
+    def handle(self, *args, **options):
+        renderer = LabReportRenderer(
+            batch_size=max(options["batch_size"], 1),
+            max_attempts=max(options["max_attempts"], 1),
+        )
+        while True:
+            rendered, failed = renderer.render_batch()
+            if rendered or failed:
+                self.stdout.write(f"Rendered {rendered}, failed {failed}.")
+            if rendered + failed == renderer.batch_size:
+                continue
+            if options["once"]:
+                break
+            time.sleep(max(options["interval"], 0))
+
+        self.stdout.write(self.style.SUCCESS("Lab report rendering finished."))
@@ -0,0 +1,339 @@
+import atexit
+import json
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core import mail
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from lab.models import MetricValue, RequestedExam
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()) -> str:
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = None
+        self._lock = threading.Lock()
+        # Recorded by this process since the last flush.
+        self._values = {}
+
+    def _key(self, labels) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {', '.join(self.labelnames) or '(none)'}.")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _recorded(self) -> None:
+        if self.registry is not None:
+            self.registry.recorded()
+
+    def take(self) -> dict:
+        """
+        Returns and forgets what was recorded since the last call.
+        """
+        with self._lock:
+            values, self._values = self._values, {}
+        return values
+
+    def render(self, values: dict, constant_labels=()) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._render_samples(sorted(values.items()), list(constant_labels)))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        self._recorded()
+
+    def value(self, **labels) -> float:
+        """
+        Shared total of one series, including what this process has not flushed yet.
+        """
+        return self.registry.totals(self).get(self._key(labels), 0)
+
+    def to_fields(self, value) -> dict:
+        return {"": value}
+
+    def from_fields(self, fields: dict):
+        return fields.get("", 0)
+
+    def _render_samples(self, items, constant_labels) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key, constant_labels)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), *, buckets=DURATION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ((0,) * len(self.buckets), 0.0))
+            index = next(index for index, bound in enumerate(self.buckets) if value <= bound)
+            # Stored as tuples so a render can read them without holding the lock.
+            self._values[key] = (counts[:index] + (counts[index] + 1,) + counts[index + 1:], total + value)
+        self._recorded()
+
+    def count(self, **labels) -> int:
+        """
+        Shared number of observations of one series.
+        """
+        counts, _ = self.registry.totals(self).get(self._key(labels), ((), 0.0))
+        return sum(counts)
+
+    def to_fields(self, value) -> dict:
+        counts, total = value
+        fields = {str(index): count for index, count in enumerate(counts) if count}
+        fields["sum"] = total
+        return fields
+
+    def from_fields(self, fields: dict):
+        counts = tuple(int(fields.get(str(index), 0)) for index in range(len(self.buckets)))
+        return counts, fields.get("sum", 0.0)
+
+    def _render_samples(self, items, constant_labels) -> list[str]:
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, constant_labels + [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key, constant_labels)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms shared by every process, rendered in the Prometheus text format.
+
+    Each process records into memory and adds the deltas to MetricValue rows:
+    at most every flush_seconds when recording outside a transaction, before a
+    scrape, and at exit. A scrape served by any uWSGI worker therefore includes
+    the other workers and the background commands, up to flush_seconds late.
+
+    The exit flush is registered on the first recording, and not at all under
+    tests (the test database is gone by then) or without a configured database.
+    """
+
+    def __init__(self, flush_seconds: float | None = None):
+        self._metrics = {}
+        self._flush_seconds = flush_seconds
+        self._flushed_at = time.monotonic()
+        self._exit_flush_checked = False
+
+    @property
+    def flush_seconds(self) -> float:
+        if self._flush_seconds is None:
+            return getattr(settings, "LAB_METRICS_FLUSH_SECONDS", 10)
+        return self._flush_seconds
+
+    def register(self, metric: _Metric) -> _Metric:
+        metric.registry = self
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames=(), **kwargs) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, **kwargs))
+
+    def recorded(self) -> None:
+        if not self._exit_flush_checked:
+            self._exit_flush_checked = True
+            # setup_test_environment() installs the locmem mail outbox for the whole test run.
+            if connection.settings_dict.get("NAME") and not hasattr(mail, "outbox"):
+                atexit.register(self._flush_at_exit)
+        # Never inside a transaction: the upsert would hold the shared rows until it commits.
+        if time.monotonic() - self._flushed_at < self.flush_seconds or connection.in_atomic_block:
+            return
+        try:
+            self.flush()
+        except DatabaseError:
+            logger.warning("Could not flush lab metrics; the recorded values are dropped.", exc_info=True)
+
+    def flush(self) -> None:
+        """
+        Adds what this process recorded since the last flush to the shared totals.
+        """
+        self._flushed_at = time.monotonic()
+        rows = sorted(
+            (metric.name, json.dumps(key), field, amount)
+            for metric in self._metrics.values()
+            for key, value in metric.take().items()
+            for field, amount in metric.to_fields(value).items()
+        )
+        if not rows:
+            return
+        now = timezone.now()
+        table = MetricValue._meta.db_table
+        # Fixed row order, so concurrent flushes lock rows in the same sequence.
+        values = ", ".join(["(%s, %s, %s, %s, %s)"] * len(rows))
+        params = [item for row in rows for item in (*row, now)]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (name, labels, field, value, updated_at) VALUES {values} "
+                f"ON CONFLICT (name, labels, field) DO UPDATE SET value = {table}.value + EXCLUDED.value, "
+                "updated_at = EXCLUDED.updated_at",
+                params,
+            )
+
+    def _flush_at_exit(self) -> None:
+        # Background commands record outside uWSGI; keep what they did not flush yet.
+        try:
+            self.flush()
+        except Exception:  # The database may already be gone at interpreter exit.
+            logger.warning("Could not flush lab metrics at exit.", exc_info=True)
+
+    def _read(self, metrics) -> dict:
+        """
+        Shared values by metric name, then by label values, in one query.
+        """
+        fields = {}
+        rows = MetricValue.objects.filter(name__in=[metric.name for metric in metrics]).values_list(
+            "name", "labels", "field", "value"
+        )
+        for name, labels, field, value in rows:
+            fields.setdefault(name, {}).setdefault(tuple(json.loads(labels)), {})[field] = value
+        return {
+            metric.name: {key: metric.from_fields(values) for key, values in fields.get(metric.name, {}).items()}
+            for metric in metrics
+        }
+
+    def totals(self, metric: _Metric) -> dict:
+        """
+        Shared values of a metric by label values, after flushing this process.
+        """
+        self.flush()
+        return self._read([metric])[metric.name]
+
+    def discard(self) -> None:
+        """
+        Forgets what this process recorded and has not flushed yet.
+        """
+        for metric in self._metrics.values():
+            metric.take()
+
+    def clear(self) -> None:
+        self.discard()
+        MetricValue.objects.filter(name__in=list(self._metrics)).delete()
+
+    def render(self) -> str:
+        self.flush()
+        metrics = list(self._metrics.values())
+        totals = self._read(metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render(totals[metric.name]))
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+results_ingested = registry.counter(
+    "lab_analyte_results_ingested_total",
+    "Patient analyte results stored by the injector.",
+    ["equipment"],
+)
+compute_duration = registry.histogram(
+    "lab_exam_compute_duration_seconds",
+    "Time to compute one requested exam.",
+)
+compute_queries = registry.histogram(
+    "lab_exam_compute_queries",
+    "Database queries issued while computing one requested exam.",
+    buckets=QUERY_BUCKETS,
+)
+formula_missing = registry.counter(
+    "lab_formula_missing_total",
+    "Exam field formulas that could not be evaluated, by exam field.",
+    ["exam_field"],
+)
+
+
+@contextmanager
+def track_compute():
+    """
+    Times the block and counts the queries it runs on the default connection.
+    """
+    queries = [0]
+
+    def counting(execute, sql, params, many, context):
+        queries[0] += 1
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        with connection.execute_wrapper(counting):
+            yield
+    finally:
+        compute_duration.observe(time.perf_counter() - started)
+        compute_queries.observe(queries[0])
+
+
+def backlog_lines() -> list[str]:
+    """
+    Incomplete requested exams of open requests, read from the database at scrape time.
+    """
+    backlog = RequestedExam.objects.filter(is_completed=False, exam_request__canceled_at__isnull=True).aggregate(
+        total=Count("id"), oldest=Min("created_at")
+    )
+    age = (timezone.now() - backlog["oldest"]).total_seconds() if backlog["oldest"] else 0
+    return [
+        "# HELP lab_requested_exams_incomplete Requested exams of open requests still missing results.",
+        "# TYPE lab_requested_exams_incomplete gauge",
+        f"lab_requested_exams_incomplete {backlog['total']}",
+        "# HELP lab_requested_exams_oldest_incomplete_age_seconds Age of the oldest incomplete requested exam.",
+        "# TYPE lab_requested_exams_oldest_incomplete_age_seconds gauge",
+        f"lab_requested_exams_oldest_incomplete_age_seconds {_format_value(max(age, 0))}",
+    ]
+
+
+def render_metrics() -> str:
+    return "\n".join(backlog_lines()) + "\n" + registry.render()
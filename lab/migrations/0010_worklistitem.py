@@ -0,0 +1,90 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:32
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+ANALYTE_REF_RE = re.compile(r"analyte_code_result\((\d+)\)\.\w+")
+
+
+def backfill_worklist(apps, schema_editor):
+    AnalyteCode = apps.get_model("lab", "AnalyteCode")
+    AnalyteResult = apps.get_model("lab", "AnalyteResult")
+    ExamField = apps.get_model("lab", "ExamField")
+    RequestedExam = apps.get_model("lab", "RequestedExam")
+    WorklistItem = apps.get_model("lab", "WorklistItem")
+
+    requested_exams = list(
+        RequestedExam.objects.filter(
+            is_completed=False,
+            sample__isnull=False,
+            exam_request__canceled_at__isnull=True,
+        ).values_list("sample_id", "exam_version_id")
+    )
+    if not requested_exams:
+        return
+
+    codes_by_version = {}
+    for version_id, formula in ExamField.objects.filter(
+        exam_version_id__in={version_id for _, version_id in requested_exams}
+    ).values_list("exam_version_id", "formula"):
+        code_ids = codes_by_version.setdefault(version_id, set())
+        for rule in formula if isinstance(formula, list) else []:
+            if not isinstance(rule, dict):
+                continue
+            for key in ("condition", "result"):
+                if isinstance(rule.get(key), str):
+                    code_ids.update(int(match) for match in ANALYTE_REF_RE.findall(rule[key]))
+
+    codes = {
+        row[0]: row[1:]
+        for row in AnalyteCode.objects.values_list("id", "analyte_id", "equipment_id", "equipment__group_id")
+    }
+    measured = set(
+        AnalyteResult.objects.filter(
+            sample_id__in={sample_id for sample_id, _ in requested_exams}
+        ).values_list("sample_id", "analyte_id", "equipment_id")
+    )
+
+    pending = {}
+    for sample_id, version_id in requested_exams:
+        for code_id in codes_by_version.get(version_id, ()):
+            if code_id not in codes or (sample_id, code_id) in pending:
+                continue
+            analyte_id, equipment_id, group_id = codes[code_id]
+            if (sample_id, analyte_id, equipment_id) in measured:
+                continue
+            pending[(sample_id, code_id)] = WorklistItem(
+                sample_id=sample_id,
+                analyte_code_id=code_id,
+                equipment_id=equipment_id,
+                equipment_group_id=group_id,
+            )
+    WorklistItem.objects.bulk_create(pending.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0009_examrequest_code_and_validation_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorklistItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('analyte_code', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='worklist_items', to='lab.analytecode')),
+                ('equipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='worklist_items', to='lab.equipment')),
+                ('equipment_group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='worklist_items', to='lab.equipmentgroup')),
+                ('sample', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='worklist_items', to='lab.sample')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['equipment', 'id'], name='worklist_equipment_idx'), models.Index(fields=['equipment_group', 'id'], name='worklist_group_idx'), models.Index(fields=['analyte_code', 'id'], name='worklist_analyte_code_idx')],
+                'constraints': [models.UniqueConstraint(fields=('sample', 'analyte_code'), name='uniq_worklist_sample_analyte_code')],
+            },
+        ),
+        migrations.RunPython(backfill_worklist, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0010_worklistitem'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analyteresult',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=128, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0011_analyteresult_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='examfieldresult',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='examfieldresult',
+            name='is_current',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='examfieldresult',
+            name='revision',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddConstraint(
+            model_name='examfieldresult',
+            constraint=models.UniqueConstraint(fields=('requested_exam', 'exam_field', 'revision'), name='uniq_exam_field_result_revision'),
+        ),
+        migrations.AddConstraint(
+            model_name='examfieldresult',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_current', True)), fields=('requested_exam', 'exam_field'), name='uniq_current_exam_field_result'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0012_examfieldresult_revisions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReferenceRange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('sex', models.CharField(blank=True, choices=[('F', 'Female'), ('M', 'Male')], default='', max_length=1)),
+                ('age_min_days', models.PositiveIntegerField(default=0)),
+                ('age_max_days', models.PositiveIntegerField(blank=True, null=True)),
+                ('low', models.FloatField(blank=True, null=True)),
+                ('high', models.FloatField(blank=True, null=True)),
+                ('critical_low', models.FloatField(blank=True, null=True)),
+                ('critical_high', models.FloatField(blank=True, null=True)),
+                ('exam_field', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reference_ranges', to='lab.examfield')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('exam_field', 'sex', 'age_min_days'), name='uniq_reference_range_band')],
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:42
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0014_criticalvaluealert'),
+        ('patients', '0003_patient_sex'),
+        ('professionals', '0002_professional_organizations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ValidationDecision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('outcome', models.CharField(choices=[('validated', 'Validated'), ('held', 'Held for review')], max_length=20)),
+                ('source', models.CharField(choices=[('manual', 'Manual'), ('auto', 'Autoverification')], max_length=20)),
+                ('failed_rules', models.JSONField(blank=True, default=list)),
+                ('details', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='examrequest',
+            name='autoverification_pending',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='examrequest',
+            name='validated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='examrequest',
+            index=models.Index(condition=models.Q(('autoverification_pending', True)), fields=['id'], name='exam_request_autoverify_idx'),
+        ),
+        migrations.AddField(
+            model_name='validationdecision',
+            name='decided_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='validation_decisions', to='professionals.professional'),
+        ),
+        migrations.AddField(
+            model_name='validationdecision',
+            name='exam_request',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='validation_decisions', to='lab.examrequest'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:46
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0015_exam_request_validation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QCAccumulator',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lot', models.CharField(max_length=64)),
+                ('level', models.CharField(blank=True, default='', max_length=32)),
+                ('target_mean', models.FloatField(blank=True, null=True)),
+                ('target_sd', models.FloatField(blank=True, null=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('mean', models.FloatField(default=0)),
+                ('m2', models.FloatField(default=0)),
+                ('recent_z_scores', models.JSONField(blank=True, default=list)),
+                ('last_violations', models.JSONField(blank=True, default=list)),
+                ('is_locked_out', models.BooleanField(default=False)),
+                ('locked_out_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('analyte_code', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='qc_accumulators', to='lab.analytecode')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='QCResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.FloatField()),
+                ('z_score', models.FloatField(blank=True, null=True)),
+                ('violations', models.JSONField(blank=True, default=list)),
+                ('is_rejected', models.BooleanField(default=False)),
+                ('metadata', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('accumulator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='lab.qcaccumulator')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='qcaccumulator',
+            index=models.Index(condition=models.Q(('is_locked_out', True)), fields=['analyte_code'], name='qc_accumulator_lockout_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='qcaccumulator',
+            constraint=models.UniqueConstraint(fields=('analyte_code', 'lot'), name='uniq_qc_accumulator_lot'),
+        ),
+        migrations.AddIndex(
+            model_name='qcresult',
+            index=models.Index(fields=['accumulator', 'id'], name='qc_result_accumulator_idx'),
+        ),
+    ]
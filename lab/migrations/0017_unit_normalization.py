@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_normalized_values(apps, schema_editor):
+    # No analyte has a canonical unit yet, so existing values are already "normalized".
+    AnalyteResult = apps.get_model("lab", "AnalyteResult")
+    AnalyteResult.objects.update(normalized_value=F("numeric_value"), normalized_units=F("units"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0016_qc_statistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analyte',
+            name='canonical_unit',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='canonical_for_analytes', to='lab.measurementunit'),
+        ),
+        migrations.AddField(
+            model_name='analyteresult',
+            name='normalized_units',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='normalized_analyte_results', to='lab.measurementunit'),
+        ),
+        migrations.AddField(
+            model_name='analyteresult',
+            name='normalized_value',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='UnitConversion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('factor', models.FloatField()),
+                ('offset', models.FloatField(default=0)),
+                ('analyte', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='unit_conversions', to='lab.analyte')),
+                ('from_unit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversions_from', to='lab.measurementunit')),
+                ('to_unit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversions_to', to='lab.measurementunit')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('from_unit', 'to_unit', 'analyte'), name='uniq_unit_conversion', nulls_distinct=False), models.CheckConstraint(condition=models.Q(('factor', 0), _negated=True), name='unit_conversion_nonzero_factor')],
+            },
+        ),
+        migrations.RunPython(backfill_normalized_values, migrations.RunPython.noop),
+    ]
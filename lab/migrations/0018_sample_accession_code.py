@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0017_unit_normalization'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sample',
+            name='code',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
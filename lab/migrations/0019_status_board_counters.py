@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:53
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0018_sample_accession_code'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatusBoardCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(choices=[('sample_state', 'Samples per state'), ('pending_exam', 'Pending requested exams per exam'), ('critical_awaiting_validation', 'Critical results awaiting validation')], max_length=32)),
+                ('key', models.BigIntegerField(default=0)),
+                ('value', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('metric', 'key'), name='uniq_status_board_counter')],
+            },
+        ),
+    ]
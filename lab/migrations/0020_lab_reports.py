@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:55
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0001_initial'),
+        ('lab', '0019_status_board_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LabReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('results_revision', models.BigIntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('rendered_at', models.DateTimeField(blank=True, null=True)),
+                ('document', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='lab_reports', to='documents.document')),
+                ('exam_request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reports', to='lab.examrequest')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status', 'pending')), fields=['id'], name='lab_report_pending_idx')],
+                'constraints': [models.UniqueConstraint(fields=('exam_request', 'results_revision'), name='uniq_lab_report_revision')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0020_lab_reports'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='requestedexam',
+            index=models.Index(condition=models.Q(('is_completed', False)), fields=['created_at'], name='lab_reqexam_incomplete_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0021_requestedexam_incomplete_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='qcresult',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=128, null=True, unique=True),
+        ),
+    ]
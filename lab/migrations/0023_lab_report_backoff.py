@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:45
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0001_initial'),
+        ('lab', '0022_qcresult_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='labreport',
+            name='lab_report_pending_idx',
+        ),
+        migrations.AddField(
+            model_name='labreport',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='labreport',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['next_attempt_at'], name='lab_report_due_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:48
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab', '0023_lab_report_backoff'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricValue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=128)),
+                ('labels', models.CharField(blank=True, default='', max_length=512)),
+                ('field', models.CharField(blank=True, default='', max_length=16)),
+                ('value', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('name', 'labels', 'field'), name='uniq_metric_value')],
+            },
+        ),
+    ]
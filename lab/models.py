@@ -1,9 +1,11 @@
 import uuid
 
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 from core.models import Service, TimeStampedModel
+from lab.catalog_cache import catalog_cache
 from patients.models import Patient
 from professionals.models import Professional
 
@@ -48,6 +50,8 @@ class Sample(models.Model):
     Represents a biological sample collected from a patient.
     """
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # Accession number printed on the tube label.
+    code = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
     patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name="samples")
     sample_type = models.ForeignKey(SampleType, on_delete=models.CASCADE, related_name="samples")
     exam_request = models.ForeignKey(
@@ -169,6 +173,52 @@ class ExamField(TimeStampedModel):
         return f"{self.exam_version} - {self.name}"
 
 
+class ReferenceRange(TimeStampedModel):
+    """
+    Reference interval of an exam field for one age band and sex.
+
+    Ages are in days, lower bound inclusive and upper bound exclusive (open when
+    null). A blank sex applies to any patient without a sex-specific band.
+    """
+    exam_field = models.ForeignKey(ExamField, on_delete=models.CASCADE, related_name="reference_ranges")
+    sex = models.CharField(max_length=1, choices=Patient.Sex.choices, blank=True, default="")
+    age_min_days = models.PositiveIntegerField(default=0)
+    age_max_days = models.PositiveIntegerField(blank=True, null=True)
+    low = models.FloatField(blank=True, null=True)
+    high = models.FloatField(blank=True, null=True)
+    critical_low = models.FloatField(blank=True, null=True)
+    critical_high = models.FloatField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["exam_field", "sex", "age_min_days"],
+                name="uniq_reference_range_band",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._invalidate_catalog_cache()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self._invalidate_catalog_cache()
+        return result
+
+    def _invalidate_catalog_cache(self):
+        # Again on commit, in case another thread reloaded before the write was visible.
+        catalog_cache.invalidate()
+        transaction.on_commit(catalog_cache.invalidate)
+
+    def contains_age(self, age_days: int) -> bool:
+        return self.age_min_days <= age_days and (self.age_max_days is None or age_days < self.age_max_days)
+
+    def __str__(self):
+        upper = self.age_max_days if self.age_max_days is not None else "∞"
+        return f"{self.exam_field.code} [{self.sex or '*'} {self.age_min_days}-{upper}d]"
+
+
 class Tag(TimeStampedModel):
     """
     Tag definition that can be attached to exam fields when formula evaluates to true.
@@ -205,6 +255,9 @@ class ExamRequest(TimeStampedModel):
         blank=True,
         null=True,
     )
+    validated_at = models.DateTimeField(blank=True, null=True)
+    # Set when every requested exam is completed; cleared once autoverification decides.
+    autoverification_pending = models.BooleanField(default=False)
     canceled_at = models.DateTimeField(blank=True, null=True)
     canceled_by = models.ForeignKey(
         Professional,
@@ -215,10 +268,50 @@ class ExamRequest(TimeStampedModel):
     )
     cancel_reason = models.CharField(max_length=255, blank=True, default="")
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["id"],
+                condition=models.Q(autoverification_pending=True),
+                name="exam_request_autoverify_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"Exam request {self.id} for {self.patient}"
 
 
+class ValidationDecision(models.Model):
+    """
+    Audit record of a validation decision on an exam request, manual or automatic.
+    """
+
+    class Outcome(models.TextChoices):
+        VALIDATED = "validated", "Validated"
+        HELD = "held", "Held for review"
+
+    class Source(models.TextChoices):
+        MANUAL = "manual", "Manual"
+        AUTO = "auto", "Autoverification"
+
+    exam_request = models.ForeignKey(ExamRequest, on_delete=models.CASCADE, related_name="validation_decisions")
+    outcome = models.CharField(max_length=20, choices=Outcome.choices)
+    source = models.CharField(max_length=20, choices=Source.choices)
+    decided_by = models.ForeignKey(
+        Professional,
+        on_delete=models.SET_NULL,
+        related_name="validation_decisions",
+        blank=True,
+        null=True,
+    )
+    failed_rules = models.JSONField(default=list, blank=True)
+    details = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    def __str__(self):
+        return f"{self.exam_request} {self.outcome} ({self.source})"
+
+
 class RequestedExam(TimeStampedModel):
     """
     A requested exam within an exam request.
@@ -230,6 +323,14 @@ class RequestedExam(TimeStampedModel):
 
     class Meta:
         unique_together = ("exam_request", "exam_version")
+        indexes = [
+            # Backlog gauges scan only the exams still waiting for results.
+            models.Index(
+                fields=["created_at"],
+                name="lab_reqexam_incomplete_idx",
+                condition=models.Q(is_completed=False),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.exam_request} - {self.exam_version}"
@@ -238,6 +339,9 @@ class RequestedExam(TimeStampedModel):
 class ExamFieldResult(TimeStampedModel):
     """
     Result for a specific exam field within a requested exam.
+
+    Rows are append-only: every change adds a new revision and moves the
+    is_current flag, so older revisions stay as the amendment history.
     """
 
     class Classification(models.TextChoices):
@@ -256,12 +360,63 @@ class ExamFieldResult(TimeStampedModel):
         null=True,
     )
     classification_context = models.JSONField(blank=True, null=True)
+    revision = models.PositiveIntegerField(default=1)
+    is_current = models.BooleanField(default=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["requested_exam", "exam_field", "revision"],
+                name="uniq_exam_field_result_revision",
+            ),
+            models.UniqueConstraint(
+                fields=["requested_exam", "exam_field"],
+                condition=models.Q(is_current=True),
+                name="uniq_current_exam_field_result",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.requested_exam} - {self.exam_field.name} (rev {self.revision})"
+
+
+class CriticalValueAlert(TimeStampedModel):
+    """
+    Outbox row for a critical result, written in the same transaction as the result.
+
+    The dispatch_critical_alerts worker delivers it to the requesting professional
+    and records how long it took from detection to delivery.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        DELIVERED = "delivered", "Delivered"
+        FAILED = "failed", "Failed"
+
+    exam_field_result = models.ForeignKey(ExamFieldResult, on_delete=models.CASCADE, related_name="critical_alerts")
+    recipient = models.ForeignKey(Professional, on_delete=models.PROTECT, related_name="critical_alerts")
+    dedup_key = models.CharField(max_length=255, unique=True)
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+    detected_at = models.DateTimeField()
+    delivered_at = models.DateTimeField(blank=True, null=True)
+    delivered_via = models.CharField(max_length=50, blank=True, default="")
+    latency_ms = models.PositiveIntegerField(blank=True, null=True)
 
     class Meta:
-        unique_together = ("requested_exam", "exam_field")
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at"],
+                condition=models.Q(status="pending"),
+                name="critical_alert_pending_idx",
+            ),
+        ]
 
     def __str__(self):
-        return f"{self.requested_exam} - {self.exam_field.name}"
+        return f"Critical alert {self.id} ({self.status})"
 
 
 class ExamFieldResultTag(models.Model):
@@ -313,6 +468,14 @@ class Analyte(models.Model):
     name = models.CharField(max_length=100, unique=True)
     group = models.ForeignKey(EquipmentGroup, on_delete=models.CASCADE, related_name="analytes")
     default_code = models.CharField(max_length=50)
+    # Unit every equipment's numeric results are normalized into at injection.
+    canonical_unit = models.ForeignKey(
+        MeasurementUnit,
+        on_delete=models.SET_NULL,
+        related_name="canonical_for_analytes",
+        blank=True,
+        null=True,
+    )
 
     def __str__(self):
         return self.name
@@ -335,6 +498,53 @@ class AnalyteCode(models.Model):
         return f"{self.analyte.name} - {self.code} ({self.equipment.name})"
 
 
+class UnitConversion(models.Model):
+    """
+    Edge of the unit conversion graph: value in to_unit = value * factor + offset.
+
+    Edges are usable in both directions. Conversions that depend on the substance
+    (mg/dL to mmol/L) are scoped to an analyte; edges without one apply to all.
+    """
+    from_unit = models.ForeignKey(MeasurementUnit, on_delete=models.CASCADE, related_name="conversions_from")
+    to_unit = models.ForeignKey(MeasurementUnit, on_delete=models.CASCADE, related_name="conversions_to")
+    analyte = models.ForeignKey(
+        Analyte,
+        on_delete=models.CASCADE,
+        related_name="unit_conversions",
+        blank=True,
+        null=True,
+    )
+    factor = models.FloatField()
+    offset = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["from_unit", "to_unit", "analyte"],
+                name="uniq_unit_conversion",
+                nulls_distinct=False,
+            ),
+            models.CheckConstraint(condition=~models.Q(factor=0), name="unit_conversion_nonzero_factor"),
+        ]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._invalidate_catalog_cache()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self._invalidate_catalog_cache()
+        return result
+
+    def _invalidate_catalog_cache(self):
+        catalog_cache.invalidate()
+        transaction.on_commit(catalog_cache.invalidate)
+
+    def __str__(self):
+        scope = f" ({self.analyte.name})" if self.analyte_id else ""
+        return f"{self.from_unit.code} -> {self.to_unit.code}{scope}"
+
+
 class AnalyteResult(TimeStampedModel):
     """
     Result received from equipment for a sample/analyte.
@@ -352,7 +562,214 @@ class AnalyteResult(TimeStampedModel):
     raw_value = models.TextField()
     numeric_value = models.FloatField(blank=True, null=True)
     units = models.ForeignKey(MeasurementUnit, on_delete=models.SET_NULL, null=True, blank=True)
+    # numeric_value converted into the analyte's canonical unit; formulas read this.
+    normalized_value = models.FloatField(blank=True, null=True)
+    normalized_units = models.ForeignKey(
+        MeasurementUnit,
+        on_delete=models.SET_NULL,
+        related_name="normalized_analyte_results",
+        null=True,
+        blank=True,
+    )
     metadata = models.JSONField(blank=True, null=True)
+    # Supplied by the sender or derived from the instrument reading; retransmissions reuse it.
+    idempotency_key = models.CharField(max_length=128, unique=True, blank=True, null=True)
 
     def __str__(self):
         return f"{self.analyte.name} result for {self.sample.id}"
+
+
+class WorklistItem(models.Model):
+    """
+    Pending work for an equipment: a sample still waiting for one analyte code.
+
+    Rows are added when exams are requested and removed as soon as the matching
+    analyte result arrives, so reading a worklist never has to parse formulas.
+    """
+    sample = models.ForeignKey(Sample, on_delete=models.CASCADE, related_name="worklist_items")
+    analyte_code = models.ForeignKey(AnalyteCode, on_delete=models.CASCADE, related_name="worklist_items")
+    equipment = models.ForeignKey(Equipment, on_delete=models.CASCADE, related_name="worklist_items")
+    equipment_group = models.ForeignKey(EquipmentGroup, on_delete=models.CASCADE, related_name="worklist_items")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["sample", "analyte_code"], name="uniq_worklist_sample_analyte_code"),
+        ]
+        indexes = [
+            models.Index(fields=["equipment", "id"], name="worklist_equipment_idx"),
+            models.Index(fields=["equipment_group", "id"], name="worklist_group_idx"),
+            models.Index(fields=["analyte_code", "id"], name="worklist_analyte_code_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.analyte_code.code} pending for sample {self.sample_id}"
+
+
+class QCAccumulator(models.Model):
+    """
+    Running Levey-Jennings statistics for one control lot of an analyte code.
+
+    Mean and variance are kept as Welford accumulators and the last z-scores in
+    a fixed window, so each new control result is checked against the Westgard
+    rules without reading the lot's history.
+    """
+    analyte_code = models.ForeignKey(AnalyteCode, on_delete=models.CASCADE, related_name="qc_accumulators")
+    lot = models.CharField(max_length=64)
+    level = models.CharField(max_length=32, blank=True, default="")
+    # Manufacturer or established values; the running statistics are used when unset.
+    target_mean = models.FloatField(blank=True, null=True)
+    target_sd = models.FloatField(blank=True, null=True)
+    count = models.PositiveIntegerField(default=0)
+    mean = models.FloatField(default=0)
+    m2 = models.FloatField(default=0)
+    recent_z_scores = models.JSONField(default=list, blank=True)
+    last_violations = models.JSONField(default=list, blank=True)
+    is_locked_out = models.BooleanField(default=False)
+    locked_out_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["analyte_code", "lot"], name="uniq_qc_accumulator_lot"),
+        ]
+        indexes = [
+            models.Index(
+                fields=["analyte_code"],
+                condition=models.Q(is_locked_out=True),
+                name="qc_accumulator_lockout_idx",
+            ),
+        ]
+
+    @property
+    def sd(self) -> float | None:
+        if self.count < 2:
+            return None
+        return (self.m2 / (self.count - 1)) ** 0.5
+
+    @property
+    def cv(self) -> float | None:
+        sd = self.sd
+        if sd is None or not self.mean:
+            return None
+        return abs(sd / self.mean) * 100
+
+    def __str__(self):
+        return f"QC {self.analyte_code.code} lot {self.lot}"
+
+
+class QCResult(models.Model):
+    """
+    A control result, one point of a Levey-Jennings chart.
+    """
+    accumulator = models.ForeignKey(QCAccumulator, on_delete=models.CASCADE, related_name="results")
+    value = models.FloatField()
+    z_score = models.FloatField(blank=True, null=True)
+    violations = models.JSONField(default=list, blank=True)
+    is_rejected = models.BooleanField(default=False)
+    metadata = models.JSONField(blank=True, null=True)
+    idempotency_key = models.CharField(max_length=128, unique=True, blank=True, null=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["accumulator", "id"], name="qc_result_accumulator_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.accumulator} value {self.value}"
+
+
+class StatusBoardCounter(models.Model):
+    """
+    One number of the lab floor status board, kept current by the write paths.
+
+    Writers add deltas in the same transaction as the change they count, and the
+    reconcile_status_board job overwrites every row with recomputed totals.
+    """
+
+    class Metric(models.TextChoices):
+        SAMPLE_STATE = "sample_state", "Samples per state"
+        PENDING_EXAM = "pending_exam", "Pending requested exams per exam"
+        CRITICAL_AWAITING_VALIDATION = "critical_awaiting_validation", "Critical results awaiting validation"
+
+    metric = models.CharField(max_length=32, choices=Metric.choices)
+    # Sample state id or exam id; 0 for metrics without a breakdown.
+    key = models.BigIntegerField(default=0)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["metric", "key"], name="uniq_status_board_counter"),
+        ]
+
+    def __str__(self):
+        return f"{self.metric}[{self.key}] = {self.value}"
+
+
+class MetricValue(models.Model):
+    """
+    Shared total of one metric series, summed over every process that recorded it.
+
+    Processes add their deltas with an upsert, so uWSGI workers and background
+    commands all end up in the same rows and any worker can serve a scrape.
+    """
+
+    name = models.CharField(max_length=128)
+    # JSON list of label values, in the order of the metric's label names.
+    labels = models.CharField(max_length=512, blank=True, default="")
+    # Empty for counters; bucket index or "sum" for histograms.
+    field = models.CharField(max_length=16, blank=True, default="")
+    value = models.FloatField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["name", "labels", "field"], name="uniq_metric_value"),
+        ]
+
+    def __str__(self):
+        return f"{self.name}{self.labels}{self.field} = {self.value}"
+
+
+class LabReport(models.Model):
+    """
+    Printable report of an exam request at one results revision.
+
+    results_revision is the id of the newest current field result, so it grows
+    with every amendment and a report is rendered once per revision.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        READY = "ready", "Ready"
+        FAILED = "failed", "Failed"
+
+    exam_request = models.ForeignKey(ExamRequest, on_delete=models.CASCADE, related_name="reports")
+    results_revision = models.BigIntegerField()
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    document = models.ForeignKey(
+        "documents.Document",
+        on_delete=models.SET_NULL,
+        related_name="lab_reports",
+        blank=True,
+        null=True,
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    # Claimed reports are pushed forward by the lease; failed ones by the backoff.
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    rendered_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["exam_request", "results_revision"], name="uniq_lab_report_revision"),
+        ]
+        indexes = [
+            models.Index(fields=["next_attempt_at"], condition=models.Q(status="pending"), name="lab_report_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"Report of {self.exam_request} (revision {self.results_revision})"
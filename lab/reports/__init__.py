@@ -0,0 +1,10 @@
+from .pdf import TextPdf
+from .renderer import LabReportRenderer, build_report_pdf, current_lab_report, enqueue_lab_reports
+
+__all__ = [
+    "LabReportRenderer",
+    "TextPdf",
+    "build_report_pdf",
+    "current_lab_report",
+    "enqueue_lab_reports",
+]
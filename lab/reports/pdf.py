@@ -0,0 +1,76 @@
+import zlib
+
+# A4 in points.
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+MARGIN = 50
+
+
+def _escape(text: str) -> bytes:
+    encoded = text.encode("cp1252", errors="replace")
+    return encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+class TextPdf:
+    """
+    Minimal PDF writer for text-only documents in the standard Helvetica fonts.
+
+    Lines are laid out top to bottom and a new page starts when one is full.
+    Nothing is embedded, which keeps reports a few kilobytes.
+    """
+
+    def __init__(self, *, font_size: float = 10, leading: float = 14):
+        self.font_size = font_size
+        self.leading = leading
+        self._pages = []
+        self._current = None
+        self._y = 0
+
+    def line(self, text: str = "", *, bold: bool = False, size: float | None = None, indent: float = 0) -> None:
+        size = size or self.font_size
+        leading = max(self.leading, size * 1.4)
+        if self._current is None or self._y - leading < MARGIN:
+            self._current = []
+            self._pages.append(self._current)
+            self._y = PAGE_HEIGHT - MARGIN
+        self._y -= leading
+        if text:
+            font = b"/F2" if bold else b"/F1"
+            self._current.append(
+                b"BT %s %g Tf %g %g Td (%s) Tj ET" % (font, size, MARGIN + indent, self._y, _escape(text))
+            )
+
+    def render(self) -> bytes:
+        pages = self._pages or [[]]
+        # Object numbers: 1 catalog, 2 page tree, 3-4 fonts, then a page and its content per page.
+        objects = {
+            1: b"<< /Type /Catalog /Pages 2 0 R >>",
+            3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+            4: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+        }
+        kids = []
+        for index, commands in enumerate(pages):
+            page_id, content_id = 5 + index * 2, 6 + index * 2
+            kids.append(b"%d 0 R" % page_id)
+            stream = zlib.compress(b"\n".join(commands))
+            objects[page_id] = (
+                b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+                b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>"
+                % (PAGE_WIDTH, PAGE_HEIGHT, content_id)
+            )
+            objects[content_id] = (
+                b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(stream), stream)
+            )
+        objects[2] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+
+        output = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = {}
+        for number in sorted(objects):
+            offsets[number] = len(output)
+            output += b"%d 0 obj\n%s\nendobj\n" % (number, objects[number])
+        xref_offset = len(output)
+        output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+        for number in sorted(objects):
+            output += b"%010d 00000 n \n" % offsets[number]
+        output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+        return bytes(output)
@@ -0,0 +1,203 @@
+import io
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, OuterRef, Subquery
+from django.utils import timezone
+
+from documents.models import Document
+from documents.storage import get_documents_storage_client
+from lab.models import ExamFieldResult, ExamRequest, LabReport, RequestedExam
+from lab.reports.pdf import TextPdf
+
+
+def _current_results(exam_request_ids):
+    return ExamFieldResult.objects.filter(requested_exam__exam_request_id__in=list(exam_request_ids), is_current=True)
+
+
+def enqueue_lab_reports(exam_request_ids) -> None:
+    """
+    Queues a report of each request at its current results revision, once.
+    """
+    revisions = _current_results(exam_request_ids).values("requested_exam__exam_request_id").annotate(revision=Max("id"))
+    LabReport.objects.bulk_create(
+        [
+            LabReport(exam_request_id=row["requested_exam__exam_request_id"], results_revision=row["revision"])
+            for row in revisions
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def current_lab_report(exam_request: ExamRequest) -> LabReport | None:
+    """
+    The report of the request's current results revision, if one was queued.
+    """
+    revision = _current_results([exam_request.id]).aggregate(revision=Max("id"))["revision"]
+    if revision is None:
+        return None
+    return LabReport.objects.filter(exam_request=exam_request, results_revision=revision).first()
+
+
+def build_report_pdf(exam_request: ExamRequest, results_revision: int) -> bytes:
+    patient = exam_request.patient
+    pdf = TextPdf()
+    pdf.line("Laboratory report", bold=True, size=16)
+    pdf.line(f"Request: {exam_request.code or exam_request.id}")
+    pdf.line(f"Patient: {patient.first_name} {patient.last_name}")
+    if patient.birth_date:
+        pdf.line(f"Birth date: {patient.birth_date:%Y-%m-%d}" + (f"    Sex: {patient.sex}" if patient.sex else ""))
+    pdf.line(f"Requested by: {exam_request.requested_by.first_name} {exam_request.requested_by.last_name}")
+    if exam_request.validated_at:
+        validator = exam_request.validated_by
+        validated_by = f"{validator.first_name} {validator.last_name}" if validator else "autoverification"
+        pdf.line(f"Validated: {timezone.localtime(exam_request.validated_at):%Y-%m-%d %H:%M} by {validated_by}")
+
+    # The newest revision of each field as of results_revision, whether or not it was amended since.
+    latest_revision = (
+        ExamFieldResult.objects.filter(
+            requested_exam=OuterRef("requested_exam"),
+            exam_field=OuterRef("exam_field"),
+            id__lte=results_revision,
+        )
+        .order_by("-id")
+        .values("id")[:1]
+    )
+    results_by_exam = {}
+    for result in (
+        ExamFieldResult.objects.filter(requested_exam__exam_request=exam_request, id=Subquery(latest_revision))
+        .select_related("exam_field__measurement_unit")
+        .order_by("exam_field__priority", "exam_field_id")
+    ):
+        results_by_exam.setdefault(result.requested_exam_id, []).append(result)
+
+    for requested_exam in RequestedExam.objects.filter(exam_request=exam_request).select_related("exam_version__exam").order_by("id"):
+        pdf.line()
+        pdf.line(f"{requested_exam.exam_version.exam.name} (v{requested_exam.exam_version.version})", bold=True, size=12)
+        for result in results_by_exam.get(requested_exam.id, []):
+            unit = result.exam_field.measurement_unit
+            context = result.classification_context or {}
+            value = result.computed_value if result.computed_value is not None else result.raw_value
+            text = f"{result.exam_field.name}: {value if value is not None else '-'}"
+            if unit:
+                text += f" {unit.code}"
+            if context.get("low") is not None or context.get("high") is not None:
+                text += f"    ref. {context.get('low', '')} - {context.get('high', '')}"
+            if context.get("flag") and context["flag"] != "N":
+                text += f"    [{context['flag']}]"
+            pdf.line(text, indent=12)
+
+    pdf.line()
+    pdf.line(f"Results revision {results_revision}, generated {timezone.localtime():%Y-%m-%d %H:%M}", size=8)
+    return pdf.render()
+
+
+def report_download_url(report: LabReport) -> dict:
+    """
+    Presigned URL of a rendered report, as returned by the documents download-url endpoint.
+    """
+    bucket, _, object_key = report.document.reference.removeprefix("minio://").partition("/")
+    return {
+        "url": get_documents_storage_client().presign_get(bucket, object_key),
+        "expires_in": settings.MINIO_PRESIGN_EXPIRES,
+    }
+
+
+class LabReportRenderer:
+    """
+    Renders queued lab reports to PDF and stores them as Documents.
+
+    Reports are claimed with SKIP LOCKED so several workers can share the queue.
+    The claim only bumps the attempt counter and leases the report, then commits;
+    rendering and the upload run outside any transaction. A report whose worker
+    stopped comes due again when the lease runs out, and rendering it twice is
+    harmless because the object key and doc_key depend only on the revision.
+    A failing report is retried with exponential backoff until max_attempts.
+    """
+
+    def __init__(
+        self,
+        storage=None,
+        *,
+        batch_size: int = 20,
+        max_attempts: int = 3,
+        lease_seconds: int = 300,
+        retry_base_seconds: int = 60,
+    ):
+        self._storage = storage
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.retry_base_seconds = retry_base_seconds
+
+    @property
+    def storage(self):
+        if self._storage is None:
+            self._storage = get_documents_storage_client()
+        return self._storage
+
+    def render_batch(self) -> tuple[int, int]:
+        """
+        Returns the number of reports rendered and failed.
+        """
+        rendered = failed = 0
+        for report in self._claim():
+            try:
+                document = self._store(report)
+            except Exception as exc:  # Storage and rendering errors are retried alike.
+                fields = {"last_error": str(exc)[:1000]}
+                if report.attempts >= self.max_attempts:
+                    fields["status"] = LabReport.Status.FAILED
+                    failed += 1
+                else:
+                    delay = self.retry_base_seconds * 2 ** (report.attempts - 1)
+                    fields["next_attempt_at"] = timezone.now() + timedelta(seconds=delay)
+            else:
+                fields = {
+                    "status": LabReport.Status.READY,
+                    "document": document,
+                    "rendered_at": timezone.now(),
+                    "last_error": "",
+                }
+                rendered += 1
+            LabReport.objects.filter(pk=report.pk).update(**fields)
+        return rendered, failed
+
+    @transaction.atomic
+    def _claim(self) -> list[LabReport]:
+        now = timezone.now()
+        reports = list(
+            LabReport.objects.select_for_update(skip_locked=True, of=("self",))
+            .select_related("exam_request__patient", "exam_request__requested_by", "exam_request__validated_by")
+            .filter(status=LabReport.Status.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[: self.batch_size]
+        )
+        for report in reports:
+            report.attempts += 1
+            report.next_attempt_at = now + timedelta(seconds=self.lease_seconds)
+        LabReport.objects.bulk_update(reports, ["attempts", "next_attempt_at"])
+        return reports
+
+    def _store(self, report: LabReport) -> Document:
+        exam_request = report.exam_request
+        content = build_report_pdf(exam_request, report.results_revision)
+        org = exam_request.requested_by.organizations.order_by("name", "id").first()
+        bucket = settings.BAYLEAF_DOCS_BUCKET
+        object_key = (
+            f"org/{org.id if org else 'unscoped'}/lab-reports/{exam_request.id}/r{report.results_revision}.pdf"
+        )
+        size_bytes, sha256 = self.storage.upload_fileobj(io.BytesIO(content), bucket, object_key, "application/pdf")
+        document, _ = Document.objects.update_or_create(
+            org=org,
+            doc_key=f"lab-report-{exam_request.id}-r{report.results_revision}",
+            defaults={
+                "name": f"Lab report {exam_request.code or exam_request.id}",
+                "reference": f"minio://{bucket}/{object_key}",
+                "mime_type": "application/pdf",
+                "tags": ["lab-report"],
+                "size_bytes": size_bytes,
+                "content_hash": sha256,
+            },
+        )
+        return document
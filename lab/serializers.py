@@ -1,5 +1,7 @@
+from django.db import models
 from rest_framework import serializers
 
+from lab.helpers.accession import accession_numbers
 from lab.helpers.exam_request_helper import ExamRequestHelper
 from lab.models import (
     AllowedStateTransition,
@@ -16,12 +18,17 @@ from lab.models import (
     Equipment,
     EquipmentGroup,
     MeasurementUnit,
+    QCAccumulator,
+    QCResult,
+    ReferenceRange,
     RequestedExam,
     Sample,
     Sector,
     SampleState,
     SampleType,
     Tag,
+    UnitConversion,
+    WorklistItem,
 )
 from patients.models import Patient
 from patients.serializers import ReducedPatientSerializer
@@ -36,7 +43,8 @@ class SampleSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Sample
-        fields = ['id', 'patient_uuid', 'sample_type', 'current_state', 'patient']
+        fields = ['id', 'code', 'patient_uuid', 'sample_type', 'current_state', 'patient']
+        read_only_fields = ('code',)
 
     def validate_patient_uuid(self, value):
         if not Patient.objects.filter(pid=value).exists():
@@ -45,7 +53,7 @@ class SampleSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         patient = Patient.objects.get(pid=validated_data.pop('patient_uuid'))
-        sample = Sample.objects.create(patient=patient, **validated_data)
+        sample = Sample.objects.create(patient=patient, code=accession_numbers.next_sample_code(), **validated_data)
         return sample
 
     def get_current_state(self, obj):
@@ -240,6 +248,52 @@ class ExamFieldSerializer(serializers.ModelSerializer):
         return TagSerializer(tags, many=True).data
 
 
+class ReferenceRangeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ReferenceRange
+        fields = [
+            "id",
+            "exam_field",
+            "sex",
+            "age_min_days",
+            "age_max_days",
+            "low",
+            "high",
+            "critical_low",
+            "critical_high",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = ("created_at", "updated_at")
+
+    def validate(self, attrs):
+        def value(name):
+            return attrs.get(name, getattr(self.instance, name, None))
+
+        exam_field = value("exam_field")
+        sex = value("sex") or ""
+        age_min = value("age_min_days") or 0
+        age_max = value("age_max_days")
+        if age_max is not None and age_max <= age_min:
+            raise serializers.ValidationError({"age_max_days": "Must be greater than age_min_days."})
+        low, high = value("low"), value("high")
+        if low is not None and high is not None and low > high:
+            raise serializers.ValidationError({"high": "Must be greater than or equal to low."})
+
+        # Bands of one field and sex must not overlap so lookups stay a binary search.
+        overlapping = ReferenceRange.objects.filter(exam_field=exam_field, sex=sex)
+        if self.instance is not None:
+            overlapping = overlapping.exclude(id=self.instance.id)
+        if age_max is not None:
+            overlapping = overlapping.filter(age_min_days__lt=age_max)
+        overlapping = overlapping.filter(
+            models.Q(age_max_days__isnull=True) | models.Q(age_max_days__gt=age_min)
+        )
+        if overlapping.exists():
+            raise serializers.ValidationError("Age band overlaps an existing reference range for this field and sex.")
+        return attrs
+
+
 class RequestedExamSerializer(serializers.ModelSerializer):
     class Meta:
         model = RequestedExam
@@ -259,6 +313,7 @@ class ExamRequestSerializer(serializers.ModelSerializer):
     samples = SampleSerializer(read_only=True, many=True)
     is_validated = serializers.BooleanField(read_only=True)
     validated_by = serializers.PrimaryKeyRelatedField(read_only=True)
+    validated_at = serializers.DateTimeField(read_only=True)
     canceled_by = serializers.PrimaryKeyRelatedField(read_only=True)
     canceled_at = serializers.DateTimeField(read_only=True)
 
@@ -274,6 +329,7 @@ class ExamRequestSerializer(serializers.ModelSerializer):
             "samples",
             "is_validated",
             "validated_by",
+            "validated_at",
             "canceled_at",
             "canceled_by",
             "cancel_reason",
@@ -287,11 +343,6 @@ class ExamRequestSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Patient not found.")
         return value
 
-    def validate(self, attrs):
-        if self.instance is None and not attrs.get("code"):
-            raise serializers.ValidationError({"code": "This field is required."})
-        return attrs
-
     def create(self, validated_data):
         request = self.context.get("request")
         patient = Patient.objects.get(pid=validated_data.pop("patient_uuid"))
@@ -325,10 +376,12 @@ class ExamFieldResultSerializer(serializers.ModelSerializer):
             "classification",
             "classification_context",
             "applied_tags",
+            "revision",
+            "is_current",
             "created_at",
             "updated_at",
         ]
-        read_only_fields = ("created_at", "updated_at")
+        read_only_fields = ("revision", "is_current", "created_at", "updated_at")
 
     def get_applied_tags(self, obj):
         links = ExamFieldResultTag.objects.select_related("tag").filter(exam_field_result=obj)
@@ -363,7 +416,32 @@ class EquipmentSerializer(serializers.ModelSerializer):
 class AnalyteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Analyte
-        fields = ["id", "name", "group", "default_code"]
+        fields = ["id", "name", "group", "default_code", "canonical_unit"]
+
+
+class UnitConversionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UnitConversion
+        fields = ["id", "from_unit", "to_unit", "analyte", "factor", "offset"]
+
+    def validate(self, attrs):
+        def value(name):
+            return attrs.get(name, getattr(self.instance, name, None))
+
+        if value("factor") == 0:
+            raise serializers.ValidationError({"factor": "factor must not be zero."})
+        if value("from_unit") == value("to_unit"):
+            raise serializers.ValidationError({"to_unit": "A unit cannot be converted to itself."})
+        duplicates = UnitConversion.objects.filter(
+            from_unit__in=[value("from_unit"), value("to_unit")],
+            to_unit__in=[value("from_unit"), value("to_unit")],
+            analyte=value("analyte"),
+        )
+        if self.instance is not None:
+            duplicates = duplicates.exclude(id=self.instance.id)
+        if duplicates.exists():
+            raise serializers.ValidationError("A conversion between these units already exists for this scope.")
+        return attrs
 
 
 class AnalyteCodeSerializer(serializers.ModelSerializer):
@@ -384,8 +462,72 @@ class AnalyteResultSerializer(serializers.ModelSerializer):
             "raw_value",
             "numeric_value",
             "units",
+            "normalized_value",
+            "normalized_units",
             "metadata",
+            "idempotency_key",
             "created_at",
             "updated_at",
         ]
-        read_only_fields = ("created_at", "updated_at")
+        read_only_fields = ("idempotency_key", "normalized_value", "normalized_units", "created_at", "updated_at")
+
+
+class QCAccumulatorSerializer(serializers.ModelSerializer):
+    analyte_code_value = serializers.CharField(source="analyte_code.code", read_only=True)
+    equipment = serializers.IntegerField(source="analyte_code.equipment_id", read_only=True)
+    sd = serializers.FloatField(read_only=True)
+    cv = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = QCAccumulator
+        fields = [
+            "id",
+            "analyte_code",
+            "analyte_code_value",
+            "equipment",
+            "lot",
+            "level",
+            "target_mean",
+            "target_sd",
+            "count",
+            "mean",
+            "sd",
+            "cv",
+            "recent_z_scores",
+            "last_violations",
+            "is_locked_out",
+            "locked_out_at",
+            "updated_at",
+        ]
+        read_only_fields = (
+            "analyte_code",
+            "lot",
+            "count",
+            "mean",
+            "recent_z_scores",
+            "last_violations",
+            "is_locked_out",
+            "locked_out_at",
+            "updated_at",
+        )
+
+    def validate_target_sd(self, value):
+        if value is not None and value <= 0:
+            raise serializers.ValidationError("target_sd must be positive.")
+        return value
+
+
+class QCResultSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = QCResult
+        fields = ["id", "accumulator", "value", "z_score", "violations", "is_rejected", "metadata", "created_at"]
+
+
+class WorklistItemSerializer(serializers.ModelSerializer):
+    analyte_code = serializers.CharField(source="analyte_code.code", read_only=True)
+    analyte = serializers.CharField(source="analyte_code.analyte.name", read_only=True)
+    equipment_code = serializers.CharField(source="equipment.code", read_only=True)
+
+    class Meta:
+        model = WorklistItem
+        fields = ["id", "sample_id", "analyte_code_id", "analyte_code", "analyte", "equipment_id", "equipment_code", "created_at"]
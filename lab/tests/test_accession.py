@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection, transaction
+from django.utils import timezone
+
+from lab.helpers.accession import AccessionNumberService, accession_numbers
+
+
+@pytest.mark.django_db
+def test_workers_draw_disjoint_blocks_from_one_sequence(django_assert_num_queries):
+    first, second = AccessionNumberService(block_size=3), AccessionNumberService(block_size=3)
+    day = timezone.localdate()
+
+    codes = [first.next_code("T", day=day), second.next_code("T", day=day)]
+    with django_assert_num_queries(0):
+        codes += [first.next_code("T", day=day) for _ in range(2)]
+    codes += [first.next_code("T", day=day), second.next_code("T", day=day, sector=7)]
+
+    stamp = day.strftime("%y%m%d")
+    base = int(codes[0].rsplit("-", 1)[1])
+    assert codes[:5] == [f"T-{stamp}-{base + offset:05d}" for offset in (0, 3, 1, 2, 6)]
+    assert codes[5].startswith(f"T-{stamp}-007-")
+    with pytest.raises(ValueError):
+        first.next_code("T1")
+
+
+@pytest.mark.django_db
+def test_exam_request_and_samples_get_codes_found_by_accession(api_client, professional, patient, exam_version):
+    accession_numbers.discard_blocks()
+    api_client.force_authenticate(user=professional)
+
+    created = api_client.post(
+        "/api/lab/exam-requests/",
+        {"patient_uuid": str(patient.pid), "exam_version_ids": [exam_version.id]},
+        format="json",
+    )
+
+    assert created.status_code == 201
+    request_code = created.data["code"]
+    sample_code = created.data["samples"][0]["code"]
+    assert request_code.startswith(f"R-{timezone.localdate():%y%m%d}-")
+    assert sample_code.startswith("S-")
+
+    by_request = api_client.get("/api/lab/exam-requests/by-accession/", {"code": request_code})
+    by_sample = api_client.get("/api/lab/samples/by-accession/", {"code": sample_code})
+    missing = api_client.get("/api/lab/samples/by-accession/", {"code": "S-000000-00000"})
+
+    assert by_request.data["id"] == created.data["id"]
+    assert by_sample.data["id"] == created.data["samples"][0]["id"]
+    assert missing.status_code == 404
+
+
+def _sequences(prefix):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relname FROM pg_class WHERE relkind = 'S' AND relname LIKE %s", [prefix + "%"])
+        return {row[0] for row in cursor.fetchall()}
+
+
+@pytest.mark.django_db
+def test_rolled_back_request_keeps_the_new_scope_sequence():
+    holder, other = AccessionNumberService(block_size=3), AccessionNumberService(block_size=3)
+    day = timezone.localdate()
+
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            held = holder.next_code("U", day=day)
+            raise RuntimeError("admission failed")
+
+    # The sequence survived the rollback, so nobody is handed the numbers still cached.
+    number = int(held.rsplit("-", 1)[1])
+    assert int(other.next_code("U", day=day).rsplit("-", 1)[1]) == number + 3
+    assert int(holder.next_code("U", day=day).rsplit("-", 1)[1]) == number + 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_new_scope_drops_old_day_sequences(settings):
+    settings.LAB_ACCESSION_KEEP_DAYS = 7
+    service = AccessionNumberService(block_size=2)
+    today = timezone.localdate()
+    old, recent = today - timedelta(days=30), today - timedelta(days=2)
+    service.next_code("P", day=old)
+    service.next_code("P", day=recent)
+    service.next_code("P")
+
+    assert f"lab_accession_p_{old:%y%m%d}" not in _sequences("lab_accession_p")
+    assert {f"lab_accession_p_{recent:%y%m%d}", "lab_accession_p"} <= _sequences("lab_accession_p")
+
+    settings.LAB_ACCESSION_KEEP_DAYS = 1
+    assert service.prune() == [f"lab_accession_p_{recent:%y%m%d}"]
+    assert "lab_accession_p" in _sequences("lab_accession_p")
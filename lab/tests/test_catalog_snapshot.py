@@ -0,0 +1,104 @@
+import gzip
+import io
+import json
+
+import pytest
+
+from careplans.models import ActionTemplate, CarePlan, CarePlanTemplate
+from lab.helpers.catalog_snapshot import CatalogSnapshotHelper
+from lab.models import (
+    Analyte,
+    AnalyteCode,
+    Equipment,
+    EquipmentGroup,
+    Exam,
+    ExamField,
+    ExamFieldTag,
+    ExamVersion,
+    MeasurementUnit,
+    Tag,
+)
+
+
+@pytest.fixture
+def catalog(db, exam_version, professional):
+    group = EquipmentGroup.objects.create(name="Chemistry")
+    equipment = Equipment.objects.create(name="Analyzer", code="AN-1", group=group)
+    analyte = Analyte.objects.create(name="Glucose", group=group, default_code="GLU")
+    analyte_code = AnalyteCode.objects.create(analyte=analyte, equipment=equipment, code="GLU-1")
+    unit = MeasurementUnit.objects.create(name="Milligrams per deciliter", code="mg/dL")
+    field = ExamField.objects.create(
+        exam_version=exam_version,
+        name="Result",
+        code="RESULT",
+        measurement_unit=unit,
+        formula=[{"condition": "", "result": f"analyte_code_result({analyte_code.id}).numeric_value"}],
+    )
+    tag = Tag.objects.create(name="high", formula="value > 100")
+    ExamFieldTag.objects.create(exam_field=field, tag=tag)
+    template = CarePlanTemplate.objects.create(name="Flu", created_by=professional)
+    ActionTemplate.objects.create(template=template, title="Rest", category="TASK", schedule_json={"on_start": True})
+    return field
+
+
+def _dump():
+    buffer = io.BytesIO()
+    counts = CatalogSnapshotHelper().dump(buffer)
+    buffer.seek(0)
+    return buffer, counts
+
+
+@pytest.mark.django_db
+def test_dump_and_replace_load_round_trip(catalog):
+    buffer, counts = _dump()
+    assert counts["lab.exam"] == 1
+    assert counts["core.service"] == 1
+    field_id = catalog.id
+    formula = catalog.formula
+
+    counts = CatalogSnapshotHelper().load(buffer, replace=True)
+
+    assert counts["lab.examfield"] == 1
+    field = ExamField.objects.select_related("exam_version__exam", "measurement_unit").get(id=field_id)
+    assert field.formula == formula
+    assert field.measurement_unit.code == "mg/dL"
+    assert field.exam_version.exam.code == "GLU"
+    assert ExamFieldTag.objects.filter(exam_field=field, tag__name="high").exists()
+    assert CarePlanTemplate.objects.get().created_by is None
+    assert ActionTemplate.objects.get().schedule_json == {"on_start": True}
+    # Sequences are moved past the loaded ids.
+    assert Tag.objects.create(name="low").id > Tag.objects.get(name="high").id
+
+
+@pytest.mark.django_db
+def test_load_refuses_non_empty_catalog(catalog):
+    buffer, _counts = _dump()
+
+    with pytest.raises(ValueError, match="not empty"):
+        CatalogSnapshotHelper().load(buffer)
+
+    assert Exam.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_replace_refuses_database_with_care_plans(catalog, patient):
+    buffer, _counts = _dump()
+    CarePlan.objects.create(patient=patient, template=CarePlanTemplate.objects.get())
+
+    with pytest.raises(ValueError, match="Care plans exist"):
+        CatalogSnapshotHelper().load(buffer, replace=True)
+
+    assert CarePlan.objects.get().template is not None
+
+
+@pytest.mark.django_db
+def test_load_rejects_unknown_version(db):
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode="wb") as handle:
+        handle.write(json.dumps({"format": "bayleaf.catalog", "version": 99, "tables": []}).encode())
+    buffer.seek(0)
+
+    with pytest.raises(ValueError, match="Unsupported snapshot version"):
+        CatalogSnapshotHelper().load(buffer)
+
+    assert ExamVersion.objects.count() == 0
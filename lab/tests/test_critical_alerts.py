@@ -0,0 +1,112 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+
+from lab.critical_alerts.channels import StubChannel
+from lab.critical_alerts.dispatcher import CriticalAlertDispatcher
+from lab.helpers.exam_field_result_helper import ExamFieldResultHelper
+from lab.models import CriticalValueAlert, ExamField, RequestedExam
+
+
+@pytest.fixture
+def requested_exam(db, exam_request, exam_version):
+    return RequestedExam.objects.create(exam_request=exam_request, exam_version=exam_version)
+
+
+@pytest.fixture
+def exam_field(db, exam_version):
+    return ExamField.objects.create(exam_version=exam_version, name="Potassium", code="K")
+
+
+def _record(requested_exam, exam_field, value, classification):
+    return ExamFieldResultHelper().record(
+        requested_exam=requested_exam,
+        exam_field=exam_field,
+        computed_value=value,
+        classification=classification,
+        classification_context={"flag": "HH" if classification == "critical" else "N", "critical_high": 6.5},
+    )
+
+
+@pytest.mark.django_db
+def test_critical_result_writes_one_outbox_row(requested_exam, exam_field):
+    _record(requested_exam, exam_field, "4.1", "normal")
+    assert not CriticalValueAlert.objects.exists()
+
+    result, _ = _record(requested_exam, exam_field, "7.2", "critical")
+    _record(requested_exam, exam_field, "7.2", "critical")
+
+    alert = CriticalValueAlert.objects.get()
+    assert alert.exam_field_result == result
+    assert alert.recipient_id == requested_exam.exam_request.requested_by_id
+    assert alert.detected_at == result.created_at
+    assert alert.payload["value"] == "7.2"
+    assert alert.payload["flag"] == "HH"
+
+
+@pytest.mark.django_db
+def test_new_value_without_classification_drops_the_old_one(requested_exam, exam_field):
+    _record(requested_exam, exam_field, "7.2", "critical")
+
+    result, _ = ExamFieldResultHelper().record(requested_exam=requested_exam, exam_field=exam_field, computed_value="4.0")
+    raw_only, _ = ExamFieldResultHelper().record(requested_exam=requested_exam, exam_field=exam_field, raw_value="4.0 mmol/L")
+
+    assert (result.classification, result.classification_context) == (None, {})
+    assert (raw_only.classification, raw_only.classification_context) == (None, {})
+    assert CriticalValueAlert.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_dispatcher_delivers_and_records_latency(requested_exam, exam_field):
+    _record(requested_exam, exam_field, "7.2", "critical")
+    CriticalValueAlert.objects.update(detected_at=timezone.now() - timedelta(seconds=3))
+    channel = StubChannel()
+
+    stats = CriticalAlertDispatcher([channel]).dispatch_batch()
+
+    alert = CriticalValueAlert.objects.get()
+    assert stats.delivered == 1
+    assert channel.sent == [alert]
+    assert alert.status == CriticalValueAlert.Status.DELIVERED
+    assert alert.delivered_via == "stub"
+    assert 3000 <= alert.latency_ms < 60000
+    assert CriticalAlertDispatcher([channel]).dispatch_batch().processed == 0
+
+
+@pytest.mark.django_db
+def test_dispatcher_retries_with_backoff_and_fails_over(requested_exam, exam_field):
+    _record(requested_exam, exam_field, "7.2", "critical")
+    broken = StubChannel(fail_times=10)
+    dispatcher = CriticalAlertDispatcher([broken], max_attempts=2, retry_base_seconds=60)
+
+    assert dispatcher.dispatch_batch().retried == 1
+    alert = CriticalValueAlert.objects.get()
+    assert alert.attempts == 1
+    assert alert.next_attempt_at > timezone.now() + timedelta(seconds=50)
+    assert "Stub channel failure" in alert.last_error
+
+    CriticalValueAlert.objects.update(next_attempt_at=timezone.now())
+    assert dispatcher.dispatch_batch().failed == 1
+    assert CriticalValueAlert.objects.get().status == CriticalValueAlert.Status.FAILED
+
+    _record(requested_exam, exam_field, "8.0", "critical")
+    backup = StubChannel()
+    assert CriticalAlertDispatcher([StubChannel(fail_times=1), backup]).dispatch_batch().delivered == 1
+    assert len(backup.sent) == 1
+
+
+@pytest.mark.django_db
+def test_dispatch_command_sends_email(settings, requested_exam, exam_field):
+    settings.EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+    settings.LAB_CRITICAL_ALERT_CHANNELS = ["lab.critical_alerts.channels.EmailChannel"]
+    _record(requested_exam, exam_field, "7.2", "critical")
+
+    call_command("dispatch_critical_alerts", "--once", stdout=StringIO())
+
+    assert len(mail.outbox) == 1
+    assert mail.outbox[0].to == [requested_exam.exam_request.requested_by.email]
+    assert CriticalValueAlert.objects.get().status == CriticalValueAlert.Status.DELIVERED
@@ -1,8 +1,12 @@
 import json
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
+from lab.catalog_cache import catalog_cache
+from lab.exam_processing.dry_run import FormulaDryRunner
+from lab.exam_processing.injector import AnalyteResultInjector
 from lab.exam_processing.processor import ExamProcessor
 from lab.exam_processing.validator import ExamFormulaValidator
 from lab.models import (
@@ -15,6 +19,7 @@ from lab.models import (
     ExamFieldResult,
     MeasurementUnit,
     RequestedExam,
+    UnitConversion,
 )
 
 
@@ -30,7 +35,7 @@ def equipment_group(db):
 
 @pytest.fixture
 def equipment(db, equipment_group):
-    return Equipment.objects.create(name="Analyzer", group=equipment_group)
+    return Equipment.objects.create(name="Analyzer", code="AN-1", group=equipment_group)
 
 
 @pytest.fixture
@@ -188,3 +193,203 @@ def test_processor_orders_field_dependencies(
     ).first()
     assert result is not None
     assert result.computed_value == "4.0"
+
+
+@pytest.mark.django_db
+def test_injector_short_circuits_retransmission_with_same_key(requested_exam, analyte_code):
+    injector = AnalyteResultInjector()
+    with patch.object(ExamProcessor, "compute_sample") as compute_mock:
+        first = injector.inject(
+            equipment_code="AN-1",
+            analyte_code="GLU-1",
+            raw_result="5.5",
+            sample_id=requested_exam.sample_id,
+            idempotency_key="msg-001",
+        )
+        second = injector.inject(
+            equipment_code="AN-1",
+            analyte_code="GLU-1",
+            raw_result="5.5",
+            sample_id=requested_exam.sample_id,
+            idempotency_key="msg-001",
+        )
+
+    assert second.id == first.id
+    assert AnalyteResult.objects.count() == 1
+    assert compute_mock.call_count == 1
+
+
+@pytest.mark.django_db
+def test_injector_derives_key_from_instrument_timestamp(requested_exam, analyte_code):
+    injector = AnalyteResultInjector()
+    payload = {
+        "equipment_code": "AN-1",
+        "analyte_code": "GLU-1",
+        "raw_result": "5.5",
+        "sample_id": requested_exam.sample_id,
+    }
+
+    first = injector.inject(**payload, instrument_timestamp="2026-01-01T10:00:00")
+    retransmitted = injector.inject(**payload, instrument_timestamp="2026-01-01T10:00:00")
+    rerun = injector.inject(**payload, instrument_timestamp="2026-01-01T10:05:00")
+    untracked = injector.inject(**payload)
+
+    assert retransmitted.id == first.id
+    assert len({first.id, rerun.id, untracked.id}) == 3
+    assert untracked.idempotency_key is None
+
+
+@pytest.mark.django_db
+def test_processor_appends_revision_only_when_value_changes(
+    requested_exam,
+    analyte_code,
+    analyte,
+    equipment,
+):
+    analyte_result = AnalyteResult.objects.create(
+        analyte=analyte,
+        equipment=equipment,
+        sample=requested_exam.sample,
+        raw_value="5.5",
+        numeric_value=5.5,
+    )
+    exam_field = ExamField.objects.create(
+        exam_version=requested_exam.exam_version,
+        name="Glucose Value",
+        code="GLU_VAL",
+        formula=[{"condition": "", "result": f"analyte_code_result({analyte_code.id}).numeric_value"}],
+    )
+    processor = ExamProcessor()
+    processor._compute_requested_exam(requested_exam)
+    first = ExamFieldResult.objects.get(requested_exam=requested_exam, exam_field=exam_field)
+
+    processor._compute_requested_exam(requested_exam)
+    assert ExamFieldResult.objects.filter(exam_field=exam_field).count() == 1
+
+    analyte_result.numeric_value = 6.1
+    analyte_result.save(update_fields=["numeric_value"])
+    processor._compute_requested_exam(requested_exam)
+
+    revisions = list(ExamFieldResult.objects.filter(exam_field=exam_field).order_by("revision"))
+    assert [(r.revision, r.computed_value, r.is_current) for r in revisions] == [
+        (1, "5.5", False),
+        (2, "6.1", True),
+    ]
+    assert revisions[0].id == first.id
+
+
+@pytest.mark.django_db
+def test_dry_run_evaluates_vectors_in_memory(exam_version, analyte_code, django_assert_num_queries):
+    base = ExamField.objects.create(
+        exam_version=exam_version,
+        name="Base",
+        code="BASE",
+        formula=[{"condition": "", "result": f"analyte_code_result({analyte_code.id}).numeric_value"}],
+    )
+    ExamField.objects.create(
+        exam_version=exam_version,
+        name="Flag",
+        code="FLAG",
+        formula=[
+            {"condition": f"exam_field_result({base.id}).numeric_value > 5", "result": "'HIGH'"},
+            {"condition": "", "result": "'OK'"},
+        ],
+    )
+    runner = FormulaDryRunner()
+    exam_fields = runner.build_fields(exam_version=exam_version)
+    vectors = [{"analytes": {str(analyte_code.id): value}} for value in (7, 3)] + [{"analytes": {}}]
+
+    with django_assert_num_queries(0):
+        results = runner.evaluate(exam_fields, vectors)
+
+    summary = [[(item["code"], item["value"], item["matched_rule"]) for item in fields] for fields in results]
+    assert summary == [
+        [("BASE", "7.0", 0), ("FLAG", "HIGH", 0)],
+        [("BASE", "3.0", 0), ("FLAG", "OK", 1)],
+        [("BASE", None, None), ("FLAG", None, None)],
+    ]
+    assert results[2][0]["is_missing"] is True
+
+
+@pytest.mark.django_db
+def test_dry_run_draft_overrides_stored_formula(exam_version, analyte_code):
+    stored = ExamField.objects.create(
+        exam_version=exam_version,
+        name="Base",
+        code="BASE",
+        formula=[{"condition": "", "result": f"analyte_code_result({analyte_code.id}).numeric_value"}],
+    )
+    runner = FormulaDryRunner()
+    exam_fields = runner.build_fields(
+        exam_version=exam_version,
+        drafts=[{"id": stored.id, "formula": [{"condition": "", "result": f"exam_field_result({stored.id}).exists"}]}],
+    )
+
+    results = runner.evaluate(exam_fields, [{"fields": {str(stored.id): "1"}}])
+
+    assert results[0][0]["value"] == "True"
+    assert ExamField.objects.get(id=stored.id).formula[0]["result"].startswith("analyte_code_result")
+    with pytest.raises(ValueError):
+        runner.build_fields(drafts=[{"formula": "not a list"}])
+
+
+@pytest.fixture
+def glucose_units(db, analyte):
+    units = {
+        code: MeasurementUnit.objects.create(name=code, code=code)
+        for code in ("mg/dL", "g/L", "mmol/L")
+    }
+    UnitConversion.objects.create(from_unit=units["g/L"], to_unit=units["mg/dL"], factor=100)
+    UnitConversion.objects.create(from_unit=units["mg/dL"], to_unit=units["mmol/L"], factor=0.0555, analyte=analyte)
+    return units
+
+
+@pytest.mark.django_db
+def test_catalog_cache_converts_through_the_unit_graph(analyte, glucose_units, django_assert_num_queries):
+    ids = {code: unit.id for code, unit in glucose_units.items()}
+    catalog_cache.convert(1, from_unit_id=ids["g/L"], to_unit_id=ids["mg/dL"])
+
+    with django_assert_num_queries(0):
+        assert catalog_cache.convert(0.9, from_unit_id=ids["g/L"], to_unit_id=ids["mg/dL"]) == pytest.approx(90)
+        assert catalog_cache.convert(90, from_unit_id=ids["mg/dL"], to_unit_id=ids["g/L"]) == pytest.approx(0.9)
+        assert catalog_cache.convert(
+            0.9, from_unit_id=ids["g/L"], to_unit_id=ids["mmol/L"], analyte_id=analyte.id
+        ) == pytest.approx(4.995)
+        assert catalog_cache.convert(0.9, from_unit_id=ids["g/L"], to_unit_id=ids["mmol/L"]) is None
+
+
+@pytest.mark.django_db
+def test_injector_normalizes_into_canonical_unit(requested_exam, analyte_code, analyte, glucose_units):
+    analyte.canonical_unit = glucose_units["mmol/L"]
+    analyte.save(update_fields=["canonical_unit"])
+    exam_field = ExamField.objects.create(
+        exam_version=requested_exam.exam_version,
+        name="Glucose Value",
+        code="GLU_VAL",
+        formula=[{"condition": "", "result": f"analyte_code_result({analyte_code.id}).numeric_value"}],
+    )
+    injector = AnalyteResultInjector()
+
+    result = injector.inject(
+        equipment_code="AN-1",
+        analyte_code="GLU-1",
+        raw_result="90",
+        sample_id=requested_exam.sample_id,
+        units_code="mg/dL",
+    )
+
+    assert (result.numeric_value, result.units.code) == (90, "mg/dL")
+    assert result.normalized_value == pytest.approx(4.995)
+    assert result.normalized_units == glucose_units["mmol/L"]
+    computed = ExamFieldResult.objects.get(requested_exam=requested_exam, exam_field=exam_field, is_current=True)
+    assert float(computed.computed_value) == pytest.approx(4.995)
+
+    unconvertible = MeasurementUnit.objects.create(name="Percent", code="%")
+    with pytest.raises(ValueError, match="No unit conversion"):
+        injector.inject(
+            equipment_code="AN-1",
+            analyte_code="GLU-1",
+            raw_result="5",
+            sample_id=requested_exam.sample_id,
+            units_code=unconvertible.code,
+        )
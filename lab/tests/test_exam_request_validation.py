@@ -0,0 +1,106 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from lab.exam_processing.processor import ExamProcessor
+from lab.helpers.exam_field_result_helper import ExamFieldResultHelper
+from lab.helpers.exam_request_validation import AutoverificationEngine
+from lab.models import ExamField, ExamRequest, ReferenceRange, RequestedExam, ValidationDecision
+
+
+@pytest.fixture
+def exam_field(db, exam_version):
+    return ExamField.objects.create(
+        exam_version=exam_version,
+        name="Glucose",
+        code="GLU",
+        formula=[{"condition": "", "result": "'90'"}],
+    )
+
+
+def _completed_request(patient, professional, exam_field, value, classification="normal", **extra):
+    exam_request = ExamRequest.objects.create(patient=patient, requested_by=professional, **extra)
+    requested_exam = RequestedExam.objects.create(
+        exam_request=exam_request, exam_version=exam_field.exam_version, is_completed=True
+    )
+    ExamFieldResultHelper().record(
+        requested_exam=requested_exam,
+        exam_field=exam_field,
+        computed_value=value,
+        classification=classification,
+    )
+    ExamRequest.objects.filter(id=exam_request.id).update(autoverification_pending=True)
+    return exam_request
+
+
+@pytest.mark.django_db
+def test_bulk_validate_endpoint_skips_ineligible_requests(api_client, professional, patient, exam_field):
+    ready = _completed_request(patient, professional, exam_field, "90")
+    incomplete = ExamRequest.objects.create(patient=patient, requested_by=professional)
+    RequestedExam.objects.create(exam_request=incomplete, exam_version=exam_field.exam_version)
+    api_client.force_authenticate(user=professional)
+
+    response = api_client.post(
+        "/api/lab/exam-requests/bulk-validate/",
+        {"ids": [ready.id, incomplete.id, 999999]},
+        format="json",
+    )
+    repeated = api_client.post("/api/lab/exam-requests/bulk-validate/", {"ids": [ready.id]}, format="json")
+
+    assert response.status_code == 200
+    assert response.data["validated"] == [ready.id]
+    assert {item["id"] for item in response.data["skipped"]} == {incomplete.id, 999999}
+    ready.refresh_from_db()
+    assert ready.is_validated and ready.validated_by == professional and ready.validated_at
+    assert not ready.autoverification_pending
+    decision = ValidationDecision.objects.get()
+    assert (decision.source, decision.decided_by) == (ValidationDecision.Source.MANUAL, professional)
+    assert repeated.data["skipped"] == [{"id": ready.id, "reason": "Exam request is already validated."}]
+
+
+@pytest.mark.django_db
+def test_autoverification_validates_normal_panels_and_holds_the_rest(patient, professional, exam_field):
+    previous = _completed_request(patient, professional, exam_field, "90")
+    ExamRequest.objects.filter(id=previous.id).update(
+        autoverification_pending=False,
+        created_at=previous.created_at - timedelta(days=30),
+    )
+    normal = _completed_request(patient, professional, exam_field, "95")
+    abnormal = _completed_request(patient, professional, exam_field, "100", classification="abnormal")
+    jumped = _completed_request(patient, professional, exam_field, "300")
+    unclassified = _completed_request(patient, professional, exam_field, "92")
+    # A field without a code or a reference range: its result is never classified.
+    uncoded = ExamField.objects.create(exam_version=exam_field.exam_version, name="Insulin", formula=[])
+    ExamFieldResultHelper().record(
+        requested_exam=unclassified.requested_exams.get(), exam_field=uncoded, computed_value="12"
+    )
+
+    assert AutoverificationEngine().run_batch() == (1, 3)
+
+    assert ExamRequest.objects.get(id=normal.id).is_validated
+    assert not ExamRequest.objects.filter(autoverification_pending=True).exists()
+    held = {
+        decision.exam_request_id: decision.failed_rules
+        for decision in ValidationDecision.objects.filter(outcome=ValidationDecision.Outcome.HELD)
+    }
+    assert held == {abnormal.id: ["all_fields_normal"], jumped.id: ["delta_check"], unclassified.id: ["all_fields_normal"]}
+    assert "Not classified: Insulin." in str(ValidationDecision.objects.get(exam_request=unclassified).details)
+    assert AutoverificationEngine().run_batch() == (0, 0)
+
+
+@pytest.mark.django_db
+def test_completion_queues_request_for_autoverify_command(exam_request, exam_field):
+    ReferenceRange.objects.create(exam_field=exam_field, low=70, high=99)
+    RequestedExam.objects.create(exam_request=exam_request, exam_version=exam_field.exam_version)
+
+    ExamProcessor().compute_exam_request(exam_request)
+    exam_request.refresh_from_db()
+    assert exam_request.autoverification_pending
+
+    call_command("autoverify_exam_requests", "--once", stdout=StringIO())
+
+    exam_request.refresh_from_db()
+    assert exam_request.is_validated and exam_request.validated_by is None
+    assert ValidationDecision.objects.get().source == ValidationDecision.Source.AUTO
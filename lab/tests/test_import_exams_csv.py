@@ -0,0 +1,127 @@
+import csv
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from lab.models import (
+    Analyte,
+    AnalyteCode,
+    Equipment,
+    EquipmentGroup,
+    Exam,
+    ExamField,
+    ExamFieldTag,
+    ExamVersion,
+    MeasurementUnit,
+)
+
+_COLUMNS = [
+    "exam_code",
+    "exam_name",
+    "exam_material",
+    "exam_version",
+    "exam_version_is_active",
+    "field_name",
+    "field_code",
+    "field_priority",
+    "field_type",
+    "field_measurement_unit_code",
+    "field_formula",
+    "field_tags",
+]
+
+
+@pytest.fixture
+def analyte_code(db):
+    group = EquipmentGroup.objects.create(name="Chemistry")
+    equipment = Equipment.objects.create(name="Analyzer", code="AN-1", group=group)
+    analyte = Analyte.objects.create(name="Glucose", group=group, default_code="GLU")
+    return AnalyteCode.objects.create(analyte=analyte, equipment=equipment, code="GLU-1")
+
+
+def _write_csv(path, rows):
+    with path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=_COLUMNS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({column: row.get(column, "") for column in _COLUMNS})
+    return str(path)
+
+
+def _exam_rows(exam_count, fields_per_exam):
+    rows = []
+    for exam_idx in range(exam_count):
+        for field_idx in range(fields_per_exam):
+            rows.append(
+                {
+                    "exam_code": f"EX{exam_idx}",
+                    "exam_name": f"Exam {exam_idx}",
+                    "exam_material": "Blood",
+                    "exam_version": "1",
+                    "exam_version_is_active": "true",
+                    "field_name": f"Field {field_idx}",
+                    "field_code": f"F{field_idx}",
+                    "field_priority": str(field_idx),
+                    "field_type": "decimal",
+                    "field_measurement_unit_code": "mg/dL",
+                    "field_formula": '[{"condition": "", "result": "analyte_code_result(GLU-1).numeric_value"}]',
+                    "field_tags": "high,low",
+                }
+            )
+    return rows
+
+
+@pytest.mark.django_db
+def test_import_creates_catalog_and_resolves_analyte_refs(tmp_path, analyte_code):
+    csv_path = _write_csv(tmp_path / "exams.csv", _exam_rows(2, 3))
+
+    call_command("import_exams_csv", csv_path, "--batch-size", "4", stdout=StringIO())
+
+    assert Exam.objects.count() == 2
+    assert ExamVersion.objects.filter(is_active=True).count() == 2
+    assert ExamField.objects.count() == 6
+    assert MeasurementUnit.objects.filter(code="mg/dL").count() == 1
+    assert ExamFieldTag.objects.count() == 12
+    field = ExamField.objects.get(exam_version__exam__code="EX1", code="F2")
+    assert field.formula[0]["result"] == f"analyte_code_result({analyte_code.id}).numeric_value"
+
+
+@pytest.mark.django_db
+def test_import_is_idempotent_and_applies_updates(tmp_path, analyte_code):
+    rows = _exam_rows(1, 2)
+    call_command("import_exams_csv", _write_csv(tmp_path / "first.csv", rows), stdout=StringIO())
+
+    rows[1]["field_name"] = "Renamed"
+    rows[1]["exam_version"] = "2"
+    call_command("import_exams_csv", _write_csv(tmp_path / "second.csv", rows), stdout=StringIO())
+
+    assert Exam.objects.count() == 1
+    assert list(ExamVersion.objects.order_by("version").values_list("version", "is_active")) == [
+        (1, False),
+        (2, True),
+    ]
+    assert ExamField.objects.filter(exam_version__version=2, name="Renamed").exists()
+    assert ExamFieldTag.objects.count() == 6
+
+
+@pytest.mark.django_db
+def test_import_query_count_does_not_grow_with_rows(tmp_path, analyte_code, django_assert_max_num_queries):
+    small = _write_csv(tmp_path / "small.csv", _exam_rows(1, 5))
+    large = _write_csv(tmp_path / "large.csv", _exam_rows(1, 200))
+    call_command("import_exams_csv", small, stdout=StringIO())
+
+    with django_assert_max_num_queries(40):
+        call_command("import_exams_csv", large, stdout=StringIO())
+
+    assert ExamField.objects.count() == 200
+
+
+@pytest.mark.django_db
+def test_import_dry_run_writes_nothing(tmp_path, analyte_code):
+    csv_path = _write_csv(tmp_path / "exams.csv", _exam_rows(2, 2))
+
+    call_command("import_exams_csv", csv_path, "--dry-run", "--batch-size", "1", stdout=StringIO())
+
+    assert Exam.objects.count() == 0
+    assert ExamField.objects.count() == 0
@@ -0,0 +1,151 @@
+import re
+import zlib
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from core.models import Organization
+from lab.helpers.exam_field_result_helper import ExamFieldResultHelper
+from lab.helpers.exam_request_validation import ExamRequestValidationHelper
+from lab.models import ExamField, LabReport, RequestedExam
+from lab.reports.pdf import TextPdf
+from lab.reports.renderer import LabReportRenderer, build_report_pdf
+from professionals.models import Professional
+
+
+class FakeStorage:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.objects = {}
+
+    def upload_fileobj(self, fileobj, bucket, object_key, content_type):
+        if self.fail:
+            raise ConnectionError("MinIO unavailable")
+        content = fileobj.read()
+        self.objects[(bucket, object_key)] = (content, content_type)
+        return len(content), "sha"
+
+    def presign_get(self, bucket, object_key):
+        return f"https://minio.test/{bucket}/{object_key}?signed"
+
+
+def _page_text(content: bytes) -> bytes:
+    streams = re.findall(rb"stream\n(.*?)\nendstream", content, re.S)
+    return b"\n".join(zlib.decompress(stream) for stream in streams)
+
+
+@pytest.fixture
+def validated_request(db, exam_request, exam_version, professional):
+    professional.organizations.add(Organization.objects.create(name="Main lab", code="LAB"))
+    requested_exam = RequestedExam.objects.create(exam_request=exam_request, exam_version=exam_version, is_completed=True)
+    field = ExamField.objects.create(exam_version=exam_version, name="Glucose (fasting)", code="GLU")
+    ExamFieldResultHelper().record(
+        requested_exam=requested_exam,
+        exam_field=field,
+        computed_value="92",
+        classification_context={"flag": "N", "low": 70, "high": 99},
+    )
+    ExamRequestValidationHelper().bulk_validate(exam_request_ids=[exam_request.id], validated_by=professional)
+    return exam_request
+
+
+def test_text_pdf_pages_and_cross_reference_table():
+    pdf = TextPdf()
+    for index in range(120):
+        pdf.line(f"Line {index} (with parentheses)")
+    content = pdf.render()
+
+    assert content.startswith(b"%PDF-1.4") and content.endswith(b"%%EOF\n")
+    assert b"/Count 3" in content
+    xref_at = int(re.search(rb"startxref\n(\d+)", content).group(1))
+    offsets = re.findall(rb"(\d{10}) 00000 n", content[xref_at:])
+    for number, offset in enumerate(offsets, start=1):
+        assert content[int(offset):].startswith(b"%d 0 obj" % number)
+
+
+@pytest.mark.django_db
+def test_validation_queues_one_report_per_revision(api_client, professional, validated_request, monkeypatch):
+    storage = FakeStorage()
+    monkeypatch.setattr("lab.reports.renderer.get_documents_storage_client", lambda: storage)
+    api_client.force_authenticate(user=professional)
+    url = f"/api/lab/exam-requests/{validated_request.id}/report/"
+
+    assert api_client.get(url).status_code == 202
+    assert LabReportRenderer(storage).render_batch() == (1, 0)
+    assert LabReportRenderer(storage).render_batch() == (0, 0)
+
+    ready = api_client.get(url)
+    report = LabReport.objects.get()
+    (bucket, object_key), (content, content_type) = next(iter(storage.objects.items()))
+    assert ready.status_code == 200
+    assert ready.data["download_url"] == f"{url}download-url/"
+    assert report.document.reference == f"minio://{bucket}/{object_key}"
+    assert object_key.endswith(f"/lab-reports/{validated_request.id}/r{report.results_revision}.pdf")
+    assert content_type == "application/pdf" and b"Glucose \\(fasting\\): 92    ref. 70 - 99" in _page_text(content)
+    assert api_client.get(f"/api/documents/{report.document_id}/").status_code == 200
+
+    # Any professional reaching the request can download it, whatever their organization.
+    colleague = Professional.objects.create(email="colleague@example.com", first_name="Col", last_name="League")
+    api_client.force_authenticate(user=colleague)
+    download = api_client.get(ready.data["download_url"])
+    assert download.status_code == 200
+    assert download.data["url"] == f"https://minio.test/{bucket}/{object_key}?signed"
+    api_client.force_authenticate(user=professional)
+
+    ExamFieldResultHelper().record(
+        requested_exam=validated_request.requested_exams.get(),
+        exam_field=ExamField.objects.get(code="GLU"),
+        computed_value="94",
+    )
+    amended = api_client.get(url)
+    assert amended.status_code == 202
+    assert amended.data["results_revision"] > report.results_revision
+    assert LabReport.objects.count() == 2
+
+    # The earlier revision still renders the value it was queued with.
+    assert b"Glucose \\(fasting\\): 92" in _page_text(build_report_pdf(validated_request, report.results_revision))
+
+
+@pytest.mark.django_db
+def test_report_endpoint_does_not_queue_reports(api_client, professional, validated_request):
+    LabReport.objects.all().delete()
+    api_client.force_authenticate(user=professional)
+
+    response = api_client.get(f"/api/lab/exam-requests/{validated_request.id}/report/")
+
+    assert response.status_code == 404
+    assert not LabReport.objects.exists()
+
+
+@pytest.mark.django_db
+def test_failed_rendering_is_retried_then_marked_failed(validated_request):
+    renderer = LabReportRenderer(FakeStorage(fail=True), max_attempts=2, retry_base_seconds=60)
+
+    assert renderer.render_batch() == (0, 0)
+    report = LabReport.objects.get()
+    assert (report.status, report.attempts) == (LabReport.Status.PENDING, 1)
+    assert report.next_attempt_at > timezone.now() + timedelta(seconds=50)
+    assert renderer.render_batch() == (0, 0)
+
+    LabReport.objects.update(next_attempt_at=timezone.now())
+    assert renderer.render_batch() == (0, 1)
+    report.refresh_from_db()
+    assert (report.status, report.attempts, report.last_error) == (LabReport.Status.FAILED, 2, "MinIO unavailable")
+
+
+@pytest.mark.django_db
+def test_report_left_by_a_stopped_worker_is_rendered_after_its_lease(validated_request):
+    LabReportRenderer(FakeStorage()).render_batch()
+    report = LabReport.objects.get()
+    # Simulate a worker that claimed the next revision and stopped before recording anything.
+    LabReport.objects.filter(pk=report.pk).update(
+        status=LabReport.Status.PENDING, document=None, attempts=1, next_attempt_at=timezone.now() + timedelta(seconds=300)
+    )
+    assert LabReportRenderer(FakeStorage()).render_batch() == (0, 0)
+
+    LabReport.objects.update(next_attempt_at=timezone.now())
+    assert LabReportRenderer(FakeStorage()).render_batch() == (1, 0)
+    report.refresh_from_db()
+    assert (report.status, report.attempts) == (LabReport.Status.READY, 2)
+    assert report.document is not None
@@ -0,0 +1,147 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.utils import timezone
+
+from lab.exam_processing.injector import AnalyteResultInjector
+from lab.metrics import Histogram, MetricsRegistry, compute_duration, compute_queries, formula_missing, registry, results_ingested
+from lab.models import Analyte, AnalyteCode, Equipment, EquipmentGroup, ExamField, MetricValue, RequestedExam
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics(db):
+    registry.clear()
+    yield
+    registry.clear()
+
+
+@pytest.fixture
+def analyte_code(db):
+    group = EquipmentGroup.objects.create(name="Chemistry")
+    equipment = Equipment.objects.create(name="Analyzer", code="AN-1", group=group)
+    analyte = Analyte.objects.create(name="Glucose", group=group, default_code="GLU")
+    return AnalyteCode.objects.create(analyte=analyte, equipment=equipment, code="GLU-1")
+
+
+@pytest.fixture
+def requested_exam(db, exam_request, exam_version, sample):
+    sample.exam_request = exam_request
+    sample.save(update_fields=["exam_request"])
+    return RequestedExam.objects.create(exam_request=exam_request, exam_version=exam_version, sample=sample)
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("lab_test_seconds", "Test.", buckets=(1, 5))
+    for value in (0.5, 3, 7):
+        histogram.observe(value)
+
+    values = histogram.take()
+    assert histogram.from_fields(histogram.to_fields(values[()])) == values[()]
+    lines = histogram.render(values)
+    assert lines[2:] == [
+        'lab_test_seconds_bucket{le="1.0"} 1',
+        'lab_test_seconds_bucket{le="5.0"} 2',
+        'lab_test_seconds_bucket{le="+Inf"} 3',
+        "lab_test_seconds_sum 10.5",
+        "lab_test_seconds_count 3",
+    ]
+
+
+@pytest.mark.django_db
+def test_injection_records_ingest_compute_and_missing_formulas(requested_exam, analyte_code, exam_version):
+    ExamField.objects.create(
+        exam_version=exam_version,
+        name="Glucose",
+        code="GLU",
+        formula=[{"condition": "", "result": f"analyte_code_result({analyte_code.id}).numeric_value"}],
+    )
+    ExamField.objects.create(
+        exam_version=exam_version,
+        name="Ratio",
+        code="RATIO",
+        formula=[{"condition": "", "result": "analyte_code_result(999999).numeric_value"}],
+    )
+    ExamField.objects.create(exam_version=exam_version, name="Notes", code="NOTES")
+
+    AnalyteResultInjector().inject(
+        equipment_code="AN-1", analyte_code="GLU-1", raw_result="5.5", sample_id=requested_exam.sample_id
+    )
+
+    assert results_ingested.value(equipment="AN-1") == 1
+    assert compute_duration.count() == 1
+    assert compute_queries.count() == 1
+    assert formula_missing.value(exam_field="RATIO") == 1
+    assert formula_missing.value(exam_field="GLU") == 0
+    assert formula_missing.value(exam_field="NOTES") == 0
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_reports_backlog(settings, api_client, requested_exam):
+    RequestedExam.objects.filter(id=requested_exam.id).update(created_at=timezone.now() - timedelta(minutes=10))
+    results_ingested.inc(equipment="AN-1")
+    settings.LAB_METRICS_TOKEN = "scrape-secret"
+
+    response = api_client.get("/api/lab/metrics/", HTTP_AUTHORIZATION="Bearer scrape-secret")
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    body = response.content.decode()
+    assert "lab_requested_exams_incomplete 1\n" in body
+    age = float(body.split("\nlab_requested_exams_oldest_incomplete_age_seconds ")[1].split("\n")[0])
+    assert 600 <= age < 700
+    assert 'lab_analyte_results_ingested_total{equipment="AN-1"} 1.0' in body
+    assert api_client.get("/api/lab/metrics/").status_code == 401
+    assert api_client.get("/api/lab/metrics/", HTTP_AUTHORIZATION="Bearer other").status_code == 401
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_without_token_is_for_admins(settings, api_client, user):
+    settings.LAB_METRICS_TOKEN = ""
+    assert api_client.get("/api/lab/metrics/").status_code == 401
+    api_client.force_authenticate(user=user)
+    assert api_client.get("/api/lab/metrics/").status_code == 403
+    user.is_staff = True
+    user.save(update_fields=["is_staff"])
+    assert api_client.get("/api/lab/metrics/").status_code == 200
+
+
+@pytest.mark.django_db
+def test_series_from_other_processes_are_summed(analyte_code):
+    results_ingested.inc(equipment="AN-1")
+    # Another uWSGI worker or a background command flushed its own count.
+    MetricValue.objects.create(name=results_ingested.name, labels='["AN-1"]', value=2)
+    compute_duration.observe(0.02)
+    registry.flush()
+    compute_duration.observe(0.3)
+
+    assert results_ingested.value(equipment="AN-1") == 3
+    assert compute_duration.count() == 2
+    body = registry.render()
+    assert 'lab_exam_compute_duration_seconds_bucket{le="0.025"} 1' in body
+    assert 'lab_exam_compute_duration_seconds_bucket{le="0.5"} 2' in body
+    assert MetricValue.objects.get(name=results_ingested.name).value == 3
+
+
+@pytest.mark.django_db
+def test_render_flushes_once_and_reads_every_metric_in_one_query(django_assert_num_queries, monkeypatch):
+    results_ingested.inc(equipment="AN-1")
+    flushes = []
+    monkeypatch.setattr(registry, "flush", lambda: flushes.append(1))
+
+    with django_assert_num_queries(1):
+        registry.render()
+    assert flushes == [1]
+
+
+def test_exit_flush_is_registered_outside_tests_only(monkeypatch):
+    registered = []
+    monkeypatch.setattr("lab.metrics.atexit.register", registered.append)
+    under_test = MetricsRegistry(flush_seconds=3600)
+    under_test.counter("lab_test_total", "Test.").inc()
+    assert registered == []
+
+    monkeypatch.delattr(mail, "outbox")
+    command = MetricsRegistry(flush_seconds=3600)
+    command.counter("lab_test_total", "Test.").inc()
+    command.counter("lab_other_total", "Test.").inc()
+    assert registered == [command._flush_at_exit]
@@ -0,0 +1,103 @@
+import pytest
+
+from lab.exam_processing.injector import AnalyteResultInjector
+from lab.exam_processing.quality_control import QCStatistics, westgard_violations
+from lab.models import Analyte, AnalyteCode, AnalyteResult, Equipment, EquipmentGroup, QCAccumulator, QCResult
+
+
+@pytest.fixture
+def analyte_code(db):
+    group = EquipmentGroup.objects.create(name="Chemistry")
+    equipment = Equipment.objects.create(name="Analyzer", code="AN-1", group=group)
+    analyte = Analyte.objects.create(name="Glucose", group=group, default_code="GLU")
+    return AnalyteCode.objects.create(analyte=analyte, equipment=equipment, code="GLU-1")
+
+
+def _inject_qc(value, lot="L1"):
+    return AnalyteResultInjector().inject(
+        equipment_code="AN-1",
+        analyte_code="GLU-1",
+        raw_result=str(value),
+        metadata={"qc": {"lot": lot, "level": "normal"}},
+    )
+
+
+def test_westgard_rules_on_recent_z_scores():
+    assert westgard_violations([0.5]) == []
+    assert westgard_violations([2.5]) == ["1_2s"]
+    assert westgard_violations([3.2]) == ["1_2s", "1_3s"]
+    assert westgard_violations([2.1, 2.4]) == ["1_2s", "2_2s"]
+    assert westgard_violations([-2.1, 2.4]) == ["1_2s", "R_4s"]
+    assert westgard_violations([1.2, 1.5, 1.1, 1.3]) == ["4_1s"]
+    assert westgard_violations([0.2] * 9 + [0.4]) == ["10_x"]
+
+
+@pytest.mark.django_db
+def test_running_statistics_match_history(settings, analyte_code):
+    settings.LAB_QC_MIN_RESULTS = 3
+    values = [100, 102, 98, 101, 99]
+    for value in values:
+        result = _inject_qc(value)
+
+    accumulator = QCAccumulator.objects.get()
+    assert isinstance(result, QCResult)
+    assert not AnalyteResult.objects.exists()
+    assert accumulator.count == 5
+    assert accumulator.mean == pytest.approx(100)
+    assert accumulator.sd == pytest.approx(1.5811, abs=1e-4)
+    assert accumulator.recent_z_scores == [result.z_score for result in QCResult.objects.order_by("id")][3:]
+
+
+@pytest.mark.django_db
+def test_rejection_locks_out_patient_results_until_qc_passes(analyte_code, sample):
+    QCAccumulator.objects.create(analyte_code=analyte_code, lot="L1", target_mean=100, target_sd=2)
+
+    rejected = _inject_qc(107)
+    assert rejected.is_rejected and "1_3s" in rejected.violations
+    assert QCAccumulator.objects.get().count == 0
+    with pytest.raises(ValueError, match="locked out by QC"):
+        AnalyteResultInjector().inject(equipment_code="AN-1", analyte_code="GLU-1", raw_result="90", sample_id=sample.id)
+
+    assert not _inject_qc(101).is_rejected
+    assert not QCAccumulator.objects.get().is_locked_out
+    AnalyteResultInjector().inject(equipment_code="AN-1", analyte_code="GLU-1", raw_result="90", sample_id=sample.id)
+    assert AnalyteResult.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_retransmitted_control_result_is_counted_once(analyte_code):
+    def send(value):
+        return AnalyteResultInjector().inject(
+            equipment_code="AN-1",
+            analyte_code="GLU-1",
+            raw_result=str(value),
+            metadata={"qc": {"lot": "L1"}},
+            instrument_timestamp="2026-10-19T08:00:00Z",
+        )
+
+    first = send(100)
+    assert send(100).id == first.id
+    assert QCResult.objects.count() == 1
+    assert QCAccumulator.objects.get().count == 1
+
+    explicit = {"analyte_code": analyte_code, "value": 101.0, "lot": "L1", "idempotency_key": "run-7"}
+    assert QCStatistics().record(**explicit).id == QCStatistics().record(**explicit).id
+    assert QCAccumulator.objects.get().count == 2
+
+
+@pytest.mark.django_db
+def test_qc_statistics_api_lists_results_and_releases_lockout(api_client, professional, analyte_code):
+    accumulator = QCAccumulator.objects.create(analyte_code=analyte_code, lot="L1", target_mean=100, target_sd=2)
+    QCStatistics().record(analyte_code=analyte_code, value=95.0, lot="L1")
+    QCStatistics().record(analyte_code=analyte_code, value=94.0, lot="L1")
+    api_client.force_authenticate(user=professional)
+
+    listing = api_client.get("/api/lab/qc-statistics/", {"is_locked_out": "true"})
+    points = api_client.get(f"/api/lab/qc-statistics/{accumulator.id}/results/")
+    released = api_client.post(f"/api/lab/qc-statistics/{accumulator.id}/release/")
+
+    assert listing.status_code == 200
+    assert [row["id"] for row in listing.data["results"]] == [accumulator.id]
+    assert [point["z_score"] for point in points.data["results"]] == [-3.0, -2.5]
+    assert points.data["results"][0]["violations"] == ["1_2s", "2_2s"]
+    assert released.data["is_locked_out"] is False
@@ -0,0 +1,81 @@
+from datetime import date, timedelta
+
+import pytest
+
+from lab.catalog_cache import catalog_cache
+from lab.exam_processing.processor import ExamProcessor
+from lab.models import ExamField, ExamFieldResult, ReferenceRange, RequestedExam
+
+
+@pytest.fixture
+def exam_field(db, exam_version):
+    return ExamField.objects.create(
+        exam_version=exam_version,
+        name="Hemoglobin",
+        code="HGB",
+        formula=[{"condition": "", "result": "exam_field_result(999999).numeric_value"}],
+    )
+
+
+@pytest.fixture
+def hemoglobin_ranges(exam_field):
+    return {
+        "newborn": ReferenceRange.objects.create(exam_field=exam_field, age_min_days=0, age_max_days=30, low=14, high=24),
+        "child": ReferenceRange.objects.create(exam_field=exam_field, age_min_days=30, age_max_days=6570, low=11, high=16),
+        "adult_female": ReferenceRange.objects.create(
+            exam_field=exam_field, sex="F", age_min_days=6570, low=12, high=16, critical_low=7
+        ),
+        "adult": ReferenceRange.objects.create(exam_field=exam_field, age_min_days=6570, low=13.5, high=17.5),
+    }
+
+
+@pytest.mark.django_db
+def test_catalog_cache_resolves_bands_by_age_and_sex(exam_field, hemoglobin_ranges, django_assert_num_queries):
+    catalog_cache.reference_range_for(exam_field.id, age_days=0)
+
+    with django_assert_num_queries(0):
+        assert catalog_cache.reference_range_for(exam_field.id, age_days=29) == hemoglobin_ranges["newborn"]
+        assert catalog_cache.reference_range_for(exam_field.id, age_days=30) == hemoglobin_ranges["child"]
+        assert catalog_cache.reference_range_for(exam_field.id, age_days=9000, sex="F") == hemoglobin_ranges["adult_female"]
+        assert catalog_cache.reference_range_for(exam_field.id, age_days=9000, sex="M") == hemoglobin_ranges["adult"]
+        assert catalog_cache.reference_range_for(exam_field.id, age_days=100, sex="F") == hemoglobin_ranges["child"]
+        assert catalog_cache.reference_range_for(exam_field.id, age_days=None) is None
+        assert catalog_cache.reference_range_for(exam_field.id + 1, age_days=100) is None
+
+
+@pytest.mark.django_db
+def test_processor_classifies_against_patient_range(exam_request, exam_field, hemoglobin_ranges):
+    patient = exam_request.patient
+    patient.sex = "F"
+    patient.birth_date = date.today() - timedelta(days=365 * 30)
+    patient.save(update_fields=["sex", "birth_date"])
+    source = RequestedExam.objects.create(exam_request=exam_request, exam_version=exam_field.exam_version)
+
+    for value, expected in (("14", ("normal", "N")), ("10", ("abnormal", "L")), ("6.5", ("critical", "LL"))):
+        exam_field.formula = [{"condition": "", "result": f"'{value}'"}]
+        exam_field.save(update_fields=["formula"])
+        ExamProcessor().compute_exam_request(exam_request)
+
+        result = ExamFieldResult.objects.get(requested_exam=source, exam_field=exam_field, is_current=True)
+        assert (result.classification, result.classification_context["flag"]) == expected
+        assert result.classification_context["reference_range_id"] == hemoglobin_ranges["adult_female"].id
+
+
+@pytest.mark.django_db
+def test_reference_range_api_rejects_overlapping_bands(api_client, professional, exam_field, hemoglobin_ranges):
+    api_client.force_authenticate(user=professional)
+
+    overlapping = api_client.post(
+        "/api/lab/reference-ranges/",
+        {"exam_field": exam_field.id, "age_min_days": 20, "age_max_days": 40, "low": 1, "high": 2},
+        format="json",
+    )
+    male_band = api_client.post(
+        "/api/lab/reference-ranges/",
+        {"exam_field": exam_field.id, "sex": "M", "age_min_days": 6570, "low": 13, "high": 17},
+        format="json",
+    )
+
+    assert overlapping.status_code == 400
+    assert male_band.status_code == 201
+    assert catalog_cache.reference_range_for(exam_field.id, age_days=9000, sex="M").id == male_band.data["id"]
@@ -0,0 +1,59 @@
+import pytest
+
+from lab.exam_processing.processor import ExamProcessor
+from lab.helpers.exam_field_result_helper import ExamFieldResultHelper
+from lab.helpers.exam_request_helper import ExamRequestHelper
+from lab.helpers.exam_request_validation import ExamRequestValidationHelper
+from lab.helpers.status_board import StatusBoard
+from lab.models import ExamField, StatusBoardCounter
+
+
+def _board():
+    snapshot = StatusBoard().snapshot()
+    return (
+        {row["name"]: row["count"] for row in snapshot["sample_states"]},
+        {row["code"]: row["count"] for row in snapshot["pending_exams"]},
+        snapshot["critical_awaiting_validation"],
+    )
+
+
+@pytest.mark.django_db
+def test_counters_follow_write_paths_without_drift(
+    api_client, professional, patient, sample_type, initial_sample_state, processing_sample_state,
+    allowed_transition, exam_version,
+):
+    helper = ExamRequestHelper()
+    first = helper.create_exam_request(patient=patient, requested_by=professional, exam_versions=[exam_version])
+    second = helper.create_exam_request(patient=patient, requested_by=professional, exam_versions=[exam_version])
+    api_client.force_authenticate(user=professional)
+    sample_id = api_client.post(
+        "/api/lab/samples/request_sample/", {"patient_uuid": str(patient.pid), "sample_type": sample_type.id}
+    ).data["sample_id"]
+    api_client.post(f"/api/lab/samples/{sample_id}/update_sample_state/", {"new_state_id": processing_sample_state.id})
+    assert _board() == ({"Processing": 1}, {"GLU": 2}, 0)
+
+    field = ExamField.objects.create(
+        exam_version=exam_version, name="Glucose", code="GLU", formula=[{"condition": "", "result": "'600'"}]
+    )
+    ExamProcessor().compute_exam_request(first)
+    ExamFieldResultHelper().record(requested_exam=first.requested_exams.get(), exam_field=field, classification="critical")
+    assert _board()[1:] == ({"GLU": 1}, 1)
+
+    ExamRequestValidationHelper().bulk_validate(exam_request_ids=[first.id], validated_by=professional)
+    helper.cancel_exam_request(exam_request=second, canceled_by=professional)
+    assert _board() == ({"Processing": 1}, {}, 0)
+    assert StatusBoard().reconcile() == 0
+
+    response = api_client.get("/api/lab/status-board/")
+    assert response.status_code == 200
+    assert response.data["sample_states"] == [{"id": processing_sample_state.id, "name": "Processing", "count": 1}]
+
+
+@pytest.mark.django_db
+def test_reconcile_corrects_drift(professional, patient, exam_version):
+    ExamRequestHelper().create_exam_request(patient=patient, requested_by=professional, exam_versions=[exam_version])
+    StatusBoardCounter.objects.filter(metric=StatusBoardCounter.Metric.PENDING_EXAM).update(value=40)
+    StatusBoard().add({(StatusBoardCounter.Metric.CRITICAL_AWAITING_VALIDATION, 0): 3})
+
+    assert StatusBoard().reconcile() == 2
+    assert _board() == ({}, {"GLU": 1}, 0)
@@ -489,3 +489,77 @@ def test_fetch_results_filters_by_is_validated(api_client, professional, patient
 
     assert response_validated.status_code == status.HTTP_200_OK
     assert len(response_validated.data) == 0
+
+
+@pytest.mark.django_db
+def test_exam_field_result_updates_append_revisions(api_client, professional, exam_request, exam_version):
+    requested_exam = RequestedExam.objects.create(exam_request=exam_request, exam_version=exam_version)
+    exam_field = ExamField.objects.create(exam_version=exam_version, name="Glucose", code="GLU")
+    api_client.force_authenticate(user=professional)
+
+    created = api_client.post(
+        "/api/lab/exam-field-results/",
+        {"requested_exam": requested_exam.id, "exam_field": exam_field.id, "computed_value": "5.5"},
+        format="json",
+    )
+    amended = api_client.patch(
+        f"/api/lab/exam-field-results/{created.data['id']}/",
+        {"computed_value": "5.8"},
+        format="json",
+    )
+    stale = api_client.patch(
+        f"/api/lab/exam-field-results/{created.data['id']}/",
+        {"computed_value": "6.0"},
+        format="json",
+    )
+    current = api_client.get("/api/lab/exam-field-results/")
+    history = api_client.get("/api/lab/exam-field-results/", {"include_history": "true"})
+    delete = api_client.delete(f"/api/lab/exam-field-results/{amended.data['id']}/")
+
+    assert created.status_code == 201
+    assert amended.status_code == 200
+    assert amended.data["revision"] == 2
+    assert amended.data["id"] != created.data["id"]
+    assert stale.status_code == 400
+    assert [item["computed_value"] for item in current.data["results"]] == ["5.8"]
+    assert history.data["count"] == 2
+    assert delete.status_code == 405
+
+
+@pytest.mark.django_db
+def test_exam_version_dry_run_returns_values_without_writes(api_client, professional, exam_version):
+    field = ExamField.objects.create(
+        exam_version=exam_version,
+        name="Double",
+        code="DBL",
+        formula=[{"condition": "", "result": "exam_field_result(999).numeric_value * 2"}],
+    )
+    api_client.force_authenticate(user=professional)
+    vectors = [{"fields": {"999": value}} for value in range(2000)]
+
+    response = api_client.post(
+        "/api/lab/exam-versions/dry-run/",
+        {"exam_version": exam_version.id, "vectors": vectors},
+        format="json",
+    )
+
+    assert response.status_code == 200
+    assert len(response.data["results"]) == 2000
+    assert response.data["results"][21]["fields"] == [
+        {"id": field.id, "code": "DBL", "value": "42.0", "matched_rule": 0, "is_missing": False}
+    ]
+    assert not ExamFieldResult.objects.exists()
+
+
+@pytest.mark.django_db
+def test_exam_version_dry_run_rejects_invalid_drafts(api_client, professional):
+    api_client.force_authenticate(user=professional)
+
+    response = api_client.post(
+        "/api/lab/exam-versions/dry-run/",
+        {"fields": [{"code": "X", "formula": [{"result": "1 +"}]}], "vector": {}},
+        format="json",
+    )
+
+    assert response.status_code == 400
+    assert "Draft 0" in response.data["error"]
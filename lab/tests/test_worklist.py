@@ -0,0 +1,117 @@
+import pytest
+from django.urls import reverse
+
+from lab.exam_processing.injector import AnalyteResultInjector
+from lab.exam_processing.worklist import WorklistQueue
+from lab.helpers.exam_request_helper import ExamRequestHelper
+from lab.models import Analyte, AnalyteCode, Equipment, EquipmentGroup, ExamField, WorklistItem
+
+
+@pytest.fixture
+def equipment_group(db):
+    return EquipmentGroup.objects.create(name="Chemistry")
+
+
+@pytest.fixture
+def equipment(db, equipment_group):
+    return Equipment.objects.create(name="Analyzer", code="AN-1", group=equipment_group)
+
+
+@pytest.fixture
+def analyte_codes(db, equipment_group, equipment):
+    codes = []
+    for name in ("Glucose", "Urea"):
+        analyte = Analyte.objects.create(name=name, group=equipment_group, default_code=name[:3].upper())
+        codes.append(AnalyteCode.objects.create(analyte=analyte, equipment=equipment, code=f"{name[:3].upper()}-1"))
+    return codes
+
+
+@pytest.fixture
+def exam_with_formulas(db, exam_version, analyte_codes):
+    for idx, analyte_code in enumerate(analyte_codes):
+        ExamField.objects.create(
+            exam_version=exam_version,
+            name=f"Field {idx}",
+            code=f"F{idx}",
+            formula=[{"condition": "", "result": f"analyte_code_result({analyte_code.id}).numeric_value"}],
+        )
+    return exam_version
+
+
+def _request_exams(patient, professional, exam_version, count=1):
+    helper = ExamRequestHelper()
+    return [
+        helper.create_exam_request(patient=patient, requested_by=professional, exam_versions=[exam_version])
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.django_db
+def test_requesting_exams_enqueues_referenced_analyte_codes(patient, professional, exam_with_formulas, analyte_codes):
+    exam_request = _request_exams(patient, professional, exam_with_formulas)[0]
+    sample = exam_request.samples.get()
+
+    items = WorklistItem.objects.filter(sample=sample).order_by("analyte_code_id")
+    assert [item.analyte_code_id for item in items] == [code.id for code in analyte_codes]
+    assert {item.equipment_id for item in items} == {analyte_codes[0].equipment_id}
+
+
+@pytest.mark.django_db
+def test_injection_and_cancel_dequeue_items(patient, professional, exam_with_formulas, analyte_codes):
+    first, second = _request_exams(patient, professional, exam_with_formulas, count=2)
+
+    result = AnalyteResultInjector().inject(equipment_code="AN-1", analyte_code="GLU-1", raw_result="5.1")
+
+    assert result.sample == first.samples.get()
+    assert not WorklistItem.objects.filter(sample=result.sample, analyte_code=analyte_codes[0]).exists()
+    ExamRequestHelper().cancel_exam_request(exam_request=second, canceled_by=professional)
+    assert list(WorklistItem.objects.values_list("analyte_code_id", flat=True)) == [analyte_codes[1].id]
+
+
+@pytest.mark.django_db
+def test_rebuild_reconciles_with_open_requests(patient, professional, exam_with_formulas, analyte_codes):
+    exam_request = _request_exams(patient, professional, exam_with_formulas)[0]
+    WorklistItem.objects.filter(analyte_code=analyte_codes[0]).delete()
+    ExamField.objects.filter(code="F1").update(formula=[])
+
+    assert WorklistQueue().rebuild() == (1, 1)
+    assert list(WorklistItem.objects.values_list("sample_id", "analyte_code_id")) == [
+        (exam_request.samples.get().id, analyte_codes[0].id)
+    ]
+
+
+@pytest.mark.django_db
+def test_equipment_worklist_paginates_and_supports_etag(
+    api_client, patient, professional, exam_with_formulas, equipment, django_assert_max_num_queries
+):
+    _request_exams(patient, professional, exam_with_formulas, count=3)
+    api_client.force_authenticate(user=professional)
+    url = reverse("equipment-worklist", args=[equipment.id])
+
+    with django_assert_max_num_queries(4):
+        response = api_client.get(url, {"page_size": 4})
+
+    assert response.status_code == 200
+    assert len(response.data["results"]) == 4
+    assert response.data["results"][0]["analyte_code"] == "GLU-1"
+    assert response.data["results"][0]["equipment_code"] == "AN-1"
+    next_page = api_client.get(response.data["next"])
+    assert len(next_page.data["results"]) == 2
+
+    etag = response["ETag"]
+    unchanged = api_client.get(url, {"page_size": 4}, HTTP_IF_NONE_MATCH=etag)
+    assert unchanged.status_code == 304
+
+    AnalyteResultInjector().inject(equipment_code="AN-1", analyte_code="GLU-1", raw_result="5.1")
+    changed = api_client.get(url, {"page_size": 4}, HTTP_IF_NONE_MATCH=etag)
+    assert changed.status_code == 200
+    assert changed["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_equipment_group_worklist_requires_professional(api_client, user, equipment_group):
+    api_client.force_authenticate(user=user)
+
+    response = api_client.get(reverse("equipmentgroup-worklist", args=[equipment_group.id]))
+
+    assert response.status_code == 403
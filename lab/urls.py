@@ -13,11 +13,16 @@ from .views import (
     EquipmentGroupViewSet,
     EquipmentViewSet,
     MeasurementUnitViewSet,
+    MetricsView,
+    QCStatisticsViewSet,
+    ReferenceRangeViewSet,
     SampleStateViewSet,
     SampleTypeViewSet,
     SectorViewSet,
     SampleViewSet,
+    StatusBoardViewSet,
     TagViewSet,
+    UnitConversionViewSet,
 )
 
 # Create a router and register the SampleViewSet
@@ -26,9 +31,11 @@ router.register(r'samples', SampleViewSet, basename='sample')
 router.register(r'sample-types', SampleTypeViewSet, basename='sampletype')
 router.register(r'sample-states', SampleStateViewSet, basename='samplestate')
 router.register(r'measurement-units', MeasurementUnitViewSet, basename='measurementunit')
+router.register(r'unit-conversions', UnitConversionViewSet, basename='unitconversion')
 router.register(r'exams', ExamViewSet, basename='exam')
 router.register(r'exam-versions', ExamVersionViewSet, basename='examversion')
 router.register(r'exam-fields', ExamFieldViewSet, basename='examfield')
+router.register(r'reference-ranges', ReferenceRangeViewSet, basename='referencerange')
 router.register(r'tags', TagViewSet, basename='tag')
 router.register(r'exam-requests', ExamRequestViewSet, basename='examrequest')
 router.register(r'exam-field-results', ExamFieldResultViewSet, basename='examfieldresult')
@@ -38,7 +45,10 @@ router.register(r'equipments', EquipmentViewSet, basename='equipment')
 router.register(r'analytes', AnalyteViewSet, basename='analyte')
 router.register(r'analyte-codes', AnalyteCodeViewSet, basename='analytecode')
 router.register(r'analyte-results', AnalyteResultViewSet, basename='analyteresult')
+router.register(r'qc-statistics', QCStatisticsViewSet, basename='qcstatistics')
+router.register(r'status-board', StatusBoardViewSet, basename='statusboard')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('metrics/', MetricsView.as_view()),
 ]
@@ -1,10 +1,19 @@
+import hashlib
+import hmac
 import uuid
 
+from django.conf import settings
+from django.db import transaction
 from django.db.models import Prefetch
-from rest_framework import status, viewsets
+from django.http import HttpResponse
+from django.urls import reverse
+from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from lab.models import (
     AllowedStateTransition,
@@ -18,7 +27,11 @@ from lab.models import (
     ExamVersion,
     Equipment,
     EquipmentGroup,
+    LabReport,
     MeasurementUnit,
+    QCAccumulator,
+    QCResult,
+    ReferenceRange,
     RequestedExam,
     Sample,
     Sector,
@@ -26,9 +39,17 @@ from lab.models import (
     SampleStateTransition,
     SampleType,
     Tag,
+    UnitConversion,
+    WorklistItem,
 )
+from lab.exam_processing.dry_run import FormulaDryRunner
 from lab.exam_processing.injector import AnalyteResultInjector
+from lab.helpers.exam_field_result_helper import REVISION_FIELDS, ExamFieldResultHelper
 from lab.helpers.exam_request_helper import ExamRequestHelper
+from lab.helpers.exam_request_validation import ExamRequestValidationHelper
+from lab.helpers.status_board import StatusBoard
+from lab.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, render_metrics
+from lab.reports.renderer import current_lab_report, report_download_url
 from lab.serializers import (
     AnalyteCodeSerializer,
     AnalyteResultSerializer,
@@ -42,14 +63,64 @@ from lab.serializers import (
     EquipmentGroupSerializer,
     EquipmentSerializer,
     MeasurementUnitSerializer,
+    QCAccumulatorSerializer,
+    QCResultSerializer,
+    ReferenceRangeSerializer,
     SampleSerializer,
     SampleStateSerializer,
     SampleTypeSerializer,
     SectorSerializer,
     TagSerializer,
+    UnitConversionSerializer,
+    WorklistItemSerializer,
 )
 from professionals.models import Professional
 from professionals.permissions import IsProfessional
+from webhooks.outbox import enqueue, sample_state_message
+
+
+class WorklistPagination(CursorPagination):
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = "id"
+
+
+def _worklist_response(request, queryset):
+    """
+    Cursor-paginated worklist page with an ETag derived from the rows it contains.
+
+    Pollers sending the previous ETag in If-None-Match get an empty 304 while the
+    page is unchanged.
+    """
+    paginator = WorklistPagination()
+    page = paginator.paginate_queryset(
+        queryset.select_related("analyte_code__analyte", "equipment"),
+        request,
+    )
+    fingerprint = ",".join(f"{item.id}:{item.analyte_code_id}" for item in page)
+    etag = '"{}"'.format(hashlib.sha1(f"{request.get_full_path()}|{fingerprint}".encode()).hexdigest())
+
+    if_none_match = request.headers.get("If-None-Match", "")
+    if etag in [value.strip() for value in if_none_match.split(",")]:
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = paginator.get_paginated_response(WorklistItemSerializer(page, many=True).data)
+    response["ETag"] = etag
+    return response
+
+
+def _accession_lookup(viewset, request):
+    """
+    Single object whose accession code is ?code=, found through its unique index.
+    """
+    code = (request.query_params.get("code") or "").strip()
+    if not code:
+        return Response({"error": "Missing accession code"}, status=status.HTTP_400_BAD_REQUEST)
+    instance = viewset.get_queryset().filter(code=code).first()
+    if instance is None:
+        return Response({"error": "Accession code not found."}, status=status.HTTP_404_NOT_FOUND)
+    return Response(viewset.get_serializer(instance).data)
 
 
 class SampleViewSet(viewsets.ReadOnlyModelViewSet):
@@ -61,18 +132,21 @@ class SampleViewSet(viewsets.ReadOnlyModelViewSet):
     def request_sample(self, request):
         serializer = SampleSerializer(data=request.data)
         if serializer.is_valid():
-            sample = serializer.save()
-            requested_state = SampleState.objects.get(is_initial_state=True)
-            transition = SampleStateTransition.objects.create(
-                sample=sample,
-                previous_state=None,
-                new_state=requested_state,
-                changed_by=request.user
-            )
-            transition.transaction_hash = uuid.uuid4().hex  # Simulate blockchain hash
-            transition.blockchain_timestamp = transition.created_at
-            transition.is_verified = True
-            transition.save()
+            with transaction.atomic():
+                sample = serializer.save()
+                requested_state = SampleState.objects.get(is_initial_state=True)
+                transition = SampleStateTransition.objects.create(
+                    sample=sample,
+                    previous_state=None,
+                    new_state=requested_state,
+                    changed_by=request.user
+                )
+                transition.transaction_hash = uuid.uuid4().hex  # Simulate blockchain hash
+                transition.blockchain_timestamp = transition.created_at
+                transition.is_verified = True
+                transition.save()
+                enqueue(sample_state_message(transition))
+                StatusBoard().sample_moved(previous_state_id=None, new_state_id=requested_state.id)
             return Response(
                 {
                     "message": "Sample requested successfully",
@@ -83,6 +157,10 @@ class SampleViewSet(viewsets.ReadOnlyModelViewSet):
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=["get"], url_path="by-accession", permission_classes=[IsAuthenticated])
+    def by_accession(self, request):
+        return _accession_lookup(self, request)
+
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
     def update_sample_state(self, request, pk=None):
         sample = self.get_object()
@@ -115,15 +193,18 @@ class SampleViewSet(viewsets.ReadOnlyModelViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         # Create the new transition
-        new_transition = SampleStateTransition.objects.create(
-            sample=sample,
-            previous_state=current_state,
-            new_state=new_state,
-            changed_by=request.user,
-            transaction_hash=uuid.uuid4().hex,
-            blockchain_timestamp=None,  # Simulate blockchain timestamp
-            is_verified=True
-        )
+        with transaction.atomic():
+            new_transition = SampleStateTransition.objects.create(
+                sample=sample,
+                previous_state=current_state,
+                new_state=new_state,
+                changed_by=request.user,
+                transaction_hash=uuid.uuid4().hex,
+                blockchain_timestamp=None,  # Simulate blockchain timestamp
+                is_verified=True
+            )
+            enqueue(sample_state_message(new_transition))
+            StatusBoard().sample_moved(previous_state_id=current_state.id, new_state_id=new_state.id)
 
         return Response({
             "message": "Sample state updated successfully.",
@@ -162,6 +243,37 @@ class ExamVersionViewSet(viewsets.ModelViewSet):
     serializer_class = ExamVersionSerializer
     permission_classes = [IsProfessional]
 
+    @action(detail=False, methods=["post"], url_path="dry-run", permission_classes=[IsProfessional])
+    def dry_run(self, request):
+        exam_version_id = request.data.get("exam_version")
+        drafts = request.data.get("fields")
+        vectors = request.data.get("vectors")
+        if vectors is None and request.data.get("vector") is not None:
+            vectors = [request.data.get("vector")]
+
+        if exam_version_id is None and not drafts:
+            return Response(
+                {"error": "Provide exam_version, draft fields, or both."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if drafts is not None and not isinstance(drafts, list):
+            return Response({"error": "fields must be a list."}, status=status.HTTP_400_BAD_REQUEST)
+
+        exam_version = None
+        if exam_version_id is not None:
+            exam_version = ExamVersion.objects.filter(id=exam_version_id).first()
+            if exam_version is None:
+                return Response({"error": "Exam version not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        runner = FormulaDryRunner()
+        try:
+            exam_fields = runner.build_fields(exam_version=exam_version, drafts=drafts)
+            results = runner.evaluate(exam_fields, vectors)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({"results": [{"fields": fields} for fields in results]}, status=status.HTTP_200_OK)
+
 
 class ExamFieldViewSet(viewsets.ModelViewSet):
     queryset = ExamField.objects.all()
@@ -169,6 +281,13 @@ class ExamFieldViewSet(viewsets.ModelViewSet):
     permission_classes = [IsProfessional]
 
 
+class ReferenceRangeViewSet(viewsets.ModelViewSet):
+    queryset = ReferenceRange.objects.all().order_by("exam_field_id", "sex", "age_min_days")
+    serializer_class = ReferenceRangeSerializer
+    permission_classes = [IsProfessional]
+    filterset_fields = ["exam_field", "sex"]
+
+
 class TagViewSet(viewsets.ModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
@@ -359,7 +478,7 @@ class ExamRequestViewSet(viewsets.ModelViewSet):
         except ValueError:
             return Response({"error": "IDs must be integers."}, status=status.HTTP_400_BAD_REQUEST)
 
-        field_result_qs = ExamFieldResult.objects.select_related(
+        field_result_qs = ExamFieldResult.objects.filter(is_current=True).select_related(
             "exam_field__measurement_unit",
         ).order_by("exam_field__priority", "exam_field__id")
 
@@ -444,6 +563,70 @@ class ExamRequestViewSet(viewsets.ModelViewSet):
 
         return Response(payload, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=["get"], url_path="by-accession", permission_classes=[IsProfessional])
+    def by_accession(self, request):
+        return _accession_lookup(self, request)
+
+    @action(detail=True, methods=["get"], permission_classes=[IsProfessional])
+    def report(self, request, pk=None):
+        exam_request = self.get_object()
+        if not exam_request.is_validated:
+            return Response({"error": "Exam request is not validated."}, status=status.HTTP_400_BAD_REQUEST)
+        report = current_lab_report(exam_request)
+        if report is None:
+            return Response({"error": "No report is queued for the current results."}, status=status.HTTP_404_NOT_FOUND)
+
+        payload = {"status": report.status, "results_revision": report.results_revision}
+        if report.status == LabReport.Status.READY:
+            payload["document"] = report.document_id
+            payload["download_url"] = reverse("examrequest-report-download-url", kwargs={"pk": exam_request.id})
+            return Response(payload, status=status.HTTP_200_OK)
+        if report.status == LabReport.Status.FAILED:
+            payload["error"] = report.last_error
+            return Response(payload, status=status.HTTP_200_OK)
+        return Response(payload, status=status.HTTP_202_ACCEPTED)
+
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path="report/download-url",
+        url_name="report-download-url",
+        permission_classes=[IsProfessional],
+    )
+    def report_download(self, request, pk=None):
+        exam_request = self.get_object()
+        report = current_lab_report(exam_request) if exam_request.is_validated else None
+        if report is None or report.status != LabReport.Status.READY:
+            return Response({"error": "Report is not ready."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(report_download_url(report), status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["post"], url_path="bulk-validate", permission_classes=[IsProfessional])
+    def bulk_validate(self, request):
+        ids = request.data.get("ids")
+        if not isinstance(ids, list) or not ids:
+            return Response({"error": "ids must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            exam_request_ids = [int(value) for value in ids]
+        except (TypeError, ValueError):
+            return Response({"error": "IDs must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+
+        professional = Professional.objects.get(id=request.user.id)
+        try:
+            validated, skipped = ExamRequestValidationHelper().bulk_validate(
+                exam_request_ids=exam_request_ids,
+                validated_by=professional,
+            )
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            {
+                "validated": validated,
+                "skipped": [{"id": exam_request_id, "reason": reason} for exam_request_id, reason in skipped.items()],
+            },
+            status=status.HTTP_200_OK,
+        )
+
     @action(detail=True, methods=["post"], permission_classes=[IsProfessional])
     def cancel(self, request, pk=None):
         exam_request = self.get_object()
@@ -468,6 +651,35 @@ class ExamFieldResultViewSet(viewsets.ModelViewSet):
     queryset = ExamFieldResult.objects.all()
     serializer_class = ExamFieldResultSerializer
     permission_classes = [IsProfessional]
+    # Results are append-only; amendments add revisions instead of deleting rows.
+    http_method_names = ["get", "post", "patch", "put", "head", "options"]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            include_history = ExamRequestViewSet._parse_bool(self.request.query_params.get("include_history"))
+            if not include_history:
+                queryset = queryset.filter(is_current=True)
+        return queryset
+
+    def perform_create(self, serializer):
+        data = serializer.validated_data
+        serializer.instance, _ = ExamFieldResultHelper().record(
+            requested_exam=data["requested_exam"],
+            exam_field=data["exam_field"],
+            **{name: data[name] for name in REVISION_FIELDS if name in data},
+        )
+
+    def perform_update(self, serializer):
+        instance = serializer.instance
+        if not instance.is_current:
+            raise ValidationError({"error": "Only the current revision can be amended."})
+        data = serializer.validated_data
+        serializer.instance, _ = ExamFieldResultHelper().record(
+            requested_exam=instance.requested_exam,
+            exam_field=instance.exam_field,
+            **{name: data[name] for name in REVISION_FIELDS if name in data},
+        )
 
 
 class EquipmentGroupViewSet(viewsets.ModelViewSet):
@@ -475,6 +687,11 @@ class EquipmentGroupViewSet(viewsets.ModelViewSet):
     serializer_class = EquipmentGroupSerializer
     permission_classes = [IsProfessional]
 
+    @action(detail=True, methods=["get"], permission_classes=[IsProfessional])
+    def worklist(self, request, pk=None):
+        equipment_group = self.get_object()
+        return _worklist_response(request, WorklistItem.objects.filter(equipment_group=equipment_group))
+
 
 class SectorViewSet(viewsets.ModelViewSet):
     queryset = Sector.objects.all()
@@ -500,6 +717,11 @@ class EquipmentViewSet(viewsets.ModelViewSet):
     serializer_class = EquipmentSerializer
     permission_classes = [IsProfessional]
 
+    @action(detail=True, methods=["get"], permission_classes=[IsProfessional])
+    def worklist(self, request, pk=None):
+        equipment = self.get_object()
+        return _worklist_response(request, WorklistItem.objects.filter(equipment=equipment))
+
     @action(detail=False, methods=["get"], url_path="term-search", permission_classes=[IsProfessional])
     def term_search(self, request):
         term = (request.query_params.get("term") or "").strip()
@@ -520,6 +742,13 @@ class AnalyteViewSet(viewsets.ModelViewSet):
     permission_classes = [IsProfessional]
 
 
+class UnitConversionViewSet(viewsets.ModelViewSet):
+    queryset = UnitConversion.objects.all()
+    serializer_class = UnitConversionSerializer
+    permission_classes = [IsProfessional]
+    filterset_fields = ["from_unit", "to_unit", "analyte"]
+
+
 class AnalyteCodeViewSet(viewsets.ModelViewSet):
     queryset = AnalyteCode.objects.all()
     serializer_class = AnalyteCodeSerializer
@@ -540,6 +769,8 @@ class AnalyteResultViewSet(viewsets.ModelViewSet):
         numeric_value = request.data.get("numeric_value")
         units_code = request.data.get("units_code")
         metadata = request.data.get("metadata")
+        idempotency_key = request.data.get("idempotency_key") or request.headers.get("Idempotency-Key")
+        instrument_timestamp = request.data.get("instrument_timestamp")
 
         injector = AnalyteResultInjector()
         try:
@@ -551,9 +782,73 @@ class AnalyteResultViewSet(viewsets.ModelViewSet):
                 numeric_value=numeric_value,
                 units_code=units_code,
                 metadata=metadata,
+                idempotency_key=idempotency_key,
+                instrument_timestamp=instrument_timestamp,
             )
         except ValueError as exc:
             return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
+        if isinstance(analyte_result, QCResult):
+            return Response(QCResultSerializer(analyte_result).data, status=status.HTTP_201_CREATED)
         serializer = AnalyteResultSerializer(analyte_result)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class StatusBoardViewSet(viewsets.ViewSet):
+    permission_classes = [IsProfessional]
+
+    def list(self, request):
+        return Response(StatusBoard().snapshot())
+
+
+class MetricsView(APIView):
+    """
+    Prometheus scrape target. With LAB_METRICS_TOKEN set, scrapers must send it as a
+    bearer token; without one, only admin users can read the metrics.
+    """
+
+    def get_authenticators(self):
+        # The scrape token is not a JWT, so it must not reach the JWT authenticator.
+        return [] if settings.LAB_METRICS_TOKEN else super().get_authenticators()
+
+    def get_permissions(self):
+        return [AllowAny()] if settings.LAB_METRICS_TOKEN else [IsAdminUser()]
+
+    def get(self, request):
+        token = settings.LAB_METRICS_TOKEN
+        if token and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            return HttpResponse(status=401)
+        return HttpResponse(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+
+class QCResultPagination(CursorPagination):
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = "-id"
+
+
+class QCStatisticsViewSet(
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.UpdateModelMixin,
+    viewsets.GenericViewSet,
+):
+    queryset = QCAccumulator.objects.select_related("analyte_code").order_by("id")
+    serializer_class = QCAccumulatorSerializer
+    permission_classes = [IsProfessional]
+    filterset_fields = ["analyte_code", "analyte_code__equipment", "lot", "is_locked_out"]
+
+    @action(detail=True, methods=["get"], permission_classes=[IsProfessional])
+    def results(self, request, pk=None):
+        accumulator = self.get_object()
+        paginator = QCResultPagination()
+        page = paginator.paginate_queryset(accumulator.results.all(), request)
+        return paginator.get_paginated_response(QCResultSerializer(page, many=True).data)
+
+    @action(detail=True, methods=["post"], permission_classes=[IsProfessional])
+    def release(self, request, pk=None):
+        accumulator = self.get_object()
+        QCAccumulator.objects.filter(id=accumulator.id).update(is_locked_out=False, locked_out_at=None)
+        accumulator.refresh_from_db()
+        return Response(self.get_serializer(accumulator).data, status=status.HTTP_200_OK)
@@ -2,14 +2,14 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from typing import Optional
-from datetime import timedelta
 
 from django.db import transaction
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 
-from medications.models import MedicationItem, TakeMedicationEvent
+from medications.models import MedicationItem
 from events.models import BaseEvent
+from events.recurrence import format_rule, regenerate
 import users
 
 
@@ -23,8 +23,8 @@ class AddMedicationHelper:
     related TakeMedicationEvents.
 
     Notes:
-    - We preserve COMPLETED events on updates/deletes (audit).
-    - We only regenerate/remove events that are NOT completed.
+    - We preserve COMPLETED and MISSED events on updates/deletes (audit).
+    - We only regenerate/remove events that are still open or canceled.
     - `created_by_user` should be the patient user in patient-scoped flows.
     """
     created_by_user: "users.User"  # AUTH_USER_MODEL instance
@@ -60,8 +60,9 @@ class AddMedicationHelper:
     ) -> MedicationItem:
         """
         If schedule_changed=True (e.g., frequency_hours or total_unit_amount changed)
-        or a new first_dose_at is provided, we regenerate all **non-completed** events
-        from the new baseline (preserving any completed ones).
+        or a new first_dose_at is provided, **non-completed** events are diffed against
+        the new baseline: only added, removed or shifted doses are written and
+        completed ones are preserved.
         """
         if schedule_changed or first_dose_at is not None:
             self._regen_events_for_item(
@@ -79,12 +80,12 @@ class AddMedicationHelper:
         delete_completed: bool = False,
     ) -> None:
         """
-        Removes the MedicationItem and (by default) only non-completed events.
+        Removes the MedicationItem and (by default) only non-completed, non-missed events.
         Set delete_completed=True to hard-delete everything (generally not recommended).
         """
         qs = item.medication_events.all()
         if not delete_completed:
-            qs = qs.exclude(status=BaseEvent.Status.COMPLETED)
+            qs = qs.exclude(status__in=[BaseEvent.Status.COMPLETED, BaseEvent.Status.MISSED])
         # Hard delete remaining events
         qs.delete()
         # Finally remove the item
@@ -101,31 +102,14 @@ class AddMedicationHelper:
     ) -> None:
         total = int(item.total_unit_amount or 0)
         freq_h = int(item.frequency_hours or 0)
-        if total <= 0 or freq_h <= 0:
-            return
-
-        cursor = first_at
-        window_delta = timedelta(minutes=window_minutes)
-
-        unit_code = getattr(item.dosage_unit, "code", "")
-        med_name = getattr(item.medication, "name", "Medication")
-        desc_base = f"Take {med_name} {item.dosage_amount} {unit_code}".strip()
-
-        created_by = self.created_by_user
-
-        # Create one by one (multi-table inheritance safe)
-        with transaction.atomic():
-            for _ in range(total):
-                start = cursor
-                until = cursor + window_delta
-                TakeMedicationEvent.objects.create(
-                    created_by=created_by,
-                    description=desc_base,
-                    scheduled_to_complete_from=start,
-                    scheduled_to_complete_until=until,
-                    medication_item=item,
-                )
-                cursor = cursor + timedelta(hours=freq_h)
+        rule = ""
+        if total > 0 and freq_h > 0:
+            rule = format_rule(first_at, [f"FREQ=HOURLY;INTERVAL={freq_h};COUNT={total}"])
+
+        # Doses are a rule; only the rolling window becomes TakeMedicationEvent rows
+        # (the extender job in events.recurrence adds the rest as time passes).
+        # Existing rows are diffed, so completed doses and unchanged ones stay put.
+        regenerate(item, rule, occurrence_minutes=window_minutes, created_by=self.created_by_user)
 
     def _regen_events_for_item(
         self,
@@ -135,9 +119,8 @@ class AddMedicationHelper:
         window_minutes: int,
     ) -> None:
         """
-        Delete all non-completed events for this item, then regenerate them.
+        Bring non-completed events in line with the new schedule (completed ones are kept).
         """
-        item.medication_events.exclude(status=BaseEvent.Status.COMPLETED).delete()
         self._generate_events_for_item(item=item, first_at=first_at, window_minutes=window_minutes)
 
 
@@ -1,6 +1,8 @@
-from django.db import models
+from datetime import timedelta
+
+from django.db import models, transaction
 from core.models import DosageUnit
-from events.models import ScheduledCheckpointEvent
+from events.models import RecurringSchedule, ScheduledCheckpointEvent
 from prescriptions.models import AbstractPrescription, AbstractPrescriptionItem
 
 
@@ -27,10 +29,16 @@ class MedicationPrescription(AbstractPrescription):
         verbose_name_plural = "Medication Prescriptions"
 
 
-class MedicationItem(AbstractPrescriptionItem):
+class MedicationItem(AbstractPrescriptionItem, RecurringSchedule):
     """
     Represents a single medication item prescription.
+
+    Doses follow `recurrence_rule`; only the rolling window is stored as
+    TakeMedicationEvent rows (see events.RecurringSchedule).
     """
+    occurrence_start_field = "scheduled_to_complete_from"
+    occurrence_end_field = "scheduled_to_complete_until"
+
     prescription = models.ForeignKey(
         MedicationPrescription,
         on_delete=models.CASCADE,
@@ -49,6 +57,30 @@ class MedicationItem(AbstractPrescriptionItem):
     def __str__(self):
         return f"{self.medication.name} ({self.dosage_amount} {self.dosage_unit.code})"
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        resync = not self._state.adding and (update_fields is None or "patient" in update_fields)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if resync:
+                # Dose events copy the item's patient into event_patient (see BaseEvent).
+                self.medication_events.exclude(event_patient_id=self.patient_id).update(event_patient_id=self.patient_id)
+
+    def occurrence_events(self):
+        return self.medication_events.all()
+
+    def build_occurrence_event(self, at, *, created_by=None) -> "TakeMedicationEvent":
+        unit_code = getattr(self.dosage_unit, "code", "")
+        med_name = getattr(self.medication, "name", "Medication")
+        return TakeMedicationEvent(
+            # Patients are users (multi-table inheritance), so the patient authors extended doses.
+            created_by=created_by or self.patient,
+            description=f"Take {med_name} {self.dosage_amount} {unit_code}".strip(),
+            scheduled_to_complete_from=at,
+            scheduled_to_complete_until=at + timedelta(minutes=self.occurrence_minutes),
+            medication_item=self,
+        )
+
 
 class TakeMedicationEvent(ScheduledCheckpointEvent):
     """
@@ -64,5 +96,10 @@ class TakeMedicationEvent(ScheduledCheckpointEvent):
         verbose_name = "Take Medication Event"
         verbose_name_plural = "Take Medication Events"
 
+    denormalized_sources = ScheduledCheckpointEvent.denormalized_sources + ("medication_item",)
+
+    def get_event_patient_id(self):
+        return self.medication_item.patient_id if self.medication_item_id else None
+
     def __str__(self):
         return f"{self.medication_item.medication.name} for {self.medication_item.patient} at {self.scheduled_to_complete_from}"
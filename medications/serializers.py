@@ -3,6 +3,7 @@ from patients.models import Patient
 from professionals.models import Professional
 from core.models import DosageUnit
 from core.serializers import DosageUnitSerializer
+from events.serializers import BulkStatusSerializer
 from .models import Medication, MedicationItem, MedicationPrescription
 
 
@@ -71,6 +72,8 @@ class MedicationItemSerializer(serializers.ModelSerializer):
             "frequency_hours",
             "instructions",
             "total_unit_amount",
+            "recurrence_rule",
+            "materialized_until",
         )
 
 
@@ -145,3 +148,9 @@ class MedicationItemUpdateSerializer(serializers.Serializer):
             instance.instructions = validated_data["instructions"]
         instance.save()
         return instance
+
+
+class MedicationEventBulkStatusSerializer(BulkStatusSerializer):
+    medication_item = serializers.IntegerField(required=False)
+
+    scope_filters = {"medication_item": "medication_item_id"}
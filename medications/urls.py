@@ -5,7 +5,9 @@ from .views import (
     MedicationPrescribeView,
     MyMedicationsView,
     MyMedicationItemCreateView,
-    MyMedicationItemDetailView
+    MyMedicationItemDetailView,
+    MyMedicationItemScheduleView,
+    MyMedicationEventsBulkStatusView,
 )
 
 router = DefaultRouter()
@@ -15,5 +17,7 @@ urlpatterns = [
     path("my-medications/", MyMedicationsView.as_view(), name="my-medications"),
     path("my-medications/add/", MyMedicationItemCreateView.as_view(), name="my-medications-add"),
     path("my-medications/<int:id>/", MyMedicationItemDetailView.as_view(), name="my-medications-detail"),  # GET/PATCH/PUT/DELETE
+    path("my-medications/<int:id>/schedule/", MyMedicationItemScheduleView.as_view(), name="my-medications-schedule"),
+    path("my-medications/events/bulk-status/", MyMedicationEventsBulkStatusView.as_view(), name="my-medications-events-bulk-status"),
     path("prescribe/", MedicationPrescribeView.as_view(), name="medication-prescribe"),
 ] + router.urls
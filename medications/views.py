@@ -7,16 +7,19 @@ from rest_framework.generics import ListAPIView, RetrieveUpdateDestroyAPIView
 from users.permissions import IsBayleafAPIToken
 from patients.permissions import IsPatient
 
-from .models import Medication, MedicationItem
+from .models import Medication, MedicationItem, TakeMedicationEvent
 from .serializers import (
     MedicationItemSerializer,
     MedicationItemCreateSerializer,
     MedicationItemUpdateSerializer,
+    MedicationEventBulkStatusSerializer,
     MedicationPrescribeSerializer,
     MedicationSerializer,
 )
 
 from medications.helpers.add_medication_helper import AddMedicationHelper
+from events.bulk import bulk_update_status
+from events.recurrence import schedule_between, schedule_window
 
 
 class MedicationViewSet(viewsets.ModelViewSet):
@@ -143,3 +146,48 @@ class MyMedicationItemDetailView(RetrieveUpdateDestroyAPIView):
         helper = AddMedicationHelper(created_by_user=request.user)
         helper.remove_item_and_events(item=item, delete_completed=delete_completed)
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class MyMedicationItemScheduleView(APIView):
+    """
+    Dose occurrences of a current-patient item between ?from= and ?to=.
+    Doses beyond the materialized window are computed from the item's rule.
+    """
+    permission_classes = [IsPatient | IsBayleafAPIToken]
+
+    def get(self, request, id):
+        item = (
+            MedicationItem.objects
+            .filter(patient__user_ptr_id=request.user.id, id=id)
+            .select_related("medication", "dosage_unit")
+            .first()
+        )
+        if item is None:
+            return Response({"error": "Medication item not found."}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            start, end = schedule_window(request.query_params)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(schedule_between(item, start, end))
+
+
+class MyMedicationEventsBulkStatusView(APIView):
+    """
+    Moves the current patient's selected dose events to one status at once.
+    The transition is checked for every event before any is changed.
+    """
+    permission_classes = [IsPatient | IsBayleafAPIToken]
+
+    def post(self, request):
+        serializer = MedicationEventBulkStatusSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        events = serializer.filter(
+            TakeMedicationEvent.objects.filter(medication_item__patient__user_ptr_id=request.user.id),
+            start_field="scheduled_to_complete_from",
+        )
+        try:
+            changed = bulk_update_status(events, serializer.validated_data["status"], changed_by=request.user)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"updated": sum(changed.values()), "by_status": changed})
@@ -6,7 +6,13 @@ from django.utils import timezone
 
 
 class Patient(User, Person):
+    class Sex(models.TextChoices):
+        FEMALE = "F", "Female"
+        MALE = "M", "Male"
+
     pid = models.UUIDField(default=uuid.uuid4, editable=False, unique=True, primary_key=True)
+    # Biological sex used to pick lab reference ranges; blank when unknown.
+    sex = models.CharField(max_length=1, choices=Sex.choices, blank=True, default="")
 
     class Meta:
         verbose_name = "Patient"
@@ -63,6 +63,7 @@ class PatientSerializer(serializers.ModelSerializer):
             "first_name",
             "last_name",
             "birth_date",
+            "sex",
             "email",
             "password",
             "address1",
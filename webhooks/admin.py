@@ -0,0 +1,37 @@
+from django.contrib import admin
+
+from webhooks.models import OutboxMessage, WebhookDelivery, WebhookSubscription
+
+
+@admin.register(WebhookSubscription)
+class WebhookSubscriptionAdmin(admin.ModelAdmin):
+    list_display = ("name", "url", "is_active", "next_attempt_at", "last_delivered_at", "created_at")
+    list_filter = ("is_active",)
+    search_fields = ("name", "url")
+    readonly_fields = ("secret", "next_attempt_at", "leased_until", "last_error", "last_delivered_at")
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ("id", "topic", "aggregate_type", "aggregate_id", "created_at", "fanned_out_at")
+    list_filter = ("topic",)
+    search_fields = ("aggregate_id",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(WebhookDelivery)
+class WebhookDeliveryAdmin(admin.ModelAdmin):
+    list_display = ("id", "subscription", "message", "status", "attempts", "delivered_at")
+    list_filter = ("status", "subscription")
+    raw_id_fields = ("message",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,221 @@
+import hashlib
+import hmac
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from webhooks.models import OutboxMessage, WebhookDelivery, WebhookSubscription
+from webhooks.transports import HttpTransport
+
+SIGNATURE_HEADER = "X-Bayleaf-Signature"
+TIMESTAMP_HEADER = "X-Bayleaf-Timestamp"
+# Transaction-level advisory lock held while fanning out; the bytes spell "bayleafw".
+FAN_OUT_LOCK_ID = 0x6261796C65616677
+
+
+def signature(secret: str, timestamp: str, body: bytes) -> str:
+    """
+    sha256=<hex HMAC of "<timestamp>.<body>">; receivers recompute it with their copy of the secret.
+    """
+    digest = hmac.new(secret.encode(), timestamp.encode() + b"." + body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+@dataclass
+class DispatchStats:
+    fanned_out: int = 0
+    delivered: int = 0
+    retried: int = 0
+    failed: int = 0
+
+    @property
+    def processed(self) -> int:
+        return self.fanned_out + self.delivered + self.retried + self.failed
+
+
+class WebhookDispatcher:
+    """
+    Moves outbox messages to webhook subscribers.
+
+    fan_out() turns each new outbox row into one delivery per matching active
+    subscription. deliver() claims up to `concurrency` subscriptions with due
+    deliveries (a lease, so several workers can run side by side), POSTs each one
+    its oldest pending deliveries as one signed batch on a thread pool, and
+    records the outcome. Only the HTTP calls run on the threads.
+
+    Pending deliveries go out oldest message first, but there is no global
+    order: a message whose transaction commits late becomes visible after later
+    ids were fanned out, and is delivered after them. Changes to one aggregate
+    that are serialized by row locks keep their order, since the later change
+    takes its outbox id after the earlier one commits. A failed batch is retried
+    with exponential backoff and holds back later ones; after max_attempts it is
+    marked failed and delivery moves on.
+    """
+
+    def __init__(
+        self,
+        transport=None,
+        *,
+        batch_size: int = 100,
+        concurrency: int = 4,
+        max_attempts: int = 8,
+        retry_base_seconds: int = 30,
+        lease_seconds: int = 120,
+    ):
+        self.transport = transport if transport is not None else HttpTransport()
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.lease_seconds = lease_seconds
+
+    def dispatch_batch(self) -> DispatchStats:
+        stats = DispatchStats(fanned_out=self.fan_out())
+        delivered = self.deliver()
+        stats.delivered, stats.retried, stats.failed = delivered.delivered, delivered.retried, delivered.failed
+        return stats
+
+    @transaction.atomic
+    def fan_out(self) -> int:
+        """
+        Creates deliveries for up to batch_size new outbox messages. Returns how many messages were handled.
+
+        One worker fans out at a time, so workers do not contend for the same rows.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_xact_lock(%s)", [FAN_OUT_LOCK_ID])
+            if not cursor.fetchone()[0]:
+                return 0
+        messages = list(OutboxMessage.objects.filter(fanned_out_at__isnull=True).order_by("id")[: self.batch_size])
+        if not messages:
+            return 0
+        subscriptions = list(WebhookSubscription.objects.filter(is_active=True))
+        WebhookDelivery.objects.bulk_create(
+            [
+                WebhookDelivery(subscription=subscription, message=message)
+                for message in messages
+                for subscription in subscriptions
+                if subscription.matches(message.topic)
+            ],
+            ignore_conflicts=True,
+        )
+        OutboxMessage.objects.filter(id__in=[message.id for message in messages]).update(fanned_out_at=timezone.now())
+        return len(messages)
+
+    def deliver(self) -> DispatchStats:
+        batches = self._claim()
+        stats = DispatchStats()
+        if not batches:
+            return stats
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            errors = list(pool.map(self._send, batches))
+        for (subscription, deliveries, _), error in zip(batches, errors):
+            self._record(subscription, deliveries, error, stats)
+        return stats
+
+    @transaction.atomic
+    def _claim(self) -> list[tuple]:
+        now = timezone.now()
+        pending = WebhookDelivery.objects.filter(subscription=OuterRef("pk"), status=WebhookDelivery.Status.PENDING)
+        subscriptions = list(
+            WebhookSubscription.objects.select_for_update(skip_locked=True)
+            .filter(is_active=True, next_attempt_at__lte=now)
+            .filter(Q(leased_until__isnull=True) | Q(leased_until__lt=now))
+            .filter(Exists(pending))
+            .order_by("next_attempt_at", "id")[: self.concurrency]
+        )
+        if not subscriptions:
+            return []
+        WebhookSubscription.objects.filter(id__in=[subscription.id for subscription in subscriptions]).update(
+            leased_until=now + timedelta(seconds=self.lease_seconds)
+        )
+        batches = []
+        for subscription in subscriptions:
+            deliveries = list(
+                subscription.deliveries.select_related("message")
+                .filter(status=WebhookDelivery.Status.PENDING)
+                .order_by("message_id")[: self.batch_size]
+            )
+            batches.append((subscription, deliveries, self._body(deliveries)))
+        return batches
+
+    def _body(self, deliveries) -> bytes:
+        messages = [
+            {
+                "id": delivery.message.id,
+                "topic": delivery.message.topic,
+                "aggregate_type": delivery.message.aggregate_type,
+                "aggregate_id": delivery.message.aggregate_id,
+                "created_at": delivery.message.created_at,
+                "payload": delivery.message.payload,
+            }
+            for delivery in deliveries
+        ]
+        return json.dumps({"messages": messages}, cls=DjangoJSONEncoder).encode()
+
+    def _send(self, batch) -> str | None:
+        subscription, _, body = batch
+        timestamp = str(int(time.time()))
+        headers = {
+            "Content-Type": "application/json",
+            TIMESTAMP_HEADER: timestamp,
+            SIGNATURE_HEADER: signature(subscription.secret, timestamp, body),
+        }
+        try:
+            self.transport.send(subscription.url, body, headers)
+        except Exception as exc:
+            # Any transport failure means "retry later"; the error is kept on the subscription.
+            return f"{type(exc).__name__}: {exc}"[:2000]
+        return None
+
+    @transaction.atomic
+    def _record(self, subscription, deliveries, error: str | None, stats: DispatchStats) -> None:
+        now = timezone.now()
+        ids = [delivery.id for delivery in deliveries]
+        subscription.leased_until = None
+        subscription.next_attempt_at = now
+        if error is None:
+            WebhookDelivery.objects.filter(id__in=ids).update(
+                status=WebhookDelivery.Status.DELIVERED, delivered_at=now, last_error=""
+            )
+            subscription.last_error = ""
+            subscription.last_delivered_at = now
+            stats.delivered += len(ids)
+        else:
+            attempts = max(delivery.attempts for delivery in deliveries) + 1
+            if attempts >= self.max_attempts:
+                WebhookDelivery.objects.filter(id__in=ids).update(
+                    status=WebhookDelivery.Status.FAILED, attempts=attempts, last_error=error
+                )
+                stats.failed += len(ids)
+            else:
+                WebhookDelivery.objects.filter(id__in=ids).update(attempts=attempts, last_error=error)
+                subscription.next_attempt_at = now + timedelta(seconds=self.retry_base_seconds * 2 ** (attempts - 1))
+                stats.retried += len(ids)
+            subscription.last_error = error
+        subscription.save(update_fields=["leased_until", "next_attempt_at", "last_error", "last_delivered_at", "updated_at"])
+
+    def prune(self, *, before: datetime | None = None) -> int:
+        """
+        Deletes outbox messages older than WEBHOOKS_RETENTION_DAYS once no delivery of theirs is pending.
+        """
+        before = before or timezone.now() - timedelta(days=getattr(settings, "WEBHOOKS_RETENTION_DAYS", 7))
+        pending = WebhookDelivery.objects.filter(message=OuterRef("pk"), status=WebhookDelivery.Status.PENDING)
+        ids = list(
+            OutboxMessage.objects.filter(fanned_out_at__isnull=False, created_at__lt=before)
+            .filter(~Exists(pending))
+            .order_by("id")
+            .values_list("id", flat=True)[: self.batch_size * 10]
+        )
+        if not ids:
+            return 0
+        OutboxMessage.objects.filter(id__in=ids).delete()
+        return len(ids)
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from webhooks.dispatcher import WebhookDispatcher
+
+
+class Command(BaseCommand):
+    help = "Fan outbox messages out to webhook subscriptions and deliver them in signed batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100, help="Messages fanned out, and sent per subscription, per batch.")
+        parser.add_argument("--concurrency", type=int, default=4, help="Subscriptions delivered to in parallel.")
+        parser.add_argument("--max-attempts", type=int, default=8, help="Attempts before a batch is marked failed.")
+        parser.add_argument("--interval", type=float, default=2, help="Seconds to sleep when nothing is due.")
+        parser.add_argument("--once", action="store_true", help="Drain due messages once and exit.")
+
+    def handle(self, *args, **options):
+        dispatcher = WebhookDispatcher(
+            batch_size=max(options["batch_size"], 1),
+            concurrency=max(options["concurrency"], 1),
+            max_attempts=max(options["max_attempts"], 1),
+        )
+        while True:
+            stats = dispatcher.dispatch_batch()
+            if stats.processed:
+                self.stdout.write(
+                    f"Fanned out {stats.fanned_out}, delivered {stats.delivered}, "
+                    f"retrying {stats.retried}, failed {stats.failed}."
+                )
+                continue
+            pruned = dispatcher.prune()
+            if pruned:
+                self.stdout.write(f"Pruned {pruned} outbox message(s).")
+                continue
+            if options["once"]:
+                break
+            time.sleep(max(options["interval"], 0))
+
+        self.stdout.write(self.style.SUCCESS("Webhook dispatch finished."))
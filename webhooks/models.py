@@ -0,0 +1,97 @@
+import secrets
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+from core.models import TimeStampedModel
+
+
+def generate_secret() -> str:
+    return secrets.token_hex(32)
+
+
+class OutboxMessage(models.Model):
+    """
+    Domain change written in the same transaction as the change itself (see webhooks/outbox.py).
+
+    The dispatch_webhooks worker copies it into one WebhookDelivery per matching
+    subscription (fan-out) and later prunes it.
+    """
+    topic = models.CharField(max_length=100)
+    aggregate_type = models.CharField(max_length=50)
+    aggregate_id = models.CharField(max_length=64)
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    fanned_out_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["id"],
+                condition=models.Q(fanned_out_at__isnull=True),
+                name="webhook_outbox_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} {self.aggregate_type}:{self.aggregate_id}"
+
+
+class WebhookSubscription(TimeStampedModel):
+    """
+    An integration endpoint that receives signed batches of outbox messages.
+
+    Pending deliveries go out oldest message first, so the retry state (backoff
+    and last error) lives on the subscription: a failing batch holds back the
+    ones after it until it succeeds or is marked failed.
+    """
+    name = models.CharField(max_length=100)
+    url = models.URLField(max_length=500)
+    secret = models.CharField(max_length=128, default=generate_secret)
+    topics = models.JSONField(default=list, blank=True)  # empty = every topic
+    is_active = models.BooleanField(default=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="webhook_subscriptions"
+    )
+
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    leased_until = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, default="")
+    last_delivered_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.url})"
+
+    def matches(self, topic: str) -> bool:
+        return not self.topics or topic in self.topics
+
+
+class WebhookDelivery(models.Model):
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        DELIVERED = "delivered", "Delivered"
+        FAILED = "failed", "Failed"
+
+    subscription = models.ForeignKey(WebhookSubscription, on_delete=models.CASCADE, related_name="deliveries")
+    message = models.ForeignKey(OutboxMessage, on_delete=models.CASCADE, related_name="deliveries")
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    delivered_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["subscription", "message"], name="uniq_webhook_delivery"),
+        ]
+        indexes = [
+            models.Index(
+                fields=["subscription", "message"],
+                condition=models.Q(status="pending"),
+                name="webhook_delivery_order_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Delivery {self.id} of message {self.message_id} ({self.status})"
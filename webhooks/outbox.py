@@ -0,0 +1,80 @@
+from webhooks.models import OutboxMessage
+
+EVENT_STATUS_CHANGED = "event.status_changed"
+EXAM_FIELD_RESULT_RECORDED = "lab.exam_field_result.recorded"
+SAMPLE_STATE_CHANGED = "lab.sample.state_changed"
+
+TOPICS = [EVENT_STATUS_CHANGED, EXAM_FIELD_RESULT_RECORDED, SAMPLE_STATE_CHANGED]
+
+
+def enqueue(*messages: OutboxMessage) -> None:
+    """
+    Writes outbox rows; call inside the transaction of the change they describe.
+    """
+    OutboxMessage.objects.bulk_create(messages)
+
+
+def event_status_message(history, *, patient_id=None) -> OutboxMessage:
+    """
+    From a saved events.EventStatusHistory row.
+    """
+    return OutboxMessage(
+        topic=EVENT_STATUS_CHANGED,
+        aggregate_type=history.event_type or "event",
+        aggregate_id=str(history.event_id),
+        payload={
+            "event_id": str(history.event_id),
+            "event_type": history.event_type,
+            "patient_id": str(patient_id) if patient_id else None,
+            "previous_status": history.previous_status,
+            "new_status": history.new_status,
+            "changed_by": history.changed_by_id,
+            "changed_at": history.changed_at,
+        },
+    )
+
+
+def exam_field_result_message(result) -> OutboxMessage:
+    """
+    From a newly recorded lab.ExamFieldResult revision.
+    """
+    requested_exam = result.requested_exam
+    exam_request = requested_exam.exam_request
+    return OutboxMessage(
+        topic=EXAM_FIELD_RESULT_RECORDED,
+        aggregate_type="requested_exam",
+        aggregate_id=str(requested_exam.id),
+        payload={
+            "exam_field_result_id": result.id,
+            "requested_exam_id": requested_exam.id,
+            "exam_request_id": exam_request.id,
+            "patient_id": str(exam_request.patient_id),
+            "exam_field_code": result.exam_field.code,
+            "revision": result.revision,
+            "raw_value": result.raw_value,
+            "computed_value": result.computed_value,
+            "classification": result.classification,
+            "recorded_at": result.created_at,
+        },
+    )
+
+
+def sample_state_message(transition) -> OutboxMessage:
+    """
+    From a newly inserted lab.SampleStateTransition.
+    """
+    sample = transition.sample
+    return OutboxMessage(
+        topic=SAMPLE_STATE_CHANGED,
+        aggregate_type="sample",
+        aggregate_id=str(sample.id),
+        payload={
+            "transition_id": str(transition.id),
+            "sample_id": str(sample.id),
+            "patient_id": str(sample.patient_id) if sample.patient_id else None,
+            "previous_state": transition.previous_state.name if transition.previous_state else None,
+            "new_state": transition.new_state.name,
+            "changed_by": transition.changed_by_id,
+            "changed_at": transition.created_at,
+        },
+    )
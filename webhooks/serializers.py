@@ -0,0 +1,28 @@
+from rest_framework import serializers
+
+from webhooks.models import WebhookDelivery, WebhookSubscription
+from webhooks.outbox import TOPICS
+
+
+class WebhookSubscriptionSerializer(serializers.ModelSerializer):
+    topics = serializers.ListField(child=serializers.ChoiceField(choices=TOPICS), required=False)
+    pending_deliveries = serializers.SerializerMethodField()
+
+    class Meta:
+        model = WebhookSubscription
+        fields = [
+            "id", "name", "url", "secret", "topics", "is_active",
+            "created_by", "created_at", "updated_at",
+            "next_attempt_at", "last_error", "last_delivered_at", "pending_deliveries",
+        ]
+        read_only_fields = [
+            "id", "secret", "created_by", "created_at", "updated_at",
+            "next_attempt_at", "last_error", "last_delivered_at",
+        ]
+
+    def get_pending_deliveries(self, obj) -> int:
+        # Annotated by the viewset's queryset; counted for freshly created rows.
+        annotated = getattr(obj, "pending_deliveries", None)
+        if annotated is not None:
+            return annotated
+        return obj.deliveries.filter(status=WebhookDelivery.Status.PENDING).count()
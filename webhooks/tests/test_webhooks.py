@@ -0,0 +1,138 @@
+import hashlib
+import hmac
+import json
+from datetime import timedelta
+
+import pytest
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.urls import reverse
+from django.utils import timezone
+
+from lab.helpers.exam_field_result_helper import ExamFieldResultHelper
+from lab.models import ExamField, RequestedExam
+from webhooks.dispatcher import FAN_OUT_LOCK_ID, SIGNATURE_HEADER, TIMESTAMP_HEADER, WebhookDispatcher
+from webhooks.models import OutboxMessage, WebhookDelivery, WebhookSubscription
+from webhooks.outbox import EXAM_FIELD_RESULT_RECORDED, SAMPLE_STATE_CHANGED
+from webhooks.transports import StubTransport
+
+
+@pytest.fixture
+def requested_exam(db, exam_request, exam_version):
+    return RequestedExam.objects.create(exam_request=exam_request, exam_version=exam_version)
+
+
+@pytest.fixture
+def exam_field(db, exam_version):
+    return ExamField.objects.create(exam_version=exam_version, name="Potassium", code="K")
+
+
+@pytest.fixture
+def subscription(db):
+    return WebhookSubscription.objects.create(name="EHR", url="https://ehr.example.com/hooks")
+
+
+def _record(requested_exam, exam_field, value):
+    return ExamFieldResultHelper().record(requested_exam=requested_exam, exam_field=exam_field, computed_value=value)
+
+
+@pytest.mark.django_db
+def test_result_revisions_write_outbox_rows(requested_exam, exam_field):
+    _record(requested_exam, exam_field, "4.1")
+    _record(requested_exam, exam_field, "4.1")
+    _record(requested_exam, exam_field, "4.3")
+
+    messages = list(OutboxMessage.objects.order_by("id"))
+    assert [message.topic for message in messages] == [EXAM_FIELD_RESULT_RECORDED] * 2
+    assert {message.aggregate_id for message in messages} == {str(requested_exam.id)}
+    assert [message.payload["revision"] for message in messages] == [1, 2]
+    assert messages[1].payload["patient_id"] == str(requested_exam.exam_request.patient_id)
+
+
+@pytest.mark.django_db
+def test_sample_transitions_write_outbox_rows(api_client, user, patient, sample_type, initial_sample_state):
+    api_client.force_authenticate(user=user)
+    response = api_client.post(
+        reverse("sample-request-sample"),
+        data={"patient_uuid": str(patient.pid), "sample_type": sample_type.id},
+        format="json",
+    )
+    assert response.status_code == 201
+
+    message = OutboxMessage.objects.get()
+    assert message.topic == SAMPLE_STATE_CHANGED
+    assert message.aggregate_id == str(response.data["sample_id"])
+    assert message.payload["new_state"] == initial_sample_state.name
+    assert message.payload["previous_state"] is None
+
+
+@pytest.mark.django_db
+def test_dispatcher_delivers_signed_batches_in_order(subscription, requested_exam, exam_field):
+    WebhookSubscription.objects.create(name="Pharmacy", url="https://rx.example.com", topics=[SAMPLE_STATE_CHANGED])
+    for value in ("4.1", "4.3", "4.5"):
+        _record(requested_exam, exam_field, value)
+    transport = StubTransport()
+
+    stats = WebhookDispatcher(transport).dispatch_batch()
+
+    assert stats.fanned_out == 3
+    assert stats.delivered == 3
+    assert WebhookDelivery.objects.count() == 3
+    url, body, headers = transport.sent[0]
+    assert url == subscription.url
+    expected = hmac.new(
+        subscription.secret.encode(), headers[TIMESTAMP_HEADER].encode() + b"." + body, hashlib.sha256
+    ).hexdigest()
+    assert headers[SIGNATURE_HEADER] == f"sha256={expected}"
+    values = [message["payload"]["computed_value"] for message in json.loads(body)["messages"]]
+    assert values == ["4.1", "4.3", "4.5"]
+    assert WebhookDispatcher(transport).dispatch_batch().processed == 0
+
+
+@pytest.mark.django_db
+def test_dispatcher_backs_off_then_marks_batch_failed(subscription, requested_exam, exam_field):
+    _record(requested_exam, exam_field, "4.1")
+    dispatcher = WebhookDispatcher(StubTransport(fail_times=10), max_attempts=2, retry_base_seconds=60)
+
+    assert dispatcher.dispatch_batch().retried == 1
+    subscription.refresh_from_db()
+    assert subscription.next_attempt_at > timezone.now() + timedelta(seconds=50)
+    assert "Stub transport failure" in subscription.last_error
+    assert dispatcher.dispatch_batch().processed == 0
+
+    WebhookSubscription.objects.update(next_attempt_at=timezone.now())
+    assert dispatcher.dispatch_batch().failed == 1
+    delivery = WebhookDelivery.objects.get()
+    assert delivery.status == WebhookDelivery.Status.FAILED
+    assert delivery.attempts == 2
+
+
+@pytest.mark.django_db
+def test_pending_deliveries_go_out_oldest_message_first(subscription):
+    first, second = (
+        OutboxMessage.objects.create(topic=SAMPLE_STATE_CHANGED, aggregate_type="sample", aggregate_id="7", payload={"n": n})
+        for n in (1, 2)
+    )
+    # Deliveries created out of message order, as a late-committing producer leaves them.
+    WebhookDelivery.objects.create(subscription=subscription, message=second)
+    WebhookDelivery.objects.create(subscription=subscription, message=first)
+    OutboxMessage.objects.update(fanned_out_at=timezone.now())
+    transport = StubTransport()
+
+    assert WebhookDispatcher(transport).dispatch_batch().delivered == 2
+    _, body, _ = transport.sent[0]
+    assert [message["id"] for message in json.loads(body)["messages"]] == [first.id, second.id]
+
+
+@pytest.mark.django_db
+def test_fan_out_runs_on_one_worker_at_a_time(subscription, requested_exam, exam_field):
+    _record(requested_exam, exam_field, "4.1")
+    other = connections.create_connection(DEFAULT_DB_ALIAS)
+    try:
+        with other.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(%s)", [FAN_OUT_LOCK_ID])
+        assert WebhookDispatcher(StubTransport()).fan_out() == 0
+        with other.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [FAN_OUT_LOCK_ID])
+        assert WebhookDispatcher(StubTransport()).fan_out() == 1
+    finally:
+        other.close()
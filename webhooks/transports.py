@@ -0,0 +1,41 @@
+import urllib.request
+
+from django.conf import settings
+
+
+class WebhookTransport:
+    """
+    POSTs one signed batch to a subscription; raise on failure so the batch is retried.
+
+    Runs on dispatcher worker threads, so it must not touch the database.
+    """
+
+    def send(self, url: str, body: bytes, headers: dict) -> None:
+        raise NotImplementedError
+
+
+class HttpTransport(WebhookTransport):
+    def __init__(self, timeout: float | None = None):
+        self.timeout = timeout if timeout is not None else getattr(settings, "WEBHOOKS_TIMEOUT_SECONDS", 10)
+
+    def send(self, url: str, body: bytes, headers: dict) -> None:
+        request = urllib.request.Request(url, data=body, headers=headers, method="POST")
+        # urlopen raises HTTPError for 4xx/5xx responses.
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class StubTransport(WebhookTransport):
+    """
+    In-memory transport for tests and local runs; fails the first `fail_times` sends.
+    """
+
+    def __init__(self, fail_times: int = 0):
+        self.fail_times = fail_times
+        self.sent = []
+
+    def send(self, url: str, body: bytes, headers: dict) -> None:
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise ConnectionError("Stub transport failure.")
+        self.sent.append((url, body, headers))
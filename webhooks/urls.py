@@ -0,0 +1,8 @@
+from rest_framework.routers import DefaultRouter
+
+from .views import WebhookSubscriptionViewSet
+
+router = DefaultRouter()
+router.register(r"subscriptions", WebhookSubscriptionViewSet, basename="webhook-subscription")
+
+urlpatterns = router.urls
@@ -0,0 +1,41 @@
+from django.db.models import Count, Q
+from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from webhooks.models import WebhookDelivery, WebhookSubscription, generate_secret
+from webhooks.serializers import WebhookSubscriptionSerializer
+
+
+class WebhookSubscriptionViewSet(viewsets.ModelViewSet):
+    """
+    Integration endpoints that receive outbox messages (staff only).
+    """
+    serializer_class = WebhookSubscriptionSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+    def get_queryset(self):
+        return WebhookSubscription.objects.annotate(
+            pending_deliveries=Count("deliveries", filter=Q(deliveries__status=WebhookDelivery.Status.PENDING))
+        ).order_by("id")
+
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
+
+    @action(detail=True, methods=["post"], url_path="rotate-secret")
+    def rotate_secret(self, request, pk=None):
+        subscription = self.get_object()
+        subscription.secret = generate_secret()
+        subscription.save(update_fields=["secret", "updated_at"])
+        return Response({"secret": subscription.secret})
+
+    @action(detail=True, methods=["post"], url_path="retry-failed")
+    def retry_failed(self, request, pk=None):
+        """
+        Queues the subscription's failed deliveries again, in their original order.
+        """
+        subscription = self.get_object()
+        retried = subscription.deliveries.filter(status=WebhookDelivery.Status.FAILED).update(
+            status=WebhookDelivery.Status.PENDING, attempts=0
+        )
+        return Response({"retried": retried}, status=status.HTTP_200_OK)